@@ -11,6 +11,10 @@ urlpatterns = [
         r"^identities/(?P<identifier>[-\w@%.]+)/traits/(?P<trait_key>[-\w.]+)$",
         SDKTraitsDeprecated.as_view(),
     ),
-    url(r"^identities/(?P<identifier>[-\w@%.]+)/", SDKIdentitiesDeprecated.as_view()),
+    # exclude the bulk identify endpoint which is defined in the v1 urls
+    url(
+        r"^identities/(?!bulk/$)(?P<identifier>[-\w@%.]+)/",
+        SDKIdentitiesDeprecated.as_view(),
+    ),
     url(r"^flags/(?P<identifier>[-\w@%.]+)$", SDKFeatureStates.as_view()),
 ]
@@ -62,12 +62,67 @@ INFLUXDB_TOKEN = env.str("INFLUXDB_TOKEN", default="")
 INFLUXDB_BUCKET = env.str("INFLUXDB_BUCKET", default="")
 INFLUXDB_URL = env.str("INFLUXDB_URL", default="")
 INFLUXDB_ORG = env.str("INFLUXDB_ORG", default="")
+# Data points are written to InfluxDB in batches (of up to this size) by a
+# background thread in each process. If more than INFLUXDB_WRITER_MAX_QUEUE_SIZE
+# data points are waiting to be written, any further data points are dropped.
+INFLUXDB_WRITER_BATCH_SIZE = env.int("INFLUXDB_WRITER_BATCH_SIZE", default=1000)
+INFLUXDB_WRITER_FLUSH_INTERVAL_SECONDS = env.float(
+    "INFLUXDB_WRITER_FLUSH_INTERVAL_SECONDS", default=5.0
+)
+INFLUXDB_WRITER_MAX_QUEUE_SIZE = env.int(
+    "INFLUXDB_WRITER_MAX_QUEUE_SIZE", default=50000
+)
 
 ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=[])
 USE_X_FORWARDED_HOST = env.bool("USE_X_FORWARDED_HOST", default=False)
 
 USE_POSTGRES_FOR_ANALYTICS = env.bool("USE_POSTGRES_FOR_ANALYTICS", default=False)
 
+# Aggregate the API usage in memory (in each process) and periodically write it to
+# the database as 1 minute buckets, rather than creating a task for each request.
+USE_CACHE_FOR_USAGE_DATA = env.bool("USE_CACHE_FOR_USAGE_DATA", default=False)
+API_USAGE_CACHE_SECONDS = env.int("API_USAGE_CACHE_SECONDS", default=60)
+# Maximum number of (environment, resource, minute) counts to hold in memory
+# before writing them to the database early.
+API_USAGE_CACHE_MAX_KEYS = env.int("API_USAGE_CACHE_MAX_KEYS", default=10000)
+
+# The raw analytics tables are partitioned by day. Partitions are created this many
+# days ahead of time and, if a retention period is set, partitions holding data
+# older than that are dropped (by default, the raw data is kept forever).
+RAW_ANALYTICS_PARTITION_PREMAKE_DAYS = env.int(
+    "RAW_ANALYTICS_PARTITION_PREMAKE_DAYS", default=7
+)
+RAW_ANALYTICS_RETENTION_DAYS = env.int("RAW_ANALYTICS_RETENTION_DAYS", default=0)
+
+# Functions decorated with util.util.postpone (e.g. the calls to the identity and
+# event integrations) are run by a pool of this many threads in each process. Calls
+# are dropped when more than POSTPONE_EXECUTOR_MAX_QUEUE_SIZE are waiting to be run.
+POSTPONE_EXECUTOR_MAX_WORKERS = env.int("POSTPONE_EXECUTOR_MAX_WORKERS", default=10)
+POSTPONE_EXECUTOR_MAX_QUEUE_SIZE = env.int(
+    "POSTPONE_EXECUTOR_MAX_QUEUE_SIZE", default=1000
+)
+# How long to wait for the queued calls to complete when the process exits.
+POSTPONE_EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS = env.float(
+    "POSTPONE_EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS", default=5.0
+)
+
+# The user data sent to the identity integrations is delivered in batches (per
+# integration) at least this often. Failed deliveries are retried with exponential
+# backoff, and user data is dropped if more than INTEGRATION_DELIVERY_MAX_QUEUE_SIZE
+# items are waiting to be delivered.
+INTEGRATION_DELIVERY_FLUSH_INTERVAL_SECONDS = env.float(
+    "INTEGRATION_DELIVERY_FLUSH_INTERVAL_SECONDS", default=1.0
+)
+INTEGRATION_DELIVERY_MAX_QUEUE_SIZE = env.int(
+    "INTEGRATION_DELIVERY_MAX_QUEUE_SIZE", default=10000
+)
+INTEGRATION_DELIVERY_MAX_RETRIES = env.int(
+    "INTEGRATION_DELIVERY_MAX_RETRIES", default=3
+)
+INTEGRATION_DELIVERY_RETRY_BACKOFF_SECONDS = env.float(
+    "INTEGRATION_DELIVERY_RETRY_BACKOFF_SECONDS", default=0.5
+)
+
 CSRF_TRUSTED_ORIGINS = env.list("DJANGO_CSRF_TRUSTED_ORIGINS", default=[])
 
 INTERNAL_IPS = ["127.0.0.1"]
@@ -158,6 +213,7 @@ INSTALLED_APPS = [
     "softdelete",
     "metadata",
     "app_analytics",
+    "webhooks",
 ]
 
 SITE_ID = 1
@@ -538,6 +594,31 @@ ENVIRONMENT_CACHE_LOCATION = env.str(
     "ENVIRONMENT_CACHE_LOCATION", default=ENVIRONMENT_CACHE_NAME
 )
 
+# Process local cache of environment objects which sits in front of the environment
+# cache above to avoid the round trip to (and unpickling from) the shared cache on
+# every SDK request. Entries are invalidated across processes using a version key
+# stored in the environment cache so, when enabled, the environment cache backend
+# must be shared between processes (e.g. redis / memcached). The versions are cached
+# locally too, so changes can take up to ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS to
+# reach the other processes (0 checks the version in the shared cache on every
+# request). Cached environments are shared by concurrent requests.
+ENVIRONMENT_LOCAL_CACHE_SECONDS = env.int("ENVIRONMENT_LOCAL_CACHE_SECONDS", default=0)
+ENVIRONMENT_LOCAL_CACHE_MAX_ENTRIES = env.int(
+    "ENVIRONMENT_LOCAL_CACHE_MAX_ENTRIES", default=1000
+)
+ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS = env.int(
+    "ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS", default=5
+)
+
+# Process local cache of the engine models built from the environment documents stored
+# in dynamodb, used to evaluate the segments of edge identities. Cached models are
+# invalidated when the environment document is written, although other processes only
+# see that once their cached version expires (see ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS).
+CACHE_ENVIRONMENT_MODEL_SECONDS = env.int("CACHE_ENVIRONMENT_MODEL_SECONDS", default=0)
+ENVIRONMENT_MODEL_CACHE_MAX_ENTRIES = env.int(
+    "ENVIRONMENT_MODEL_CACHE_MAX_ENTRIES", default=1000
+)
+
 GET_FLAGS_ENDPOINT_CACHE_SECONDS = env.int(
     "GET_FLAGS_ENDPOINT_CACHE_SECONDS", default=0
 )
@@ -577,9 +658,51 @@ ENVIRONMENT_SEGMENTS_CACHE_BACKEND = env(
     "django.core.cache.backends.locmem.LocMemCache",
 )
 
+# Process local cache of the live environment / segment feature states used when
+# evaluating identity flags. Note that the cached values are invalidated when the
+# environment's updated_at value changes, so the timeout just limits the staleness
+# of the environment objects which are themselves cached.
+CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS = env.int(
+    "CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS", default=0
+)
+ENVIRONMENT_FEATURE_STATES_CACHE_MAX_ENTRIES = env.int(
+    "ENVIRONMENT_FEATURE_STATES_CACHE_MAX_ENTRIES", default=1000
+)
+
+# Process local cache of the names of the features in each environment, used to
+# validate the analytics data sent by the SDKs. As above, the cached values are
+# invalidated when the environment's updated_at value changes.
+CACHE_ENVIRONMENT_FEATURE_NAMES_SECONDS = env.int(
+    "CACHE_ENVIRONMENT_FEATURE_NAMES_SECONDS", default=0
+)
+ENVIRONMENT_FEATURE_NAMES_CACHE_MAX_ENTRIES = env.int(
+    "ENVIRONMENT_FEATURE_NAMES_CACHE_MAX_ENTRIES", default=1000
+)
+
+# Maximum number of identities that can be identified in a single request to the
+# bulk identify endpoint.
+MAX_IDENTITIES_PER_BULK_IDENTIFY_REQUEST = env.int(
+    "MAX_IDENTITIES_PER_BULK_IDENTIFY_REQUEST", default=100
+)
+
 CACHE_ENVIRONMENT_DOCUMENT_SECONDS = env.int("CACHE_ENVIRONMENT_DOCUMENT_SECONDS", 0)
 ENVIRONMENT_DOCUMENT_CACHE_LOCATION = "environment-documents"
 
+# Cache the mapped segment rules used to build the environment documents written to
+# dynamodb, so that only the rules of the segment being changed need rebuilding.
+# Note that changes which don't create an audit log record (e.g. changing the type
+# of a segment rule) will only be picked up once the cache entry expires.
+CACHE_SEGMENT_RULES_SECONDS = env.int("CACHE_SEGMENT_RULES_SECONDS", 0)
+SEGMENT_RULES_CACHE_LOCATION = "segment-rules"
+
+# Cache the engine models of the environment documents written to dynamodb, so that
+# a change to a feature state (or its multivariate values) only needs the feature
+# states of that environment re-mapping, rather than rebuilding the whole document.
+# As above, changes which don't create an audit log record or rebuild the document
+# (e.g. to the organisation) will only be picked up once the cache entry expires.
+CACHE_BUILT_ENVIRONMENTS_SECONDS = env.int("CACHE_BUILT_ENVIRONMENTS_SECONDS", 0)
+BUILT_ENVIRONMENTS_CACHE_LOCATION = "built-environments"
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
@@ -608,6 +731,16 @@ CACHES = {
         "LOCATION": ENVIRONMENT_DOCUMENT_CACHE_LOCATION,
         "timeout": CACHE_ENVIRONMENT_DOCUMENT_SECONDS,
     },
+    SEGMENT_RULES_CACHE_LOCATION: {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": SEGMENT_RULES_CACHE_LOCATION,
+        "TIMEOUT": CACHE_SEGMENT_RULES_SECONDS,
+    },
+    BUILT_ENVIRONMENTS_CACHE_LOCATION: {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": BUILT_ENVIRONMENTS_CACHE_LOCATION,
+        "TIMEOUT": CACHE_BUILT_ENVIRONMENTS_SECONDS,
+    },
     GET_FLAGS_ENDPOINT_CACHE_NAME: {
         "BACKEND": GET_FLAGS_ENDPOINT_CACHE_BACKEND,
         "LOCATION": GET_FLAGS_ENDPOINT_CACHE_LOCATION,
@@ -734,6 +867,11 @@ ENVIRONMENTS_API_KEY_TABLE_NAME_DYNAMO = env.str(
 # DynamoDB table name for storing project metadata(currently only used for identity migration)
 PROJECT_METADATA_TABLE_NAME_DYNAMO = env.str("PROJECT_METADATA_TABLE_NAME_DYNAMO", None)
 
+# Identities are migrated to dynamodb in chunks of the given size (in order of id),
+# which are written concurrently by the given number of workers.
+IDENTITY_MIGRATION_CHUNK_SIZE = env.int("IDENTITY_MIGRATION_CHUNK_SIZE", 2000)
+IDENTITY_MIGRATION_MAX_WORKERS = env.int("IDENTITY_MIGRATION_MAX_WORKERS", 4)
+
 # Front end environment variables
 API_URL = env("API_URL", default="/api/v1/")
 ASSET_URL = env("ASSET_URL", default="/")
@@ -811,6 +949,24 @@ DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 EDGE_API_URL = env.str("EDGE_API_URL", None)
 # Used for signing forwarded request to edge
 EDGE_REQUEST_SIGNING_KEY = env.str("EDGE_REQUEST_SIGNING_KEY", None)
+# If set, the requests forwarded to edge are coalesced in memory (by a background
+# thread in each process) and forwarded by a single task, of up to
+# EDGE_REQUEST_FORWARDING_BATCH_SIZE requests, at least this often. Otherwise, a task
+# is created for every forwarded request.
+EDGE_REQUEST_FORWARDING_FLUSH_INTERVAL_SECONDS = env.float(
+    "EDGE_REQUEST_FORWARDING_FLUSH_INTERVAL_SECONDS", default=0
+)
+EDGE_REQUEST_FORWARDING_BATCH_SIZE = env.int(
+    "EDGE_REQUEST_FORWARDING_BATCH_SIZE", default=100
+)
+# Process local cache of the projects which have completed their migration to edge,
+# used to avoid reading the project metadata from dynamodb for every forwarded request.
+CACHE_PROJECT_MIGRATION_STATUS_SECONDS = env.int(
+    "CACHE_PROJECT_MIGRATION_STATUS_SECONDS", default=0
+)
+PROJECT_MIGRATION_STATUS_CACHE_MAX_ENTRIES = env.int(
+    "PROJECT_MIGRATION_STATUS_CACHE_MAX_ENTRIES", default=1000
+)
 
 # Aws Event bus used for sending identity migration events
 IDENTITY_MIGRATION_EVENT_BUS_NAME = env.str("IDENTITY_MIGRATION_EVENT_BUS_NAME", None)
@@ -827,6 +983,33 @@ EDGE_ENABLED = (
 
 DISABLE_WEBHOOKS = env.bool("DISABLE_WEBHOOKS", False)
 
+# Webhooks are delivered by the task processor from the webhook delivery log. Failed
+# deliveries are retried with exponential backoff (only when using the task processor,
+# since the retries are scheduled as future tasks), up to the given number of attempts.
+WEBHOOK_REQUEST_TIMEOUT_SECONDS = env.float("WEBHOOK_REQUEST_TIMEOUT_SECONDS", 10.0)
+WEBHOOK_DELIVERY_MAX_ATTEMPTS = env.int("WEBHOOK_DELIVERY_MAX_ATTEMPTS", 5)
+WEBHOOK_DELIVERY_RETRY_BACKOFF_SECONDS = env.float(
+    "WEBHOOK_DELIVERY_RETRY_BACKOFF_SECONDS", 30.0
+)
+# Once this many consecutive deliveries to a url have failed, no further requests are
+# made to it until the reset period has passed since the last failure. A single
+# delivery is then let through to probe the url. Deliveries skipped in the meantime
+# are rescheduled (with jitter) and count towards WEBHOOK_DELIVERY_MAX_ATTEMPTS. Set
+# the threshold to 0 to disable the circuit breaker.
+WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = env.int("WEBHOOK_CIRCUIT_BREAKER_THRESHOLD", 10)
+WEBHOOK_CIRCUIT_BREAKER_RESET_SECONDS = env.int(
+    "WEBHOOK_CIRCUIT_BREAKER_RESET_SECONDS", 300
+)
+# Completed webhook deliveries are deleted from the delivery log after this many days,
+# every 12 hours (by the processes calling the webhooks when not using the task
+# processor). Set to 0 to keep them forever.
+WEBHOOK_DELIVERY_RETENTION_DAYS = env.int("WEBHOOK_DELIVERY_RETENTION_DAYS", 30)
+WEBHOOK_DELIVERY_DELETE_BATCH_SIZE = env.int("WEBHOOK_DELIVERY_DELETE_BATCH_SIZE", 2000)
+# The maximum number of concurrent requests made to each webhook host, per process.
+WEBHOOK_MAX_CONCURRENT_REQUESTS_PER_HOST = env.int(
+    "WEBHOOK_MAX_CONCURRENT_REQUESTS_PER_HOST", 10
+)
+
 SERVE_FE_ASSETS = os.path.exists(BASE_DIR + "/app/templates/webpack/index.html")
 
 # Used to configure the number of application proxies that the API runs behind
@@ -842,6 +1025,12 @@ MAX_SELF_MIGRATABLE_IDENTITIES = env.int("MAX_SELF_MIGRATABLE_IDENTITIES", 10000
 TASK_RUN_METHOD = env.enum(
     "TASK_RUN_METHOD", type=TaskRunMethod, default=TaskRunMethod.SEPARATE_THREAD.value
 )
+# When using the task processor, changes made to environments within this many
+# seconds of each other result in a single rebuild of the environment document(s)
+# and a single update message to the SSE service, once the window has passed.
+ENVIRONMENT_UPDATE_COALESCE_SECONDS = env.int(
+    "ENVIRONMENT_UPDATE_COALESCE_SECONDS", default=0
+)
 ENABLE_TASK_PROCESSOR_HEALTH_CHECK = env.bool(
     "ENABLE_TASK_PROCESSOR_HEALTH_CHECK", default=False
 )
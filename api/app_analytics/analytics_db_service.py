@@ -1,4 +1,4 @@
-from datetime import date, timedelta
+from datetime import datetime, time, timedelta
 from typing import List
 
 from app_analytics.dataclasses import FeatureEvaluationData, UsageData
@@ -49,10 +49,7 @@ def get_usage_data_from_local_db(
         qs = qs.filter(environment_id=environment_id)
 
     qs = (
-        qs.filter(
-            created_at__date__lte=timezone.now(),
-            created_at__date__gt=timezone.now() - timedelta(days=30),
-        )
+        qs.filter(**_get_created_at_filters(period))
         .order_by("created_at__date")
         .values("created_at__date", "resource")
         .annotate(count=Sum("total_count"))
@@ -78,8 +75,7 @@ def get_total_events_count(organisation) -> int:
     if settings.USE_POSTGRES_FOR_ANALYTICS:
         count = APIUsageBucket.objects.filter(
             environment_id__in=_get_environment_ids_for_org(organisation),
-            created_at__date__lte=date.today(),
-            created_at__date__gt=date.today() - timedelta(days=30),
+            **_get_created_at_filters(30),
             bucket_size=ANALYTICS_READ_BUCKET_SIZE,
         ).aggregate(total_count=Sum("total_count"))["total_count"]
     else:
@@ -106,8 +102,7 @@ def get_feature_evaluation_data_from_local_db(
         FeatureEvaluationBucket.objects.filter(
             environment_id=environment_id,
             bucket_size=ANALYTICS_READ_BUCKET_SIZE,
-            created_at__date__lte=timezone.now(),
-            created_at__date__gt=timezone.now() - timedelta(days=period),
+            **_get_created_at_filters(period),
         )
         .order_by("created_at__date")
         .values("created_at__date", "feature_name", "environment_id")
@@ -131,3 +126,15 @@ def _get_environment_ids_for_org(organisation) -> List[int]:
     return [
         e.id for e in Environment.objects.filter(project__organisation=organisation)
     ]
+
+
+def _get_created_at_filters(period: int) -> dict:
+    # Filter on a range of `created_at` rather than on `created_at__date` so that
+    # the database can use the indexes on (and prune any partitions of) the table.
+    start_of_tomorrow = datetime.combine(
+        timezone.now().date() + timedelta(days=1), time.min, tzinfo=timezone.utc
+    )
+    return {
+        "created_at__gte": start_of_tomorrow - timedelta(days=period),
+        "created_at__lt": start_of_tomorrow,
+    }
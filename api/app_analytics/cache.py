@@ -0,0 +1,83 @@
+"""
+In memory aggregation of the API usage tracked by APIUsageMiddleware.
+
+Rather than creating a task (and subsequently an APIUsageRaw row) for every tracked
+request, the number of requests is counted in memory for each environment, resource
+and minute, and the counts are periodically written (by a background thread) as
+1 minute API usage buckets.
+"""
+import logging
+import typing
+from collections import defaultdict
+from datetime import datetime
+
+from app_analytics.models import APIUsageBucket
+from core.buffering import BufferedFlusher
+from django.conf import settings
+from django.utils import timezone
+
+from environments.models import Environment
+
+logger = logging.getLogger(__name__)
+
+# size (in minutes) of the buckets written by the cache
+API_USAGE_CACHE_BUCKET_SIZE = 1
+
+CacheKey = typing.Tuple[str, int, datetime]
+
+
+class APIUsageCache(BufferedFlusher):
+    close_db_connections = True
+
+    def __init__(self):
+        super().__init__(settings.API_USAGE_CACHE_SECONDS)
+        self._counts: typing.Dict[CacheKey, int] = defaultdict(int)
+
+    def track_request(self, resource: int, environment_key: str) -> None:
+        if not environment_key:
+            return
+
+        key = (
+            environment_key,
+            resource,
+            timezone.now().replace(second=0, microsecond=0),
+        )
+        with self._lock:
+            self._counts[key] += 1
+            num_keys = len(self._counts)
+            self._start_flusher()
+
+        if num_keys >= settings.API_USAGE_CACHE_MAX_KEYS:
+            # don't wait until the flush interval has passed to bound the size
+            # of the cache
+            self._flush_requested.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        if not counts:
+            return
+
+        api_usage_buckets = []
+        for (environment_key, resource, created_at), count in counts.items():
+            environment = Environment.get_from_cache(environment_key)
+            if environment is None:
+                continue
+            api_usage_buckets.append(
+                APIUsageBucket(
+                    environment_id=environment.id,
+                    resource=resource,
+                    created_at=created_at,
+                    bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+                    total_count=count,
+                )
+            )
+
+        # Note that bulk_create doesn't trigger the overlapping buckets check, since
+        # each process writes its own buckets (which are summed when populating the
+        # larger buckets).
+        APIUsageBucket.objects.bulk_create(api_usage_buckets)
+
+
+api_usage_cache = APIUsageCache()
+api_usage_cache.register_flush_on_exit()
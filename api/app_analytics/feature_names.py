@@ -0,0 +1,60 @@
+import datetime
+import typing
+from dataclasses import dataclass
+
+from core.cache import LocalCache
+from django.conf import settings
+
+from features.models import FeatureState
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from environments.models import Environment
+
+
+environment_feature_names_cache = LocalCache(
+    max_entries=settings.ENVIRONMENT_FEATURE_NAMES_CACHE_MAX_ENTRIES,
+    timeout=settings.CACHE_ENVIRONMENT_FEATURE_NAMES_SECONDS,
+)
+
+
+@dataclass(frozen=True)
+class EnvironmentFeatureNames:
+    environment_updated_at: datetime.datetime
+    feature_names: typing.FrozenSet[str]
+
+
+def get_environment_feature_names(environment: "Environment") -> typing.FrozenSet[str]:
+    """
+    Get the names of the features in the environment, used to validate the analytics
+    data sent by the SDKs.
+
+    If enabled, the names are cached in the process local cache until the environment
+    is next updated (determined using Environment.updated_at).
+    """
+    if not settings.CACHE_ENVIRONMENT_FEATURE_NAMES_SECONDS:
+        return _get_feature_names(environment)
+
+    cached = environment_feature_names_cache.get(environment.id)
+    if cached and cached.environment_updated_at == environment.updated_at:
+        return cached.feature_names
+
+    feature_names = _get_feature_names(environment)
+    environment_feature_names_cache.set(
+        environment.id,
+        EnvironmentFeatureNames(
+            environment_updated_at=environment.updated_at,
+            feature_names=feature_names,
+        ),
+        timeout=settings.CACHE_ENVIRONMENT_FEATURE_NAMES_SECONDS,
+    )
+    return feature_names
+
+
+def _get_feature_names(environment: "Environment") -> typing.FrozenSet[str]:
+    return frozenset(
+        FeatureState.objects.filter(
+            environment=environment,
+            feature_segment=None,
+            identity=None,
+        ).values_list("feature__name", flat=True)
+    )
@@ -42,6 +42,19 @@ DEFAULT_DROP_COLUMNS = (
 )
 
 
+def get_data_point(
+    name: str, field_name: str, field_value: typing.Any, tags: dict = None
+) -> Point:
+    point = Point(name)
+    point.field(field_name, field_value)
+
+    if tags is not None:
+        for tag_key, tag_value in tags.items():
+            point = point.tag(tag_key, tag_value)
+
+    return point
+
+
 class InfluxDBWrapper:
     def __init__(self, name):
         self.name = name
@@ -49,14 +62,7 @@ class InfluxDBWrapper:
         self.write_api = influxdb_client.write_api(write_options=SYNCHRONOUS)
 
     def add_data_point(self, field_name, field_value, tags=None):
-        point = Point(self.name)
-        point.field(field_name, field_value)
-
-        if tags is not None:
-            for tag_key, tag_value in tags.items():
-                point = point.tag(tag_key, tag_value)
-
-        self.records.append(point)
+        self.records.append(get_data_point(self.name, field_name, field_value, tags))
 
     def write(self):
         try:
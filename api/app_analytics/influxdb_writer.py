@@ -0,0 +1,157 @@
+"""
+Process wide, batching writer for the data points written to InfluxDB.
+
+Rather than writing each data point synchronously (from a new thread per request),
+data points are added to a bounded, in memory queue as line protocol and written in
+batches, over the client's pooled connections, by a single background thread. A
+batch is written as soon as it is full, or when the flush interval has passed.
+
+Points without a timestamp are given one (in nanoseconds, unique within the process)
+when they are queued. Otherwise InfluxDB would give every point in a batch the same
+(server) timestamp, and points in the same series would overwrite each other.
+
+If InfluxDB can't keep up, the queue fills up and any further data points are
+dropped (and counted in the writer's metrics) rather than blocking the request.
+"""
+import dataclasses
+import logging
+import queue
+import threading
+import time
+import typing
+
+from core.buffering import BufferedFlusher
+from django.conf import settings
+from influxdb_client import InfluxDBClient, Point
+from influxdb_client.client.write_api import SYNCHRONOUS, WriteApi
+from influxdb_client.domain.write_precision import WritePrecision
+from influxdb_client.rest import ApiException
+from urllib3.exceptions import HTTPError
+
+from .influxdb_wrapper import influxdb_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class InfluxDBWriterMetrics:
+    queued: int = 0
+    written: int = 0
+    dropped: int = 0
+    failed: int = 0
+
+
+class InfluxDBWriter(BufferedFlusher):
+    def __init__(
+        self,
+        client: InfluxDBClient,
+        bucket: str,
+        batch_size: int,
+        flush_interval_seconds: float,
+        max_queue_size: int,
+    ):
+        super().__init__(flush_interval_seconds)
+        self.client = client
+        self.bucket = bucket
+        self.batch_size = batch_size
+
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_queue_size)
+        self._metrics = InfluxDBWriterMetrics()
+        self._metrics_lock = threading.Lock()
+        self._reported_dropped = 0
+        self._last_timestamp_ns = 0
+        self._timestamp_lock = threading.Lock()
+
+        self._write_api: typing.Optional[WriteApi] = None
+
+    @property
+    def metrics(self) -> InfluxDBWriterMetrics:
+        with self._metrics_lock:
+            return dataclasses.replace(self._metrics)
+
+    def write(self, records: typing.Iterable[Point]) -> None:
+        """
+        Queue the given data points to be written to InfluxDB. Never blocks.
+        """
+        self._start_flusher()
+
+        queued = dropped = 0
+        for record in records:
+            if record._time is None:
+                record.time(self._get_timestamp_ns(), WritePrecision.NS)
+            try:
+                self._queue.put_nowait(record.to_line_protocol())
+                queued += 1
+            except queue.Full:
+                dropped += 1
+
+        self._increment_metrics(queued=queued, dropped=dropped)
+
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+
+    def flush(self) -> None:
+        """
+        Write all of the queued data points to InfluxDB, in batches.
+        """
+        while True:
+            batch = self._get_batch()
+            if not batch:
+                break
+            self._write_batch(batch)
+
+        self._report_dropped()
+
+    def _get_timestamp_ns(self) -> int:
+        # strictly increasing so that identical points written at (almost) the same
+        # time are still stored as separate points
+        with self._timestamp_lock:
+            self._last_timestamp_ns = max(time.time_ns(), self._last_timestamp_ns + 1)
+            return self._last_timestamp_ns
+
+    def _get_batch(self) -> typing.List[str]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: typing.List[str]) -> None:
+        if self._write_api is None:
+            self._write_api = self.client.write_api(write_options=SYNCHRONOUS)
+
+        try:
+            self._write_api.write(bucket=self.bucket, record=batch)
+        except (HTTPError, ApiException):
+            logger.warning("Failed to write %d records to Influx.", len(batch))
+            self._increment_metrics(failed=len(batch))
+        else:
+            self._increment_metrics(written=len(batch))
+
+    def _report_dropped(self) -> None:
+        dropped = self.metrics.dropped
+        if dropped > self._reported_dropped:
+            logger.warning(
+                "Dropped %d records since the InfluxDB write queue was full.",
+                dropped - self._reported_dropped,
+            )
+            self._reported_dropped = dropped
+
+    def _increment_metrics(self, **increments: int) -> None:
+        with self._metrics_lock:
+            for metric, increment in increments.items():
+                setattr(
+                    self._metrics, metric, getattr(self._metrics, metric) + increment
+                )
+
+
+influxdb_writer = InfluxDBWriter(
+    client=influxdb_client,
+    bucket=settings.INFLUXDB_BUCKET,
+    batch_size=settings.INFLUXDB_WRITER_BATCH_SIZE,
+    flush_interval_seconds=settings.INFLUXDB_WRITER_FLUSH_INTERVAL_SECONDS,
+    max_queue_size=settings.INFLUXDB_WRITER_MAX_QUEUE_SIZE,
+)
+influxdb_writer.register_flush_on_exit()
@@ -0,0 +1,96 @@
+import logging
+from argparse import ArgumentParser, ArgumentTypeError
+from datetime import datetime
+from typing import Any
+
+from app_analytics.analytics_db_service import ANALYTICS_READ_BUCKET_SIZE
+from app_analytics.cache import API_USAGE_CACHE_BUCKET_SIZE
+from app_analytics.tasks import (
+    get_time_buckets_between,
+    populate_api_usage_time_bucket,
+    populate_feature_evaluation_time_bucket,
+)
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_datetime(value: str) -> datetime:
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ArgumentTypeError(f"Invalid datetime '{value}'.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        "(Re)populate the API usage and feature evaluation buckets for all complete "
+        "time buckets between the given times. Existing buckets are replaced, "
+        "unless there's no source data for them (e.g. since it has expired)."
+    )
+
+    def add_arguments(self, parser: ArgumentParser) -> None:
+        parser.add_argument(
+            "--from",
+            type=_parse_datetime,
+            dest="start",
+            required=True,
+            help="ISO 8601 datetime to start from (UTC if no offset is given).",
+        )
+        parser.add_argument(
+            "--to",
+            type=_parse_datetime,
+            dest="end",
+            default=None,
+            help="ISO 8601 datetime to backfill until. Defaults to now.",
+        )
+        parser.add_argument(
+            "--bucket-size",
+            type=int,
+            dest="bucket_size",
+            default=ANALYTICS_READ_BUCKET_SIZE,
+            help="Size (in minutes) of the buckets to populate.",
+        )
+        parser.add_argument(
+            "--source-bucket-size",
+            type=int,
+            dest="source_bucket_size",
+            default=None,
+            help="Size (in minutes) of the buckets to populate from. Defaults to "
+            "populating from the raw data.",
+        )
+
+    def handle(
+        self,
+        *args: Any,
+        start: datetime,
+        end: datetime,
+        bucket_size: int,
+        source_bucket_size: int,
+        **options: Any,
+    ) -> None:
+        if bucket_size == API_USAGE_CACHE_BUCKET_SIZE:
+            raise CommandError(
+                f"Cannot backfill {bucket_size} minute buckets, the API usage buckets "
+                "of that size are written by the API and would be lost."
+            )
+
+        time_buckets = get_time_buckets_between(
+            bucket_size, start=start, end=end or timezone.now()
+        )
+        for bucket_start_time, bucket_end_time in time_buckets:
+            logger.info(
+                "Populating %d minute buckets from %s.", bucket_size, bucket_start_time
+            )
+            populate_api_usage_time_bucket(
+                bucket_size, bucket_start_time, bucket_end_time, source_bucket_size
+            )
+            populate_feature_evaluation_time_bucket(
+                bucket_size, bucket_start_time, bucket_end_time, source_bucket_size
+            )
+
+        self.stdout.write(f"Populated {len(time_buckets)} time buckets.")
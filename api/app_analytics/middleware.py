@@ -1,10 +1,13 @@
+from django.conf import settings
+
+from .cache import api_usage_cache
 from .models import Resource
 from .tasks import track_request
 from .track import (
     TRACKED_RESOURCE_ACTIONS,
     get_resource_from_uri,
     track_request_googleanalytics_async,
-    track_request_influxdb_async,
+    track_request_influxdb,
 )
 
 
@@ -26,8 +29,8 @@ class InfluxDBMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
-        # for each API request, trigger a call to InfluxDB to track the request
-        track_request_influxdb_async(request)
+        # for each API request, queue a data point to be written to InfluxDB
+        track_request_influxdb(request)
 
         response = self.get_response(request)
 
@@ -41,13 +44,19 @@ class APIUsageMiddleware:
     def __call__(self, request):
         resource = get_resource_from_uri(request.path)
         if resource in TRACKED_RESOURCE_ACTIONS:
-            track_request.delay(
-                kwargs={
-                    "resource": Resource.get_from_resource_name(resource),
-                    "host": request.get_host(),
-                    "environment_key": request.headers.get("X-Environment-Key"),
-                }
-            )
+            if settings.USE_CACHE_FOR_USAGE_DATA:
+                api_usage_cache.track_request(
+                    resource=Resource.get_from_resource_name(resource),
+                    environment_key=request.headers.get("X-Environment-Key"),
+                )
+            else:
+                track_request.delay(
+                    kwargs={
+                        "resource": Resource.get_from_resource_name(resource),
+                        "host": request.get_host(),
+                        "environment_key": request.headers.get("X-Environment-Key"),
+                    }
+                )
 
         response = self.get_response(request)
 
@@ -0,0 +1,49 @@
+import os
+
+from django.db import migrations
+
+from core.migration_helpers import PostgresOnlyRunSQL
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "sql")
+
+RAW_TABLES = ("app_analytics_apiusageraw", "app_analytics_featureevaluationraw")
+
+
+def _read_sql_file(file_name: str) -> str:
+    with open(os.path.join(SQL_DIR, file_name)) as f:
+        return f.read()
+
+
+class Migration(migrations.Migration):
+    # the unique indexes are built concurrently, which can't be done in a transaction
+    atomic = False
+
+    dependencies = [
+        ("app_analytics", "0001_initial"),
+    ]
+
+    operations = [
+        PostgresOnlyRunSQL.from_sql_file(
+            os.path.join(SQL_DIR, "0002_partition_raw_tables_prepare.sql"),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        *[
+            PostgresOnlyRunSQL(
+                f"CREATE UNIQUE INDEX CONCURRENTLY {raw_table}_id_created_at_uniq "
+                f"ON {raw_table} (id, created_at)",
+                reverse_sql=migrations.RunSQL.noop,
+            )
+            for raw_table in RAW_TABLES
+        ],
+        *[
+            PostgresOnlyRunSQL(
+                f"ALTER TABLE {raw_table} VALIDATE CONSTRAINT {raw_table}_created_at_check",
+                reverse_sql=migrations.RunSQL.noop,
+            )
+            for raw_table in RAW_TABLES
+        ],
+        PostgresOnlyRunSQL.from_sql_file(
+            os.path.join(SQL_DIR, "0002_partition_raw_tables.sql"),
+            reverse_sql=_read_sql_file("0002_unpartition_raw_tables.sql"),
+        ),
+    ]
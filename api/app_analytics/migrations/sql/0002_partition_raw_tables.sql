@@ -0,0 +1,91 @@
+-- Convert the raw analytics tables into tables partitioned by day on created_at.
+--
+-- The existing table is attached as the partition holding all of the data up to
+-- the end of the next (UTC) day. It is named after that day, like the daily
+-- partitions created by app_analytics.partitions, so that it is dropped once all
+-- of the data in it has expired. The partitions for the following week are created
+-- up front (matching the default RAW_ANALYTICS_PARTITION_PREMAKE_DAYS), and a
+-- default partition catches any rows for days that a partition has not been
+-- created for (yet).
+--
+-- The check constraint and the unique index on (id, created_at) are created and
+-- validated beforehand (see 0002_partition_raw_tables_prepare.sql and the migration)
+-- so that the tables are only locked briefly here, rather than for a table scan
+-- or an index build.
+DO $$
+DECLARE
+    raw_table text;
+    legacy_partition text;
+    legacy_primary_key text;
+    first_partition_day date := (now() AT TIME ZONE 'UTC')::date + 2;
+    partition_day date;
+BEGIN
+    FOREACH raw_table IN ARRAY ARRAY['app_analytics_apiusageraw', 'app_analytics_featureevaluationraw']
+    LOOP
+        legacy_partition := raw_table || '_p' || to_char(first_partition_day - 1, 'YYYYMMDD');
+
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', raw_table, legacy_partition);
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)',
+            raw_table,
+            legacy_partition
+        );
+        -- the primary key of a partitioned table must include the partition key
+        EXECUTE format('ALTER TABLE %I ADD PRIMARY KEY (id, created_at)', raw_table);
+        SELECT conname INTO legacy_primary_key
+        FROM pg_constraint
+        WHERE conrelid = legacy_partition::regclass AND contype = 'p';
+        EXECUTE format(
+            'ALTER TABLE %I DROP CONSTRAINT %I, ADD CONSTRAINT %I PRIMARY KEY USING INDEX %I',
+            legacy_partition,
+            legacy_primary_key,
+            legacy_partition || '_pkey',
+            raw_table || '_id_created_at_uniq'
+        );
+        -- make sure that the sequence is not dropped along with the legacy partition
+        EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', raw_table || '_id_seq', raw_table);
+        EXECUTE format(
+            'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (MINVALUE) TO (%L)',
+            raw_table,
+            legacy_partition,
+            first_partition_day::timestamp AT TIME ZONE 'UTC'
+        );
+        EXECUTE format(
+            'ALTER TABLE %I DROP CONSTRAINT %I', legacy_partition, raw_table || '_created_at_check'
+        );
+
+        FOR i IN 0..7
+        LOOP
+            partition_day := first_partition_day + i;
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                raw_table || '_p' || to_char(partition_day, 'YYYYMMDD'),
+                raw_table,
+                partition_day::timestamp AT TIME ZONE 'UTC',
+                (partition_day + 1)::timestamp AT TIME ZONE 'UTC'
+            );
+        END LOOP;
+
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', raw_table || '_default', raw_table);
+    END LOOP;
+END $$;
+
+-- The index for APIUsageRaw.Meta.index_together is recreated on the partitioned
+-- table under the name django expects, so the existing index on the legacy
+-- partition is renamed first. It is then attached rather than rebuilt.
+DO $$
+DECLARE
+    legacy_partition text;
+BEGIN
+    SELECT indrelid::regclass::text INTO legacy_partition
+    FROM pg_index
+    WHERE indexrelid = 'app_analytics_apiusagera_environment_id_created_a_ef3863d6_idx'::regclass;
+
+    EXECUTE format(
+        'ALTER INDEX app_analytics_apiusagera_environment_id_created_a_ef3863d6_idx RENAME TO %I',
+        legacy_partition || '_env_created_at_idx'
+    );
+END $$;
+
+CREATE INDEX app_analytics_apiusagera_environment_id_created_a_ef3863d6_idx
+    ON app_analytics_apiusageraw (environment_id, created_at);
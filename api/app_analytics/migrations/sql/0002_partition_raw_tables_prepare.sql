@@ -0,0 +1,24 @@
+-- Prepare the raw analytics tables to be attached as the partitions holding all of
+-- the existing data (see 0002_partition_raw_tables.sql) without locking them for
+-- the duration of a full table scan.
+--
+-- The check constraint matches the range the tables are attached with, so that
+-- Postgres doesn't need to scan the tables to validate the partition constraint.
+-- It's added as NOT VALID, which doesn't scan the table, and validated separately,
+-- which doesn't block reads or writes. It leaves a day of headroom so that rows
+-- can still be written if the migration runs past midnight (UTC).
+DO $$
+DECLARE
+    raw_table text;
+    first_partition_day date := (now() AT TIME ZONE 'UTC')::date + 2;
+BEGIN
+    FOREACH raw_table IN ARRAY ARRAY['app_analytics_apiusageraw', 'app_analytics_featureevaluationraw']
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ADD CONSTRAINT %I CHECK (created_at < %L) NOT VALID',
+            raw_table,
+            raw_table || '_created_at_check',
+            first_partition_day::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END $$;
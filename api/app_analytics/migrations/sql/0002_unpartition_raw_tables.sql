@@ -0,0 +1,22 @@
+-- Convert the (partitioned) raw analytics tables back into regular tables.
+DO $$
+DECLARE
+    raw_table text;
+BEGIN
+    FOREACH raw_table IN ARRAY ARRAY['app_analytics_apiusageraw', 'app_analytics_featureevaluationraw']
+    LOOP
+        EXECUTE format('ALTER TABLE %I RENAME TO %I', raw_table, raw_table || '_partitioned');
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS, PRIMARY KEY (id))',
+            raw_table,
+            raw_table || '_partitioned'
+        );
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I', raw_table, raw_table || '_partitioned');
+        EXECUTE format('ALTER SEQUENCE %I OWNED BY %I.id', raw_table || '_id_seq', raw_table);
+        EXECUTE format('DROP TABLE %I', raw_table || '_partitioned');
+    END LOOP;
+END $$;
+
+-- recreate the index for APIUsageRaw.Meta.index_together under its original name
+CREATE INDEX app_analytics_apiusagera_environment_id_created_a_ef3863d6_idx
+    ON app_analytics_apiusageraw (environment_id, created_at);
@@ -0,0 +1,183 @@
+"""
+Management of the daily partitions of the raw analytics tables.
+
+The raw analytics tables are partitioned by day on `created_at` (see migration
+0002_partition_raw_tables) so that expired data can be removed by dropping whole
+partitions instead of running large deletes against the tables, and so that
+queries filtering on `created_at` only need to scan the relevant partitions.
+"""
+import logging
+import re
+import typing
+from datetime import date, datetime, time, timedelta
+
+from django.db import DatabaseError, connections, router, transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from .models import APIUsageRaw, FeatureEvaluationRaw
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_MODELS = (APIUsageRaw, FeatureEvaluationRaw)
+
+PARTITION_DATE_FORMAT = "%Y%m%d"
+
+
+def get_partition_name(model_class: typing.Type[Model], day: date) -> str:
+    return f"{model_class._meta.db_table}_p{day.strftime(PARTITION_DATE_FORMAT)}"
+
+
+def get_default_partition_name(model_class: typing.Type[Model]) -> str:
+    return f"{model_class._meta.db_table}_default"
+
+
+def get_partitions(model_class: typing.Type[Model]) -> typing.Dict[str, date]:
+    """
+    Get the daily partitions of the given model's table, by partition name.
+    """
+    table_name = model_class._meta.db_table
+    partition_name_pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{8}})$")
+
+    with _get_connection(model_class).cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = %s
+            """,
+            [table_name],
+        )
+        partition_names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for partition_name in partition_names:
+        match = partition_name_pattern.match(partition_name)
+        if match:
+            partitions[partition_name] = datetime.strptime(
+                match.group(1), PARTITION_DATE_FORMAT
+            ).date()
+    return partitions
+
+
+def create_partitions(
+    model_class: typing.Type[Model], start: date, days: int
+) -> typing.List[str]:
+    """
+    Create the daily partitions for the given number of days from `start` (inclusive)
+    which don't exist yet, returning the names of the partitions created. Any rows
+    for those days in the default partition are moved to the new partitions.
+    """
+    existing_partitions = get_partitions(model_class)
+    connection = _get_connection(model_class)
+    table_name = model_class._meta.db_table
+    default_partition_name = get_default_partition_name(model_class)
+
+    created_partitions = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        partition_name = get_partition_name(model_class, day)
+        if partition_name in existing_partitions:
+            continue
+
+        try:
+            _create_partition(
+                connection, table_name, default_partition_name, partition_name, day
+            )
+        except DatabaseError:
+            logger.error("Unable to create partition %s", partition_name, exc_info=True)
+            continue
+
+        created_partitions.append(partition_name)
+
+    return created_partitions
+
+
+def drop_partitions(model_class: typing.Type[Model], before: date) -> typing.List[str]:
+    """
+    Drop the daily partitions for the days before `before` (exclusive), returning
+    the names of the partitions dropped. Any rows for those days that ended up in
+    the default partition are deleted too.
+    """
+    connection = _get_connection(model_class)
+
+    dropped_partitions = []
+    for partition_name, day in sorted(get_partitions(model_class).items()):
+        if day >= before:
+            continue
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {connection.ops.quote_name(partition_name)}")
+        dropped_partitions.append(partition_name)
+
+    model_class.objects.filter(created_at__lt=_start_of_day(before)).delete()
+
+    return dropped_partitions
+
+
+def manage_partitions(premake_days: int, retention_days: int = 0) -> None:
+    """
+    Create the partitions of the raw analytics tables for the next `premake_days`
+    days and, if `retention_days` is set, drop the partitions holding data older
+    than that.
+    """
+    today = timezone.now().date()
+
+    for model_class in PARTITIONED_MODELS:
+        if _get_connection(model_class).vendor != "postgresql":
+            continue
+
+        create_partitions(model_class, start=today, days=premake_days + 1)
+        if retention_days:
+            drop_partitions(model_class, before=today - timedelta(days=retention_days))
+
+
+def _create_partition(
+    connection,
+    table_name: str,
+    default_partition_name: str,
+    partition_name: str,
+    day: date,
+) -> None:
+    quote_name = connection.ops.quote_name
+    bounds = [_start_of_day(day), _start_of_day(day + timedelta(days=1))]
+
+    # a partition can't be created while the default partition holds rows for its
+    # range, so the partition is created as a regular table, any such rows are
+    # moved into it, and it's then attached to the partitioned table
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {quote_name(partition_name)} "
+                f"(LIKE {quote_name(table_name)} INCLUDING DEFAULTS)"
+            )
+            cursor.execute(
+                "WITH moved_rows AS ("
+                f"DELETE FROM {quote_name(default_partition_name)} "
+                "WHERE created_at >= %s AND created_at < %s RETURNING *"
+                f") INSERT INTO {quote_name(partition_name)} SELECT * FROM moved_rows",
+                bounds,
+            )
+            if cursor.rowcount:
+                logger.warning(
+                    "Moved %d rows from %s to %s",
+                    cursor.rowcount,
+                    default_partition_name,
+                    partition_name,
+                )
+            cursor.execute(
+                f"ALTER TABLE {quote_name(table_name)} "
+                f"ATTACH PARTITION {quote_name(partition_name)} "
+                "FOR VALUES FROM (%s) TO (%s)",
+                bounds,
+            )
+
+
+def _get_connection(model_class: typing.Type[Model]):
+    return connections[router.db_for_write(model_class)]
+
+
+def _start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
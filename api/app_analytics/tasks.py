@@ -1,8 +1,14 @@
+import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from itertools import chain
+from typing import List, Tuple, Type
 
 from app_analytics.analytics_db_service import ANALYTICS_READ_BUCKET_SIZE
+from app_analytics.cache import API_USAGE_CACHE_BUCKET_SIZE
+from app_analytics.partitions import manage_partitions
 from django.conf import settings
+from django.db import router, transaction
 from django.db.models import Count, Q, Sum
 from django.utils import timezone
 
@@ -11,14 +17,18 @@ from task_processor.decorators import (
     register_recurring_task,
     register_task_handler,
 )
+from task_processor.models import ANALYTICS_QUEUE, TaskPriority
 
 from .models import (
+    AbstractBucket,
     APIUsageBucket,
     APIUsageRaw,
     FeatureEvaluationBucket,
     FeatureEvaluationRaw,
 )
 
+logger = logging.getLogger(__name__)
+
 if settings.USE_POSTGRES_FOR_ANALYTICS:
 
     @register_recurring_task(
@@ -34,8 +44,15 @@ if settings.USE_POSTGRES_FOR_ANALYTICS:
         populate_api_usage_bucket(bucket_size, run_every, source_bucket_size)
         populate_feature_evaluation_bucket(bucket_size, run_every, source_bucket_size)
 
+    @register_recurring_task(run_every=timedelta(hours=12))
+    def manage_raw_analytics_partitions():
+        manage_partitions(
+            premake_days=settings.RAW_ANALYTICS_PARTITION_PREMAKE_DAYS,
+            retention_days=settings.RAW_ANALYTICS_RETENTION_DAYS,
+        )
+
 
-@register_task_handler()
+@register_task_handler(queue=ANALYTICS_QUEUE, priority=TaskPriority.LOW)
 def track_feature_evaluation(environment_id, feature_evaluations):
     feature_evaluation_objects = []
     for feature_name, evaluation_count in feature_evaluations.items():
@@ -49,7 +66,7 @@ def track_feature_evaluation(environment_id, feature_evaluations):
     FeatureEvaluationRaw.objects.bulk_create(feature_evaluation_objects)
 
 
-@register_task_handler()
+@register_task_handler(queue=ANALYTICS_QUEUE, priority=TaskPriority.LOW)
 def track_request(resource: int, host: str, environment_key: str):
     environment = Environment.get_from_cache(environment_key)
     if environment is None:
@@ -61,11 +78,11 @@ def track_request(resource: int, host: str, environment_key: str):
     )
 
 
-def get_start_of_current_bucket(bucket_size: int) -> datetime:
+def get_start_of_current_bucket(bucket_size: int, now: datetime = None) -> datetime:
     if bucket_size > 60:
         raise ValueError("Bucket size cannot be greater than 60 minutes")
 
-    current_time = timezone.now().replace(second=0, microsecond=0)
+    current_time = (now or timezone.now()).replace(second=0, microsecond=0)
     start_of_current_bucket = current_time - timezone.timedelta(
         minutes=current_time.minute % bucket_size
     )
@@ -73,9 +90,15 @@ def get_start_of_current_bucket(bucket_size: int) -> datetime:
 
 
 def get_time_buckets(
-    bucket_size: int, run_every: int
+    bucket_size: int, run_every: int, delay: timedelta = timedelta()
 ) -> List[Tuple[datetime, datetime]]:
-    start_of_first_bucket = get_start_of_current_bucket(bucket_size)
+    """
+    Get the time buckets to process in a run, i.e. the last `run_every` minutes of
+    buckets which were complete `delay` ago.
+    """
+    start_of_first_bucket = get_start_of_current_bucket(
+        bucket_size, timezone.now() - delay
+    )
     time_buckets = []
 
     # number of buckets that can be processed in `run_every` time
@@ -90,46 +113,180 @@ def get_time_buckets(
     return time_buckets
 
 
+def get_time_buckets_between(
+    bucket_size: int, start: datetime, end: datetime
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Get the (complete) time buckets of the given size between start and end.
+    """
+    if bucket_size > 60:
+        raise ValueError("Bucket size cannot be greater than 60 minutes")
+
+    start = start.replace(second=0, microsecond=0)
+    if start.minute % bucket_size:
+        # start from the next full bucket
+        start += timezone.timedelta(minutes=bucket_size - start.minute % bucket_size)
+
+    time_buckets = []
+    bucket_start_time = start
+    bucket_end_time = start + timezone.timedelta(minutes=bucket_size)
+    while bucket_end_time <= end:
+        time_buckets.append((bucket_start_time, bucket_end_time))
+        bucket_start_time = bucket_end_time
+        bucket_end_time += timezone.timedelta(minutes=bucket_size)
+
+    return time_buckets
+
+
 def populate_api_usage_bucket(
     bucket_size: int, run_every: int, source_bucket_size: int = None
+):
+    # The API usage cache (see app_analytics.cache) writes the usage for each minute
+    # up to a flush interval later, so the buckets are only populated once that
+    # has passed (with a minute to spare for the flush itself).
+    delay = timedelta(seconds=settings.API_USAGE_CACHE_SECONDS + 60)
+    time_buckets = get_time_buckets(bucket_size, run_every, delay=delay)
+    for bucket_start_time, bucket_end_time in time_buckets:
+        populate_api_usage_time_bucket(
+            bucket_size, bucket_start_time, bucket_end_time, source_bucket_size
+        )
+
+
+def populate_feature_evaluation_bucket(
+    bucket_size: int, run_every: int, source_bucket_size: int = None
 ):
     for bucket_start_time, bucket_end_time in get_time_buckets(bucket_size, run_every):
-        data = _get_api_usage_source_data(
-            bucket_start_time, bucket_end_time, source_bucket_size
+        populate_feature_evaluation_time_bucket(
+            bucket_size, bucket_start_time, bucket_end_time, source_bucket_size
+        )
+
+
+def populate_api_usage_time_bucket(
+    bucket_size: int,
+    bucket_start_time: datetime,
+    bucket_end_time: datetime,
+    source_bucket_size: int = None,
+) -> None:
+    """
+    (Re)populate the API usage buckets for a single time bucket. This is idempotent,
+    so it can safely be rerun (e.g. to backfill buckets).
+    """
+    if bucket_size == API_USAGE_CACHE_BUCKET_SIZE:
+        # the buckets of this size are written by the API (see app_analytics.cache)
+        # and are part of the source data, so they must not be replaced
+        raise ValueError(
+            f"Cannot populate API usage buckets of size {bucket_size}, "
+            "they are written by the API usage cache."
+        )
+
+    if not source_bucket_size and _is_raw_data_expired(bucket_start_time):
+        logger.warning(
+            "Not populating API usage buckets from %s, the raw data has expired.",
+            bucket_start_time,
         )
-        for row in data:
-            APIUsageBucket.objects.create(
+        return
+
+    data = _get_api_usage_source_data(
+        bucket_start_time, bucket_end_time, source_bucket_size
+    )
+    _replace_buckets(
+        APIUsageBucket,
+        bucket_size,
+        bucket_start_time,
+        bucket_end_time,
+        [
+            APIUsageBucket(
                 environment_id=row["environment_id"],
                 resource=row["resource"],
                 total_count=row["count"],
                 bucket_size=bucket_size,
                 created_at=bucket_start_time,
             )
+            for row in data
+        ],
+    )
 
 
-def populate_feature_evaluation_bucket(
-    bucket_size: int, run_every: int, source_bucket_size: int = None
-):
-    for bucket_start_time, bucket_end_time in get_time_buckets(bucket_size, run_every):
-        data = _get_feature_evaluation_source_data(
-            bucket_start_time, bucket_end_time, source_bucket_size
+def populate_feature_evaluation_time_bucket(
+    bucket_size: int,
+    bucket_start_time: datetime,
+    bucket_end_time: datetime,
+    source_bucket_size: int = None,
+) -> None:
+    """
+    (Re)populate the feature evaluation buckets for a single time bucket. This is
+    idempotent, so it can safely be rerun (e.g. to backfill buckets).
+    """
+    if not source_bucket_size and _is_raw_data_expired(bucket_start_time):
+        logger.warning(
+            "Not populating feature evaluation buckets from %s, the raw data has "
+            "expired.",
+            bucket_start_time,
         )
-        for row in data:
-            FeatureEvaluationBucket.objects.create(
+        return
+
+    data = _get_feature_evaluation_source_data(
+        bucket_start_time, bucket_end_time, source_bucket_size
+    )
+    _replace_buckets(
+        FeatureEvaluationBucket,
+        bucket_size,
+        bucket_start_time,
+        bucket_end_time,
+        [
+            FeatureEvaluationBucket(
                 environment_id=row["environment_id"],
                 feature_name=row["feature_name"],
                 total_count=row["count"],
                 bucket_size=bucket_size,
                 created_at=bucket_start_time,
             )
+            for row in data
+        ],
+    )
+
+
+def _replace_buckets(
+    model_class: Type[AbstractBucket],
+    bucket_size: int,
+    bucket_start_time: datetime,
+    bucket_end_time: datetime,
+    buckets: List[AbstractBucket],
+) -> None:
+    if not buckets:
+        # keep any existing buckets when there's no source data, e.g. since it has
+        # been deleted
+        return
+
+    # Replace any existing buckets for the time bucket, rather than checking for
+    # overlapping buckets one by one (bulk_create doesn't trigger the lifecycle
+    # hooks).
+    with transaction.atomic(using=router.db_for_write(model_class)):
+        model_class.objects.filter(
+            bucket_size=bucket_size,
+            created_at__gte=bucket_start_time,
+            created_at__lt=bucket_end_time,
+        ).delete()
+        model_class.objects.bulk_create(buckets)
+
+
+def _is_raw_data_expired(bucket_start_time: datetime) -> bool:
+    # the partitions holding the raw data are dropped by day once they're older
+    # than the retention period (see app_analytics.partitions)
+    if not settings.RAW_ANALYTICS_RETENTION_DAYS:
+        return False
+    retained_from = timezone.now().date() - timedelta(
+        days=settings.RAW_ANALYTICS_RETENTION_DAYS
+    )
+    return bucket_start_time.astimezone(timezone.utc).date() < retained_from
 
 
 def _get_api_usage_source_data(
     process_from: datetime, process_till: datetime, source_bucket_size: int = None
 ) -> dict:
     filters = Q(
-        created_at__lte=process_till,
-        created_at__gt=process_from,
+        created_at__gte=process_from,
+        created_at__lt=process_till,
     )
     if source_bucket_size:
         return (
@@ -137,19 +294,33 @@ def _get_api_usage_source_data(
             .values("environment_id", "resource")
             .annotate(count=Sum("total_count"))
         )
-    return (
+
+    raw_data = (
         APIUsageRaw.objects.filter(filters)
         .values("environment_id", "resource")
         .annotate(count=Count("id"))
     )
+    # include the usage aggregated in memory by the API (see app_analytics.cache)
+    cached_data = (
+        APIUsageBucket.objects.filter(filters, bucket_size=API_USAGE_CACHE_BUCKET_SIZE)
+        .values("environment_id", "resource")
+        .annotate(count=Sum("total_count"))
+    )
+    counts = defaultdict(int)
+    for row in chain(raw_data, cached_data):
+        counts[(row["environment_id"], row["resource"])] += row["count"]
+    return [
+        {"environment_id": environment_id, "resource": resource, "count": count}
+        for (environment_id, resource), count in counts.items()
+    ]
 
 
 def _get_feature_evaluation_source_data(
     process_from: datetime, process_till: datetime, source_bucket_size: int = None
 ) -> dict:
     filters = Q(
-        created_at__lte=process_till,
-        created_at__gt=process_from,
+        created_at__gte=process_from,
+        created_at__lt=process_till,
     )
     if source_bucket_size:
         return (
@@ -2,6 +2,7 @@ from unittest import mock
 
 import pytest
 from app_analytics.track import (
+    track_feature_evaluation_influxdb,
     track_request_googleanalytics,
     track_request_influxdb,
 )
@@ -51,10 +52,13 @@ def test_track_request_googleanalytics(
         ("/api/v1/environment-document/", "environment-document"),
     ),
 )
-@mock.patch("app_analytics.track.InfluxDBWrapper")
+@mock.patch("app_analytics.track.influxdb_writer")
 @mock.patch("app_analytics.track.Environment")
 def test_track_request_sends_data_to_influxdb_for_tracked_uris(
-    MockEnvironment, MockInfluxDBWrapper, request_uri, expected_resource
+    MockEnvironment,
+    mock_influxdb_writer,
+    request_uri,
+    expected_resource,
 ):
     """
     Verify that the correct number of calls are made to InfluxDB for the various uris.
@@ -65,25 +69,20 @@ def test_track_request_sends_data_to_influxdb_for_tracked_uris(
     environment_api_key = "test"
     request.headers = {"X-Environment-Key": environment_api_key}
 
-    mock_influxdb = mock.MagicMock()
-    MockInfluxDBWrapper.return_value = mock_influxdb
-
     # When
     track_request_influxdb(request)
 
     # Then
-    call_list = MockInfluxDBWrapper.call_args_list
-    assert len(call_list) == 1
-    assert (
-        mock_influxdb.add_data_point.call_args_list[0][1]["tags"]["resource"]
-        == expected_resource
-    )
+    mock_influxdb_writer.write.assert_called_once()
+    (point,) = mock_influxdb_writer.write.call_args.args[0]
+    assert point._name == "api_call"
+    assert point._tags["resource"] == expected_resource
 
 
-@mock.patch("app_analytics.track.InfluxDBWrapper")
+@mock.patch("app_analytics.track.influxdb_writer")
 @mock.patch("app_analytics.track.Environment")
 def test_track_request_sends_host_data_to_influxdb(
-    MockEnvironment, MockInfluxDBWrapper, rf
+    MockEnvironment, mock_influxdb_writer, rf
 ):
     """
     Verify that host is part of the data send to influxDB
@@ -94,23 +93,18 @@ def test_track_request_sends_host_data_to_influxdb(
 
     request = rf.get("/api/v1/flags/", headers=headers)
 
-    mock_influxdb = mock.MagicMock()
-    MockInfluxDBWrapper.return_value = mock_influxdb
-
     # When
     track_request_influxdb(request)
 
     # Then
-    assert (
-        mock_influxdb.add_data_point.call_args_list[0][1]["tags"]["host"]
-        == "testserver"
-    )
+    (point,) = mock_influxdb_writer.write.call_args.args[0]
+    assert point._tags["host"] == "testserver"
 
 
-@mock.patch("app_analytics.track.InfluxDBWrapper")
+@mock.patch("app_analytics.track.influxdb_writer")
 @mock.patch("app_analytics.track.Environment")
 def test_track_request_does_not_send_data_to_influxdb_for_not_tracked_uris(
-    MockEnvironment, MockInfluxDBWrapper
+    MockEnvironment, mock_influxdb_writer
 ):
     """
     Verify that the correct number of calls are made to InfluxDB for the various uris.
@@ -121,11 +115,38 @@ def test_track_request_does_not_send_data_to_influxdb_for_not_tracked_uris(
     environment_api_key = "test"
     request.headers = {"X-Environment-Key": environment_api_key}
 
-    mock_influxdb = mock.MagicMock()
-    MockInfluxDBWrapper.return_value = mock_influxdb
+    # When
+    track_request_influxdb(request)
+
+    # Then
+    mock_influxdb_writer.write.assert_not_called()
+
+
+@mock.patch("app_analytics.influxdb_wrapper.influxdb_client")
+@mock.patch("app_analytics.track.influxdb_writer")
+@mock.patch("app_analytics.track.Environment")
+def test_track_request_influxdb_does_not_create_write_api(
+    MockEnvironment, mock_influxdb_writer, mock_influxdb_client, rf
+):
+    # Given
+    request = rf.get("/api/v1/flags/", headers={"X-Environment-Key": "test"})
 
     # When
     track_request_influxdb(request)
 
     # Then
-    MockInfluxDBWrapper.assert_not_called()
+    mock_influxdb_writer.write.assert_called_once()
+    mock_influxdb_client.write_api.assert_not_called()
+
+
+@mock.patch("app_analytics.track.influxdb_writer")
+def test_track_feature_evaluation_influxdb(mock_influxdb_writer):
+    # When
+    track_feature_evaluation_influxdb(1, {"feature_one": 2, "feature_two": 3})
+
+    # Then
+    points = list(mock_influxdb_writer.write.call_args.args[0])
+    assert [point.to_line_protocol() for point in points] == [
+        "feature_evaluation,environment_id=1,feature_id=feature_one request_count=2i",
+        "feature_evaluation,environment_id=1,feature_id=feature_two request_count=3i",
+    ]
@@ -2,7 +2,8 @@ import logging
 import uuid
 
 import requests
-from app_analytics.influxdb_wrapper import InfluxDBWrapper
+from app_analytics.influxdb_wrapper import get_data_point
+from app_analytics.influxdb_writer import influxdb_writer
 from django.conf import settings
 from django.core.cache import caches
 from six.moves.urllib.parse import quote  # python 2/3 compatible urllib import
@@ -34,11 +35,6 @@ def track_request_googleanalytics_async(request):
     return track_request_googleanalytics(request)
 
 
-@postpone
-def track_request_influxdb_async(request):
-    return track_request_influxdb(request)
-
-
 def get_resource_from_uri(request_uri):
     """
     Split the uri so we can determine the resource that is being requested
@@ -96,7 +92,7 @@ def track_event(category, action, label="", value=""):
 
 def track_request_influxdb(request):
     """
-    Sends API event data to InfluxDB
+    Queues API event data to be written to InfluxDB
 
     :param request: (HttpRequest) the request being made
     """
@@ -120,22 +116,24 @@ def track_request_influxdb(request):
             "host": request.get_host(),
         }
 
-        influxdb = InfluxDBWrapper("api_call")
-        influxdb.add_data_point("request_count", 1, tags=tags)
-        influxdb.write()
+        # the data point is written by influxdb_writer, so there's no need for an
+        # InfluxDBWrapper (and its write api) per request
+        influxdb_writer.write([get_data_point("api_call", "request_count", 1, tags)])
 
 
 def track_feature_evaluation_influxdb(environment_id, feature_evaluations):
     """
-    Sends Feature analytics event data to InfluxDB
+    Queues Feature analytics event data to be written to InfluxDB
 
     :param environment_id: (int) the id of the environment the feature is being evaluated within
     :param feature_evaluations: (dict) A collection of key id / evaluation counts
     """
-    influxdb = InfluxDBWrapper("feature_evaluation")
-
-    for feature_name, evaluation_count in feature_evaluations.items():
-        tags = {"feature_id": feature_name, "environment_id": environment_id}
-        influxdb.add_data_point("request_count", evaluation_count, tags=tags)
-
-    influxdb.write()
+    influxdb_writer.write(
+        get_data_point(
+            "feature_evaluation",
+            "request_count",
+            evaluation_count,
+            tags={"feature_id": feature_name, "environment_id": environment_id},
+        )
+        for feature_name, evaluation_count in feature_evaluations.items()
+    )
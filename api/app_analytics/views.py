@@ -1,9 +1,12 @@
 import logging
+import typing
+from collections import defaultdict
 
 from app_analytics.analytics_db_service import (
     get_total_events_count,
     get_usage_data,
 )
+from app_analytics.feature_names import get_environment_feature_names
 from app_analytics.tasks import track_feature_evaluation
 from app_analytics.track import track_feature_evaluation_influxdb
 from django.conf import settings
@@ -19,7 +22,6 @@ from telemetry.serializers import TelemetrySerializer
 
 from environments.authentication import EnvironmentKeyAuthentication
 from environments.permissions.permissions import EnvironmentKeyPermissions
-from features.models import FeatureState
 from organisations.models import Organisation
 
 from .permissions import UsageDataPermission
@@ -44,12 +46,8 @@ class SDKAnalyticsFlags(GenericAPIView):
         if getattr(self, "swagger_fake_view", False):
             return Serializer
 
-        environment_feature_names = set(
-            FeatureState.objects.filter(
-                environment=self.request.environment,
-                feature_segment=None,
-                identity=None,
-            ).values_list("feature__name", flat=True)
+        environment_feature_names = get_environment_feature_names(
+            self.request.environment
         )
 
         class _AnalyticsSerializer(Serializer):
@@ -64,9 +62,13 @@ class SDKAnalyticsFlags(GenericAPIView):
     def post(self, request, *args, **kwargs):
         """
         Send flag evaluation events from the SDK back to the API for reporting.
+
+        The data can either be a single object mapping feature names to evaluation
+        counts, or a list of such objects (e.g. from multiple flushes of the SDK),
+        which are merged before being tracked.
         """
-        is_valid = self._is_data_valid()
-        if not is_valid:
+        feature_evaluations = self._get_feature_evaluations()
+        if feature_evaluations is None:
             # for now, return 200 to avoid breaking client integrations
             return Response(
                 {"detail": "Invalid data. Not logged."},
@@ -74,39 +76,57 @@ class SDKAnalyticsFlags(GenericAPIView):
                 status=status.HTTP_200_OK,
             )
         if settings.USE_POSTGRES_FOR_ANALYTICS:
-            track_feature_evaluation.delay(args=(request.environment.id, request.data))
+            track_feature_evaluation.delay(
+                args=(request.environment.id, feature_evaluations)
+            )
 
         if settings.INFLUXDB_TOKEN:
-            track_feature_evaluation_influxdb(request.environment.id, request.data)
+            track_feature_evaluation_influxdb(
+                request.environment.id, feature_evaluations
+            )
 
         return Response(status=status.HTTP_200_OK)
 
-    def _is_data_valid(self) -> bool:
-        environment_feature_names = set(
-            FeatureState.objects.filter(
-                environment=self.request.environment,
-                feature_segment=None,
-                identity=None,
-            ).values_list("feature__name", flat=True)
+    def _get_feature_evaluations(self) -> typing.Optional[typing.Dict[str, int]]:
+        """
+        Validate the analytics data, returning the evaluation count of each feature,
+        or None if the data is invalid.
+        """
+        data = self.request.data
+        flushes = data if isinstance(data, list) else [data]
+        environment_feature_names = get_environment_feature_names(
+            self.request.environment
         )
 
         is_valid = True
-        for feature_name, request_count in self.request.data.items():
-            if not (
-                isinstance(feature_name, str)
-                and feature_name in environment_feature_names
-            ):
-                logger.warning("Feature %s does not belong to project", feature_name)
-                is_valid = False
-
-            if not (isinstance(request_count, int)):
-                logger.error(
-                    "Analytics data contains non integer request count. User agent: %s",
-                    self.request.headers.get("User-Agent", "Not found"),
-                )
+        feature_evaluations = defaultdict(int)
+        for flush in flushes:
+            if not isinstance(flush, dict):
+                logger.warning("Analytics data contains invalid flush: %s", flush)
                 is_valid = False
-
-        return is_valid
+                continue
+
+            for feature_name, request_count in flush.items():
+                if not (
+                    isinstance(feature_name, str)
+                    and feature_name in environment_feature_names
+                ):
+                    logger.warning(
+                        "Feature %s does not belong to project", feature_name
+                    )
+                    is_valid = False
+
+                if not (isinstance(request_count, int)):
+                    logger.error(
+                        "Analytics data contains non integer request count. User agent: %s",
+                        self.request.headers.get("User-Agent", "Not found"),
+                    )
+                    is_valid = False
+
+                if is_valid:
+                    feature_evaluations[feature_name] += request_count
+
+        return dict(feature_evaluations) if is_valid else None
 
 
 class SelfHostedTelemetryAPIView(CreateAPIView):
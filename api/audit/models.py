@@ -1,8 +1,11 @@
 import typing
+from datetime import timedelta
 from importlib import import_module
 
+from django.conf import settings
 from django.db import models
 from django.db.models import Model, Q
+from django.utils import timezone
 from django_lifecycle import (
     AFTER_CREATE,
     BEFORE_CREATE,
@@ -18,6 +21,8 @@ from sse import (
     send_environment_update_message_for_environment,
     send_environment_update_message_for_project,
 )
+from task_processor.models import Task
+from task_processor.task_run_method import TaskRunMethod
 
 RELATED_OBJECT_TYPES = ((tag.name, tag.value) for tag in RelatedObjectType)
 
@@ -115,9 +120,42 @@ class AuditLog(LifecycleModel):
     )
     def process_environment_update(self):
         self.update_environments_updated_at()
+
+        if (
+            settings.ENVIRONMENT_UPDATE_COALESCE_SECONDS > 0
+            and settings.TASK_RUN_METHOD == TaskRunMethod.TASK_PROCESSOR
+        ):
+            self.schedule_environment_update()
+            return
+
         self.send_environments_to_dynamodb()
         self.send_environment_update_message()
 
+    def schedule_environment_update(self):
+        """
+        Schedule a single task to write the environment document(s) to dynamodb and
+        send the update message once the coalescing window has passed, so that
+        many changes made in quick succession result in a single rebuild.
+        """
+        from audit.tasks import process_environment_update
+
+        if self.environment_id and Task.objects.get_scheduled_task(
+            task_identifier=process_environment_update.task_identifier,
+            kwargs={"environment_id": None, "project_id": self.project_id},
+        ):
+            # a rebuild of every environment in the project is already scheduled
+            return
+
+        process_environment_update.delay(
+            delay_until=timezone.now()
+            + timedelta(seconds=settings.ENVIRONMENT_UPDATE_COALESCE_SECONDS),
+            kwargs={
+                "environment_id": self.environment_id,
+                "project_id": self.project_id,
+            },
+            coalesce=True,
+        )
+
     def update_environments_updated_at(self):
         environments_filter = Q()
         if self.environment_id:
@@ -133,7 +171,9 @@ class AuditLog(LifecycleModel):
         from environments.models import Environment
 
         Environment.write_environments_to_dynamodb(
-            environment_id=self.environment_id, project_id=self.project_id
+            environment_id=self.environment_id,
+            project_id=self.project_id,
+            audit_log=self,
         )
 
     def send_environment_update_message(self):
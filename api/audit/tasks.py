@@ -8,7 +8,13 @@ from audit.constants import (
     FEATURE_STATE_WENT_LIVE_MESSAGE,
 )
 from audit.models import AuditLog, RelatedObjectType
+from projects.models import Project
+from sse import (
+    send_environment_update_message_for_environment,
+    send_environment_update_message_for_project,
+)
 from task_processor.decorators import register_task_handler
+from task_processor.models import REALTIME_QUEUE, TaskPriority
 
 logger = logging.getLogger(__name__)
 
@@ -163,3 +169,30 @@ def create_segment_priorities_changed_audit_log(
         related_object_type=RelatedObjectType.FEATURE.name,
         master_api_key_id=master_api_key_id,
     )
+
+
+@register_task_handler(queue=REALTIME_QUEUE, priority=TaskPriority.HIGH)
+def process_environment_update(environment_id: int = None, project_id: int = None):
+    """
+    Write the environment document(s) to dynamodb and send the update message to
+    the SSE service. Scheduled (and coalesced) by AuditLog when environment
+    updates are being debounced.
+    """
+    from environments.models import Environment
+
+    Environment.write_environments_to_dynamodb(
+        environment_id=environment_id, project_id=project_id
+    )
+
+    if environment_id:
+        environment = (
+            Environment.objects.select_related("project")
+            .filter(id=environment_id)
+            .first()
+        )
+        if environment:
+            send_environment_update_message_for_environment(environment)
+    else:
+        project = Project.objects.filter(id=project_id).first()
+        if project:
+            send_environment_update_message_for_project(project)
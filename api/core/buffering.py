@@ -0,0 +1,69 @@
+import atexit
+import logging
+import threading
+import typing
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedFlusher:
+    """
+    Base class for the process wide buffers which are flushed by a background
+    thread, either when the flush interval has passed or as soon as a flush is
+    requested (e.g. because a batch is full).
+
+    Subclasses hold their own buffer (guarded by `_lock` where needed), call
+    `_start_flusher` when adding to it and implement `flush`, which must be safe to
+    call from any thread.
+    """
+
+    # whether the flusher thread closes its database connections after each flush
+    close_db_connections = False
+
+    def __init__(self, flush_interval_seconds: float):
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._flusher: typing.Optional[threading.Thread] = None
+        self._flusher_lock = threading.Lock()
+
+    def flush(self) -> None:
+        raise NotImplementedError()
+
+    def flush_on_exit(self) -> None:
+        self.flush()
+
+    def register_flush_on_exit(self) -> None:
+        atexit.register(self._flush_on_exit)
+
+    def _flush_on_exit(self) -> None:  # pragma: no cover
+        try:
+            self.flush_on_exit()
+        except Exception as e:
+            logger.exception(e)
+
+    def _start_flusher(self) -> None:
+        # started lazily so that the thread is only started in the processes which
+        # actually use it (e.g. after gunicorn forks its workers)
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+
+        with self._flusher_lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+                self._flusher.start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            self._flush_requested.wait(timeout=self.flush_interval_seconds)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                if self.close_db_connections:
+                    close_old_connections()
@@ -0,0 +1,71 @@
+import threading
+import time
+import typing
+from collections import OrderedDict
+
+_NOT_FOUND = object()
+
+
+class LocalCache:
+    """
+    Thread safe, process local cache holding at most `max_entries` items. When full,
+    the least recently used item is evicted. Items can optionally expire after a
+    given number of seconds.
+
+    Unlike django's locmem cache backend, values are not pickled so they are
+    shared between callers and must not be mutated once they have been cached.
+
+    The number of hits and misses are recorded to allow the effectiveness of the
+    cache to be monitored.
+    """
+
+    def __init__(self, max_entries: int, timeout: float | None = None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self._data: OrderedDict[
+            typing.Hashable, tuple[float | None, typing.Any]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: typing.Hashable, default: typing.Any = None) -> typing.Any:
+        with self._lock:
+            expires_at, value = self._data.get(key, (None, _NOT_FOUND))
+            if value is _NOT_FOUND:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self, key: typing.Hashable, value: typing.Any, timeout: float | None = None
+    ) -> None:
+        timeout = self.timeout if timeout is None else timeout
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: typing.Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
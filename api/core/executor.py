@@ -0,0 +1,160 @@
+import dataclasses
+import logging
+import queue
+import threading
+import time
+import typing
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclasses.dataclass
+class BoundedExecutorMetrics:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    dropped: int = 0
+    # time spent waiting in the queue by the tasks that have been run
+    total_latency_seconds: float = 0.0
+    max_latency_seconds: float = 0.0
+
+
+class BoundedExecutor:
+    """
+    Thread pool which runs the submitted functions on a fixed number of (lazily
+    started) worker threads.
+
+    Functions are queued in a bounded queue until a worker is available. When the
+    queue is full, any further functions are dropped rather than blocking the caller
+    so that a slow downstream service can't exhaust the threads or memory of the
+    process.
+    """
+
+    # minimum number of seconds between the warnings logged for dropped calls
+    dropped_warning_interval_seconds = 60
+
+    def __init__(self, max_workers: int, max_queue_size: int):
+        self.max_workers = max_workers
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._workers: typing.List[threading.Thread] = []
+        self._workers_lock = threading.Lock()
+        self._metrics = BoundedExecutorMetrics()
+        self._metrics_lock = threading.Lock()
+        self._dropped_since_warning = 0
+        self._last_dropped_warning_at: typing.Optional[float] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def metrics(self) -> BoundedExecutorMetrics:
+        with self._metrics_lock:
+            return dataclasses.replace(self._metrics)
+
+    def submit(self, function: typing.Callable, *args, **kwargs) -> bool:
+        """
+        Queue the function to be run by one of the workers, returning False if it
+        was dropped because the queue is full.
+        """
+        self._start_workers()
+
+        try:
+            self._queue.put_nowait((time.monotonic(), function, args, kwargs))
+        except queue.Full:
+            self._increment_metrics(dropped=1)
+            self._warn_dropped(function)
+            return False
+
+        self._increment_metrics(submitted=1)
+        return True
+
+    def shutdown(self, timeout: float) -> None:
+        """
+        Stop the workers once they have run the functions which are already queued,
+        waiting at most `timeout` seconds for them to do so.
+        """
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+
+        deadline = time.monotonic() + timeout
+        for _ in workers:
+            try:
+                self._queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                break
+
+        for worker in workers:
+            worker.join(timeout=max(deadline - time.monotonic(), 0))
+
+    def _start_workers(self) -> None:
+        # started lazily so that the threads are only started in the processes
+        # which actually use them (e.g. after gunicorn forks its workers)
+        if len(self._workers) == self.max_workers:
+            return
+
+        with self._workers_lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._run_worker, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run_worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+
+            queued_at, function, args, kwargs = item
+            latency = time.monotonic() - queued_at
+            try:
+                function(*args, **kwargs)
+            except Exception as e:
+                logger.exception(e)
+                self._increment_metrics(failed=1)
+            else:
+                self._increment_metrics(completed=1)
+            finally:
+                close_old_connections()
+
+            with self._metrics_lock:
+                self._metrics.total_latency_seconds += latency
+                self._metrics.max_latency_seconds = max(
+                    self._metrics.max_latency_seconds, latency
+                )
+
+    def _warn_dropped(self, function: typing.Callable) -> None:
+        # the queue is full when the downstream service is slow, so every call is
+        # likely to be dropped for a while; avoid flooding the logs with a warning
+        # for each of them
+        with self._metrics_lock:
+            self._dropped_since_warning += 1
+            now = time.monotonic()
+            if (
+                self._last_dropped_warning_at is not None
+                and now - self._last_dropped_warning_at
+                < self.dropped_warning_interval_seconds
+            ):
+                return
+            dropped, self._dropped_since_warning = self._dropped_since_warning, 0
+            self._last_dropped_warning_at = now
+
+        logger.warning(
+            "Executor queue is full, dropped %d call(s) since the last warning, "
+            "including a call to %s",
+            dropped,
+            function,
+        )
+
+    def _increment_metrics(self, **increments: int) -> None:
+        with self._metrics_lock:
+            for metric, increment in increments.items():
+                setattr(
+                    self._metrics, metric, getattr(self._metrics, metric) + increment
+                )
@@ -1,6 +1,23 @@
+"""
+Forwarding of the identity and trait requests to the Edge API, used to keep the edge
+identities in sync while a project is migrating to edge.
+
+Each request to be forwarded is recorded as an `EdgeRequest` dict, and requests are
+forwarded in batches by the `forward_edge_requests` task. The migration status of each
+project is only checked once per batch (and can be cached in the process), and all
+requests share a pooled HTTP session.
+
+If enabled, the requests are also coalesced in memory by a background thread in each
+process, so that the requests forwarded during a flush interval result in a single
+task rather than a task per request.
+"""
 import json
+import logging
+import typing
 
 import requests
+from core.buffering import BufferedFlusher
+from core.cache import LocalCache
 from core.constants import FLAGSMITH_SIGNATURE_HEADER
 from core.signing import sign_payload
 from django.conf import settings
@@ -8,10 +25,106 @@ from django.conf import settings
 from environments.dynamodb.migrator import IdentityMigrator
 from task_processor.decorators import register_task_handler
 
+logger = logging.getLogger(__name__)
+
+# shared by the forwarded requests so that connections to edge are reused
+http_session = requests.Session()
+
+project_migration_done_cache = LocalCache(
+    max_entries=settings.PROJECT_MIGRATION_STATUS_CACHE_MAX_ENTRIES,
+    timeout=settings.CACHE_PROJECT_MIGRATION_STATUS_SECONDS,
+)
+
+
+class EdgeRequest(typing.TypedDict, total=False):
+    request_method: str
+    path: str
+    headers: dict
+    project_id: int
+    query_params: typing.Optional[dict]
+    request_data: typing.Any
+
 
 def _should_forward(project_id: int) -> bool:
+    if settings.CACHE_PROJECT_MIGRATION_STATUS_SECONDS and (
+        project_migration_done_cache.get(project_id)
+    ):
+        return True
+
     migrator = IdentityMigrator(project_id)
-    return bool(migrator.is_migration_done)
+    is_migration_done = bool(migrator.is_migration_done)
+
+    # only completed migrations are cached since a migration can't be undone, and
+    # requests would otherwise not be forwarded once the migration has completed
+    if settings.CACHE_PROJECT_MIGRATION_STATUS_SECONDS and is_migration_done:
+        project_migration_done_cache.set(
+            project_id,
+            True,
+            timeout=settings.CACHE_PROJECT_MIGRATION_STATUS_SECONDS,
+        )
+
+    return is_migration_done
+
+
+def get_identity_edge_request(
+    request_method: str,
+    headers: dict,
+    project_id: int,
+    query_params: dict = None,
+    request_data: dict = None,
+) -> EdgeRequest:
+    return EdgeRequest(
+        request_method=request_method,
+        path="identities/",
+        headers=headers,
+        project_id=project_id,
+        query_params=query_params,
+        request_data=request_data,
+    )
+
+
+def get_trait_edge_request(
+    request_method: str, headers: dict, project_id: int, payload: dict
+) -> EdgeRequest:
+    return EdgeRequest(
+        request_method=request_method,
+        path="traits/",
+        headers=headers,
+        project_id=project_id,
+        request_data=payload,
+    )
+
+
+def get_bulk_traits_edge_request(
+    request_method: str, headers: dict, project_id: int, payload: typing.List[dict]
+) -> EdgeRequest:
+    return EdgeRequest(
+        request_method=request_method,
+        path="traits/bulk/",
+        headers=headers,
+        project_id=project_id,
+        request_data=payload,
+    )
+
+
+@register_task_handler()
+def forward_edge_requests(edge_requests: typing.List[EdgeRequest]) -> None:
+    should_forward_by_project_id = {}
+
+    for edge_request in edge_requests:
+        project_id = edge_request["project_id"]
+        if project_id not in should_forward_by_project_id:
+            should_forward_by_project_id[project_id] = _should_forward(project_id)
+
+        if not should_forward_by_project_id[project_id]:
+            continue
+
+        try:
+            _send_edge_request(edge_request)
+        except requests.RequestException as e:
+            logger.warning(
+                "Failed to forward %s request to edge: %s", edge_request["path"], e
+            )
 
 
 @register_task_handler()
@@ -22,17 +135,15 @@ def forward_identity_request(
     query_params: dict = None,
     request_data: dict = None,
 ):
+    # kept to process the tasks queued before forward_edge_requests was added
     if not _should_forward(project_id):
         return
 
-    url = settings.EDGE_API_URL + "identities/"
-    headers = _get_headers(
-        request_method, headers, json.dumps(request_data) if request_data else ""
+    _send_edge_request(
+        get_identity_edge_request(
+            request_method, headers, project_id, query_params, request_data
+        )
     )
-    if request_method == "POST":
-        requests.post(url, data=json.dumps(request_data), headers=headers, timeout=5)
-        return
-    requests.get(url, params=query_params, headers=headers, timeout=5)
 
 
 @register_task_handler()
@@ -42,6 +153,7 @@ def forward_trait_request(
     project_id: int,
     payload: dict,
 ):
+    # kept to process the tasks queued before forward_edge_requests was added
     return forward_trait_request_sync(request_method, headers, project_id, payload)
 
 
@@ -51,14 +163,8 @@ def forward_trait_request_sync(
     if not _should_forward(project_id):
         return
 
-    url = settings.EDGE_API_URL + "traits/"
-    payload = payload
-    payload = json.dumps(payload)
-    requests.post(
-        url,
-        data=payload,
-        headers=_get_headers(request_method, headers, payload),
-        timeout=5,
+    _send_edge_request(
+        get_trait_edge_request(request_method, headers, project_id, payload)
     )
 
 
@@ -69,8 +175,36 @@ def forward_trait_requests(
     project_id: int,
     payload: dict,
 ):
-    for trait_data in payload:
-        forward_trait_request_sync(request_method, headers, project_id, trait_data)
+    # kept to process the tasks queued before forward_edge_requests was added
+    if not _should_forward(project_id):
+        return
+
+    _send_edge_request(
+        get_bulk_traits_edge_request(request_method, headers, project_id, payload)
+    )
+
+
+def _send_edge_request(edge_request: EdgeRequest) -> None:
+    request_method = edge_request["request_method"]
+    request_data = edge_request.get("request_data")
+    url = settings.EDGE_API_URL + edge_request["path"]
+
+    payload = json.dumps(request_data) if request_data else ""
+    headers = _get_headers(request_method, edge_request["headers"], payload)
+
+    if request_method == "GET":
+        http_session.get(
+            url, params=edge_request.get("query_params"), headers=headers, timeout=5
+        )
+        return
+
+    # the bulk traits endpoint only accepts PUT, the others only accept POST
+    send = (
+        http_session.put
+        if edge_request["path"] == "traits/bulk/"
+        else http_session.post
+    )
+    send(url, data=payload, headers=headers, timeout=5)
 
 
 def _get_headers(request_method: str, headers: dict, payload: str = "") -> dict:
@@ -84,3 +218,44 @@ def _get_headers(request_method: str, headers: dict, payload: str = "") -> dict:
     signature = sign_payload(payload, settings.EDGE_REQUEST_SIGNING_KEY)
     headers[FLAGSMITH_SIGNATURE_HEADER] = signature
     return headers
+
+
+class EdgeRequestForwarder(BufferedFlusher):
+    def __init__(self, flush_interval_seconds: float, batch_size: int):
+        super().__init__(flush_interval_seconds)
+        self.batch_size = batch_size
+
+        self._edge_requests: typing.List[EdgeRequest] = []
+
+    def forward(self, *edge_requests: EdgeRequest) -> None:
+        """
+        Forward the given requests to edge, either in a task of their own or, if
+        coalescing is enabled, in a task with any other requests queued in this
+        process during the flush interval.
+        """
+        if not self.flush_interval_seconds:
+            forward_edge_requests.delay(args=(list(edge_requests),))
+            return
+
+        with self._lock:
+            self._edge_requests.extend(edge_requests)
+            is_batch_full = len(self._edge_requests) >= self.batch_size
+            self._start_flusher()
+
+        if is_batch_full:
+            self._flush_requested.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            edge_requests, self._edge_requests = self._edge_requests, []
+
+        for start in range(0, len(edge_requests), self.batch_size):
+            end = start + self.batch_size
+            forward_edge_requests.delay(args=(edge_requests[start:end],))
+
+
+edge_request_forwarder = EdgeRequestForwarder(
+    flush_interval_seconds=settings.EDGE_REQUEST_FORWARDING_FLUSH_INTERVAL_SECONDS,
+    batch_size=settings.EDGE_REQUEST_FORWARDING_BATCH_SIZE,
+)
+edge_request_forwarder.register_flush_on_exit()
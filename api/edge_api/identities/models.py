@@ -1,17 +1,17 @@
-import copy
 import typing
 from contextlib import suppress
 
-from django.db.models import Prefetch, Q
-from flag_engine.features.models import FeatureStateModel
+from flag_engine.features.models import (
+    FeatureStateModel,
+    MultivariateFeatureStateValueModel,
+)
 from flag_engine.identities.builders import build_identity_model
 from flag_engine.identities.models import IdentityFeaturesList, IdentityModel
+from flag_engine.segments.evaluator import get_identity_segments
+from flag_engine.segments.models import SegmentModel
 
 from api_keys.models import MasterAPIKey
 from environments.dynamodb import DynamoIdentityWrapper
-from environments.models import Environment
-from features.models import FeatureState
-from features.multivariate.models import MultivariateFeatureStateValue
 from users.models import FFAdminUser
 from util.mappers import map_engine_identity_to_identity_document
 
@@ -19,6 +19,50 @@ from .audit import generate_change_dict
 from .tasks import generate_audit_log_records, sync_identity_document_features
 
 
+class FeatureOverrideSnapshot(typing.NamedTuple):
+    """
+    The state of a feature override when it was snapshotted, used to determine the
+    changes made to the feature overrides of an EdgeIdentity for the audit log.
+    """
+
+    feature_state: FeatureStateModel
+    enabled: bool
+    feature_state_value: typing.Any
+    multivariate_feature_state_values: typing.Tuple[
+        MultivariateFeatureStateValueModel, ...
+    ]
+
+    @classmethod
+    def from_feature_state(
+        cls, feature_state: FeatureStateModel
+    ) -> "FeatureOverrideSnapshot":
+        return cls(
+            feature_state=feature_state,
+            enabled=feature_state.enabled,
+            feature_state_value=feature_state.feature_state_value,
+            multivariate_feature_state_values=tuple(
+                feature_state.multivariate_feature_state_values
+            ),
+        )
+
+    def is_changed(self) -> bool:
+        return self != self.from_feature_state(self.feature_state)
+
+    def get_feature_state(self) -> FeatureStateModel:
+        """
+        Get a (shallow) copy of the feature state, as it was when it was snapshotted.
+        """
+        return self.feature_state.copy(
+            update={
+                "enabled": self.enabled,
+                "feature_state_value": self.feature_state_value,
+                "multivariate_feature_state_values": list(
+                    self.multivariate_feature_state_values
+                ),
+            }
+        )
+
+
 class EdgeIdentity:
     dynamo_wrapper = DynamoIdentityWrapper()
 
@@ -62,55 +106,32 @@ class EdgeIdentity:
     def get_all_feature_states(
         self,
     ) -> typing.Tuple[
-        typing.List[typing.Union[FeatureState, FeatureStateModel]], typing.Set[str]
+        typing.List[FeatureStateModel], typing.Set[str], typing.Dict[str, SegmentModel]
     ]:
         """
-        Get all feature states for a flag engine identity model. The list returned by
-        this function contains two distinct types: features.models.FeatureState &
-        flag_engine.features.models.FeatureStateModel.
+        Get all feature states for a flag engine identity model, evaluated against
+        the engine model of the identity's environment (see
+        DynamoEnvironmentWrapper.get_environment_model) rather than the database.
 
         :return: tuple of (list of feature states, set of feature names that were overridden
-            for the identity specifically)
+            for the identity specifically, dict of the segments which overrode the feature
+            states keyed on feature name)
         """
-        segment_ids = self.dynamo_wrapper.get_segment_ids(
-            identity_model=self._engine_identity_model
-        )
-        django_environment = Environment.objects.get(api_key=self.environment_api_key)
-
-        q = (
-            Q(version__isnull=False)
-            & Q(identity__isnull=True)
-            & (
-                Q(feature_segment__segment__id__in=segment_ids)
-                | Q(feature_segment__isnull=True)
-            )
-        )
-        environment_and_segment_feature_states = (
-            django_environment.feature_states.select_related(
-                "feature",
-                "feature_segment",
-                "feature_segment__segment",
-                "feature_state_value",
-            )
-            .prefetch_related(
-                Prefetch(
-                    "multivariate_feature_state_values",
-                    queryset=MultivariateFeatureStateValue.objects.select_related(
-                        "multivariate_feature_option"
-                    ),
-                )
-            )
-            .filter(q)
+        environment = self.dynamo_wrapper.environment_wrapper.get_environment_model(
+            self.environment_api_key
         )
 
-        feature_states = {}
-        for feature_state in environment_and_segment_feature_states:
-            feature_name = feature_state.feature.name
-            if (
-                feature_name not in feature_states
-                or feature_state > feature_states[feature_name]
-            ):
+        feature_states = {fs.feature.name: fs for fs in environment.feature_states}
+        segment_overrides = {}
+        for segment in get_identity_segments(environment, self._engine_identity_model):
+            for feature_state in segment.feature_states:
+                feature_name = feature_state.feature.name
+                if feature_name in feature_states and feature_states[
+                    feature_name
+                ].is_higher_segment_priority(feature_state):
+                    continue
                 feature_states[feature_name] = feature_state
+                segment_overrides[feature_name] = segment
 
         identity_feature_states = self.feature_overrides
         identity_feature_names = set()
@@ -118,8 +139,9 @@ class EdgeIdentity:
             feature_name = identity_feature_state.feature.name
             feature_states[feature_name] = identity_feature_state
             identity_feature_names.add(feature_name)
+            segment_overrides.pop(feature_name, None)
 
-        return list(feature_states.values()), identity_feature_names
+        return list(feature_states.values()), identity_feature_names, segment_overrides
 
     def get_feature_state_by_feature_name_or_id(
         self, feature: typing.Union[str, int]
@@ -161,7 +183,7 @@ class EdgeIdentity:
 
     def save(self, user: FFAdminUser = None, master_api_key: MasterAPIKey = None):
         self.dynamo_wrapper.put_item(self.to_document())
-        changes = self._get_changes(self._initial_state)
+        changes = self._get_changes()
         if changes["feature_overrides"]:
             # TODO: would this be simpler if we put a wrapper around FeatureStateModel instead?
             generate_audit_log_records.delay(
@@ -187,26 +209,33 @@ class EdgeIdentity:
     def to_document(self) -> dict:
         return map_engine_identity_to_identity_document(self._engine_identity_model)
 
-    def _get_changes(self, previous_instance: "EdgeIdentity") -> dict:
+    def _get_changes(self) -> dict:
         changes = {}
         feature_changes = changes.setdefault("feature_overrides", {})
-        previous_feature_overrides = {
-            fs.featurestate_uuid: fs for fs in previous_instance.feature_overrides
-        }
+        previous_feature_overrides = self._feature_override_snapshots
         current_feature_overrides = {
             fs.featurestate_uuid: fs for fs in self.feature_overrides
         }
 
-        for uuid_, previous_fs in previous_feature_overrides.items():
+        for uuid_, snapshot in previous_feature_overrides.items():
             current_matching_fs = current_feature_overrides.get(uuid_)
             if current_matching_fs is None:
-                feature_changes[previous_fs.feature.name] = generate_change_dict(
-                    change_type="-", identity=self, old=previous_fs
+                feature_changes[
+                    snapshot.feature_state.feature.name
+                ] = generate_change_dict(
+                    change_type="-", identity=self, old=snapshot.get_feature_state()
                 )
-            elif (
-                current_matching_fs.enabled != previous_fs.enabled
-                or current_matching_fs.get_value(self.id)
-                != previous_fs.get_value(self.id)
+                continue
+
+            if current_matching_fs is not snapshot.feature_state:
+                previous_fs = snapshot.get_feature_state()
+            elif snapshot.is_changed():
+                previous_fs = snapshot.get_feature_state()
+            else:
+                continue
+
+            if current_matching_fs.enabled != previous_fs.enabled or (
+                current_matching_fs.get_value(self.id) != previous_fs.get_value(self.id)
             ):
                 feature_changes[previous_fs.feature.name] = generate_change_dict(
                     change_type="~",
@@ -215,13 +244,19 @@ class EdgeIdentity:
                     old=previous_fs,
                 )
 
-        for uuid_, previous_fs in current_feature_overrides.items():
+        for uuid_, current_fs in current_feature_overrides.items():
             if uuid_ not in previous_feature_overrides:
-                feature_changes[previous_fs.feature.name] = generate_change_dict(
-                    change_type="+", identity=self, new=previous_fs
+                feature_changes[current_fs.feature.name] = generate_change_dict(
+                    change_type="+", identity=self, new=current_fs
                 )
 
         return changes
 
     def _reset_initial_state(self):
-        self._initial_state = copy.deepcopy(self)
+        # rather than copying the identity, only the state of its feature overrides
+        # is kept (by reference), since the overrides are replaced or updated in
+        # place by assigning new values to their fields
+        self._feature_override_snapshots = {
+            fs.featurestate_uuid: FeatureOverrideSnapshot.from_feature_state(fs)
+            for fs in self.feature_overrides
+        }
@@ -1,4 +1,3 @@
-import copy
 import typing
 
 from django.utils import timezone
@@ -147,7 +146,9 @@ class EdgeIdentityFeatureStateSerializer(serializers.Serializer):
         identity: EdgeIdentity = view.identity
         feature_state_value = self.validated_data.get("feature_state_value", None)
 
-        previous_state = copy.deepcopy(self.instance)
+        # a shallow copy is enough since the fields of the instance are reassigned
+        # (rather than mutated in place) below
+        previous_state = self.instance.copy() if self.instance else None
 
         if not self.instance:
             try:
@@ -269,6 +269,7 @@ class EdgeIdentityFeatureStateViewSet(viewsets.ModelViewSet):
         (
             feature_states,
             identity_feature_names,
+            segment_overrides,
         ) = self.identity.get_all_feature_states()
 
         serializer = IdentityAllFeatureStatesSerializer(
@@ -279,6 +280,7 @@ class EdgeIdentityFeatureStateViewSet(viewsets.ModelViewSet):
                 "identity": self.identity,
                 "environment_api_key": self.identity.environment_api_key,
                 "identity_feature_names": identity_feature_names,
+                "segment_overrides": segment_overrides,
             },
         )
 
@@ -0,0 +1,79 @@
+"""
+Process local (L1) cache of Environment objects which sits in front of the shared
+environment cache used by Environment.get_from_cache.
+
+To invalidate the local caches in all processes, each environment api key has a
+version stored in the shared cache which is changed whenever the environment cache
+is cleared. The local cache is keyed on the api key and the version so that, after
+the version changes, stale entries are no longer retrieved (and are eventually
+evicted).
+
+The versions themselves are cached locally for ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS
+so that the shared cache isn't hit on every request. Other processes therefore only
+see a change to an environment once that has passed, while the process making the
+change sees it straight away.
+
+The cached Environment objects are not copied, so the same instance is handed to
+concurrent requests (and threads) and must not be mutated.
+"""
+import typing
+import uuid
+
+from core.cache import LocalCache
+from django.conf import settings
+from django.core.cache import caches
+
+environment_cache = caches[settings.ENVIRONMENT_CACHE_NAME]
+
+environment_local_cache = LocalCache(
+    max_entries=settings.ENVIRONMENT_LOCAL_CACHE_MAX_ENTRIES,
+    timeout=settings.ENVIRONMENT_LOCAL_CACHE_SECONDS,
+)
+
+
+environment_cache_version_local_cache = LocalCache(
+    max_entries=settings.ENVIRONMENT_LOCAL_CACHE_MAX_ENTRIES,
+    timeout=settings.ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS,
+)
+
+
+def get_environment_cache_version(api_key: str) -> str:
+    if settings.ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS:
+        version = environment_cache_version_local_cache.get(api_key)
+        if version is not None:
+            return version
+
+    version_key = _get_version_key(api_key)
+    version = environment_cache.get(version_key)
+    if version is None:
+        # use add to avoid overwriting a version set by another process in
+        # the meantime
+        environment_cache.add(version_key, uuid.uuid4().hex, timeout=None)
+        version = environment_cache.get(version_key)
+
+    _set_local_version(api_key, version)
+    return version
+
+
+def bump_environment_cache_versions(api_keys: typing.Iterable[str]) -> None:
+    """
+    Invalidate the local environment caches in all processes for the given api keys.
+    """
+    api_keys = list(api_keys)
+    version = uuid.uuid4().hex
+    environment_cache.set_many(
+        {_get_version_key(api_key): version for api_key in api_keys}, timeout=None
+    )
+    for api_key in api_keys:
+        _set_local_version(api_key, version)
+
+
+def _set_local_version(api_key: str, version: str) -> None:
+    if settings.ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS:
+        environment_cache_version_local_cache.set(
+            api_key, version, timeout=settings.ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS
+        )
+
+
+def _get_version_key(api_key: str) -> str:
+    return f"{api_key}:version"
@@ -0,0 +1,273 @@
+"""
+Caches used to avoid rebuilding the environment documents from scratch.
+
+Mapping the rules and conditions of every segment in the project makes up most of
+the cost of building the environment documents, even though they are the same for
+every environment in the project and rarely change. The mapped segment rules are
+therefore cached per project and, when an audit log record is created for a
+segment, only the rules for that segment are rebuilt.
+
+To make sure that the cached rules never miss a change (e.g. if audit log records
+are processed out of order), they are stored along with the id of the last segment
+audit log record they include, and are only used if that matches the most recent
+segment audit log record for the project.
+
+Similarly, the engine models of the built environment documents are cached per
+environment, along with the id of the last audit log record they include for the
+environment (or its project). When an audit log record is created for a feature
+state (which includes its value and multivariate values), only the feature states
+of that environment are re-mapped and patched into the cached model. Any other
+change falls back to rebuilding the document in full.
+"""
+import typing
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max, Prefetch, Q
+from flag_engine.environments.models import EnvironmentModel
+from flag_engine.segments.models import SegmentRuleModel
+
+from audit.related_object_type import RelatedObjectType
+from features.models import FeatureState
+from features.multivariate.models import MultivariateFeatureStateValue
+from segments.models import Segment
+from util.mappers.engine import (
+    map_feature_states_to_engine_environment,
+    map_segment_rules_to_engine,
+)
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from audit.models import AuditLog
+    from projects.models import Project
+
+segment_rules_cache = caches[settings.SEGMENT_RULES_CACHE_LOCATION]
+built_environments_cache = caches[settings.BUILT_ENVIRONMENTS_CACHE_LOCATION]
+
+SegmentRulesBySegmentId = typing.Dict[int, typing.List[SegmentRuleModel]]
+
+
+@dataclass(frozen=True)
+class ProjectSegmentRules:
+    last_audit_log_id: int | None
+    rules_by_segment_id: SegmentRulesBySegmentId
+
+
+@dataclass(frozen=True)
+class BuiltEnvironment:
+    last_audit_log_id: int | None
+    environment_model: EnvironmentModel
+
+
+def get_project_segment_rules(
+    project: "Project", audit_log: typing.Optional["AuditLog"] = None
+) -> SegmentRulesBySegmentId:
+    """
+    Get the mapped rules for each of the project's segments, reusing the cached
+    rules where they are known to be up to date.
+
+    :param project: the project, with the segments prefetched
+    :param audit_log: the audit log record which triggered the rebuild, if any
+    """
+    is_segment_audit_log = (
+        audit_log is not None
+        and audit_log.related_object_type == RelatedObjectType.SEGMENT.name
+    )
+    last_audit_log_id = _get_last_segment_audit_log_id(
+        project.id, before_id=audit_log.id if audit_log else None
+    )
+
+    cache_key = str(project.id)
+    cached_segment_rules = segment_rules_cache.get(cache_key)
+    if (
+        cached_segment_rules
+        and cached_segment_rules.last_audit_log_id == last_audit_log_id
+    ):
+        rules_by_segment_id = dict(cached_segment_rules.rules_by_segment_id)
+        if is_segment_audit_log:
+            rules_by_segment_id.pop(audit_log.related_object_id, None)
+    else:
+        rules_by_segment_id = {}
+
+    if is_segment_audit_log:
+        last_audit_log_id = audit_log.id
+
+    segment_ids = {segment.id for segment in project.segments.all()}
+    missing_segment_ids = segment_ids.difference(rules_by_segment_id)
+    if missing_segment_ids:
+        rules_by_segment_id.update(_get_segment_rules(missing_segment_ids))
+
+    # drop any segments that have since been deleted
+    rules_by_segment_id = {
+        segment_id: rules
+        for segment_id, rules in rules_by_segment_id.items()
+        if segment_id in segment_ids
+    }
+
+    segment_rules_cache.set(
+        cache_key,
+        ProjectSegmentRules(
+            last_audit_log_id=last_audit_log_id,
+            rules_by_segment_id=rules_by_segment_id,
+        ),
+        timeout=settings.CACHE_SEGMENT_RULES_SECONDS,
+    )
+    return rules_by_segment_id
+
+
+def _get_segment_rules(segment_ids: typing.Iterable[int]) -> SegmentRulesBySegmentId:
+    segments = Segment.objects.filter(id__in=segment_ids).prefetch_related(
+        "rules",
+        "rules__rules",
+        "rules__conditions",
+        "rules__rules__conditions",
+        "rules__rules__rules",
+    )
+    return {segment.id: map_segment_rules_to_engine(segment) for segment in segments}
+
+
+def _get_last_segment_audit_log_id(
+    project_id: int, before_id: int = None
+) -> int | None:
+    from audit.models import AuditLog
+
+    audit_logs = AuditLog.objects.filter(
+        project_id=project_id, related_object_type=RelatedObjectType.SEGMENT.name
+    )
+    if before_id:
+        audit_logs = audit_logs.filter(id__lt=before_id)
+    return audit_logs.aggregate(last_id=Max("id"))["last_id"]
+
+
+def get_patched_environment_model(
+    audit_log: "AuditLog",
+) -> EnvironmentModel | None:
+    """
+    Get the engine model of the audit log record's environment by patching the
+    feature states of the cached model, if possible.
+
+    Returns None if the environment document needs rebuilding in full, i.e. if the
+    audit log record isn't for a feature state, or if there is no cached model which
+    includes every other change to the environment.
+    """
+    if not (
+        audit_log.environment_id
+        and audit_log.related_object_type == RelatedObjectType.FEATURE_STATE.name
+    ):
+        return None
+
+    cached_environment = built_environments_cache.get(str(audit_log.environment_id))
+    if not (
+        cached_environment
+        and cached_environment.last_audit_log_id
+        == _get_last_audit_log_ids(
+            audit_log.project_id,
+            environment_ids=[audit_log.environment_id],
+            before_id=audit_log.id,
+        )[audit_log.environment_id]
+    ):
+        return None
+
+    from environments.models import Environment
+
+    feature_states = FeatureState.objects.filter(
+        environment_id=audit_log.environment_id, identity__isnull=True
+    ).select_related("feature", "feature_state_value", "feature_segment")
+    feature_states = feature_states.prefetch_related(
+        Prefetch(
+            "multivariate_feature_state_values",
+            queryset=MultivariateFeatureStateValue.objects.select_related(
+                "multivariate_feature_option"
+            ),
+        ),
+    )
+    environment_model = map_feature_states_to_engine_environment(
+        cached_environment.environment_model, feature_states
+    ).copy(
+        update={
+            "updated_at": Environment.objects.values_list("updated_at", flat=True).get(
+                id=audit_log.environment_id
+            )
+        }
+    )
+
+    set_built_environments([environment_model], audit_log=audit_log)
+    return environment_model
+
+
+def set_built_environments(
+    environment_models: typing.Iterable[EnvironmentModel],
+    audit_log: typing.Optional["AuditLog"] = None,
+) -> None:
+    """
+    Cache the engine models of the environment documents which have just been
+    written, so that later feature state changes can be patched into them.
+
+    :param environment_models: the engine models, which must all belong to the
+        same project
+    :param audit_log: the audit log record which triggered the write, if any
+    """
+    environment_models = list(environment_models)
+    if not environment_models:
+        return
+
+    if audit_log:
+        last_audit_log_ids = {}
+    else:
+        last_audit_log_ids = _get_last_audit_log_ids(
+            environment_models[0].project.id,
+            environment_ids=[
+                environment_model.id for environment_model in environment_models
+            ],
+        )
+
+    built_environments_cache.set_many(
+        {
+            str(environment_model.id): BuiltEnvironment(
+                last_audit_log_id=(
+                    audit_log.id
+                    if audit_log
+                    else last_audit_log_ids[environment_model.id]
+                ),
+                environment_model=environment_model,
+            )
+            for environment_model in environment_models
+        },
+        timeout=settings.CACHE_BUILT_ENVIRONMENTS_SECONDS,
+    )
+
+
+def _get_last_audit_log_ids(
+    project_id: int, environment_ids: typing.Iterable[int], before_id: int = None
+) -> typing.Dict[int, int | None]:
+    """
+    Get the id of the last audit log record for each of the given environments,
+    including those which apply to every environment in the project.
+    """
+    from audit.models import AuditLog
+
+    environment_ids = list(environment_ids)
+    audit_logs = AuditLog.objects.filter(
+        Q(environment_id__in=environment_ids) | Q(environment_id__isnull=True),
+        project_id=project_id,
+    )
+    if before_id:
+        audit_logs = audit_logs.filter(id__lt=before_id)
+    last_ids_by_environment_id = dict(
+        audit_logs.order_by().values_list("environment_id").annotate(Max("id"))
+    )
+
+    last_project_audit_log_id = last_ids_by_environment_id.get(None)
+    return {
+        environment_id: max(
+            filter(
+                None,
+                (
+                    last_ids_by_environment_id.get(environment_id),
+                    last_project_audit_log_id,
+                ),
+            ),
+            default=None,
+        )
+        for environment_id in environment_ids
+    }
@@ -1,30 +1,58 @@
 import logging
+import threading
 import typing
 from contextlib import suppress
 from typing import Iterable
 
 import boto3
 from boto3.dynamodb.conditions import Key
+from core.cache import LocalCache
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from flag_engine.environments.builders import build_environment_model
+from flag_engine.environments.models import EnvironmentModel
 from flag_engine.identities.builders import build_identity_model
 from flag_engine.identities.models import IdentityModel
 from flag_engine.segments.evaluator import get_identity_segments
 from rest_framework.exceptions import NotFound
 
+from environments.cache import (
+    bump_environment_cache_versions,
+    get_environment_cache_version,
+)
 from util.mappers import (
+    map_engine_environment_to_environment_document,
     map_environment_api_key_to_environment_api_key_document,
-    map_environment_to_environment_document,
     map_identity_to_identity_document,
 )
+from util.mappers.engine import map_environment_to_engine
 
 if typing.TYPE_CHECKING:
+    from flag_engine.segments.models import SegmentRuleModel
+
     from environments.identities.models import Identity
     from environments.models import Environment, EnvironmentAPIKey
 
 logger = logging.getLogger()
 
+# creating a boto3 resource is expensive (it creates a new session and client) so the
+# wrappers share a resource. Resources aren't thread safe though, so each thread gets
+# its own, created from a session of its own.
+_dynamodb_resources = threading.local()
+
+environment_model_cache = LocalCache(
+    max_entries=settings.ENVIRONMENT_MODEL_CACHE_MAX_ENTRIES,
+    timeout=settings.CACHE_ENVIRONMENT_MODEL_SECONDS,
+)
+
+
+def get_dynamodb_resource():
+    resource = getattr(_dynamodb_resources, "resource", None)
+    if resource is None:
+        resource = boto3.session.Session().resource("dynamodb")
+        _dynamodb_resources.resource = resource
+    return resource
+
 
 class DynamoWrapper:
     table_name: str = None
@@ -32,7 +60,7 @@ class DynamoWrapper:
     def __init__(self):
         self._table = None
         if self.table_name:
-            self._table = boto3.resource("dynamodb").Table(self.table_name)
+            self._table = get_dynamodb_resource().Table(self.table_name)
 
     @property
     def is_enabled(self) -> bool:
@@ -42,6 +70,10 @@ class DynamoWrapper:
 class DynamoIdentityWrapper(DynamoWrapper):
     table_name = settings.IDENTITIES_TABLE_NAME_DYNAMO
 
+    def __init__(self):
+        super().__init__()
+        self._environment_wrapper = None
+
     def query_items(self, *args, **kwargs):
         return self._table.query(*args, **kwargs)
 
@@ -128,15 +160,20 @@ class DynamoIdentityWrapper(DynamoWrapper):
             identity = identity_model or build_identity_model(
                 self.get_item_from_uuid(identity_pk)
             )
-            environment_wrapper = DynamoEnvironmentWrapper()
-            environment = build_environment_model(
-                environment_wrapper.get_item(identity.environment_api_key)
+            environment = self.environment_wrapper.get_environment_model(
+                identity.environment_api_key
             )
             segments = get_identity_segments(environment, identity)
             return [segment.id for segment in segments]
 
         return []
 
+    @property
+    def environment_wrapper(self) -> "DynamoEnvironmentWrapper":
+        if self._environment_wrapper is None:
+            self._environment_wrapper = DynamoEnvironmentWrapper()
+        return self._environment_wrapper
+
 
 class DynamoEnvironmentWrapper(DynamoWrapper):
     table_name = settings.ENVIRONMENTS_TABLE_NAME_DYNAMO
@@ -144,12 +181,41 @@ class DynamoEnvironmentWrapper(DynamoWrapper):
     def write_environment(self, environment: "Environment"):
         self.write_environments([environment])
 
-    def write_environments(self, environments: Iterable["Environment"]):
+    def write_environments(
+        self,
+        environments: Iterable["Environment"],
+        segment_rules_by_segment_id: typing.Dict[
+            int, typing.List["SegmentRuleModel"]
+        ] = None,
+    ) -> typing.List[EnvironmentModel]:
+        """
+        Write the documents for the given environments, returning the engine models
+        they were built from.
+        """
+        environment_models = [
+            map_environment_to_engine(
+                environment, segment_rules_by_segment_id=segment_rules_by_segment_id
+            )
+            for environment in environments
+        ]
+        self.write_environment_models(environment_models)
+        return environment_models
+
+    def write_environment_models(
+        self, environment_models: Iterable[EnvironmentModel]
+    ) -> None:
+        api_keys = []
         with self._table.batch_writer() as writer:
-            for environment in environments:
+            for environment_model in environment_models:
                 writer.put_item(
-                    Item=map_environment_to_environment_document(environment),
+                    Item=map_engine_environment_to_environment_document(
+                        environment_model
+                    ),
                 )
+                api_keys.append(environment_model.api_key)
+
+        # invalidate the environment models cached by get_environment_model
+        bump_environment_cache_versions(api_keys)
 
     def get_item(self, api_key: str) -> dict:
         try:
@@ -157,6 +223,34 @@ class DynamoEnvironmentWrapper(DynamoWrapper):
         except KeyError as e:
             raise ObjectDoesNotExist() from e
 
+    def get_environment_model(self, api_key: str) -> EnvironmentModel:
+        """
+        Get the engine model of the environment with the given api key.
+
+        If enabled, the models are cached in the process local cache for
+        CACHE_ENVIRONMENT_MODEL_SECONDS, to avoid retrieving and parsing the
+        environment document on every call. The cached models are keyed on the
+        environment cache version (see environments.cache), which is changed when
+        the environment document is written, so that changes are picked up without
+        waiting for the cached model to expire. Cached models are shared between
+        callers and must not be mutated.
+        """
+        if not settings.CACHE_ENVIRONMENT_MODEL_SECONDS:
+            return build_environment_model(self.get_item(api_key))
+
+        cache_key = (api_key, get_environment_cache_version(api_key))
+        environment_model = environment_model_cache.get(cache_key)
+        if environment_model is not None:
+            return environment_model
+
+        environment_model = build_environment_model(self.get_item(api_key))
+        environment_model_cache.set(
+            cache_key,
+            environment_model,
+            timeout=settings.CACHE_ENVIRONMENT_MODEL_SECONDS,
+        )
+        return environment_model
+
 
 class DynamoEnvironmentAPIKeyWrapper(DynamoWrapper):
     table_name = settings.ENVIRONMENTS_API_KEY_TABLE_NAME_DYNAMO
@@ -1,4 +1,10 @@
-from django.db.models import Prefetch
+import typing
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Prefetch, QuerySet
 
 from edge_api.identities.events import send_migration_event
 from environments.identities.models import Identity
@@ -6,7 +12,6 @@ from environments.models import Environment, EnvironmentAPIKey
 from features.models import FeatureState
 from features.multivariate.models import MultivariateFeatureStateValue
 from projects.models import Project
-from util.queryset import iterator_with_prefetch
 
 from .dynamodb_wrapper import (
     DynamoEnvironmentAPIKeyWrapper,
@@ -15,6 +20,10 @@ from .dynamodb_wrapper import (
 )
 from .types import DynamoProjectMetadata, ProjectIdentityMigrationStatus
 
+# called with the number of identities migrated so far and the total number of
+# identities in the project
+ProgressCallback = typing.Callable[[int, int], None]
+
 
 class IdentityMigrator:
     def __init__(self, project_id):
@@ -36,6 +45,13 @@ class IdentityMigrator:
             ProjectIdentityMigrationStatus.MIGRATION_SCHEDULED,
         )
 
+    @property
+    def can_resume(self) -> bool:
+        return (
+            self.migration_status
+            == ProjectIdentityMigrationStatus.MIGRATION_IN_PROGRESS
+        )
+
     def trigger_migration(self):
         # Note: since we mark the project as `migration in progress` before we start the migration,
         # there is a small chance for the project of being stuck in `migration in progress`
@@ -44,8 +60,14 @@ class IdentityMigrator:
         send_migration_event(self.project_metadata.id)
         self.project_metadata.trigger_identity_migration()
 
-    def migrate(self):
-        self.project_metadata.start_identity_migration()
+    def migrate(self, resume: bool = False, progress_callback: ProgressCallback = None):
+        """
+        Migrate the project's identities to dynamodb. If `resume` is True, an
+        interrupted migration is resumed after the last chunk of identities which
+        was migrated.
+        """
+        if not resume:
+            self.project_metadata.start_identity_migration()
 
         project_id = self.project_metadata.id
 
@@ -60,25 +82,120 @@ class IdentityMigrator:
         api_keys = EnvironmentAPIKey.objects.filter(environment__project_id=project_id)
         api_key_wrapper.write_api_keys(api_keys)
 
-        identity_wrapper = DynamoIdentityWrapper()
-        identities = (
-            Identity.objects.filter(environment__project__id=project_id)
-            .select_related("environment")
-            .prefetch_related(
-                "identity_traits",
-                Prefetch(
-                    "identity_features",
-                    queryset=FeatureState.objects.select_related(
-                        "feature", "feature_state_value"
-                    ),
+        self._migrate_identities(progress_callback)
+        self.project_metadata.finish_identity_migration()
+
+    def _migrate_identities(self, progress_callback: ProgressCallback = None):
+        identities = Identity.objects.filter(
+            environment__project__id=self.project_metadata.id
+        )
+
+        last_migrated_identity_id = self.project_metadata.last_migrated_identity_id
+        last_migrated_identity_id = int(last_migrated_identity_id or 0)
+
+        total = identities.count()
+        migrated = identities.filter(id__lte=last_migrated_identity_id).count()
+        if progress_callback:
+            progress_callback(migrated, total)
+
+        # the chunks are written concurrently, but the checkpoint is only moved
+        # past a chunk once it, and all of the chunks before it, have been written
+        pending_chunks: typing.Deque[typing.Tuple[int, int, Future]] = deque()
+        max_pending_chunks = settings.IDENTITY_MIGRATION_MAX_WORKERS * 2
+
+        executor = ThreadPoolExecutor(
+            max_workers=settings.IDENTITY_MIGRATION_MAX_WORKERS
+        )
+        try:
+            for first_id, last_id, count in _get_identity_id_chunks(
+                identities, start_after=last_migrated_identity_id
+            ):
+                future = executor.submit(
+                    _write_identities,
+                    identities.filter(id__gte=first_id, id__lte=last_id),
+                )
+                pending_chunks.append((last_id, count, future))
+
+                wait = len(pending_chunks) >= max_pending_chunks
+                checkpointed = self._checkpoint(pending_chunks, wait)
+                if checkpointed:
+                    migrated += checkpointed
+                    if progress_callback:
+                        progress_callback(migrated, total)
+
+            while pending_chunks:
+                migrated += self._checkpoint(pending_chunks, wait=True)
+                if progress_callback:
+                    progress_callback(migrated, total)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _checkpoint(
+        self,
+        pending_chunks: typing.Deque[typing.Tuple[int, int, Future]],
+        wait: bool,
+    ) -> int:
+        """
+        Checkpoint the migration after the leading chunks which have been written
+        (waiting for at least one to be written if `wait` is True), returning the
+        number of identities checkpointed.
+        """
+        last_identity_id = None
+        checkpointed = 0
+        while pending_chunks and (wait or pending_chunks[0][2].done()):
+            last_identity_id, count, future = pending_chunks.popleft()
+            future.result()
+            checkpointed += count
+            wait = False
+
+        if last_identity_id is not None:
+            self.project_metadata.checkpoint_identity_migration(last_identity_id)
+        return checkpointed
+
+
+def _get_identity_id_chunks(
+    identities: QuerySet, start_after: int
+) -> typing.Iterator[typing.Tuple[int, int, int]]:
+    """
+    Split the identities into chunks of consecutive ids using keyset pagination,
+    yielding the first id, last id and number of identities of each chunk.
+    """
+    chunk_size = settings.IDENTITY_MIGRATION_CHUNK_SIZE
+    while True:
+        identity_ids = list(
+            identities.filter(id__gt=start_after)
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        if not identity_ids:
+            return
+
+        yield identity_ids[0], identity_ids[-1], len(identity_ids)
+        start_after = identity_ids[-1]
+
+
+def _write_identities(identities: QuerySet):
+    # the wrapper (and its boto3 resource) is created in the executor's thread
+    # since boto3 resources can't be shared between threads
+    identity_wrapper = DynamoIdentityWrapper()
+    try:
+        identities = identities.select_related("environment").prefetch_related(
+            "identity_traits",
+            Prefetch(
+                "identity_features",
+                queryset=FeatureState.objects.select_related(
+                    "feature", "feature_state_value"
                 ),
-                Prefetch(
-                    "identity_features__multivariate_feature_state_values",
-                    queryset=MultivariateFeatureStateValue.objects.select_related(
-                        "multivariate_feature_option"
-                    ),
+            ),
+            Prefetch(
+                "identity_features__multivariate_feature_state_values",
+                queryset=MultivariateFeatureStateValue.objects.select_related(
+                    "multivariate_feature_option"
                 ),
-            )
+            ),
         )
-        identity_wrapper.write_identities(iterator_with_prefetch(identities))
-        self.project_metadata.finish_identity_migration()
+        identity_wrapper.write_identities(identities)
+    finally:
+        # the chunks are written by the executor's threads, which each have
+        # their own database connections
+        connections.close_all()
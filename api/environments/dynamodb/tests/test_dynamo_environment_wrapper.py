@@ -1,7 +1,19 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
 
-from environments.dynamodb import DynamoEnvironmentWrapper
+from environments.dynamodb import (
+    DynamoEnvironmentWrapper,
+    DynamoIdentityWrapper,
+)
+from environments.dynamodb.dynamodb_wrapper import (
+    environment_model_cache,
+    get_dynamodb_resource,
+)
 from environments.models import Environment
 from util.mappers import map_environment_to_environment_document
 
@@ -59,3 +71,183 @@ def test_get_item_raises_object_does_not_exists_if_get_item_does_not_return_any_
     # Then
     with pytest.raises(ObjectDoesNotExist):
         dynamo_environment_wrapper.get_item(api_key)
+
+
+def test_get_environment_model__cache_disabled__builds_model_on_every_call(
+    mocker, environment, settings
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_MODEL_SECONDS = 0
+
+    dynamo_environment_wrapper = DynamoEnvironmentWrapper()
+    mocked_get_item = mocker.patch.object(
+        dynamo_environment_wrapper,
+        "get_item",
+        return_value=map_environment_to_environment_document(environment),
+    )
+
+    # When
+    environment_model_1 = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+    environment_model_2 = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+
+    # Then
+    assert environment_model_1.id == environment_model_2.id == environment.id
+    assert mocked_get_item.call_count == 2
+
+
+def test_get_environment_model__cache_enabled__returns_cached_model(
+    mocker, environment, settings
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_MODEL_SECONDS = 60
+    mocker.patch.object(environment_model_cache, "_data", OrderedDict())
+
+    dynamo_environment_wrapper = DynamoEnvironmentWrapper()
+    mocked_get_item = mocker.patch.object(
+        dynamo_environment_wrapper,
+        "get_item",
+        return_value=map_environment_to_environment_document(environment),
+    )
+
+    # When
+    environment_model_1 = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+    environment_model_2 = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+
+    # Then
+    assert environment_model_1 is environment_model_2
+    mocked_get_item.assert_called_once_with(environment.api_key)
+
+
+def test_get_environment_model__cache_enabled__rebuilds_model_once_expired(
+    mocker, environment, settings
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_MODEL_SECONDS = 60
+    mocker.patch.object(environment_model_cache, "_data", OrderedDict())
+    mocked_monotonic = mocker.patch("core.cache.time.monotonic", return_value=0)
+
+    dynamo_environment_wrapper = DynamoEnvironmentWrapper()
+    mocked_get_item = mocker.patch.object(
+        dynamo_environment_wrapper,
+        "get_item",
+        return_value=map_environment_to_environment_document(environment),
+    )
+    dynamo_environment_wrapper.get_environment_model(environment.api_key)
+
+    environment.updated_at = timezone.now()
+    environment.save()
+    mocked_get_item.return_value = map_environment_to_environment_document(environment)
+    mocked_monotonic.return_value = 61
+
+    # When
+    environment_model = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+
+    # Then
+    assert environment_model.updated_at == environment.updated_at
+    assert mocked_get_item.call_count == 2
+
+
+def test_get_environment_model__cache_enabled__does_not_query_the_database(
+    mocker, environment, settings, django_assert_num_queries
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_MODEL_SECONDS = 60
+    mocker.patch.object(environment_model_cache, "_data", OrderedDict())
+
+    dynamo_environment_wrapper = DynamoEnvironmentWrapper()
+    mocker.patch.object(
+        dynamo_environment_wrapper,
+        "get_item",
+        return_value=map_environment_to_environment_document(environment),
+    )
+    cached_environment_model = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+
+    # When
+    with django_assert_num_queries(0):
+        environment_model = dynamo_environment_wrapper.get_environment_model(
+            environment.api_key
+        )
+
+    # Then
+    assert environment_model is cached_environment_model
+
+
+def test_get_environment_model__cache_enabled__rebuilds_model_once_written(
+    mocker, environment, settings
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_MODEL_SECONDS = 60
+    mocker.patch.object(environment_model_cache, "_data", OrderedDict())
+
+    dynamo_environment_wrapper = DynamoEnvironmentWrapper()
+    mocker.patch.object(dynamo_environment_wrapper, "_table")
+    mocked_get_item = mocker.patch.object(
+        dynamo_environment_wrapper,
+        "get_item",
+        return_value=map_environment_to_environment_document(environment),
+    )
+    cached_environment_model = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+
+    # When
+    dynamo_environment_wrapper.write_environments([environment])
+    environment_model = dynamo_environment_wrapper.get_environment_model(
+        environment.api_key
+    )
+
+    # Then
+    assert environment_model is not cached_environment_model
+    assert mocked_get_item.call_count == 2
+
+
+def test_dynamo_wrappers_share_dynamodb_resource_within_a_thread(mocker):
+    # Given
+    mocked_boto3 = mocker.patch("environments.dynamodb.dynamodb_wrapper.boto3")
+    mocker.patch(
+        "environments.dynamodb.dynamodb_wrapper._dynamodb_resources", threading.local()
+    )
+    mocker.patch.object(DynamoEnvironmentWrapper, "table_name", "environments")
+    mocker.patch.object(DynamoIdentityWrapper, "table_name", "identities")
+    mocked_resource = mocked_boto3.session.Session.return_value.resource
+
+    # When
+    DynamoEnvironmentWrapper()
+    DynamoIdentityWrapper()
+
+    # Then
+    mocked_resource.assert_called_once_with("dynamodb")
+    mocked_resource.return_value.Table.assert_has_calls(
+        [mocker.call("environments"), mocker.call("identities")]
+    )
+
+
+def test_get_dynamodb_resource_creates_a_resource_per_thread(mocker):
+    # Given
+    mocked_boto3 = mocker.patch("environments.dynamodb.dynamodb_wrapper.boto3")
+    mocker.patch(
+        "environments.dynamodb.dynamodb_wrapper._dynamodb_resources", threading.local()
+    )
+    mocked_boto3.session.Session.side_effect = lambda: mocker.MagicMock()
+
+    # When
+    resource = get_dynamodb_resource()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other_thread_resource = executor.submit(get_dynamodb_resource).result()
+
+    # Then
+    assert get_dynamodb_resource() is resource
+    assert other_thread_resource is not resource
+    assert mocked_boto3.session.Session.call_count == 2
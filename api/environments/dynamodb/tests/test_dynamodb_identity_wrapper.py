@@ -1,3 +1,4 @@
+import threading
 import typing
 
 import pytest
@@ -238,8 +239,7 @@ def test_is_enabled_is_false_if_dynamo_table_name_is_not_set(settings, mocker):
 
     # Then
     assert dynamo_identity_wrapper.is_enabled is False
-    mocked_boto3.resource.assert_not_called()
-    mocked_boto3.resource.return_value.Table.assert_not_called()
+    mocked_boto3.session.Session.assert_not_called()
 
 
 def test_is_enabled_is_true_if_dynamo_table_name_is_set(settings, mocker):
@@ -250,14 +250,18 @@ def test_is_enabled_is_true_if_dynamo_table_name_is_set(settings, mocker):
         table_name,
     )
     mocked_boto3 = mocker.patch("environments.dynamodb.dynamodb_wrapper.boto3")
+    mocker.patch(
+        "environments.dynamodb.dynamodb_wrapper._dynamodb_resources", threading.local()
+    )
+    mocked_resource = mocked_boto3.session.Session.return_value.resource
 
     # When
     dynamo_identity_wrapper = DynamoIdentityWrapper()
     # Then
 
     assert dynamo_identity_wrapper.is_enabled is True
-    mocked_boto3.resource.assert_called_with("dynamodb")
-    mocked_boto3.resource.return_value.Table.assert_called_with(table_name)
+    mocked_resource.assert_called_with("dynamodb")
+    mocked_resource.return_value.Table.assert_called_with(table_name)
 
 
 def test_get_segment_ids_returns_correct_segment_ids(
@@ -274,10 +278,10 @@ def test_get_segment_ids_returns_correct_segment_ids(
     identity_uuid = identity_document["identity_uuid"]
 
     environment_document = map_environment_to_environment_document(environment)
-    mocked_environment_wrapper = mocker.patch(
-        "environments.dynamodb.dynamodb_wrapper.DynamoEnvironmentWrapper"
+    mocked_get_environment_item = mocker.patch(
+        "environments.dynamodb.dynamodb_wrapper.DynamoEnvironmentWrapper.get_item",
+        return_value=environment_document,
     )
-    mocked_environment_wrapper.return_value.get_item.return_value = environment_document
 
     # When
     segment_ids = dynamo_identity_wrapper.get_segment_ids(identity_uuid)
@@ -285,9 +289,7 @@ def test_get_segment_ids_returns_correct_segment_ids(
     # Then
     assert segment_ids == [identity_matching_segment.id]
     mocked_get_item_from_uuid.assert_called_with(identity_uuid)
-    mocked_environment_wrapper.return_value.get_item.assert_called_with(
-        environment.api_key
-    )
+    mocked_get_environment_item.assert_called_with(environment.api_key)
 
 
 def test_get_segment_ids_returns_segment_using_in_operator_for_integer_traits(
@@ -319,10 +321,10 @@ def test_get_segment_ids_returns_segment_using_in_operator_for_integer_traits(
     identity_uuid = identity_document["identity_uuid"]
 
     environment_document = map_environment_to_environment_document(environment)
-    mocked_environment_wrapper = mocker.patch(
-        "environments.dynamodb.dynamodb_wrapper.DynamoEnvironmentWrapper"
+    mocker.patch(
+        "environments.dynamodb.dynamodb_wrapper.DynamoEnvironmentWrapper.get_item",
+        return_value=environment_document,
     )
-    mocked_environment_wrapper.return_value.get_item.return_value = environment_document
 
     # When
     segment_ids = dynamo_identity_wrapper.get_segment_ids(identity_uuid)
@@ -384,10 +386,10 @@ def test_get_segment_ids_with_identity_model(identity, environment, mocker):
     )
 
     environment_document = map_environment_to_environment_document(environment)
-    mocked_environment_wrapper = mocker.patch(
-        "environments.dynamodb.dynamodb_wrapper.DynamoEnvironmentWrapper"
+    mocker.patch(
+        "environments.dynamodb.dynamodb_wrapper.DynamoEnvironmentWrapper.get_item",
+        return_value=environment_document,
     )
-    mocked_environment_wrapper.return_value.get_item.return_value = environment_document
 
     # When
     segment_ids = dynamo_identity_wrapper.get_segment_ids(identity_model=identity_model)
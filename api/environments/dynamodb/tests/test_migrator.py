@@ -1,3 +1,7 @@
+import threading
+from decimal import Decimal
+
+import pytest
 from pytest_django.asserts import assertQuerysetEqual as assert_queryset_equal
 
 from environments.dynamodb.migrator import IdentityMigrator
@@ -26,7 +30,7 @@ def test_migrate_calls_internal_methods_with_correct_arguments(
         "environments.dynamodb.migrator.DynamoEnvironmentAPIKeyWrapper", autospec=True
     )
     mocked_project_metadata_instance = mocker.MagicMock(
-        spec=DynamoProjectMetadata, id=project.id
+        spec=DynamoProjectMetadata, id=project.id, last_migrated_identity_id=None
     )
     mocked_project_metadata.get_or_new.return_value = mocked_project_metadata_instance
 
@@ -64,6 +68,10 @@ def test_migrate_calls_internal_methods_with_correct_arguments(
 
     # and, Make sure that Project Metadata Wrapper was called correctly
     mocked_project_metadata.get_or_new.assert_called_with(project.id)
+    mocked_project_metadata_instance.start_identity_migration.assert_called_once_with()
+    mocked_project_metadata_instance.checkpoint_identity_migration.assert_called_once_with(
+        identity.id
+    )
     mocked_project_metadata_instance.finish_identity_migration.assert_called_once_with()
     project.refresh_from_db()
 
@@ -166,3 +174,153 @@ def test_get_migration_status_returns_correct_migraion_status_for_in_progress_mi
     # Then
     assert status == ProjectIdentityMigrationStatus.MIGRATION_IN_PROGRESS
     mocked_project_metadata.get_or_new.assert_called_with(project_id)
+
+
+def test_migrate__multiple_chunks__writes_all_identities_and_checkpoints(
+    mocker, project, environment, settings
+):
+    # Given
+    settings.IDENTITY_MIGRATION_CHUNK_SIZE = 2
+    settings.IDENTITY_MIGRATION_MAX_WORKERS = 2
+
+    identities = [
+        Identity.objects.create(identifier=f"identity_{i}", environment=environment)
+        for i in range(5)
+    ]
+
+    mocked_project_metadata = mocker.patch(
+        "environments.dynamodb.migrator.DynamoProjectMetadata", autospec=True
+    )
+    mocker.patch(
+        "environments.dynamodb.migrator.DynamoEnvironmentWrapper", autospec=True
+    )
+    mocker.patch(
+        "environments.dynamodb.migrator.DynamoEnvironmentAPIKeyWrapper", autospec=True
+    )
+    mocked_identity_wrapper = mocker.patch(
+        "environments.dynamodb.migrator.DynamoIdentityWrapper", autospec=True
+    )
+    identity_wrapper_threads = []
+
+    def create_identity_wrapper():
+        identity_wrapper_threads.append(threading.current_thread())
+        return mocker.DEFAULT
+
+    mocked_identity_wrapper.side_effect = create_identity_wrapper
+    mocked_project_metadata_instance = mocker.MagicMock(
+        spec=DynamoProjectMetadata, id=project.id, last_migrated_identity_id=None
+    )
+    mocked_project_metadata.get_or_new.return_value = mocked_project_metadata_instance
+    progress_callback = mocker.MagicMock()
+
+    identity_migrator = IdentityMigrator(project.id)
+
+    # When
+    identity_migrator.migrate(progress_callback=progress_callback)
+
+    # Then
+    write_identities_calls = (
+        mocked_identity_wrapper.return_value.write_identities.call_args_list
+    )
+    assert [
+        [identity.id for identity in args[0]] for args, _ in write_identities_calls
+    ] == [
+        [identities[0].id, identities[1].id],
+        [identities[2].id, identities[3].id],
+        [identities[4].id],
+    ]
+
+    checkpoint_calls = (
+        mocked_project_metadata_instance.checkpoint_identity_migration.call_args_list
+    )
+    assert checkpoint_calls[-1] == mocker.call(identities[4].id)
+
+    assert progress_callback.call_args_list[0] == mocker.call(0, 5)
+    assert progress_callback.call_args_list[-1] == mocker.call(5, 5)
+
+    # a wrapper is created for each chunk, in the thread writing it
+    assert len(identity_wrapper_threads) == 3
+    assert threading.current_thread() not in identity_wrapper_threads
+
+
+def test_migrate__resume__only_writes_identities_after_checkpoint(
+    mocker, project, environment
+):
+    # Given
+    identities = [
+        Identity.objects.create(identifier=f"identity_{i}", environment=environment)
+        for i in range(3)
+    ]
+
+    mocked_project_metadata = mocker.patch(
+        "environments.dynamodb.migrator.DynamoProjectMetadata", autospec=True
+    )
+    mocker.patch(
+        "environments.dynamodb.migrator.DynamoEnvironmentWrapper", autospec=True
+    )
+    mocker.patch(
+        "environments.dynamodb.migrator.DynamoEnvironmentAPIKeyWrapper", autospec=True
+    )
+    mocked_identity_wrapper = mocker.patch(
+        "environments.dynamodb.migrator.DynamoIdentityWrapper", autospec=True
+    )
+    mocked_project_metadata_instance = mocker.MagicMock(
+        spec=DynamoProjectMetadata,
+        id=project.id,
+        last_migrated_identity_id=Decimal(identities[0].id),
+    )
+    mocked_project_metadata.get_or_new.return_value = mocked_project_metadata_instance
+    progress_callback = mocker.MagicMock()
+
+    identity_migrator = IdentityMigrator(project.id)
+
+    # When
+    identity_migrator.migrate(resume=True, progress_callback=progress_callback)
+
+    # Then
+    mocked_project_metadata_instance.start_identity_migration.assert_not_called()
+
+    args, _ = mocked_identity_wrapper.return_value.write_identities.call_args
+    assert [identity.id for identity in args[0]] == [
+        identities[1].id,
+        identities[2].id,
+    ]
+
+    mocked_project_metadata_instance.checkpoint_identity_migration.assert_called_once_with(
+        identities[2].id
+    )
+    mocked_project_metadata_instance.finish_identity_migration.assert_called_once_with()
+    assert progress_callback.call_args_list == [mocker.call(1, 3), mocker.call(3, 3)]
+
+
+def test_migrate__chunk_fails__does_not_checkpoint_or_finish_migration(
+    mocker, project, identity
+):
+    # Given
+    mocked_project_metadata = mocker.patch(
+        "environments.dynamodb.migrator.DynamoProjectMetadata", autospec=True
+    )
+    mocker.patch(
+        "environments.dynamodb.migrator.DynamoEnvironmentWrapper", autospec=True
+    )
+    mocker.patch(
+        "environments.dynamodb.migrator.DynamoEnvironmentAPIKeyWrapper", autospec=True
+    )
+    mocked_identity_wrapper = mocker.patch(
+        "environments.dynamodb.migrator.DynamoIdentityWrapper", autospec=True
+    )
+    mocked_identity_wrapper.return_value.write_identities.side_effect = Exception
+    mocked_project_metadata_instance = mocker.MagicMock(
+        spec=DynamoProjectMetadata, id=project.id, last_migrated_identity_id=None
+    )
+    mocked_project_metadata.get_or_new.return_value = mocked_project_metadata_instance
+
+    identity_migrator = IdentityMigrator(project.id)
+
+    # When
+    with pytest.raises(Exception):
+        identity_migrator.migrate()
+
+    # Then
+    mocked_project_metadata_instance.checkpoint_identity_migration.assert_not_called()
+    mocked_project_metadata_instance.finish_identity_migration.assert_not_called()
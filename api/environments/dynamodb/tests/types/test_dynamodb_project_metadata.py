@@ -81,6 +81,7 @@ def test_start_identity_migration_calls_put_item_with_correct_arguments(mocker):
             "migration_end_time": None,
             "migration_start_time": migration_start_time.isoformat(),
             "triggered_at": None,
+            "last_migrated_identity_id": None,
         }
     )
 
@@ -144,5 +145,43 @@ def test_finish_identity_migration_calls_put_item_with_correct_arguments(
             "migration_start_time": migration_start_time,
             "migration_end_time": migration_end_time.isoformat(),
             "triggered_at": None,
+            "last_migrated_identity_id": None,
         }
     )
+
+
+def test_checkpoint_identity_migration_saves_last_migrated_identity_id(mocker):
+    # Given
+    mocked_dynamo_table = mocker.patch(
+        "environments.dynamodb.types.project_metadata_table"
+    )
+    migration_start_time = datetime.now().isoformat()
+    project_metadata = DynamoProjectMetadata(
+        id=1, migration_start_time=migration_start_time
+    )
+
+    # When
+    project_metadata.checkpoint_identity_migration(100)
+
+    # Then
+    mocked_dynamo_table.put_item.assert_called_with(
+        Item={
+            "id": 1,
+            "migration_start_time": migration_start_time,
+            "migration_end_time": None,
+            "triggered_at": None,
+            "last_migrated_identity_id": 100,
+        }
+    )
+
+
+def test_checkpoint_identity_migration_raises_error_if_migration_not_in_progress(
+    mocker,
+):
+    # Given
+    mocker.patch("environments.dynamodb.types.project_metadata_table")
+    project_metadata = DynamoProjectMetadata(id=1)
+
+    # When
+    with pytest.raises(AttributeError):
+        project_metadata.checkpoint_identity_migration(100)
@@ -29,6 +29,9 @@ class DynamoProjectMetadata:
     migration_start_time: str = None
     migration_end_time: str = None
     triggered_at: str = None
+    # the identities are migrated in order of id, so an interrupted migration can
+    # be resumed after the last identity which has been migrated
+    last_migrated_identity_id: int = None
 
     @classmethod
     def get_or_new(cls, project_id: int) -> "DynamoProjectMetadata":
@@ -67,5 +70,11 @@ class DynamoProjectMetadata:
         self.migration_end_time = datetime.now().isoformat()
         self._save()
 
+    def checkpoint_identity_migration(self, last_migrated_identity_id: int):
+        if not self.migration_start_time or self.migration_end_time:
+            raise AttributeError("Migration is not in progress.")
+        self.last_migrated_identity_id = last_migrated_identity_id
+        self._save()
+
     def _save(self):
         return project_metadata_table.put_item(Item=asdict(self))
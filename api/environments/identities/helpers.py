@@ -1,6 +1,23 @@
+import contextlib
+import contextvars
 import hashlib
 import typing
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+ObjectIds = typing.Sequence[typing.Union[str, int]]
+
+# 2**64 % 9999, used to reduce the 128 bit md5 digests (as two 64 bit halves)
+# modulo 9999 without overflowing numpy's uint64
+_UINT64_MODULUS_MOD_9999 = 2**64 % 9999
+
+_hashed_percentages_memo: contextvars.ContextVar[
+    typing.Optional[typing.Dict[typing.Tuple[typing.Union[str, int], ...], float]]
+] = contextvars.ContextVar("hashed_percentages_memo", default=None)
+
 
 def get_hashed_percentage_for_object_ids(
     object_ids: typing.Iterable[typing.Union[str, int]], iterations: int = 1
@@ -14,18 +31,96 @@ def get_hashed_percentage_for_object_ids(
     :param iterations: num times to include each id in the generated string to hash
     :return: (float) number between 0 (inclusive) and 1 (exclusive)
     """
+    object_ids = tuple(object_ids)
+    memo = _hashed_percentages_memo.get()
+    if memo is not None and iterations == 1 and object_ids in memo:
+        return memo[object_ids]
 
-    to_hash = ",".join(str(id_) for id_ in list(object_ids) * iterations)
-    hashed_value = hashlib.md5(to_hash.encode("utf-8"))
-    hashed_value_as_int = int(hashed_value.hexdigest(), base=16)
+    hashed_value = hashlib.md5(_get_string_to_hash(object_ids, iterations))
+    hashed_value_as_int = int.from_bytes(hashed_value.digest(), "big")
     value = (hashed_value_as_int % 9999) / 9998
 
     if value == 1:
         # since we want a number between 0 (inclusive) and 1 (exclusive), in the
         # unlikely case that we get the exact number 1, we call the method again
         # and increase the number of iterations to ensure we get a different result
-        return get_hashed_percentage_for_object_ids(
+        value = get_hashed_percentage_for_object_ids(
             object_ids=object_ids, iterations=iterations + 1
         )
 
+    if memo is not None and iterations == 1:
+        memo[object_ids] = value
+
     return value
+
+
+def get_hashed_percentages_for_object_ids(
+    object_ids_list: typing.Iterable[ObjectIds],
+) -> typing.List[float]:
+    """
+    Get the hashed percentage (see get_hashed_percentage_for_object_ids) for each
+    of the given lists of object ids, e.g. for many (object id, identity hash key)
+    pairs at once. If numpy is installed, the digests are reduced to percentages as
+    a vector. The results are identical to calling get_hashed_percentage_for_object_ids
+    for each list of object ids.
+    """
+    object_ids_list = [tuple(object_ids) for object_ids in object_ids_list]
+    memo = _hashed_percentages_memo.get()
+    if memo is None:
+        memo = {}
+
+    missing = list(dict.fromkeys(o for o in object_ids_list if o not in memo))
+    if missing:
+        digests = [
+            hashlib.md5(_get_string_to_hash(object_ids)).digest()
+            for object_ids in missing
+        ]
+        if np is not None:
+            values = _reduce_digests_with_numpy(digests)
+        else:
+            values = [int.from_bytes(digest, "big") % 9999 for digest in digests]
+
+        for object_ids, value in zip(missing, values):
+            memo[object_ids] = (
+                value / 9998
+                if value != 9998
+                # the percentage would be exactly 1, see
+                # get_hashed_percentage_for_object_ids
+                else get_hashed_percentage_for_object_ids(object_ids, iterations=2)
+            )
+
+    return [memo[object_ids] for object_ids in object_ids_list]
+
+
+def prime_hashed_percentages_memo(object_ids_list: typing.Iterable[ObjectIds]) -> None:
+    """
+    Calculate the hashed percentages for the given lists of object ids in a single
+    batch, ahead of them being evaluated one at a time. Does nothing unless called
+    within hashed_percentages_memo.
+    """
+    if _hashed_percentages_memo.get() is not None:
+        get_hashed_percentages_for_object_ids(object_ids_list)
+
+
+@contextlib.contextmanager
+def hashed_percentages_memo() -> typing.Generator[None, None, None]:
+    """
+    Memoise the hashed percentages calculated in this context (e.g. for the duration
+    of a request) since the same object ids are often hashed repeatedly while
+    evaluating the flags for an identity. Can also be used as a decorator.
+    """
+    token = _hashed_percentages_memo.set({})
+    try:
+        yield
+    finally:
+        _hashed_percentages_memo.reset(token)
+
+
+def _get_string_to_hash(object_ids: ObjectIds, iterations: int = 1) -> bytes:
+    return ",".join(str(id_) for id_ in list(object_ids) * iterations).encode("utf-8")
+
+
+def _reduce_digests_with_numpy(digests: typing.List[bytes]) -> typing.List[int]:
+    halves = np.frombuffer(b"".join(digests), dtype=">u8").reshape(-1, 2)
+    high, low = halves[:, 0] % 9999, halves[:, 1] % 9999
+    return ((high * _UINT64_MODULUS_MOD_9999 + low) % 9999).tolist()
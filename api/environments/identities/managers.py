@@ -1,6 +1,57 @@
+import typing
+
 from django.db.models import Manager
 
+if typing.TYPE_CHECKING:
+    from environments.identities.models import Identity
+    from environments.models import Environment
+
 
 class IdentityManager(Manager):
     def get_by_natural_key(self, identifier, environment_api_key):
         return self.get(identifier=identifier, environment__api_key=environment_api_key)
+
+    def bulk_get_or_create(
+        self, environment: "Environment", identifiers: typing.Iterable[str]
+    ) -> typing.Tuple[typing.Dict[str, "Identity"], typing.Set[str]]:
+        """
+        Equivalent of calling get_or_create for each of the given identifiers, but
+        using a single query to retrieve the existing identities and a single insert
+        to create the missing ones.
+
+        :return: tuple of a dictionary of identities keyed on identifier and the set
+            of identifiers for which an identity was created
+        """
+        identifiers = set(identifiers)
+        identities = {
+            identity.identifier: identity
+            for identity in self.filter(
+                environment=environment, identifier__in=identifiers
+            )
+        }
+
+        created_identifiers = identifiers - set(identities)
+        if created_identifiers:
+            # use ignore_conflicts to handle the race condition where another request
+            # creates one of the identities in the meantime
+            self.bulk_create(
+                [
+                    self.model(identifier=identifier, environment=environment)
+                    for identifier in created_identifiers
+                ],
+                ignore_conflicts=True,
+            )
+            identities.update(
+                {
+                    identity.identifier: identity
+                    for identity in self.filter(
+                        environment=environment, identifier__in=created_identifiers
+                    )
+                }
+            )
+
+        for identity in identities.values():
+            # prevent further queries to retrieve the environment
+            identity.environment = environment
+
+        return identities, created_identifiers
@@ -1,14 +1,23 @@
 import typing
+from collections import defaultdict
 
+from django.conf import settings
 from django.db import models
-from django.db.models import Prefetch, Q
+from django.db.models import Prefetch, Q, QuerySet
 from django.utils import timezone
 
+from environments.identities.helpers import prime_hashed_percentages_memo
 from environments.identities.managers import IdentityManager
 from environments.identities.traits.models import Trait
 from environments.models import Environment
+from environments.snapshots import (
+    build_environment_feature_states_snapshot,
+    get_environment_feature_states_snapshot,
+)
+from features.feature_types import MULTIVARIATE
 from features.models import FeatureState
 from features.multivariate.models import MultivariateFeatureStateValue
+from segments.evaluator import get_traits_by_key
 from segments.models import Segment
 
 
@@ -66,6 +75,138 @@ class Identity(models.Model):
         """
         segments = self.get_segments(traits=traits, overrides_only=True)
 
+        if settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS > 0:
+            all_flags = self._get_feature_states_from_snapshot(
+                segments, additional_filters
+            )
+        else:
+            all_flags = self._get_feature_states_from_db(segments, additional_filters)
+
+        feature_states = self._resolve_feature_states(all_flags)
+        prime_hashed_percentages_memo(self._get_multivariate_object_ids(feature_states))
+        return feature_states
+
+    @classmethod
+    def get_all_feature_states_for_identities(
+        cls,
+        environment: Environment,
+        identities_traits: typing.Iterable[
+            typing.Tuple["Identity", typing.Iterable[Trait]]
+        ],
+        additional_filters: Q | None = None,
+    ) -> typing.Dict[int, typing.List[FeatureState]]:
+        """
+        Get all feature states for multiple identities in the same environment. The
+        segments and the environment / segment feature states are retrieved once and
+        shared between all identities, and the identity overrides are retrieved with
+        a single query.
+
+        :param identities_traits: iterable of (identity, traits) pairs where the
+            traits are those to use when evaluating the identity's segments
+        :return: dictionary of the feature states for each identity (see
+            get_all_feature_states), keyed on identity id
+        """
+        identities_traits = list(identities_traits)
+        compiled_segments = environment.get_compiled_segments_from_cache()
+
+        if settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS > 0:
+            snapshot = get_environment_feature_states_snapshot(
+                environment, additional_filters
+            )
+        else:
+            snapshot = build_environment_feature_states_snapshot(
+                environment, additional_filters
+            )
+
+        identity_overrides = defaultdict(list)
+        for feature_state in cls._get_live_feature_states(
+            Q(
+                environment=environment,
+                identity__in=[identity for identity, _ in identities_traits],
+            ),
+            additional_filters,
+        ):
+            identity_overrides[feature_state.identity_id].append(feature_state)
+
+        # the percentage split conditions (and multivariate values below) are hashed
+        # in a single batch for all of the identities
+        percentage_split_segment_ids = [
+            compiled_segment.id
+            for compiled_segment in compiled_segments
+            if compiled_segment.has_percentage_split
+        ]
+        if percentage_split_segment_ids:
+            prime_hashed_percentages_memo(
+                (segment_id, identity.get_hash_key())
+                for identity, _ in identities_traits
+                for segment_id in percentage_split_segment_ids
+            )
+
+        identities_feature_states = {}
+        for identity, traits in identities_traits:
+            traits_by_key = get_traits_by_key(traits)
+            segment_ids = [
+                compiled_segment.id
+                for compiled_segment in compiled_segments
+                if compiled_segment.does_identity_match(identity, traits_by_key)
+            ]
+            identities_feature_states[identity.id] = identity._resolve_feature_states(
+                [
+                    *snapshot.get_feature_states(segment_ids),
+                    *identity_overrides[identity.id],
+                ]
+            )
+
+        prime_hashed_percentages_memo(
+            object_ids
+            for identity, _ in identities_traits
+            for object_ids in identity._get_multivariate_object_ids(
+                identities_feature_states[identity.id]
+            )
+        )
+
+        return identities_feature_states
+
+    def _get_multivariate_object_ids(
+        self, feature_states: typing.Iterable[FeatureState]
+    ) -> typing.List[typing.Tuple[int, str]]:
+        """
+        Get the object ids hashed to determine the multivariate values of the given
+        feature states for this identity (see
+        FeatureState.get_multivariate_feature_state_value).
+        """
+        identity_hash_key = self.get_hash_key(
+            self.environment.use_identity_composite_key_for_hashing
+        )
+        return [
+            (feature_state.id, identity_hash_key)
+            for feature_state in feature_states
+            if feature_state.feature.type == MULTIVARIATE
+        ]
+
+    def _resolve_feature_states(
+        self, all_flags: typing.Iterable[FeatureState]
+    ) -> typing.List[FeatureState]:
+        # iterate over all the flags and build a dictionary keyed on feature with the highest priority flag
+        # for the given identity as the value.
+        identity_flags = {}
+        for flag in all_flags:
+            if flag.feature_id not in identity_flags:
+                identity_flags[flag.feature_id] = flag
+            else:
+                current_flag = identity_flags[flag.feature_id]
+                if flag > current_flag:
+                    identity_flags[flag.feature_id] = flag
+
+        if self.environment.get_hide_disabled_flags() is True:
+            # filter out any flags that are disabled
+            return [value for value in identity_flags.values() if value.enabled]
+
+        return list(identity_flags.values())
+
+    def _get_feature_states_from_db(
+        self, segments: typing.List[Segment], additional_filters: Q | None = None
+    ) -> typing.Iterable[FeatureState]:
         # define sub queries
         belongs_to_environment_query = Q(environment=self.environment)
         overridden_for_identity_query = Q(identity=self)
@@ -74,21 +215,44 @@ class Identity(models.Model):
             feature_segment__environment=self.environment,
         )
         environment_default_query = Q(identity=None, feature_segment=None)
-        only_live_versions_query = Q(
-            live_from__lte=timezone.now(), version__isnull=False
-        )
 
         # define the full query
-        full_query = (
-            only_live_versions_query
-            & belongs_to_environment_query
-            & (
-                overridden_for_identity_query
-                | overridden_for_segment_query
-                | environment_default_query
-            )
+        full_query = belongs_to_environment_query & (
+            overridden_for_identity_query
+            | overridden_for_segment_query
+            | environment_default_query
+        )
+
+        return self._get_live_feature_states(full_query, additional_filters)
+
+    def _get_feature_states_from_snapshot(
+        self, segments: typing.List[Segment], additional_filters: Q | None = None
+    ) -> typing.List[FeatureState]:
+        """
+        Get the environment default and segment override feature states from the
+        cached environment snapshot so that only the identity overrides need to be
+        retrieved from the database.
+        """
+        snapshot = get_environment_feature_states_snapshot(
+            self.environment, additional_filters
         )
+        identity_overrides = self._get_live_feature_states(
+            Q(environment=self.environment, identity=self), additional_filters
+        )
+        return [
+            *snapshot.get_feature_states(segment.id for segment in segments),
+            *identity_overrides,
+        ]
 
+    @staticmethod
+    def _get_live_feature_states(
+        query: Q, additional_filters: Q | None = None
+    ) -> QuerySet[FeatureState]:
+        only_live_versions_query = Q(
+            live_from__lte=timezone.now(), version__isnull=False
+        )
+
+        full_query = only_live_versions_query & query
         if additional_filters:
             full_query &= additional_filters
 
@@ -100,7 +264,7 @@ class Identity(models.Model):
             "identity",
         ]
 
-        all_flags = (
+        return (
             FeatureState.objects.select_related(*select_related_args)
             .prefetch_related(
                 Prefetch(
@@ -113,23 +277,6 @@ class Identity(models.Model):
             .filter(full_query)
         )
 
-        # iterate over all the flags and build a dictionary keyed on feature with the highest priority flag
-        # for the given identity as the value.
-        identity_flags = {}
-        for flag in all_flags:
-            if flag.feature_id not in identity_flags:
-                identity_flags[flag.feature_id] = flag
-            else:
-                current_flag = identity_flags[flag.feature_id]
-                if flag > current_flag:
-                    identity_flags[flag.feature_id] = flag
-
-        if self.environment.get_hide_disabled_flags() is True:
-            # filter out any flags that are disabled
-            return [value for value in identity_flags.values() if value.enabled]
-
-        return list(identity_flags.values())
-
     def get_segments(
         self, traits: typing.List[Trait] = None, overrides_only: bool = False
     ) -> typing.List[Segment]:
@@ -140,19 +287,21 @@ class Identity(models.Model):
         :param overrides_only: only retrieve the segments which have a valid override in the environment
         :return: List of matching segments
         """
-        matching_segments = []
         traits = self.identity_traits.all() if traits is None else traits
+        traits_by_key = get_traits_by_key(traits)
 
         if overrides_only:
-            all_segments = self.environment.get_segments_from_cache()
+            compiled_segments = self.environment.get_compiled_segments_from_cache()
         else:
-            all_segments = self.environment.project.get_segments_from_cache()
-
-        for segment in all_segments:
-            if segment.does_identity_match(self, traits=traits):
-                matching_segments.append(segment)
+            compiled_segments = (
+                self.environment.project.get_compiled_segments_from_cache()
+            )
 
-        return matching_segments
+        return [
+            compiled_segment.segment
+            for compiled_segment in compiled_segments
+            if compiled_segment.does_identity_match(self, traits_by_key)
+        ]
 
     def get_all_user_traits(self):
         # this is pointless, we should probably replace all uses with the below code
@@ -201,7 +350,88 @@ class Identity(models.Model):
         :return: queryset of updated trait models
         """
         current_traits = {t.trait_key: t for t in self.identity_traits.all()}
+        keys_to_delete, updated_traits, new_traits = self._get_trait_changes(
+            current_traits, trait_data_items
+        )
+
+        # delete the traits that had their keys set to None
+        if keys_to_delete:
+            self.identity_traits.filter(trait_key__in=keys_to_delete).delete()
+
+        Trait.objects.bulk_update(updated_traits, fields=Trait.BULK_UPDATE_FIELDS)
+
+        # use ignore_conflicts to handle race conditions which result in IntegrityError if another request
+        # has added a particular trait_key for the identity while this method has been determining what to
+        # update or create.
+        # See: https://github.com/Flagsmith/flagsmith/issues/370
+        Trait.objects.bulk_create(new_traits, ignore_conflicts=True)
+
+        # return the full list of traits for this identity by refreshing from the db
+        # TODO: handle this in the above logic to avoid a second hit to the DB
+        return self.identity_traits.all()
+
+    @classmethod
+    def bulk_update_traits(
+        cls,
+        identities_trait_data_items: typing.Iterable[
+            typing.Tuple["Identity", typing.List[dict]]
+        ],
+    ) -> typing.Dict[int, typing.List[Trait]]:
+        """
+        Equivalent of calling update_traits for each of the given identities but
+        using a fixed number of queries regardless of the number of identities.
+
+        :param identities_trait_data_items: iterable of (identity, trait data items)
+            pairs, where the trait data items are validated by TraitSerializerFull
+        :return: dictionary of the full list of traits for each identity after these
+            changes, keyed on identity id
+        """
+        identities_trait_data_items = list(identities_trait_data_items)
+        identities = {
+            identity.id: identity for identity, _ in identities_trait_data_items
+        }
+        identity_ids = list(identities)
+
+        current_traits = defaultdict(dict)
+        for trait in Trait.objects.filter(identity_id__in=identity_ids):
+            current_traits[trait.identity_id][trait.trait_key] = trait
+
+        delete_query = Q()
+        all_updated_traits = []
+        all_new_traits = []
+        for identity, trait_data_items in identities_trait_data_items:
+            keys_to_delete, updated_traits, new_traits = identity._get_trait_changes(
+                current_traits[identity.id], trait_data_items
+            )
+            if keys_to_delete:
+                delete_query |= Q(identity=identity, trait_key__in=keys_to_delete)
+            all_updated_traits.extend(updated_traits)
+            all_new_traits.extend(new_traits)
 
+        if delete_query:
+            Trait.objects.filter(delete_query).delete()
+
+        Trait.objects.bulk_update(all_updated_traits, fields=Trait.BULK_UPDATE_FIELDS)
+        Trait.objects.bulk_create(all_new_traits, ignore_conflicts=True)
+
+        identities_traits = defaultdict(list)
+        for trait in Trait.objects.filter(identity_id__in=identity_ids):
+            trait.identity = identities[trait.identity_id]
+            identities_traits[trait.identity_id].append(trait)
+        return identities_traits
+
+    def _get_trait_changes(
+        self,
+        current_traits: typing.Dict[str, Trait],
+        trait_data_items: typing.List[dict],
+    ) -> typing.Tuple[typing.List[str], typing.List[Trait], typing.List[Trait]]:
+        """
+        Determine the changes required to update the identity's current traits (keyed
+        on trait key) with the given trait data items.
+
+        :return: tuple of the trait keys to delete, the traits to update and the
+            traits to create
+        """
         keys_to_delete = []
         new_traits = []
         updated_traits = []
@@ -232,18 +462,4 @@ class Identity(models.Model):
                     Trait(**trait_value_data, trait_key=trait_key, identity=self)
                 )
 
-        # delete the traits that had their keys set to None
-        if keys_to_delete:
-            self.identity_traits.filter(trait_key__in=keys_to_delete).delete()
-
-        Trait.objects.bulk_update(updated_traits, fields=Trait.BULK_UPDATE_FIELDS)
-
-        # use ignore_conflicts to handle race conditions which result in IntegrityError if another request
-        # has added a particular trait_key for the identity while this method has been determining what to
-        # update or create.
-        # See: https://github.com/Flagsmith/flagsmith/issues/370
-        Trait.objects.bulk_create(new_traits, ignore_conflicts=True)
-
-        # return the full list of traits for this identity by refreshing from the db
-        # TODO: handle this in the above logic to avoid a second hit to the DB
-        return self.identity_traits.all()
+        return keys_to_delete, updated_traits, new_traits
@@ -63,6 +63,13 @@ class SDKIdentitiesResponseSerializer(serializers.Serializer):
     traits = serializers.ListSerializer(child=_TraitSerializer())
 
 
+class SDKBulkIdentitiesResponseSerializer(serializers.Serializer):
+    class _IdentitySerializer(SDKIdentitiesResponseSerializer):
+        identifier = serializers.CharField()
+
+    identities = serializers.ListSerializer(child=_IdentitySerializer())
+
+
 class SDKIdentitiesQuerySerializer(serializers.Serializer):
     identifier = serializers.CharField(required=True)
 
@@ -123,7 +130,7 @@ class IdentityAllFeatureStatesSerializer(serializers.Serializer):
         return instance.get_value(hash_key)
 
     def get_overridden_by(self, instance) -> typing.Optional[str]:
-        if getattr(instance, "feature_segment_id", None) is not None:
+        if self._get_overriding_segment(instance) is not None:
             return "SEGMENT"
         elif getattr(
             instance, "identity_id", None
@@ -135,8 +142,14 @@ class IdentityAllFeatureStatesSerializer(serializers.Serializer):
         serializer_or_field=IdentityAllFeatureStatesSegmentSerializer
     )
     def get_segment(self, instance) -> typing.Optional[typing.Dict[str, typing.Any]]:
-        if getattr(instance, "feature_segment_id", None) is not None:
-            return IdentityAllFeatureStatesSegmentSerializer(
-                instance=instance.feature_segment.segment
-            ).data
+        segment = self._get_overriding_segment(instance)
+        if segment is not None:
+            return IdentityAllFeatureStatesSegmentSerializer(instance=segment).data
         return None
+
+    def _get_overriding_segment(self, instance):
+        if getattr(instance, "feature_segment_id", None) is not None:
+            return instance.feature_segment.segment
+        # engine feature states don't reference their segment so, for those, the
+        # segments are provided in the context, keyed on feature name
+        return self.context.get("segment_overrides", {}).get(instance.feature.name)
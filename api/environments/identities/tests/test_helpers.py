@@ -1,8 +1,15 @@
 import itertools
+import uuid
 from unittest import mock
 
+import pytest
+
+from environments.identities import helpers
 from environments.identities.helpers import (
     get_hashed_percentage_for_object_ids,
+    get_hashed_percentages_for_object_ids,
+    hashed_percentages_memo,
+    prime_hashed_percentages_memo,
 )
 
 
@@ -92,13 +99,13 @@ def test_get_hashed_percentage_does_not_return_1(mock_hashlib):
     hash_string_to_return_0 = "270f"
     hashed_values = [hash_string_to_return_0, hash_string_to_return_1]
 
-    def hexdigest_side_effect():
-        return hashed_values.pop()
+    def digest_side_effect():
+        return bytes.fromhex(hashed_values.pop())
 
     mock_hash = mock.MagicMock()
     mock_hashlib.md5.return_value = mock_hash
 
-    mock_hash.hexdigest.side_effect = hexdigest_side_effect
+    mock_hash.digest.side_effect = digest_side_effect
 
     # -- FINISH SETTING UP THE MOCKS --
 
@@ -122,3 +129,94 @@ def test_get_hashed_percentage_does_not_return_1(mock_hashlib):
     # the second call, with a string (in bytes) that contains each object id twice
     expected_bytes_2 = ",".join(str(id_) for id_ in object_ids * 2).encode("utf-8")
     assert call_list[1][0][0] == expected_bytes_2
+
+
+@pytest.mark.parametrize("use_numpy", (True, False))
+def test_get_hashed_percentages_for_object_ids_matches_single_object_ids(
+    mocker, use_numpy
+):
+    # Given
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        mocker.patch.object(helpers, "np", None)
+
+    object_ids_list = [
+        *((feature_state_id, str(uuid.uuid4())) for feature_state_id in range(500)),
+        *((segment_id, identity_id) for segment_id, identity_id in [(1, 2), (3, 4)]),
+        ("a", "b", "c"),
+    ]
+
+    # When
+    values = get_hashed_percentages_for_object_ids(object_ids_list)
+
+    # Then
+    assert values == [
+        get_hashed_percentage_for_object_ids(object_ids)
+        for object_ids in object_ids_list
+    ]
+
+
+@pytest.mark.parametrize("use_numpy", (True, False))
+@mock.patch("environments.identities.helpers.hashlib")
+def test_get_hashed_percentages_for_object_ids_does_not_return_1(
+    mock_hashlib, mocker, use_numpy
+):
+    # Given
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        mocker.patch.object(helpers, "np", None)
+
+    # see test_get_hashed_percentage_does_not_return_1
+    hashed_values = ["270f".zfill(32), "270e".zfill(32)]
+    mock_hashlib.md5.return_value.digest.side_effect = lambda: bytes.fromhex(
+        hashed_values.pop()
+    )
+
+    # When
+    values = get_hashed_percentages_for_object_ids([[12, 93]])
+
+    # Then
+    assert values == [0]
+    assert mock_hashlib.md5.call_args_list == [
+        mock.call(b"12,93"),
+        mock.call(b"12,93,12,93"),
+    ]
+
+
+def test_hashed_percentages_memo_memoises_hashed_percentages(mocker):
+    # Given
+    md5_spy = mocker.spy(helpers.hashlib, "md5")
+    object_ids = [1, "identity"]
+
+    # When
+    with hashed_percentages_memo():
+        values = [get_hashed_percentage_for_object_ids(object_ids) for _ in range(3)]
+        batch_values = get_hashed_percentages_for_object_ids([object_ids])
+
+    value_outside_memo = get_hashed_percentage_for_object_ids(object_ids)
+
+    # Then
+    assert values == batch_values * 3 == [value_outside_memo] * 3
+    assert md5_spy.call_count == 2
+
+
+def test_prime_hashed_percentages_memo(mocker):
+    # Given
+    md5_spy = mocker.spy(helpers.hashlib, "md5")
+    object_ids_list = [(1, "identity"), (2, "identity")]
+
+    # When
+    prime_hashed_percentages_memo(object_ids_list)
+    with hashed_percentages_memo():
+        prime_hashed_percentages_memo(object_ids_list)
+        values = [
+            get_hashed_percentage_for_object_ids(object_ids)
+            for object_ids in object_ids_list
+        ]
+
+    # Then
+    # the memo is only primed within hashed_percentages_memo
+    assert md5_spy.call_count == 2
+    assert values == get_hashed_percentages_for_object_ids(object_ids_list)
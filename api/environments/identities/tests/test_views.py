@@ -704,9 +704,9 @@ class SDKIdentitiesTestCase(APITestCase):
         assert self.identity.identity_traits.count() == 0
 
     @override_settings(EDGE_API_URL="http://localhost")
-    @mock.patch("environments.identities.views.forward_identity_request")
-    def test_post_identities_calls_forward_identity_request_with_correct_arguments(
-        self, mocked_forward_identity_request
+    @mock.patch("environments.identities.views.edge_request_forwarder")
+    def test_post_identities_forwards_identity_request_with_correct_arguments(
+        self, mocked_edge_request_forwarder
     ):
         # Given
         url = reverse("api-v1:sdk-identities")
@@ -723,18 +723,21 @@ class SDKIdentitiesTestCase(APITestCase):
         self.client.post(url, data=json.dumps(data), content_type="application/json")
 
         # Then
-        args, kwargs = mocked_forward_identity_request.delay.call_args_list[0]
-        assert args == ()
-        assert kwargs["args"][0] == "POST"
-        assert kwargs["args"][1].get("X-Environment-Key") == self.environment.api_key
-        assert kwargs["args"][2] == self.environment.project.id
+        args, kwargs = mocked_edge_request_forwarder.forward.call_args_list[0]
+        (edge_request,) = args
+        assert edge_request["request_method"] == "POST"
+        assert edge_request["path"] == "identities/"
+        assert (
+            edge_request["headers"].get("X-Environment-Key") == self.environment.api_key
+        )
+        assert edge_request["project_id"] == self.environment.project.id
 
-        assert kwargs["kwargs"]["request_data"] == data
+        assert edge_request["request_data"] == data
 
     @override_settings(EDGE_API_URL="http://localhost")
-    @mock.patch("environments.identities.views.forward_identity_request")
-    def test_get_identities_calls_forward_identity_request_with_correct_arguments(
-        self, mocked_forward_identity_request
+    @mock.patch("environments.identities.views.edge_request_forwarder")
+    def test_get_identities_forwards_identity_request_with_correct_arguments(
+        self, mocked_edge_request_forwarder
     ):
         # Given
         base_url = reverse("api-v1:sdk-identities")
@@ -744,15 +747,16 @@ class SDKIdentitiesTestCase(APITestCase):
         self.client.get(url)
 
         # Then
-        args, kwargs = mocked_forward_identity_request.delay.call_args_list[0]
-        assert args == ()
-        assert kwargs["args"][0] == "GET"
-        assert kwargs["args"][1].get("X-Environment-Key") == self.environment.api_key
-        assert kwargs["args"][2] == self.environment.project.id
-
-        assert kwargs["kwargs"]["query_params"] == {
-            "identifier": self.identity.identifier
-        }
+        args, kwargs = mocked_edge_request_forwarder.forward.call_args_list[0]
+        (edge_request,) = args
+        assert edge_request["request_method"] == "GET"
+        assert edge_request["path"] == "identities/"
+        assert (
+            edge_request["headers"].get("X-Environment-Key") == self.environment.api_key
+        )
+        assert edge_request["project_id"] == self.environment.project.id
+
+        assert edge_request["query_params"] == {"identifier": self.identity.identifier}
 
     def test_post_identities_with_traits_fails_if_client_cannot_set_traits(self):
         # Given
@@ -989,3 +993,159 @@ def test_post_identities__server_key_only_feature__server_key_auth__return_expec
     # Then
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["flags"]
+
+
+def test_post_bulk_identities_returns_flags_and_traits_for_each_identity(
+    environment: Environment,
+    feature: Feature,
+    identity: Identity,
+    api_client: APIClient,
+) -> None:
+    # Given
+    api_client.credentials(HTTP_X_ENVIRONMENT_KEY=environment.api_key)
+    segment = Segment.objects.create(name="segment", project=environment.project)
+    segment_rule = SegmentRule.objects.create(
+        segment=segment, type=SegmentRule.ALL_RULE
+    )
+    Condition.objects.create(
+        rule=segment_rule, property="plan", operator=models.EQUAL, value="premium"
+    )
+    FeatureState.objects.create(
+        feature=feature,
+        environment=environment,
+        feature_segment=FeatureSegment.objects.create(
+            feature=feature, segment=segment, environment=environment
+        ),
+        enabled=True,
+    )
+
+    url = reverse("api-v1:sdk-identities-bulk")
+    data = {
+        "identities": [
+            {
+                "identifier": "new_identity",
+                "traits": [{"trait_key": "plan", "trait_value": "premium"}],
+            },
+            {"identifier": identity.identifier},
+        ]
+    }
+
+    # When
+    response = api_client.post(
+        url, data=json.dumps(data), content_type="application/json"
+    )
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    assert response.has_header(FLAGSMITH_UPDATED_AT_HEADER)
+
+    response_json = response.json()
+    assert [item["identifier"] for item in response_json["identities"]] == [
+        "new_identity",
+        identity.identifier,
+    ]
+
+    new_identity_data, existing_identity_data = response_json["identities"]
+    assert new_identity_data["traits"][0]["trait_key"] == "plan"
+    assert new_identity_data["traits"][0]["trait_value"] == "premium"
+    assert new_identity_data["flags"][0]["enabled"] is True
+    assert existing_identity_data["traits"] == []
+    assert existing_identity_data["flags"][0]["enabled"] is False
+
+    assert Identity.objects.filter(
+        identifier="new_identity", environment=environment
+    ).exists()
+    assert Trait.objects.filter(
+        identity__identifier="new_identity", trait_key="plan"
+    ).exists()
+
+
+@pytest.mark.parametrize(
+    "identities",
+    (
+        [],
+        [{"identifier": "duplicate"}, {"identifier": "duplicate"}],
+        [{"identifier": "one"}, {"identifier": "two"}, {"identifier": "three"}],
+    ),
+)
+def test_post_bulk_identities_returns_400_for_invalid_identities(
+    environment: Environment,
+    api_client: APIClient,
+    settings,
+    identities: list,
+) -> None:
+    # Given
+    settings.MAX_IDENTITIES_PER_BULK_IDENTIFY_REQUEST = 2
+    api_client.credentials(HTTP_X_ENVIRONMENT_KEY=environment.api_key)
+    url = reverse("api-v1:sdk-identities-bulk")
+
+    # When
+    response = api_client.post(
+        url,
+        data=json.dumps({"identities": identities}),
+        content_type="application/json",
+    )
+
+    # Then
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Identity.objects.filter(environment=environment).exists()
+
+
+def test_post_bulk_identities_with_traits_fails_if_client_cannot_set_traits(
+    environment: Environment,
+    api_client: APIClient,
+) -> None:
+    # Given
+    environment.allow_client_traits = False
+    environment.save()
+    api_client.credentials(HTTP_X_ENVIRONMENT_KEY=environment.api_key)
+    url = reverse("api-v1:sdk-identities-bulk")
+    data = {
+        "identities": [
+            {
+                "identifier": "identity",
+                "traits": [{"trait_key": "foo", "trait_value": "bar"}],
+            }
+        ]
+    }
+
+    # When
+    response = api_client.post(
+        url, data=json.dumps(data), content_type="application/json"
+    )
+
+    # Then
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_post_bulk_identities_forwards_identity_request_for_each_identity(
+    environment: Environment,
+    api_client: APIClient,
+    settings,
+    mocker,
+) -> None:
+    # Given
+    settings.EDGE_API_URL = "http://localhost"
+    environment.project.enable_dynamo_db = True
+    environment.project.save()
+    mocked_edge_request_forwarder = mocker.patch(
+        "environments.identities.views.edge_request_forwarder"
+    )
+    api_client.credentials(HTTP_X_ENVIRONMENT_KEY=environment.api_key)
+    url = reverse("api-v1:sdk-identities-bulk")
+    identities = [{"identifier": "one"}, {"identifier": "two", "traits": []}]
+
+    # When
+    response = api_client.post(
+        url,
+        data=json.dumps({"identities": identities}),
+        content_type="application/json",
+    )
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    mocked_edge_request_forwarder.forward.assert_called_once()
+    edge_requests = mocked_edge_request_forwarder.forward.call_args.args
+    assert [edge_request["request_data"] for edge_request in edge_requests] == (
+        identities
+    )
@@ -457,9 +457,9 @@ class SDKTraitsTest(APITestCase):
         )
 
     @override_settings(EDGE_API_URL="http://localhost")
-    @mock.patch("environments.identities.traits.views.forward_trait_request")
-    def test_post_trait_calls_forward_trait_request_with_correct_arguments(
-        self, mocked_forward_trait_request
+    @mock.patch("environments.identities.traits.views.edge_request_forwarder")
+    def test_post_trait_forwards_trait_request_with_correct_arguments(
+        self, mocked_edge_request_forwarder
     ):
         # Given
         url = reverse("api-v1:sdk-traits-list")
@@ -469,17 +469,20 @@ class SDKTraitsTest(APITestCase):
         self.client.post(url, data=data, content_type=self.JSON)
 
         # Then
-        args, kwargs = mocked_forward_trait_request.delay.call_args_list[0]
-        assert args == ()
-        assert kwargs["args"][0] == "POST"
-        assert kwargs["args"][1].get("X-Environment-Key") == self.environment.api_key
-        assert kwargs["args"][2] == self.environment.project.id
-        assert kwargs["args"][3] == json.loads(data)
+        args, kwargs = mocked_edge_request_forwarder.forward.call_args_list[0]
+        (edge_request,) = args
+        assert edge_request["request_method"] == "POST"
+        assert edge_request["path"] == "traits/"
+        assert (
+            edge_request["headers"].get("X-Environment-Key") == self.environment.api_key
+        )
+        assert edge_request["project_id"] == self.environment.project.id
+        assert edge_request["request_data"] == json.loads(data)
 
     @override_settings(EDGE_API_URL="http://localhost")
-    @mock.patch("environments.identities.traits.views.forward_trait_request")
-    def test_increment_value_calls_forward_trait_request_with_correct_arguments(
-        self, mocked_forward_trait_request
+    @mock.patch("environments.identities.traits.views.edge_request_forwarder")
+    def test_increment_value_forwards_trait_request_with_correct_arguments(
+        self, mocked_edge_request_forwarder
     ):
         # Given
         url = reverse("api-v1:sdk-traits-increment-value")
@@ -493,21 +496,25 @@ class SDKTraitsTest(APITestCase):
         self.client.post(url, data=data)
 
         # Then
-        args, kwargs = mocked_forward_trait_request.delay.call_args_list[0]
-        assert args == ()
-        assert kwargs["args"][0] == "POST"
-        assert kwargs["args"][1].get("X-Environment-Key") == self.environment.api_key
-        assert kwargs["args"][2] == self.environment.project.id
+        args, kwargs = mocked_edge_request_forwarder.forward.call_args_list[0]
+        (edge_request,) = args
+        assert edge_request["request_method"] == "POST"
+        assert edge_request["path"] == "traits/"
+        assert (
+            edge_request["headers"].get("X-Environment-Key") == self.environment.api_key
+        )
+        assert edge_request["project_id"] == self.environment.project.id
 
         # and the structure of payload was correct
-        assert kwargs["args"][3]["identity"]["identifier"] == data["identifier"]
-        assert kwargs["args"][3]["trait_key"] == data["trait_key"]
-        assert kwargs["args"][3]["trait_value"]
+        payload = edge_request["request_data"]
+        assert payload["identity"]["identifier"] == data["identifier"]
+        assert payload["trait_key"] == data["trait_key"]
+        assert payload["trait_value"]
 
     @override_settings(EDGE_API_URL="http://localhost")
-    @mock.patch("environments.identities.traits.views.forward_trait_requests")
-    def test_bulk_create_traits_calls_forward_trait_request_with_correct_arguments(
-        self, mocked_forward_trait_requests
+    @mock.patch("environments.identities.traits.views.edge_request_forwarder")
+    def test_bulk_create_traits_forwards_bulk_traits_request_with_correct_arguments(
+        self, mocked_edge_request_forwarder
     ):
         # Given
         url = reverse("api-v1:sdk-traits-bulk-create")
@@ -532,12 +539,15 @@ class SDKTraitsTest(APITestCase):
         # Then
 
         # Then
-        args, kwargs = mocked_forward_trait_requests.delay.call_args_list[0]
-        assert args == ()
-        assert kwargs["args"][0] == "PUT"
-        assert kwargs["args"][1].get("X-Environment-Key") == self.environment.api_key
-        assert kwargs["args"][2] == self.environment.project.id
-        assert kwargs["args"][3] == request_data
+        args, kwargs = mocked_edge_request_forwarder.forward.call_args_list[0]
+        (edge_request,) = args
+        assert edge_request["request_method"] == "PUT"
+        assert edge_request["path"] == "traits/bulk/"
+        assert (
+            edge_request["headers"].get("X-Environment-Key") == self.environment.api_key
+        )
+        assert edge_request["project_id"] == self.environment.project.id
+        assert edge_request["request_data"] == request_data
 
     def test_create_trait_returns_403_if_client_cannot_set_traits(self):
         # Given
@@ -9,8 +9,9 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from edge_api.identities.edge_request_forwarder import (
-    forward_trait_request,
-    forward_trait_requests,
+    edge_request_forwarder,
+    get_bulk_traits_edge_request,
+    get_trait_edge_request,
 )
 from environments.authentication import EnvironmentKeyAuthentication
 from environments.identities.models import Identity
@@ -200,8 +201,8 @@ class SDKTraits(mixins.CreateModelMixin, viewsets.GenericViewSet):
         response = super(SDKTraits, self).create(request, *args, **kwargs)
         response.status_code = status.HTTP_200_OK
         if settings.EDGE_API_URL and request.environment.project.enable_dynamo_db:
-            forward_trait_request.delay(
-                args=(
+            edge_request_forwarder.forward(
+                get_trait_edge_request(
                     request.method,
                     dict(request.headers),
                     request.environment.project.id,
@@ -225,8 +226,8 @@ class SDKTraits(mixins.CreateModelMixin, viewsets.GenericViewSet):
             # Convert the payload to the structure expected by /traits
             payload = serializer.data.copy()
             payload.update({"identity": {"identifier": payload.pop("identifier")}})
-            forward_trait_request.delay(
-                args=(
+            edge_request_forwarder.forward(
+                get_trait_edge_request(
                     request.method,
                     dict(request.headers),
                     request.environment.project.id,
@@ -266,8 +267,8 @@ class SDKTraits(mixins.CreateModelMixin, viewsets.GenericViewSet):
             serializer.save()
 
             if settings.EDGE_API_URL and request.environment.project.enable_dynamo_db:
-                forward_trait_requests.delay(
-                    args=(
+                edge_request_forwarder.forward(
+                    get_bulk_traits_edge_request(
                         request.method,
                         dict(request.headers),
                         request.environment.project.id,
@@ -13,10 +13,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from app.pagination import CustomPagination
-from edge_api.identities.edge_request_forwarder import forward_identity_request
+from edge_api.identities.edge_request_forwarder import (
+    edge_request_forwarder,
+    get_identity_edge_request,
+)
+from environments.identities.helpers import hashed_percentages_memo
 from environments.identities.models import Identity
 from environments.identities.serializers import (
     IdentitySerializer,
+    SDKBulkIdentitiesResponseSerializer,
     SDKIdentitiesQuerySerializer,
     SDKIdentitiesResponseSerializer,
 )
@@ -29,6 +34,8 @@ from environments.permissions.permissions import NestedEnvironmentPermissions
 from environments.sdk.serializers import (
     IdentifyWithTraitsSerializer,
     IdentitySerializerWithTraitsAndSegments,
+    SDKBulkIdentifyItemSerializer,
+    SDKBulkIdentifySerializer,
 )
 from features.serializers import SDKFeatureStateSerializer
 from integrations.integration import (
@@ -164,6 +171,7 @@ class SDKIdentities(SDKAPIView):
             cache=settings.GET_IDENTITIES_ENDPOINT_CACHE_NAME,
         )
     )
+    @hashed_percentages_memo()
     def get(self, request):
         identifier = request.query_params.get("identifier")
         if not identifier:
@@ -186,13 +194,13 @@ class SDKIdentities(SDKAPIView):
         self.identity = identity
 
         if settings.EDGE_API_URL and request.environment.project.enable_dynamo_db:
-            forward_identity_request.delay(
-                args=(
+            edge_request_forwarder.forward(
+                get_identity_edge_request(
                     request.method,
                     dict(request.headers),
                     request.environment.project.id,
-                ),
-                kwargs={"query_params": request.GET.dict()},
+                    query_params=request.GET.dict(),
+                )
             )
 
         # Note that we send the environment updated_at value here since it covers most use cases
@@ -231,6 +239,7 @@ class SDKIdentities(SDKAPIView):
         responses={200: SDKIdentitiesResponseSerializer()},
         operation_id="identify_user_with_traits",
     )
+    @hashed_percentages_memo()
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -238,13 +247,13 @@ class SDKIdentities(SDKAPIView):
         self.identity = instance.get("identity")
 
         if settings.EDGE_API_URL and request.environment.project.enable_dynamo_db:
-            forward_identity_request.delay(
-                args=(
+            edge_request_forwarder.forward(
+                get_identity_edge_request(
                     request.method,
                     dict(request.headers),
                     request.environment.project.id,
-                ),
-                kwargs={"request_data": request.data},
+                    request_data=request.data,
+                )
             )
 
         # we need to serialize the response again to ensure that the
@@ -316,3 +325,68 @@ class SDKIdentities(SDKAPIView):
         return Response(
             data=serializer.data, status=status.HTTP_200_OK, headers=headers
         )
+
+
+class SDKBulkIdentities(SDKAPIView):
+    """
+    Identify multiple identities (optionally with traits) in a single request and
+    return the flags for each of them.
+    """
+
+    serializer_class = SDKBulkIdentifySerializer
+    pagination_class = None  # set here to ensure documentation is correct
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if hasattr(self.request, "environment"):
+            # only set it if the request has the attribute to ensure that the
+            # documentation works correctly still
+            context["environment"] = self.request.environment
+        if self.request.originated_from is RequestOrigin.CLIENT:
+            context["feature_states_additional_filters"] = Q(
+                feature__is_server_key_only=False
+            )
+        return context
+
+    @swagger_auto_schema(
+        request_body=SDKBulkIdentifySerializer(),
+        responses={200: SDKBulkIdentitiesResponseSerializer()},
+        operation_id="bulk_identify_users",
+    )
+    @hashed_percentages_memo()
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+
+        if settings.EDGE_API_URL and request.environment.project.enable_dynamo_db:
+            headers = dict(request.headers)
+            edge_request_forwarder.forward(
+                *(
+                    get_identity_edge_request(
+                        request.method,
+                        headers,
+                        request.environment.project.id,
+                        request_data=item,
+                    )
+                    for item in serializer.initial_data["identities"]
+                )
+            )
+
+        # serialize each identity separately since the flags need the identity
+        # in the context to determine the multivariate values
+        context = self.get_serializer_context()
+        return Response(
+            {
+                "identities": [
+                    SDKBulkIdentifyItemSerializer(
+                        instance=result,
+                        context={**context, "identity": result["identity"]},
+                    ).data
+                    for result in results
+                ]
+            },
+            headers={
+                FLAGSMITH_UPDATED_AT_HEADER: request.environment.updated_at.timestamp()
+            },
+        )
@@ -10,12 +10,28 @@ class Command(BaseCommand):
         parser.add_argument(
             "project", type=int, help="Id of the project being migrated"
         )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Resume an interrupted migration from its last checkpoint",
+        )
 
     def handle(self, *args, **options):
         project_id = options["project"]
+        resume = options["resume"]
         identity_migrator = IdentityMigrator(project_id)
-        if not identity_migrator.can_migrate:
+        if resume and not identity_migrator.can_resume:
+            raise CommandError(
+                "Identities migration for this project is not in progress"
+            )
+        if not resume and not identity_migrator.can_migrate:
             raise CommandError(
                 "Identities migration for this project is either done or is in progress"
             )
-        identity_migrator.migrate()
+        identity_migrator.migrate(
+            resume=resume, progress_callback=self._report_progress
+        )
+        self.stdout.write(self.style.SUCCESS("Identities migration completed"))
+
+    def _report_progress(self, migrated: int, total: int):
+        self.stdout.write(f"Migrated {migrated} of {total} identities")
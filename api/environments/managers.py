@@ -6,8 +6,15 @@ from features.multivariate.models import MultivariateFeatureStateValue
 
 
 class EnvironmentManager(SoftDeleteManager):
-    def filter_for_document_builder(self, *args, **kwargs):
-        return (
+    def filter_for_document_builder(
+        self, *args, include_segment_rules: bool = True, **kwargs
+    ):
+        """
+        :param include_segment_rules: whether to prefetch the rules and conditions of
+            the project's segments (which can be omitted if the mapped segment rules
+            are provided to the document builder separately)
+        """
+        queryset = (
             super()
             .select_related(
                 "project",
@@ -34,11 +41,6 @@ class EnvironmentManager(SoftDeleteManager):
                     ),
                 ),
                 "project__segments",
-                "project__segments__rules",
-                "project__segments__rules__rules",
-                "project__segments__rules__conditions",
-                "project__segments__rules__rules__conditions",
-                "project__segments__rules__rules__rules",
                 Prefetch(
                     "project__segments__feature_segments",
                     queryset=FeatureSegment.objects.select_related("segment"),
@@ -58,6 +60,15 @@ class EnvironmentManager(SoftDeleteManager):
             )
             .filter(*args, **kwargs)
         )
+        if include_segment_rules:
+            queryset = queryset.prefetch_related(
+                "project__segments__rules",
+                "project__segments__rules__rules",
+                "project__segments__rules__conditions",
+                "project__segments__rules__rules__conditions",
+                "project__segments__rules__rules__rules",
+            )
+        return queryset
 
     def get_queryset(self):
         return super().get_queryset().select_related("project", "project__organisation")
@@ -34,6 +34,16 @@ from environments.api_keys import (
     generate_client_api_key,
     generate_server_api_key,
 )
+from environments.cache import (
+    bump_environment_cache_versions,
+    environment_local_cache,
+    get_environment_cache_version,
+)
+from environments.document_builder import (
+    get_patched_environment_model,
+    get_project_segment_rules,
+    set_built_environments,
+)
 from environments.dynamodb import (
     DynamoEnvironmentAPIKeyWrapper,
     DynamoEnvironmentWrapper,
@@ -42,10 +52,14 @@ from environments.exceptions import EnvironmentHeaderNotPresentError
 from environments.managers import EnvironmentManager
 from features.models import Feature, FeatureSegment, FeatureState
 from metadata.models import Metadata
+from segments.evaluator import CompiledSegment, compile_segments
 from segments.models import Segment
 from util.mappers import map_environment_to_environment_document
 from webhooks.models import AbstractBaseExportableWebhookModel
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from audit.models import AuditLog
+
 logger = logging.getLogger(__name__)
 
 environment_cache = caches[settings.ENVIRONMENT_CACHE_NAME]
@@ -143,6 +157,7 @@ class Environment(
     def clear_environment_cache(self):
         # TODO: this could rebuild the cache itself (using an async task)
         environment_cache.delete(self.initial_value("api_key"))
+        bump_environment_cache_versions([self.initial_value("api_key")])
 
     def __str__(self):
         return "Project %s - Environment %s" % (self.project.name, self.name)
@@ -185,11 +200,25 @@ class Environment(
 
     @classmethod
     def get_from_cache(cls, api_key):
+        """
+        Get the environment from the (process local and / or shared) environment
+        cache. The environment returned may be shared with concurrent requests, so
+        it must not be modified.
+        """
         try:
             if not api_key:
                 logger.warning("Requested environment with null api_key.")
                 return None
 
+            use_local_cache = settings.ENVIRONMENT_LOCAL_CACHE_SECONDS > 0
+            if use_local_cache:
+                # retrieve the version before the environment so that, if it
+                # changes in the meantime, the cached environment is not used
+                local_cache_key = (api_key, get_environment_cache_version(api_key))
+                environment = environment_local_cache.get(local_cache_key)
+                if environment:
+                    return environment
+
             environment = environment_cache.get(api_key)
             if not environment:
                 select_related_args = (
@@ -211,20 +240,50 @@ class Environment(
                 environment_cache.set(
                     api_key, environment, timeout=settings.ENVIRONMENT_CACHE_SECONDS
                 )
+            if use_local_cache:
+                environment_local_cache.set(
+                    local_cache_key,
+                    environment,
+                    timeout=settings.ENVIRONMENT_LOCAL_CACHE_SECONDS,
+                )
             return environment
         except cls.DoesNotExist:
             logger.info("Environment with api_key %s does not exist" % api_key)
 
     @classmethod
     def write_environments_to_dynamodb(
-        cls, environment_id: int = None, project_id: int = None
+        cls,
+        environment_id: int = None,
+        project_id: int = None,
+        audit_log: "AuditLog" = None,
     ) -> None:
+        """
+        :param audit_log: the audit log record which triggered the write, if any,
+            used to determine which of the cached segment rules need rebuilding, or
+            whether the cached environment can be patched instead of rebuilt
+        """
+        use_segment_rules_cache = settings.CACHE_SEGMENT_RULES_SECONDS > 0
+        use_built_environments_cache = settings.CACHE_BUILT_ENVIRONMENTS_SECONDS > 0
+
+        if (
+            use_built_environments_cache
+            and audit_log is not None
+            and environment_wrapper.is_enabled
+            and audit_log.project.enable_dynamo_db
+            and (environment_model := get_patched_environment_model(audit_log))
+        ):
+            environment_wrapper.write_environment_models([environment_model])
+            return
+
         # use a list to make sure the entire qs is evaluated up front
         environments_filter = (
             Q(id=environment_id) if environment_id else Q(project_id=project_id)
         )
         environments = list(
-            cls.objects.filter_for_document_builder(environments_filter)
+            cls.objects.filter_for_document_builder(
+                environments_filter,
+                include_segment_rules=not use_segment_rules_cache,
+            )
         )
         if not environments:
             return
@@ -240,7 +299,18 @@ class Environment(
         if not all([project, project.enable_dynamo_db, environment_wrapper.is_enabled]):
             return
 
-        environment_wrapper.write_environments(environments)
+        if use_segment_rules_cache:
+            environment_models = environment_wrapper.write_environments(
+                environments,
+                segment_rules_by_segment_id=get_project_segment_rules(
+                    project, audit_log=audit_log
+                ),
+            )
+        else:
+            environment_models = environment_wrapper.write_environments(environments)
+
+        if use_built_environments_cache:
+            set_built_environments(environment_models, audit_log=audit_log)
 
     def get_feature_state(
         self, feature_id: int, filter_kwargs: dict = None
@@ -272,9 +342,22 @@ class Environment(
         """
         Get any segments that have been overridden in this environment.
         """
-        segments = environment_segments_cache.get(self.id)
-        if not segments:
-            segments = list(
+        return [
+            compiled_segment.segment
+            for compiled_segment in self.get_compiled_segments_from_cache()
+        ]
+
+    def get_compiled_segments_from_cache(self) -> typing.List[CompiledSegment]:
+        """
+        Get the compiled representation of any segments that have been overridden
+        in this environment. See segments.evaluator.
+        """
+        # the key is prefixed since the cache previously held lists of Segment
+        # objects under the environment id
+        cache_key = f"compiled:{self.id}"
+        compiled_segments = environment_segments_cache.get(cache_key)
+        if not compiled_segments:
+            compiled_segments = compile_segments(
                 Segment.objects.filter(
                     feature_segments__feature_states__environment=self
                 ).prefetch_related(
@@ -285,8 +368,8 @@ class Environment(
                     "rules__rules__rules",
                 )
             )
-            environment_segments_cache.set(self.id, segments)
-        return segments
+            environment_segments_cache.set(cache_key, compiled_segments)
+        return compiled_segments
 
     @classmethod
     def get_environment_document(
@@ -0,0 +1,141 @@
+"""
+Rendered (and compressed) environment documents served by SDKEnvironmentAPIView.
+
+Since local evaluation SDKs poll the environment document endpoint constantly, the
+document is cached as the final response content (in each supported encoding),
+keyed on the environment's api key and updated_at value so that it never needs to
+be serialised or compressed again until the environment is updated.
+"""
+import datetime
+import gzip
+import typing
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from environments.models import Environment, environment_document_cache
+from util.mappers import map_environment_to_environment_document
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+
+
+def _compress(encoding: str, content: bytes) -> bytes:
+    if encoding == BROTLI:
+        return brotli.compress(content)
+    return gzip.compress(content)
+
+
+def get_supported_encodings() -> typing.List[str]:
+    """
+    Content encodings that can be used for the environment document, in order of
+    preference.
+    """
+    if not settings.ENABLE_GZIP_COMPRESSION:
+        return []
+    return [BROTLI, GZIP] if brotli else [GZIP]
+
+
+def get_preferred_encoding(accept_encoding: str) -> str | None:
+    """
+    Determine the content encoding to use from the value of the Accept-Encoding
+    header of the request. Returns None if the content should not be encoded.
+    """
+    accepted_encodings = set()
+    for item in accept_encoding.split(","):
+        encoding, _, params = item.partition(";")
+        _, _, quality = params.partition("q=")
+        try:
+            if quality and float(quality) == 0:
+                # explicitly not accepted
+                continue
+        except ValueError:
+            continue
+        accepted_encodings.add(encoding.strip().lower())
+
+    for encoding in get_supported_encodings():
+        if encoding in accepted_encodings:
+            return encoding
+    return None
+
+
+def get_environment_document_etag(updated_at: datetime.datetime) -> str:
+    # the content differs depending on the encoding so this can only be a weak
+    # validator
+    return f'W/"{updated_at.timestamp()}"'
+
+
+@dataclass(frozen=True)
+class RenderedEnvironmentDocument:
+    updated_at: datetime.datetime
+    content: bytes
+    encoded_content: typing.Dict[str, bytes] = field(default_factory=dict)
+
+    def get_content(self, encoding: str | None = None) -> bytes:
+        if encoding is None:
+            return self.content
+        if encoding in self.encoded_content:
+            return self.encoded_content[encoding]
+        return _compress(encoding, self.content)
+
+
+def get_environment_updated_at(environment: Environment) -> datetime.datetime:
+    """
+    Get the current updated_at of the environment from the database. The value on
+    the (cached) environment can't be relied on since updated_at is updated in bulk
+    (see AuditLog.update_environments_updated_at), which doesn't clear the
+    environment cache.
+    """
+    return (
+        Environment.objects.filter(id=environment.id)
+        .values_list("updated_at", flat=True)
+        .get()
+    )
+
+
+def get_rendered_environment_document(
+    environment: Environment, updated_at: datetime.datetime
+) -> RenderedEnvironmentDocument:
+    if settings.CACHE_ENVIRONMENT_DOCUMENT_SECONDS <= 0:
+        return render_environment_document(environment)
+
+    cache_key = f"{environment.api_key}:{updated_at.timestamp()}"
+    rendered_document = environment_document_cache.get(cache_key)
+    if not rendered_document:
+        rendered_document = render_environment_document(
+            environment, encodings=get_supported_encodings()
+        )
+        environment_document_cache.set(
+            cache_key,
+            rendered_document,
+            timeout=settings.CACHE_ENVIRONMENT_DOCUMENT_SECONDS,
+        )
+    return rendered_document
+
+
+def render_environment_document(
+    environment: Environment, encodings: typing.Iterable[str] = ()
+) -> RenderedEnvironmentDocument:
+    """
+    Render the environment document as JSON and compress it using each of the
+    given encodings.
+    """
+    environment = Environment.objects.filter_for_document_builder(
+        api_key=environment.api_key
+    ).get()
+    content = JSONRenderer().render(
+        map_environment_to_environment_document(environment)
+    )
+    return RenderedEnvironmentDocument(
+        updated_at=environment.updated_at,
+        content=content,
+        encoded_content={
+            encoding: _compress(encoding, content) for encoding in encodings
+        },
+    )
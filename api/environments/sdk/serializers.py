@@ -2,6 +2,7 @@ import typing
 from collections import defaultdict
 
 from core.constants import BOOLEAN, FLOAT, INTEGER, STRING
+from django.conf import settings
 from rest_framework import serializers
 
 from environments.identities.models import Identity
@@ -170,3 +171,101 @@ class IdentifyWithTraitsSerializer(
                 "Setting traits not allowed with client key."
             )
         return traits
+
+
+class SDKBulkIdentifyItemSerializer(
+    HideSensitiveFieldsSerializerMixin, serializers.Serializer
+):
+    identifier = serializers.CharField(required=True)
+    traits = TraitSerializerBasic(required=False, many=True)
+    flags = SDKFeatureStateSerializer(read_only=True, many=True)
+
+    sensitive_fields = ("traits",)
+
+
+class SDKBulkIdentifySerializer(serializers.Serializer):
+    identities = SDKBulkIdentifyItemSerializer(many=True, allow_empty=False)
+
+    def save(self, **kwargs) -> typing.List[dict]:
+        """
+        Create the identities with their associated traits (optionally storing the
+        traits if the flag is set on the organisation) and evaluate the flags for
+        each of them using a fixed number of queries.
+
+        :return: list of dictionaries of the identity, traits and flags in the same
+            order as the identities in the request data
+        """
+        environment = self.context["environment"]
+        persist_trait_data = environment.project.organisation.persist_trait_data
+        items = self.validated_data["identities"]
+
+        identities, _ = Identity.objects.bulk_get_or_create(
+            environment, (item["identifier"] for item in items)
+        )
+
+        if persist_trait_data:
+            # partially update any existing traits (a newly created identity has
+            # none) and use the full list of traits for each identity
+            identities_traits = Identity.bulk_update_traits(
+                (identities[item["identifier"]], item.get("traits", []))
+                for item in items
+            )
+            traits = {
+                item["identifier"]: identities_traits[identities[item["identifier"]].id]
+                for item in items
+            }
+        else:
+            traits = {
+                item["identifier"]: identities[item["identifier"]].generate_traits(
+                    item.get("traits", []), persist=False
+                )
+                for item in items
+            }
+
+        identities_feature_states = Identity.get_all_feature_states_for_identities(
+            environment,
+            (
+                (identities[item["identifier"]], traits[item["identifier"]])
+                for item in items
+            ),
+            additional_filters=self.context.get("feature_states_additional_filters"),
+        )
+
+        results = []
+        for item in items:
+            identity = identities[item["identifier"]]
+            all_feature_states = identities_feature_states[identity.id]
+            identify_integrations(
+                identity, all_feature_states, traits[identity.identifier]
+            )
+            results.append(
+                {
+                    "identity": identity,
+                    "identifier": identity.identifier,
+                    "traits": traits[identity.identifier],
+                    "flags": all_feature_states,
+                }
+            )
+
+        return results
+
+    def validate_identities(self, identities: typing.List[dict]) -> typing.List[dict]:
+        if len(identities) > settings.MAX_IDENTITIES_PER_BULK_IDENTIFY_REQUEST:
+            raise serializers.ValidationError(
+                "Cannot identify more than %d identities in a single request."
+                % settings.MAX_IDENTITIES_PER_BULK_IDENTIFY_REQUEST
+            )
+
+        identifiers = [item["identifier"] for item in identities]
+        if len(set(identifiers)) != len(identifiers):
+            raise serializers.ValidationError("Identifiers must be unique.")
+
+        request = self.context["request"]
+        if any(
+            item.get("traits") for item in identities
+        ) and not request.environment.trait_persistence_allowed(request):
+            raise serializers.ValidationError(
+                "Setting traits not allowed with client key."
+            )
+
+        return identities
@@ -1,11 +1,17 @@
 from core.constants import FLAGSMITH_UPDATED_AT_HEADER
-from django.http import HttpRequest
-from rest_framework.response import Response
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework.views import APIView
 
 from environments.authentication import EnvironmentKeyAuthentication
-from environments.models import Environment
 from environments.permissions.permissions import EnvironmentKeyPermissions
+from environments.sdk.documents import (
+    get_environment_document_etag,
+    get_environment_updated_at,
+    get_preferred_encoding,
+    get_rendered_environment_document,
+)
 
 
 class SDKEnvironmentAPIView(APIView):
@@ -14,12 +20,33 @@ class SDKEnvironmentAPIView(APIView):
     def get_authenticators(self):
         return [EnvironmentKeyAuthentication(required_key_prefix="ser.")]
 
-    def get(self, request: HttpRequest) -> Response:
-        environment_document = Environment.get_environment_document(
-            request.environment.api_key
-        )
-        updated_at = self.request.environment.updated_at
-        return Response(
-            environment_document,
-            headers={FLAGSMITH_UPDATED_AT_HEADER: updated_at.timestamp()},
+    def get(self, request: HttpRequest) -> HttpResponse:
+        environment = request.environment
+        updated_at = get_environment_updated_at(environment)
+        headers = {
+            FLAGSMITH_UPDATED_AT_HEADER: updated_at.timestamp(),
+            "ETag": get_environment_document_etag(updated_at),
+            "Last-Modified": http_date(updated_at.timestamp()),
+        }
+
+        # respond without the document if the client already has the latest version.
+        # Only the ETag is used since Last-Modified is truncated to whole seconds, so
+        # a change made in the same second as the client's copy would be missed.
+        not_modified_response = get_conditional_response(request, etag=headers["ETag"])
+        if not_modified_response is not None:
+            for header, value in headers.items():
+                not_modified_response[header] = value
+            return not_modified_response
+
+        rendered_document = get_rendered_environment_document(environment, updated_at)
+        encoding = get_preferred_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+
+        response = HttpResponse(
+            rendered_document.get_content(encoding),
+            content_type="application/json",
+            headers=headers,
         )
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
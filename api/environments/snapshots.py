@@ -0,0 +1,155 @@
+import datetime
+import typing
+from dataclasses import dataclass, field
+
+from core.cache import LocalCache
+from django.conf import settings
+from django.db.models import Min, Prefetch, Q
+from django.utils import timezone
+
+from features.feature_types import MULTIVARIATE
+from features.models import FeatureState
+from features.multivariate.models import MultivariateFeatureStateValue
+
+if typing.TYPE_CHECKING:
+    from environments.models import Environment
+
+
+environment_feature_states_cache = LocalCache(
+    max_entries=settings.ENVIRONMENT_FEATURE_STATES_CACHE_MAX_ENTRIES,
+    timeout=settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS,
+)
+
+
+@dataclass(frozen=True)
+class EnvironmentFeatureStatesSnapshot:
+    """
+    The live environment default and segment override feature states for an
+    environment, resolved to the highest priority feature state per feature
+    (for environment defaults) and per segment / feature (for segment overrides).
+
+    The feature states are shared between requests and must not be modified. The
+    multivariate allocations of the multivariate feature states are precomputed.
+    """
+
+    environment_updated_at: datetime.datetime
+    environment_feature_states: typing.List[FeatureState]
+    segment_feature_states: typing.Dict[int, typing.List[FeatureState]] = field(
+        default_factory=dict
+    )
+
+    def get_feature_states(
+        self, segment_ids: typing.Iterable[int]
+    ) -> typing.List[FeatureState]:
+        """
+        Get the environment default feature states along with the segment overrides
+        for the given segments.
+        """
+        feature_states = list(self.environment_feature_states)
+        for segment_id in segment_ids:
+            feature_states.extend(self.segment_feature_states.get(segment_id, []))
+        return feature_states
+
+
+def get_environment_feature_states_snapshot(
+    environment: "Environment", additional_filters: Q | None = None
+) -> EnvironmentFeatureStatesSnapshot:
+    """
+    Get the snapshot of the environment's feature states from the process local cache,
+    building it if it doesn't exist or if the environment has been updated since it
+    was built (determined using Environment.updated_at).
+    """
+    cache_key = (environment.id, additional_filters)
+
+    snapshot = environment_feature_states_cache.get(cache_key)
+    if snapshot and snapshot.environment_updated_at == environment.updated_at:
+        return snapshot
+
+    now = timezone.now()
+    snapshot = build_environment_feature_states_snapshot(
+        environment, additional_filters
+    )
+
+    # Scheduled feature states don't update the environment when they go live so
+    # we make sure that the snapshot expires when the next one does.
+    timeout = settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS
+    next_live_from = _get_next_scheduled_live_from(environment, now)
+    if next_live_from:
+        timeout = min(timeout, (next_live_from - now).total_seconds())
+
+    environment_feature_states_cache.set(cache_key, snapshot, timeout=timeout)
+    return snapshot
+
+
+def build_environment_feature_states_snapshot(
+    environment: "Environment", additional_filters: Q | None = None
+) -> EnvironmentFeatureStatesSnapshot:
+    full_query = Q(
+        environment=environment,
+        identity__isnull=True,
+        live_from__lte=timezone.now(),
+        version__isnull=False,
+    )
+    if additional_filters:
+        full_query &= additional_filters
+
+    feature_states = (
+        FeatureState.objects.select_related(
+            "feature",
+            "feature_state_value",
+            "feature_segment",
+            "feature_segment__segment",
+        )
+        .prefetch_related(
+            Prefetch(
+                "multivariate_feature_state_values",
+                queryset=MultivariateFeatureStateValue.objects.select_related(
+                    "multivariate_feature_option"
+                ),
+            )
+        )
+        .filter(full_query)
+    )
+
+    # Build dictionaries keyed on feature id (and segment id) holding only the
+    # highest priority feature state.
+    environment_feature_states = {}
+    segment_feature_states = {}
+    for feature_state in feature_states:
+        if feature_state.feature_segment_id:
+            if feature_state.feature_segment.environment_id != environment.id:
+                continue
+            flags = segment_feature_states.setdefault(
+                feature_state.feature_segment.segment_id, {}
+            )
+        else:
+            flags = environment_feature_states
+
+        current_feature_state = flags.get(feature_state.feature_id)
+        if not current_feature_state or feature_state > current_feature_state:
+            flags[feature_state.feature_id] = feature_state
+
+    for flags in (environment_feature_states, *segment_feature_states.values()):
+        for feature_state in flags.values():
+            if feature_state.feature.type == MULTIVARIATE:
+                feature_state.precompute_multivariate_allocations()
+
+    return EnvironmentFeatureStatesSnapshot(
+        environment_updated_at=environment.updated_at,
+        environment_feature_states=list(environment_feature_states.values()),
+        segment_feature_states={
+            segment_id: list(flags.values())
+            for segment_id, flags in segment_feature_states.items()
+        },
+    )
+
+
+def _get_next_scheduled_live_from(
+    environment: "Environment", now: datetime.datetime
+) -> datetime.datetime | None:
+    return FeatureState.objects.filter(
+        environment=environment,
+        identity__isnull=True,
+        live_from__gt=now,
+        version__isnull=False,
+    ).aggregate(next_live_from=Min("live_from"))["next_live_from"]
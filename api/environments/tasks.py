@@ -1,9 +1,10 @@
 from environments.dynamodb import DynamoEnvironmentWrapper
 from environments.models import Environment
 from task_processor.decorators import register_task_handler
+from task_processor.models import REALTIME_QUEUE, TaskPriority
 
 
-@register_task_handler()
+@register_task_handler(queue=REALTIME_QUEUE, priority=TaskPriority.HIGH)
 def rebuild_environment_document(environment_id: int):
     wrapper = DynamoEnvironmentWrapper()
     if wrapper.is_enabled:
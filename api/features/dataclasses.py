@@ -1,6 +1,10 @@
+import bisect
 import typing
 from dataclasses import dataclass
 
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from features.multivariate.models import MultivariateFeatureOption
+
 
 @dataclass
 class EnvironmentFeatureOverridesData:
@@ -25,3 +29,24 @@ class EnvironmentFeatureOverridesData:
             self.num_identity_overrides = 1
         else:
             self.num_identity_overrides += 1
+
+
+@dataclass(frozen=True)
+class MultivariateAllocations:
+    """
+    Dataclass to hold the cumulative percentage allocations of the multivariate options
+    of a feature state (in order of the id of their multivariate feature state value)
+    so that the option for a given percentage can be found with a binary search.
+
+    Options are allocated the percentages from the limit of the previous option
+    (inclusive) to their own limit (exclusive).
+    """
+
+    limits: typing.Tuple[float, ...] = ()
+    options: typing.Tuple["MultivariateFeatureOption", ...] = ()
+
+    def get_option(
+        self, percentage_value: float
+    ) -> typing.Optional["MultivariateFeatureOption"]:
+        index = bisect.bisect_right(self.limits, percentage_value)
+        return self.options[index] if index < len(self.options) else None
@@ -74,7 +74,10 @@ from projects.models import Project
 from projects.tags.models import Tag
 
 from . import audit_helpers
-from .dataclasses import EnvironmentFeatureOverridesData
+from .dataclasses import (
+    EnvironmentFeatureOverridesData,
+    MultivariateAllocations,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -559,6 +562,7 @@ class FeatureState(
         clone = deepcopy(self)
         clone.id = None
         clone.uuid = uuid.uuid4()
+        clone._multivariate_allocations = None
         clone.feature_segment = (
             FeatureSegment.objects.get(
                 environment=env,
@@ -643,33 +647,51 @@ class FeatureState(
     def get_multivariate_feature_state_value(
         self, identity_hash_key: str
     ) -> AbstractBaseFeatureValueModel:
-        # the multivariate_feature_state_values should be prefetched at this point
-        # so we just convert them to a list and use python operations from here to
-        # avoid further queries to the DB
-        mv_options = list(self.multivariate_feature_state_values.all())
+        allocations = getattr(self, "_multivariate_allocations", None)
+        if allocations is None:
+            allocations = self.build_multivariate_allocations()
 
         percentage_value = (
             get_hashed_percentage_for_object_ids([self.id, identity_hash_key]) * 100
         )
 
-        # Iterate over the mv options in order of id (so we get the same value each
-        # time) to determine the correct value to return to the identity based on
-        # the percentage allocations of the multivariate options. This gives us a
-        # way to ensure that the same value is returned every time we use the same
-        # percentage value.
-        start_percentage = 0
-        for mv_option in sorted(mv_options, key=lambda o: o.id):
-            limit = getattr(mv_option, "percentage_allocation", 0) + start_percentage
-            if start_percentage <= percentage_value < limit:
-                return mv_option.multivariate_feature_option
-
-            start_percentage = limit
+        mv_option = allocations.get_option(percentage_value)
+        if mv_option is not None:
+            return mv_option
 
         # if none of the percentage allocations match the percentage value we got for
         # the identity, then we just return the default feature state value (or None
         # if there isn't one - although this should never happen)
         return getattr(self, "feature_state_value", None)
 
+    def build_multivariate_allocations(self) -> MultivariateAllocations:
+        # the multivariate_feature_state_values should be prefetched at this point
+        # so we just convert them to a list and use python operations from here to
+        # avoid further queries to the DB
+        mv_options = list(self.multivariate_feature_state_values.all())
+
+        # Order the mv options by id (so we get the same value each time) to determine
+        # the percentage range allocated to each of them. This gives us a way to ensure
+        # that the same value is returned every time we use the same percentage value.
+        limits = []
+        options = []
+        limit = 0
+        for mv_option in sorted(mv_options, key=lambda o: o.id):
+            limit = getattr(mv_option, "percentage_allocation", 0) + limit
+            limits.append(limit)
+            options.append(mv_option.multivariate_feature_option)
+
+        return MultivariateAllocations(limits=tuple(limits), options=tuple(options))
+
+    def precompute_multivariate_allocations(self) -> None:
+        """
+        Build the multivariate allocations once, rather than on every call to
+        get_multivariate_feature_state_value. Only to be used for feature states
+        whose multivariate values won't change, e.g. those in the environment feature
+        states snapshot.
+        """
+        self._multivariate_allocations = self.build_multivariate_allocations()
+
     @hook(BEFORE_CREATE)
     def check_for_existing_feature_state(self):
         # prevent duplicate feature states being created for an environment
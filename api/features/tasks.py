@@ -1,5 +1,3 @@
-from threading import Thread
-
 from environments.models import Webhook
 from features.models import FeatureState
 from webhooks.constants import WEBHOOK_DATETIME_FORMAT
@@ -38,19 +36,12 @@ def trigger_feature_state_change_webhooks(
     previous_state = _get_previous_state(history_instance, event_type)
     if previous_state:
         data.update(previous_state=previous_state)
-    Thread(
-        target=call_environment_webhooks,
-        args=(instance.environment, data, event_type),
-    ).start()
 
-    Thread(
-        target=call_organisation_webhooks,
-        args=(
-            instance.environment.project.organisation,
-            data,
-            event_type,
-        ),
-    ).start()
+    # the webhooks are delivered asynchronously by the task processor
+    call_environment_webhooks(instance.environment, data, event_type)
+    call_organisation_webhooks(
+        instance.environment.project.organisation, data, event_type
+    )
 
 
 def _get_previous_state(
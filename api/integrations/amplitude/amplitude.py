@@ -2,11 +2,10 @@ import json
 import logging
 import typing
 
-import requests
-
 from environments.identities.models import Identity
 from environments.identities.traits.models import Trait
 from features.models import FeatureState
+from integrations.common.delivery import http_session
 from integrations.common.wrapper import AbstractBaseIdentityIntegrationWrapper
 
 from .models import AmplitudeConfiguration
@@ -15,17 +14,26 @@ logger = logging.getLogger(__name__)
 
 
 class AmplitudeWrapper(AbstractBaseIdentityIntegrationWrapper):
+    batch_size = 100
+
     def __init__(self, config: AmplitudeConfiguration):
         self.api_key = config.api_key
         self.url = f"{config.base_url}/identify"
 
+    def get_batch_key(self) -> typing.Hashable:
+        return self.url, self.api_key
+
     def _identify_user(self, user_data: dict) -> None:
-        payload = {"api_key": self.api_key, "identification": json.dumps([user_data])}
+        self._identify_users([user_data])
+
+    def _identify_users(self, users_data: typing.List[dict]) -> None:
+        payload = {"api_key": self.api_key, "identification": json.dumps(users_data)}
 
-        response = requests.post(self.url, data=payload)
+        response = http_session.post(self.url, data=payload)
         logger.debug(
             "Sent event to Amplitude. Response code was: %s" % response.status_code
         )
+        response.raise_for_status()
 
     def generate_user_data(
         self,
@@ -0,0 +1,167 @@
+"""
+Batched delivery of the user data sent to the identity integrations.
+
+Rather than making a request to the integration (from a new thread) for every
+identify call, the user data is queued per integration (e.g. per Amplitude api key)
+and delivered in batches, by a background thread, either when a batch is full or
+when the flush interval has passed. Integrations which support it send each batch
+in a single request using the vendor's batch API, and all requests share a pooled
+HTTP session.
+
+Failed deliveries are retried with exponential backoff. Rather than sleeping in the
+(shared) executor's workers, a failed batch is queued again with the time it can be
+retried at, and is delivered by the first flush after that time.
+"""
+import logging
+import time
+import typing
+
+import requests
+from core.buffering import BufferedFlusher
+from django.conf import settings
+from rudder_analytics.request import APIError as RudderstackAPIError
+
+from analytics.request import APIError as SegmentAPIError
+from util.util import postpone_executor
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from integrations.common.wrapper import (
+        AbstractBaseIdentityIntegrationWrapper,
+    )
+
+logger = logging.getLogger(__name__)
+
+# raised by the vendor libraries for error responses, rather than HTTPError
+VENDOR_API_ERRORS = (SegmentAPIError, RudderstackAPIError)
+
+# shared by the integrations so that connections are reused between requests
+http_session = requests.Session()
+
+
+class IdentityIntegrationDelivery(BufferedFlusher):
+    def __init__(
+        self,
+        flush_interval_seconds: float,
+        max_queue_size: int,
+        max_retries: int,
+        retry_backoff_seconds: float,
+    ):
+        super().__init__(flush_interval_seconds)
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+        self._batches: typing.Dict[
+            typing.Hashable,
+            typing.Tuple["AbstractBaseIdentityIntegrationWrapper", typing.List[dict]],
+        ] = {}
+        self._queue_size = 0
+        # (retry at, attempt, wrapper, batch) of the batches which failed to deliver
+        self._retries: typing.List[
+            typing.Tuple[
+                float,
+                int,
+                "AbstractBaseIdentityIntegrationWrapper",
+                typing.List[dict],
+            ]
+        ] = []
+
+    def enqueue(
+        self, wrapper: "AbstractBaseIdentityIntegrationWrapper", user_data: dict
+    ) -> None:
+        with self._lock:
+            if self._queue_size >= self.max_queue_size:
+                logger.warning(
+                    "Integration delivery queue is full, dropping data for %s",
+                    wrapper.__class__.__name__,
+                )
+                return
+
+            _, batch = self._batches.setdefault(wrapper.get_batch_key(), (wrapper, []))
+            batch.append(user_data)
+            self._queue_size += 1
+            is_batch_full = len(batch) >= wrapper.batch_size
+            self._start_flusher()
+
+        if is_batch_full:
+            self._flush_requested.set()
+
+    def flush(self, wait: bool = False) -> None:
+        """
+        Deliver all of the queued user data, and retry the failed batches which
+        are due, using the shared executor unless `wait` is True. When waiting
+        (i.e. on exit), all of the failed batches are retried.
+        """
+        now = time.monotonic()
+        with self._lock:
+            batches, self._batches = self._batches, {}
+            self._queue_size = 0
+            retries = [r for r in self._retries if wait or r[0] <= now]
+            self._retries = [r for r in self._retries if not (wait or r[0] <= now)]
+
+        deliveries = []
+        for wrapper, user_data in batches.values():
+            for start in range(0, len(user_data), wrapper.batch_size):
+                end = start + wrapper.batch_size
+                deliveries.append((wrapper, user_data[start:end], 0))
+        deliveries.extend(
+            (wrapper, batch, attempt) for _, attempt, wrapper, batch in retries
+        )
+
+        for wrapper, batch, attempt in deliveries:
+            if wait:
+                self.deliver(wrapper, batch, attempt)
+            else:
+                postpone_executor.submit(self.deliver, wrapper, batch, attempt)
+
+    def flush_on_exit(self) -> None:
+        self.flush(wait=True)
+
+    def deliver(
+        self,
+        wrapper: "AbstractBaseIdentityIntegrationWrapper",
+        batch: typing.List[dict],
+        attempt: int = 0,
+    ) -> None:
+        try:
+            wrapper._identify_users(batch)
+        except (requests.RequestException, *VENDOR_API_ERRORS) as e:
+            if not _is_retryable(e) or attempt == self.max_retries:
+                logger.warning(
+                    "Failed to deliver %d users to %s: %s",
+                    len(batch),
+                    wrapper.__class__.__name__,
+                    e,
+                )
+                return
+
+            retry_at = time.monotonic() + self.retry_backoff_seconds * 2**attempt
+            with self._lock:
+                self._retries.append((retry_at, attempt + 1, wrapper, batch))
+
+
+def _is_retryable(
+    exception: typing.Union[
+        requests.RequestException, SegmentAPIError, RudderstackAPIError
+    ]
+) -> bool:
+    if isinstance(exception, VENDOR_API_ERRORS):
+        return _is_retryable_status_code(exception.status)
+    if isinstance(exception, requests.HTTPError):
+        return _is_retryable_status_code(
+            getattr(exception.response, "status_code", None)
+        )
+    return isinstance(exception, (requests.ConnectionError, requests.Timeout))
+
+
+def _is_retryable_status_code(status_code: typing.Optional[int]) -> bool:
+    return status_code is not None and (status_code >= 500 or status_code == 429)
+
+
+identity_integration_delivery = IdentityIntegrationDelivery(
+    flush_interval_seconds=settings.INTEGRATION_DELIVERY_FLUSH_INTERVAL_SECONDS,
+    max_queue_size=settings.INTEGRATION_DELIVERY_MAX_QUEUE_SIZE,
+    max_retries=settings.INTEGRATION_DELIVERY_MAX_RETRIES,
+    retry_backoff_seconds=settings.INTEGRATION_DELIVERY_RETRY_BACKOFF_SECONDS,
+)
+identity_integration_delivery.register_flush_on_exit()
@@ -1,6 +1,7 @@
 import typing
 from abc import ABC, abstractmethod
 
+from integrations.common.delivery import identity_integration_delivery
 from util.util import postpone
 
 if typing.TYPE_CHECKING:
@@ -25,13 +26,28 @@ class AbstractBaseEventIntegrationWrapper(ABC):
 
 
 class AbstractBaseIdentityIntegrationWrapper(ABC):
+    # maximum number of users to send to the integration in a single request
+    batch_size: int = 1
+
     @abstractmethod
     def _identify_user(self, user_data: dict) -> None:
         raise NotImplementedError()
 
-    @postpone
+    def _identify_users(self, users_data: typing.List[dict]) -> None:
+        # integrations which support batching override this to send all of the
+        # users in a single request
+        for user_data in users_data:
+            self._identify_user(user_data)
+
+    def get_batch_key(self) -> typing.Hashable:
+        """
+        Key used to group the user data which can be delivered together (e.g. the
+        integration's api key). By default, user data is delivered individually.
+        """
+        return id(self)
+
     def identify_user_async(self, data: dict) -> None:
-        self._identify_user(data)
+        identity_integration_delivery.enqueue(self, data)
 
     @abstractmethod
     def generate_user_data(
@@ -1,11 +1,10 @@
 import logging
 import typing
 
-import requests
-
 from environments.identities.models import Identity
 from environments.identities.traits.models import Trait
 from features.models import FeatureState
+from integrations.common.delivery import http_session
 from integrations.common.wrapper import AbstractBaseIdentityIntegrationWrapper
 
 from .models import HeapConfiguration
@@ -21,8 +20,9 @@ class HeapWrapper(AbstractBaseIdentityIntegrationWrapper):
         self.url = f"{HEAP_API_URL}/api/track"
 
     def _identify_user(self, user_data: dict) -> None:
-        response = requests.post(self.url, json=user_data)
+        response = http_session.post(self.url, json=user_data)
         logger.debug("Sent event to Heap. Response code was: %s" % response.status_code)
+        response.raise_for_status()
 
     def generate_user_data(
         self,
@@ -1,11 +1,11 @@
 import logging
 import typing
-
-import requests
+from itertools import chain
 
 from environments.identities.models import Identity
 from environments.identities.traits.models import Trait
 from features.models import FeatureState
+from integrations.common.delivery import http_session
 from integrations.common.wrapper import AbstractBaseIdentityIntegrationWrapper
 
 from .models import MixpanelConfiguration
@@ -16,6 +16,8 @@ MIXPANEL_API_URL = "https://api.mixpanel.com"
 
 
 class MixpanelWrapper(AbstractBaseIdentityIntegrationWrapper):
+    batch_size = 50
+
     def __init__(self, config: MixpanelConfiguration):
         self.api_key = config.api_key
         self.url = f"{MIXPANEL_API_URL}/engage#profile-set"
@@ -26,14 +28,23 @@ class MixpanelWrapper(AbstractBaseIdentityIntegrationWrapper):
             "X-Mixpanel-Integration-ID": "flagsmith",
         }
 
-    def _identify_user(self, user_data: dict) -> None:
-        response = requests.post(self.url, headers=self.headers, json=user_data)
+    def get_batch_key(self) -> typing.Hashable:
+        return self.api_key
+
+    def _identify_user(self, user_data: typing.List[dict]) -> None:
+        self._identify_users([user_data])
+
+    def _identify_users(self, users_data: typing.List[typing.List[dict]]) -> None:
+        # the engage API accepts a list of profile updates for multiple users
+        updates = list(chain.from_iterable(users_data))
+        response = http_session.post(self.url, headers=self.headers, json=updates)
         logger.debug(
             "Sent event to Mixpanel. Response code was: %s" % response.status_code
         )
         logger.debug(
             "Sent event to Mixpanel. Response content was: %s" % response.content
         )
+        response.raise_for_status()
 
     def generate_user_data(
         self,
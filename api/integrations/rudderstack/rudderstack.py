@@ -1,7 +1,8 @@
 import logging
 import typing
 
-import rudder_analytics
+from rudder_analytics.client import Client as RudderstackClient
+from rudder_analytics.request import post
 
 from environments.identities.models import Identity
 from environments.identities.traits.models import Trait
@@ -14,12 +15,31 @@ logger = logging.getLogger(__name__)
 
 
 class RudderstackWrapper(AbstractBaseIdentityIntegrationWrapper):
+    batch_size = 100
+
     def __init__(self, config: RudderstackConfiguration):
-        rudder_analytics.write_key = config.api_key
-        rudder_analytics.data_plane_url = config.base_url
+        # the client is only used to build the messages, which are then sent to
+        # the batch API in a single request (see _identify_users). The module level
+        # client isn't used since its configuration is shared by all environments.
+        self.client = RudderstackClient(
+            write_key=config.api_key, host=config.base_url, sync_mode=True, send=False
+        )
+
+    def get_batch_key(self) -> typing.Hashable:
+        return self.client.write_key, self.client.host
 
     def _identify_user(self, user_data: dict) -> None:
-        rudder_analytics.identify(**user_data)
+        self._identify_users([user_data])
+
+    def _identify_users(self, users_data: typing.List[dict]) -> None:
+        messages = [self.client.identify(**data)[1] for data in users_data]
+        post(
+            self.client.write_key,
+            self.client.host,
+            timeout=self.client.timeout,
+            batch=messages,
+        )
+        logger.debug("Sent event to Rudderstack.")
 
     def generate_user_data(
         self,
@@ -2,6 +2,7 @@ import logging
 import typing
 
 from analytics.client import Client as SegmentClient
+from analytics.request import post
 from environments.identities.models import Identity
 from environments.identities.traits.models import Trait
 from features.models import FeatureState
@@ -13,12 +14,28 @@ logger = logging.getLogger(__name__)
 
 
 class SegmentWrapper(AbstractBaseIdentityIntegrationWrapper):
+    batch_size = 100
+
     def __init__(self, config: SegmentConfiguration):
         api_key = config.api_key
-        self.analytics = SegmentClient(write_key=api_key, sync_mode=True)
+        # the client is only used to build the messages, which are then sent to
+        # the batch API in a single request (see _identify_users)
+        self.analytics = SegmentClient(write_key=api_key, sync_mode=True, send=False)
+
+    def get_batch_key(self) -> typing.Hashable:
+        return self.analytics.write_key
 
     def _identify_user(self, data: dict) -> None:
-        self.analytics.identify(**data)
+        self._identify_users([data])
+
+    def _identify_users(self, users_data: typing.List[dict]) -> None:
+        messages = [self.analytics.identify(**data)[1] for data in users_data]
+        post(
+            self.analytics.write_key,
+            self.analytics.host,
+            timeout=self.analytics.timeout,
+            batch=messages,
+        )
         logger.debug("Sent event to Segment.")
 
     def generate_user_data(
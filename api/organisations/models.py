@@ -129,15 +129,16 @@ class Organisation(LifecycleModelMixin, SoftDeleteExportableModel):
 
     @hook(AFTER_SAVE)
     def clear_environment_caches(self):
+        from environments.cache import bump_environment_cache_versions
         from environments.models import Environment
 
-        environment_cache.delete_many(
-            list(
-                Environment.objects.filter(project__organisation=self).values_list(
-                    "api_key", flat=True
-                )
+        api_keys = list(
+            Environment.objects.filter(project__organisation=self).values_list(
+                "api_key", flat=True
             )
         )
+        environment_cache.delete_many(api_keys)
+        bump_environment_cache_versions(api_keys)
 
 
 class UserOrganisation(models.Model):
@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 import re
+import typing
 
 from core.models import SoftDeleteExportableModel
 from django.conf import settings
@@ -17,6 +18,7 @@ from django_lifecycle import (
     hook,
 )
 
+from environments.cache import bump_environment_cache_versions
 from organisations.models import Organisation
 from permissions.models import (
     PROJECT_PERMISSION_TYPE,
@@ -26,6 +28,10 @@ from permissions.models import (
 from projects.managers import ProjectManager
 from projects.tasks import write_environments_to_dynamodb
 
+if typing.TYPE_CHECKING:
+    from segments.evaluator import CompiledSegment
+    from segments.models import Segment
+
 project_segments_cache = caches[settings.PROJECT_SEGMENTS_CACHE_LOCATION]
 environment_cache = caches[settings.ENVIRONMENT_CACHE_NAME]
 
@@ -92,25 +98,44 @@ class Project(LifecycleModelMixin, SoftDeleteExportableModel):
             .exists()
         )
 
-    def get_segments_from_cache(self):
-        segments = project_segments_cache.get(self.id)
+    def get_segments_from_cache(self) -> typing.List["Segment"]:
+        return [
+            compiled_segment.segment
+            for compiled_segment in self.get_compiled_segments_from_cache()
+        ]
 
-        if not segments:
+    def get_compiled_segments_from_cache(self) -> typing.List["CompiledSegment"]:
+        """
+        Get the compiled representation of all segments in the project, used to
+        evaluate identities against the segments. See segments.evaluator.
+        """
+        from segments.evaluator import compile_segments
+
+        # the key is prefixed since the cache previously held lists of Segment
+        # objects under the project id
+        cache_key = f"compiled:{self.id}"
+        compiled_segments = project_segments_cache.get(cache_key)
+
+        if not compiled_segments:
             # This is optimised to account for rules nested one levels deep (since we
             # don't support anything above that from the UI at the moment). Anything
             # past that will require additional queries / thought on how to optimise.
-            segments = self.segments.all().prefetch_related(
-                "rules",
-                "rules__conditions",
-                "rules__rules",
-                "rules__rules__conditions",
-                "rules__rules__rules",
+            compiled_segments = compile_segments(
+                self.segments.all().prefetch_related(
+                    "rules",
+                    "rules__conditions",
+                    "rules__rules",
+                    "rules__rules__conditions",
+                    "rules__rules__rules",
+                )
             )
             project_segments_cache.set(
-                self.id, segments, timeout=settings.CACHE_PROJECT_SEGMENTS_SECONDS
+                cache_key,
+                compiled_segments,
+                timeout=settings.CACHE_PROJECT_SEGMENTS_SECONDS,
             )
 
-        return segments
+        return compiled_segments
 
     @hook(BEFORE_CREATE)
     def set_enable_dynamo_db(self):
@@ -121,9 +146,9 @@ class Project(LifecycleModelMixin, SoftDeleteExportableModel):
 
     @hook(AFTER_SAVE)
     def clear_environments_cache(self):
-        environment_cache.delete_many(
-            list(self.environments.values_list("api_key", flat=True))
-        )
+        api_keys = list(self.environments.values_list("api_key", flat=True))
+        environment_cache.delete_many(api_keys)
+        bump_environment_cache_versions(api_keys)
 
     @hook(AFTER_UPDATE)
     def write_to_dynamo(self):
@@ -1,7 +1,8 @@
 from task_processor.decorators import register_task_handler
+from task_processor.models import REALTIME_QUEUE, TaskPriority
 
 
-@register_task_handler()
+@register_task_handler(queue=REALTIME_QUEUE, priority=TaskPriority.HIGH)
 def write_environments_to_dynamodb(project_id: int):
     from environments.models import Environment
 
@@ -6,6 +6,7 @@ from django.conf import settings
 from django.utils import timezone
 
 from projects.models import Project
+from segments.evaluator import compile_segments
 
 now = timezone.now()
 tomorrow = now + timedelta(days=1)
@@ -23,12 +24,14 @@ def test_get_segments_from_cache(project, monkeypatch):
     )
 
     # When
-    segments = project.get_segments_from_cache()
+    compiled_segments = project.get_compiled_segments_from_cache()
 
     # Then
-    mock_project_segments_cache.get.assert_called_with(project.id)
+    mock_project_segments_cache.get.assert_called_with(f"compiled:{project.id}")
     mock_project_segments_cache.set.assert_called_with(
-        project.id, segments, timeout=settings.CACHE_PROJECT_SEGMENTS_SECONDS
+        f"compiled:{project.id}",
+        compiled_segments,
+        timeout=settings.CACHE_PROJECT_SEGMENTS_SECONDS,
     )
 
 
@@ -36,7 +39,9 @@ def test_get_segments_from_cache(project, monkeypatch):
 def test_get_segments_from_cache_set_not_called(project, segments, monkeypatch):
     # Given
     mock_project_segments_cache = mock.MagicMock()
-    mock_project_segments_cache.get.return_value = project.segments.all()
+    mock_project_segments_cache.get.return_value = compile_segments(
+        project.segments.all()
+    )
 
     monkeypatch.setattr(
         "projects.models.project_segments_cache", mock_project_segments_cache
@@ -49,7 +54,7 @@ def test_get_segments_from_cache_set_not_called(project, segments, monkeypatch):
     assert segments
 
     # And correct calls to cache are made
-    mock_project_segments_cache.get.assert_called_once_with(project.id)
+    mock_project_segments_cache.get.assert_called_once_with(f"compiled:{project.id}")
     mock_project_segments_cache.set.assert_not_called()
 
 
@@ -0,0 +1,312 @@
+"""
+Compiled representation of segment rule trees used to evaluate identities against
+segments without walking the Segment / SegmentRule / Condition model instances (and
+re-parsing the condition values) for every identity and every condition.
+
+The compiled structures are immutable and picklable so that they can be stored in
+the project / environment segments caches in place of the model instances.
+"""
+import typing
+from dataclasses import dataclass
+
+import semver
+from core.constants import BOOLEAN, FLOAT, INTEGER
+from flag_engine.utils.semver import is_semver, remove_semver_suffix
+
+from environments.identities.helpers import (
+    get_hashed_percentage_for_object_ids,
+)
+from segments.models import (
+    CONTAINS,
+    EQUAL,
+    GREATER_THAN,
+    GREATER_THAN_INCLUSIVE,
+    IN,
+    IS_NOT_SET,
+    IS_SET,
+    LESS_THAN,
+    LESS_THAN_INCLUSIVE,
+    MODULO,
+    NOT_CONTAINS,
+    NOT_EQUAL,
+    PERCENTAGE_SPLIT,
+    REGEX,
+    Condition,
+    Segment,
+    SegmentRule,
+)
+
+try:
+    import re2 as re
+except ImportError:
+    import re
+
+if typing.TYPE_CHECKING:
+    from environments.identities.models import Identity
+    from environments.identities.traits.models import Trait
+
+
+TraitsByKey = typing.Dict[str, "Trait"]
+
+
+def _compare(operator: str, value: typing.Any, condition_value: typing.Any) -> bool:
+    if operator == EQUAL:
+        return value == condition_value
+    elif operator == GREATER_THAN:
+        return value > condition_value
+    elif operator == GREATER_THAN_INCLUSIVE:
+        return value >= condition_value
+    elif operator == LESS_THAN:
+        return value < condition_value
+    elif operator == LESS_THAN_INCLUSIVE:
+        return value <= condition_value
+    elif operator == NOT_EQUAL:
+        return value != condition_value
+
+    return False
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """
+    A segment condition with its value pre-parsed into every operand type that the
+    operator could need at evaluation time. Operands that could not be parsed are
+    stored as None, which evaluates to False (as per Condition.does_identity_match).
+    """
+
+    operator: str
+    property: typing.Optional[str]
+    value: typing.Optional[str]
+    segment_id: int
+    int_value: typing.Optional[int] = None
+    float_value: typing.Optional[float] = None
+    bool_value: typing.Optional[bool] = None
+    is_semver: bool = False
+    semver_value: typing.Optional[semver.VersionInfo] = None
+    in_values: typing.FrozenSet[str] = frozenset()
+    regex: typing.Optional[typing.Any] = None
+    modulo: typing.Optional[typing.Tuple[float, float]] = None
+    percentage_split: typing.Optional[float] = None
+
+    def does_identity_match(  # noqa: C901
+        self, identity: "Identity", traits_by_key: TraitsByKey
+    ) -> bool:
+        if self.operator == PERCENTAGE_SPLIT:
+            return self.percentage_split is not None and (
+                get_hashed_percentage_for_object_ids(
+                    object_ids=[self.segment_id, identity.get_hash_key()]
+                )
+                <= self.percentage_split
+            )
+
+        matching_trait = traits_by_key.get(self.property)
+        if matching_trait is None:
+            return self.operator == IS_NOT_SET
+
+        if self.operator in (IS_SET, IS_NOT_SET):
+            return self.operator == IS_SET
+        elif self.operator == MODULO:
+            if self.modulo is None or matching_trait.value_type not in (
+                INTEGER,
+                FLOAT,
+            ):
+                return False
+            divisor, remainder = self.modulo
+            return matching_trait.trait_value % divisor == remainder
+        elif self.operator == IN:
+            return str(matching_trait.trait_value) in self.in_values
+        elif matching_trait.value_type == INTEGER:
+            return self.int_value is not None and _compare(
+                self.operator, matching_trait.integer_value, self.int_value
+            )
+        elif matching_trait.value_type == FLOAT:
+            return self.float_value is not None and _compare(
+                self.operator, matching_trait.float_value, self.float_value
+            )
+        elif matching_trait.value_type == BOOLEAN:
+            return (
+                self.bool_value is not None
+                and self.operator in (EQUAL, NOT_EQUAL)
+                and _compare(
+                    self.operator, matching_trait.boolean_value, self.bool_value
+                )
+            )
+        elif self.is_semver:
+            return self._check_semver_value(matching_trait.string_value)
+
+        return self._check_string_value(matching_trait.string_value)
+
+    def _check_semver_value(self, value: str) -> bool:
+        if self.semver_value is None:
+            return False
+
+        try:
+            return _compare(self.operator, value, self.semver_value)
+        except ValueError:
+            # the trait value is not a valid semver string
+            return False
+
+    def _check_string_value(self, value: str) -> bool:
+        str_value = str(self.value)
+
+        if self.operator in (EQUAL, NOT_EQUAL):
+            return _compare(self.operator, value, str_value)
+        elif self.operator == CONTAINS:
+            return str_value in value
+        elif self.operator == NOT_CONTAINS:
+            return str_value not in value
+        elif self.operator == REGEX:
+            return self.regex is not None and self.regex.match(value) is not None
+
+        return False
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    type: str
+    conditions: typing.Tuple[CompiledCondition, ...] = ()
+    rules: typing.Tuple["CompiledRule", ...] = ()
+
+    @property
+    def has_percentage_split(self) -> bool:
+        return any(
+            condition.operator == PERCENTAGE_SPLIT for condition in self.conditions
+        ) or any(rule.has_percentage_split for rule in self.rules)
+
+    def does_identity_match(
+        self, identity: "Identity", traits_by_key: TraitsByKey
+    ) -> bool:
+        if not self.conditions:
+            matches_conditions = True
+        elif self.type == SegmentRule.ALL_RULE:
+            matches_conditions = all(
+                condition.does_identity_match(identity, traits_by_key)
+                for condition in self.conditions
+            )
+        elif self.type == SegmentRule.ANY_RULE:
+            matches_conditions = any(
+                condition.does_identity_match(identity, traits_by_key)
+                for condition in self.conditions
+            )
+        elif self.type == SegmentRule.NONE_RULE:
+            matches_conditions = not any(
+                condition.does_identity_match(identity, traits_by_key)
+                for condition in self.conditions
+            )
+        else:
+            matches_conditions = False
+
+        return matches_conditions and all(
+            rule.does_identity_match(identity, traits_by_key) for rule in self.rules
+        )
+
+
+@dataclass(frozen=True)
+class CompiledSegment:
+    segment: Segment
+    rules: typing.Tuple[CompiledRule, ...] = ()
+
+    @property
+    def id(self) -> int:
+        return self.segment.id
+
+    @property
+    def has_percentage_split(self) -> bool:
+        return any(rule.has_percentage_split for rule in self.rules)
+
+    def does_identity_match(
+        self, identity: "Identity", traits_by_key: TraitsByKey
+    ) -> bool:
+        return len(self.rules) > 0 and all(
+            rule.does_identity_match(identity, traits_by_key) for rule in self.rules
+        )
+
+
+def compile_segment(segment: Segment) -> CompiledSegment:
+    """
+    Build the compiled representation of a segment. Note that this reads the rules
+    and conditions via the related managers so, to avoid additional queries, the
+    segment should be retrieved with the relevant prefetch_related arguments.
+    """
+    return CompiledSegment(
+        segment=segment,
+        rules=tuple(_compile_rule(rule, segment.id) for rule in segment.rules.all()),
+    )
+
+
+def compile_segments(
+    segments: typing.Iterable[Segment],
+) -> typing.List[CompiledSegment]:
+    return [compile_segment(segment) for segment in segments]
+
+
+def get_traits_by_key(traits: typing.Iterable["Trait"]) -> TraitsByKey:
+    """
+    Build the trait lookup used by the compiled conditions. If there are multiple
+    traits with the same key, the first one wins to match the behaviour of
+    Condition.does_identity_match.
+    """
+    traits_by_key = {}
+    for trait in traits:
+        traits_by_key.setdefault(trait.trait_key, trait)
+    return traits_by_key
+
+
+def _compile_rule(rule: SegmentRule, segment_id: int) -> CompiledRule:
+    return CompiledRule(
+        type=rule.type,
+        conditions=tuple(
+            _compile_condition(condition, segment_id)
+            for condition in rule.conditions.all()
+        ),
+        rules=tuple(_compile_rule(child, segment_id) for child in rule.rules.all()),
+    )
+
+
+def _compile_condition(condition: Condition, segment_id: int) -> CompiledCondition:
+    value = condition.value
+    operands = {}
+
+    if condition.operator == PERCENTAGE_SPLIT:
+        operands["percentage_split"] = _parse(lambda: float(value) / 100.0)
+    elif condition.operator == MODULO:
+        operands["modulo"] = _parse(
+            lambda: tuple(float(part) for part in _split_modulo(value))
+        )
+    elif condition.operator == IN:
+        operands["in_values"] = frozenset(value.split(",") if value is not None else ())
+    else:
+        operands["int_value"] = _parse(lambda: int(str(value)))
+        operands["float_value"] = _parse(lambda: float(str(value)))
+        if value in ("False", "false", "0"):
+            operands["bool_value"] = False
+        elif value in ("True", "true", "1"):
+            operands["bool_value"] = True
+
+        if value is not None and is_semver(value):
+            operands["is_semver"] = True
+            operands["semver_value"] = _parse(
+                lambda: semver.VersionInfo.parse(remove_semver_suffix(value))
+            )
+        elif condition.operator == REGEX:
+            operands["regex"] = _parse(lambda: re.compile(str(value)))
+
+    return CompiledCondition(
+        operator=condition.operator,
+        property=condition.property,
+        value=value,
+        segment_id=segment_id,
+        **operands,
+    )
+
+
+def _split_modulo(value: str) -> typing.Tuple[str, str]:
+    divisor, remainder = value.split("|")
+    return divisor, remainder
+
+
+def _parse(parser: typing.Callable[[], typing.Any]) -> typing.Any:
+    try:
+        return parser()
+    except (TypeError, ValueError, AttributeError, re.error):
+        return None
@@ -3,11 +3,12 @@ from django.conf import settings
 
 from projects.models import Project
 from task_processor.decorators import register_task_handler
+from task_processor.models import REALTIME_QUEUE, TaskPriority
 
 from .exceptions import SSEAuthTokenNotSet
 
 
-@register_task_handler()
+@register_task_handler(queue=REALTIME_QUEUE, priority=TaskPriority.HIGH)
 def send_environment_update_message_for_project(
     project_id: int,
 ):
@@ -19,7 +20,7 @@ def send_environment_update_message_for_project(
         )
 
 
-@register_task_handler()
+@register_task_handler(queue=REALTIME_QUEUE, priority=TaskPriority.HIGH)
 def send_environment_update_message(environment_key: str, updated_at):
     url = f"{settings.SSE_SERVER_BASE_URL}/sse/environments/{environment_key}/queue-change"
     payload = {"updated_at": updated_at}
@@ -8,14 +8,30 @@ from threading import Thread
 from django.conf import settings
 from django.utils import timezone
 
-from task_processor.models import RecurringTask, Task
+from task_processor.models import (
+    DEFAULT_QUEUE,
+    RecurringTask,
+    Task,
+    TaskPriority,
+)
 from task_processor.task_registry import register_task
 from task_processor.task_run_method import TaskRunMethod
 
 logger = logging.getLogger(__name__)
 
 
-def register_task_handler(task_name: str = None):
+def register_task_handler(
+    task_name: str = None,
+    queue: str = DEFAULT_QUEUE,
+    priority: TaskPriority = TaskPriority.NORMAL,
+):
+    """
+    :param queue: the queue to add the tasks to, so that the task processor can
+        dedicate task runners to it
+    :param priority: the priority of the tasks relative to other tasks waiting to
+        be processed
+    """
+
     def decorator(f: typing.Callable):
         nonlocal task_name
 
@@ -29,7 +45,14 @@ def register_task_handler(task_name: str = None):
             delay_until: datetime = None,
             args: typing.Tuple = (),
             kwargs: typing.Dict = None,
+            coalesce: bool = False,
         ) -> typing.Optional[Task]:
+            """
+            :param coalesce: if True and the same task (with the same arguments) is
+                already scheduled to run at a later time, don't create a new task
+                and return the existing one instead. Only applies when using the
+                task processor.
+            """
             logger.debug("Request to run task '%s' asynchronously.", task_identifier)
 
             kwargs = kwargs or dict()
@@ -46,12 +69,24 @@ def register_task_handler(task_name: str = None):
                 logger.debug("Running task '%s' in separate thread", task_identifier)
                 run_in_thread(args=args, kwargs=kwargs)
             else:
+                if coalesce:
+                    scheduled_task = Task.objects.get_scheduled_task(
+                        task_identifier=task_identifier, args=args, kwargs=kwargs
+                    )
+                    if scheduled_task:
+                        logger.debug(
+                            "Task '%s' already scheduled, coalescing.", task_identifier
+                        )
+                        return scheduled_task
+
                 logger.debug("Creating task for function '%s'...", task_identifier)
                 task = Task.schedule_task(
                     schedule_for=delay_until or timezone.now(),
                     task_identifier=task_identifier,
                     args=args,
                     kwargs=kwargs,
+                    queue=queue,
+                    priority=priority,
                 )
                 task.save()
                 return task
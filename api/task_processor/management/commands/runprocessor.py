@@ -3,7 +3,7 @@ import os
 import signal
 import time
 import typing
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 from datetime import timedelta
 from importlib import reload
 
@@ -11,15 +11,23 @@ from django.core.management import BaseCommand
 from django.utils import timezone
 
 from task_processor import tasks
+from task_processor.processes import WorkerProcess
 from task_processor.task_registry import registered_tasks
 from task_processor.thread_monitoring import (
     clear_unhealthy_threads,
     write_unhealthy_threads,
 )
-from task_processor.threads import TaskRunner
+from task_processor.threads import (
+    TaskNotificationListener,
+    TaskRunner,
+    create_task_runners,
+)
 
 logger = logging.getLogger(__name__)
 
+THREADS_MODE = "threads"
+PROCESSES_MODE = "processes"
+
 
 class Command(BaseCommand):
     def __init__(self, *args, **kwargs):
@@ -42,13 +50,29 @@ class Command(BaseCommand):
         signal.signal(signal.SIGTERM, self._exit_gracefully)
 
         self._threads: typing.List[TaskRunner] = []
+        self._listener: typing.Optional[TaskNotificationListener] = None
+        self._processes: typing.List[WorkerProcess] = []
         self._monitor_threads = True
 
     def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--mode",
+            choices=[THREADS_MODE, PROCESSES_MODE],
+            help="Whether to run the worker threads in this process, or in a number "
+            "of worker processes (each running --numthreads threads).",
+            default=THREADS_MODE,
+        )
+        parser.add_argument(
+            "--numprocesses",
+            type=int,
+            help="Number of worker processes to run in processes mode.",
+            default=os.cpu_count(),
+        )
         parser.add_argument(
             "--numthreads",
             type=int,
-            help="Number of worker threads to run.",
+            help="Number of worker threads to run (per worker process in processes "
+            "mode).",
             default=5,
         )
         parser.add_argument(
@@ -69,28 +93,55 @@ class Command(BaseCommand):
             help="Number of tasks each worker will pop from the queue on each cycle.",
             default=10,
         )
-
-    def handle(self, *args, **options):
-        num_threads = options["numthreads"]
-        sleep_interval_ms = options["sleepintervalms"]
-        grace_period_ms = options["graceperiodms"]
-        queue_pop_size = options["queuepopsize"]
-
-        self._threads.extend(
-            [
-                TaskRunner(
-                    sleep_interval_millis=sleep_interval_ms,
-                    queue_pop_size=queue_pop_size,
-                )
-                for _ in range(num_threads)
-            ]
+        parser.add_argument(
+            "--queues",
+            type=lambda value: value.split(","),
+            help="Comma separated list of the queues to process tasks from (all "
+            "queues by default). Recurring tasks are only processed if not set.",
+            default=None,
+        )
+        parser.add_argument(
+            "--dedicatedrunners",
+            type=_parse_dedicated_runners,
+            action="append",
+            metavar="QUEUE=NUMTHREADS",
+            help="Run additional worker threads (per worker process in processes "
+            "mode) which only process tasks from the given queue. Can be repeated.",
+            default=[],
+        )
+        parser.add_argument(
+            "--nolisten",
+            action="store_true",
+            help="Don't listen for notifications of new tasks (and rely on polling "
+            "only). Notifications are only supported when using postgres.",
         )
 
+    def handle(self, *args, **options):
         logger.info(
             "Processor starting. Registered tasks are: %s",
             list(registered_tasks.keys()),
         )
 
+        if options["mode"] == PROCESSES_MODE:
+            self._run_processes(**options)
+        else:
+            self._run_threads(**options)
+
+    def _run_threads(self, **options):
+        sleep_interval_ms = options["sleepintervalms"]
+        grace_period_ms = options["graceperiodms"]
+
+        self._threads, self._listener = create_task_runners(
+            num_threads=options["numthreads"],
+            sleep_interval_millis=sleep_interval_ms,
+            queue_pop_size=options["queuepopsize"],
+            listen=not options["nolisten"],
+            queues=options["queues"],
+            dedicated_runners=dict(options["dedicatedrunners"]),
+        )
+
+        if self._listener:
+            self._listener.start()
         for thread in self._threads:
             thread.start()
 
@@ -105,8 +156,56 @@ class Command(BaseCommand):
 
         [t.join() for t in self._threads]
 
+    def _run_processes(self, **options):
+        sleep_interval_ms = options["sleepintervalms"]
+        grace_period_ms = options["graceperiodms"]
+
+        self._processes = [
+            WorkerProcess(
+                name=f"TaskProcessorWorker-{i}",
+                num_threads=options["numthreads"],
+                sleep_interval_millis=sleep_interval_ms,
+                queue_pop_size=options["queuepopsize"],
+                listen=not options["nolisten"],
+                queues=options["queues"],
+                dedicated_runners=dict(options["dedicatedrunners"]),
+            )
+            for i in range(options["numprocesses"])
+        ]
+        for process in self._processes:
+            process.start()
+
+        clear_unhealthy_threads()
+        while self._monitor_threads:
+            time.sleep(1)
+            unhealthy_threads = []
+            for process in self._processes:
+                if not process.is_alive() and self._monitor_threads:
+                    logger.warning(
+                        "Worker process %s exited unexpectedly with exit code %s. "
+                        "Restarting.",
+                        process.name,
+                        process.exitcode,
+                    )
+                    process.start()
+                unhealthy_threads.extend(
+                    process.get_unhealthy_threads(
+                        ms_before_unhealthy=grace_period_ms + sleep_interval_ms
+                    )
+                )
+            if unhealthy_threads:
+                write_unhealthy_threads(unhealthy_threads)
+
+        # the worker processes finish any running tasks before exiting
+        for process in self._processes:
+            process.stop()
+        for process in self._processes:
+            process.join()
+
     def _exit_gracefully(self, *args):
         self._monitor_threads = False
+        if self._listener:
+            self._listener.stop()
         for t in self._threads:
             t.stop()
 
@@ -124,3 +223,13 @@ class Command(BaseCommand):
             ):
                 unhealthy_threads.append(thread)
         return unhealthy_threads
+
+
+def _parse_dedicated_runners(value: str) -> typing.Tuple[str, int]:
+    queue, _, num_threads = value.partition("=")
+    try:
+        return queue, int(num_threads)
+    except ValueError as e:
+        raise ArgumentTypeError(
+            f"Invalid value '{value}', expected QUEUE=NUMTHREADS."
+        ) from e
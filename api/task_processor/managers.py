@@ -1,9 +1,49 @@
+import typing
+
 from django.db.models import Manager
+from django.utils import timezone
+
+if typing.TYPE_CHECKING:
+    from task_processor.models import Task
 
 
 class TaskManager(Manager):
-    def get_tasks_to_process(self, num_tasks):
-        return self.raw("SELECT * FROM get_tasks_to_process(%s)", [num_tasks])
+    def get_tasks_to_process(
+        self, num_tasks: int, queues: typing.List[str] = None
+    ) -> typing.Iterable["Task"]:
+        """
+        Lock and return the next tasks to process, in order of priority.
+
+        :param queues: only return tasks from these queues (all queues if None)
+        """
+        return self.raw(
+            "SELECT * FROM get_tasks_to_process(%s, %s)", [num_tasks, queues]
+        )
+
+    def get_scheduled_task(
+        self,
+        task_identifier: str,
+        args: typing.Tuple[typing.Any] = None,
+        kwargs: typing.Dict[str, typing.Any] = None,
+    ) -> typing.Optional["Task"]:
+        """
+        Get an incomplete task with the given identifier and arguments which is
+        scheduled to run in the future (and so can't have been picked up by the
+        processor yet).
+        """
+        return (
+            self.filter(
+                task_identifier=task_identifier,
+                serialized_args=self.model.serialize_data(args or tuple()),
+                serialized_kwargs=self.model.serialize_data(kwargs or dict()),
+                scheduled_for__gt=timezone.now(),
+                completed=False,
+                num_failures__lt=3,
+                is_locked=False,
+            )
+            .order_by("scheduled_for")
+            .first()
+        )
 
 
 class RecurringTaskManager(Manager):
@@ -0,0 +1,34 @@
+import os
+
+from django.db import migrations
+
+from core.migration_helpers import PostgresOnlyRunSQL
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "sql")
+
+
+def _read_sql_file(file_name: str) -> str:
+    with open(os.path.join(SQL_DIR, file_name)) as f:
+        return f.read()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("task_processor", "0009_add_recurring_task_run_first_run_at"),
+    ]
+
+    operations = [
+        PostgresOnlyRunSQL.from_sql_file(
+            os.path.join(SQL_DIR, "0010_get_tasks_to_process.sql"),
+            reverse_sql=_read_sql_file("get_tasks_to_process.sql"),
+        ),
+        PostgresOnlyRunSQL.from_sql_file(
+            os.path.join(SQL_DIR, "0010_get_recurring_tasks_to_process.sql"),
+            reverse_sql=_read_sql_file("get_recurring_tasks_to_process.sql"),
+        ),
+        PostgresOnlyRunSQL.from_sql_file(
+            os.path.join(SQL_DIR, "0010_notify_task_created.sql"),
+            reverse_sql="DROP TRIGGER IF EXISTS notify_task_created ON task_processor_task; "
+            "DROP FUNCTION IF EXISTS notify_task_created",
+        ),
+    ]
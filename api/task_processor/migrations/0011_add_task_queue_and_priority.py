@@ -0,0 +1,68 @@
+import os
+
+from django.db import migrations, models
+
+from core.migration_helpers import PostgresOnlyRunSQL
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "sql")
+
+
+def _read_sql_file(file_name: str) -> str:
+    with open(os.path.join(SQL_DIR, file_name)) as f:
+        return f.read()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("task_processor", "0010_set_based_get_tasks_to_process"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="queue",
+            field=models.CharField(default="default", max_length=50),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="priority",
+            field=models.SmallIntegerField(
+                choices=[
+                    (0, "Highest"),
+                    (10, "High"),
+                    (50, "Normal"),
+                    (90, "Low"),
+                    (100, "Lowest"),
+                ],
+                default=50,
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="task",
+                    index=models.Index(
+                        condition=models.Q(
+                            ("completed", False), ("num_failures__lt", 3)
+                        ),
+                        fields=["priority", "scheduled_for"],
+                        name="incomplete_tasks_priority_idx",
+                    ),
+                ),
+            ],
+            database_operations=[
+                PostgresOnlyRunSQL(
+                    'CREATE INDEX CONCURRENTLY "incomplete_tasks_priority_idx" ON "task_processor_task" ("priority", "scheduled_for") WHERE (NOT "completed" and "num_failures" < 3);',
+                    reverse_sql='DROP INDEX CONCURRENTLY "incomplete_tasks_priority_idx";',
+                ),
+            ],
+        ),
+        PostgresOnlyRunSQL.from_sql_file(
+            os.path.join(SQL_DIR, "0011_get_tasks_to_process.sql"),
+            reverse_sql="DROP FUNCTION IF EXISTS get_tasks_to_process(integer, text[]); "
+            + _read_sql_file("0010_get_tasks_to_process.sql"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+CREATE OR REPLACE FUNCTION get_recurringtasks_to_process(num_tasks integer)
+RETURNS SETOF task_processor_recurringtask AS $$
+BEGIN
+    RETURN QUERY
+    WITH tasks_to_process AS (
+        SELECT id
+        FROM task_processor_recurringtask
+        WHERE is_locked = FALSE
+        ORDER BY id
+        LIMIT num_tasks
+        -- Select for update to ensure that no other workers can select these tasks while in this transaction block
+        FOR UPDATE SKIP LOCKED
+    ), locked_tasks AS (
+        -- Lock all the selected tasks in a single statement (by setting `is_locked` to true), so that no other
+        -- workers can select these tasks after this transaction is complete (but the tasks are still being
+        -- executed by the current worker)
+        UPDATE task_processor_recurringtask
+        SET is_locked = TRUE
+        FROM tasks_to_process
+        WHERE task_processor_recurringtask.id = tasks_to_process.id
+        RETURNING task_processor_recurringtask.*
+    )
+    SELECT *
+    FROM locked_tasks
+    ORDER BY id;
+END;
+$$ LANGUAGE plpgsql
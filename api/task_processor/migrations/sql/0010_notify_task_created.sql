@@ -0,0 +1,15 @@
+CREATE OR REPLACE FUNCTION notify_task_created()
+RETURNS trigger AS $$
+BEGIN
+    -- Wake up any task processors that are listening, so that they don't have to wait
+    -- until they next poll for tasks
+    PERFORM pg_notify('task_processor_task_created', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_task_created ON task_processor_task;
+CREATE TRIGGER notify_task_created
+AFTER INSERT ON task_processor_task
+FOR EACH STATEMENT
+EXECUTE PROCEDURE notify_task_created();
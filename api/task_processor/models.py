@@ -10,6 +10,21 @@ from task_processor.exceptions import TaskProcessingError
 from task_processor.managers import RecurringTaskManager, TaskManager
 from task_processor.task_registry import registered_tasks
 
+DEFAULT_QUEUE = "default"
+# tasks which propagate changes to the SDKs (e.g. environment document rebuilds and
+# SSE update messages)
+REALTIME_QUEUE = "realtime"
+ANALYTICS_QUEUE = "analytics"
+
+
+class TaskPriority(models.IntegerChoices):
+    # tasks with a lower value are processed first
+    HIGHEST = 0
+    HIGH = 10
+    NORMAL = 50
+    LOW = 90
+    LOWEST = 100
+
 
 class AbstractBaseTask(models.Model):
     uuid = models.UUIDField(unique=True, default=uuid.uuid4)
@@ -73,17 +88,28 @@ class Task(AbstractBaseTask):
     # denormalise failures and completion so that we can use select_for_update
     num_failures = models.IntegerField(default=0)
     completed = models.BooleanField(default=False)
+
+    queue = models.CharField(max_length=50, default=DEFAULT_QUEUE)
+    priority = models.SmallIntegerField(
+        choices=TaskPriority.choices, default=TaskPriority.NORMAL
+    )
+
     objects = TaskManager()
 
     class Meta:
-        # We have customised the migration in 0004 to only apply this change to postgres databases
+        # We have customised the migrations in 0004 and 0011 to only apply these changes to postgres databases
         # TODO: work out how to index the taskprocessor_task table for Oracle and MySQL
         indexes = [
             models.Index(
                 name="incomplete_tasks_idx",
                 fields=["scheduled_for"],
                 condition=models.Q(completed=False, num_failures__lt=3),
-            )
+            ),
+            models.Index(
+                name="incomplete_tasks_priority_idx",
+                fields=["priority", "scheduled_for"],
+                condition=models.Q(completed=False, num_failures__lt=3),
+            ),
         ]
 
     @classmethod
@@ -93,11 +119,15 @@ class Task(AbstractBaseTask):
         *,
         args: typing.Tuple[typing.Any] = None,
         kwargs: typing.Dict[str, typing.Any] = None,
+        queue: str = DEFAULT_QUEUE,
+        priority: TaskPriority = TaskPriority.NORMAL,
     ) -> "Task":
         return Task(
             task_identifier=task_identifier,
             serialized_args=cls.serialize_data(args or tuple()),
             serialized_kwargs=cls.serialize_data(kwargs or dict()),
+            queue=queue,
+            priority=priority,
         )
 
     @classmethod
@@ -108,11 +138,15 @@ class Task(AbstractBaseTask):
         *,
         args: typing.Tuple[typing.Any] = None,
         kwargs: typing.Dict[str, typing.Any] = None,
+        queue: str = DEFAULT_QUEUE,
+        priority: TaskPriority = TaskPriority.NORMAL,
     ) -> "Task":
         task = cls.create(
             task_identifier=task_identifier,
             args=args,
             kwargs=kwargs,
+            queue=queue,
+            priority=priority,
         )
         task.scheduled_for = schedule_for
         return task
@@ -0,0 +1,175 @@
+"""
+Worker processes used by the runprocessor command in `processes` mode, so that
+CPU bound tasks aren't all competing for the GIL of a single process.
+
+Each worker process runs its own task runner threads and reports a heartbeat for
+each of them to the supervising process (using shared memory) so that the health
+of every thread can be monitored in the same way as in `threads` mode.
+"""
+import logging
+import multiprocessing
+import signal
+import time
+import typing
+from dataclasses import dataclass
+from threading import Event
+
+from django.db import connections
+
+from task_processor.threads import create_task_runners
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL_SECONDS = 1
+
+
+@dataclass(frozen=True)
+class WorkerThread:
+    """
+    Reference to a task runner thread in a worker process, as used for health
+    reporting.
+    """
+
+    name: str
+
+
+class WorkerProcess:
+    def __init__(
+        self,
+        name: str,
+        num_threads: int,
+        sleep_interval_millis: int,
+        queue_pop_size: int,
+        listen: bool = True,
+        queues: typing.List[str] = None,
+        dedicated_runners: typing.Dict[str, int] = None,
+    ):
+        self.name = name
+        self.num_threads = num_threads
+        self.sleep_interval_millis = sleep_interval_millis
+        self.queue_pop_size = queue_pop_size
+        self.listen = listen
+        self.queues = queues
+        self.dedicated_runners = dedicated_runners or {}
+
+        self.started_at = None
+
+        # use fork explicitly so that the worker processes don't need to set up
+        # django again, regardless of the platform's default start method
+        self._context = multiprocessing.get_context("fork")
+        self._process = None
+        self._heartbeats = None
+
+    def start(self) -> None:
+        # the forked process must not share the database connections of this one
+        connections.close_all()
+
+        self._heartbeats = self._context.Array("d", self.total_num_threads, lock=False)
+        self._process = self._context.Process(
+            target=run_worker_process,
+            name=self.name,
+            kwargs={
+                "num_threads": self.num_threads,
+                "sleep_interval_millis": self.sleep_interval_millis,
+                "queue_pop_size": self.queue_pop_size,
+                "listen": self.listen,
+                "queues": self.queues,
+                "dedicated_runners": self.dedicated_runners,
+                "heartbeats": self._heartbeats,
+            },
+        )
+        self.started_at = time.time()
+        self._process.start()
+
+    def stop(self) -> None:
+        """
+        Ask the worker process to stop once its threads have finished the tasks
+        they are running.
+        """
+        if self.is_alive():
+            self._process.terminate()
+
+    def join(self, timeout: float = None) -> None:
+        self._process.join(timeout)
+
+    @property
+    def total_num_threads(self) -> int:
+        return self.num_threads + sum(self.dedicated_runners.values())
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def exitcode(self) -> typing.Optional[int]:
+        return self._process.exitcode
+
+    def get_unhealthy_threads(
+        self, ms_before_unhealthy: int
+    ) -> typing.List[WorkerThread]:
+        threads = [
+            WorkerThread(name=f"{self.name}-TaskRunner-{i}")
+            for i in range(self.total_num_threads)
+        ]
+        if not self.is_alive():
+            return threads
+
+        healthy_threshold = time.time() - ms_before_unhealthy / 1000
+        return [
+            thread
+            for thread, last_checked_for_tasks in zip(threads, self._heartbeats)
+            # allow the threads some time to start before they're considered
+            # unhealthy
+            if max(last_checked_for_tasks, self.started_at) < healthy_threshold
+        ]
+
+
+def run_worker_process(
+    num_threads: int,
+    sleep_interval_millis: int,
+    queue_pop_size: int,
+    listen: bool,
+    queues: typing.Optional[typing.List[str]],
+    dedicated_runners: typing.Dict[str, int],
+    heartbeats: typing.MutableSequence[float],
+) -> None:
+    """
+    Entrypoint of the worker processes. Runs the task runner threads until it
+    receives SIGTERM (or SIGINT), at which point it waits for them to finish the
+    tasks they are running before exiting.
+    """
+    stopping = Event()
+
+    def _stop(*args):
+        stopping.set()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    task_runners, listener = create_task_runners(
+        num_threads=num_threads,
+        sleep_interval_millis=sleep_interval_millis,
+        queue_pop_size=queue_pop_size,
+        listen=listen,
+        queues=queues,
+        dedicated_runners=dedicated_runners,
+    )
+    if listener:
+        listener.start()
+    for task_runner in task_runners:
+        task_runner.start()
+
+    while not stopping.is_set():
+        for i, task_runner in enumerate(task_runners):
+            if task_runner.is_alive() and task_runner.last_checked_for_tasks:
+                heartbeats[i] = task_runner.last_checked_for_tasks.timestamp()
+        stopping.wait(HEARTBEAT_INTERVAL_SECONDS)
+
+    logger.info("Worker process stopping, waiting for running tasks to finish.")
+    if listener:
+        listener.stop()
+    for task_runner in task_runners:
+        task_runner.stop()
+    for task_runner in task_runners:
+        task_runner.join()
+
+    connections.close_all()
@@ -15,11 +15,13 @@ from task_processor.models import (
 logger = logging.getLogger(__name__)
 
 
-def run_tasks(num_tasks: int = 1) -> typing.List[TaskRun]:
+def run_tasks(
+    num_tasks: int = 1, queues: typing.List[str] = None
+) -> typing.List[TaskRun]:
     if num_tasks < 1:
         raise ValueError("Number of tasks to process must be at least one")
 
-    tasks = Task.objects.get_tasks_to_process(num_tasks)
+    tasks = Task.objects.get_tasks_to_process(num_tasks, queues=queues)
 
     if tasks:
         executed_tasks = []
@@ -4,6 +4,9 @@ import os
 import typing
 from threading import Thread
 
+if typing.TYPE_CHECKING:
+    from task_processor.processes import WorkerThread
+
 UNHEALTHY_THREADS_FILE_PATH = "/tmp/task-processor-unhealthy-threads.json"
 
 logger = logging.getLogger(__name__)
@@ -14,7 +17,9 @@ def clear_unhealthy_threads():
         os.remove(UNHEALTHY_THREADS_FILE_PATH)
 
 
-def write_unhealthy_threads(unhealthy_threads: typing.List[Thread]):
+def write_unhealthy_threads(
+    unhealthy_threads: typing.List[typing.Union[Thread, "WorkerThread"]]
+):
     unhealthy_thread_names = [t.name for t in unhealthy_threads]
     logger.warning("Writing unhealthy threads: %s", unhealthy_thread_names)
 
@@ -1,13 +1,19 @@
 import logging
+import select
 import time
-from threading import Thread
+import typing
+from threading import Event, Thread
 
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.utils import timezone
 
 from task_processor.processor import run_recurring_tasks, run_tasks
 
 logger = logging.getLogger(__name__)
 
+# Postgres channel which is notified (by a trigger) whenever tasks are created.
+TASK_CREATED_CHANNEL = "task_processor_task_created"
+
 
 class TaskRunner(Thread):
     def __init__(
@@ -15,11 +21,21 @@ class TaskRunner(Thread):
         *args,
         sleep_interval_millis: int = 2000,
         queue_pop_size: int = 1,
+        wakeup_event: Event = None,
+        queues: typing.List[str] = None,
         **kwargs,
     ):
+        """
+        :param wakeup_event: optional event which, when set, wakes the runner up
+            to check for new tasks before the sleep interval has passed
+        :param queues: only process tasks from these queues (and no recurring
+            tasks), otherwise process tasks from all queues
+        """
         super(TaskRunner, self).__init__(*args, **kwargs)
         self.sleep_interval_millis = sleep_interval_millis
         self.queue_pop_size = queue_pop_size
+        self.wakeup_event = wakeup_event
+        self.queues = queues
         self.last_checked_for_tasks = None
 
         self._stopped = False
@@ -28,11 +44,128 @@ class TaskRunner(Thread):
         while not self._stopped:
             self.last_checked_for_tasks = timezone.now()
             try:
-                run_tasks(self.queue_pop_size)
+                run_tasks(self.queue_pop_size, queues=self.queues)
             except Exception as e:
                 logger.exception(e)
-            run_recurring_tasks(self.queue_pop_size)
+            if not self.queues:
+                run_recurring_tasks(self.queue_pop_size)
+            self._sleep()
+
+    def stop(self):
+        self._stopped = True
+        if self.wakeup_event is not None:
+            self.wakeup_event.set()
+
+    def _sleep(self) -> None:
+        if self.wakeup_event is None:
             time.sleep(self.sleep_interval_millis / 1000)
+            return
+
+        self.wakeup_event.wait(timeout=self.sleep_interval_millis / 1000)
+        self.wakeup_event.clear()
+
+
+class TaskNotificationListener(Thread):
+    """
+    Listens for notifications that tasks have been created and sets the wakeup
+    event shared with the task runners, so that they pick up new tasks immediately
+    rather than waiting until they next poll for them. Requires postgres.
+    """
+
+    def __init__(
+        self,
+        *args,
+        wakeup_event: Event,
+        select_timeout_millis: int = 1000,
+        reconnect_interval_millis: int = 5000,
+        **kwargs,
+    ):
+        super(TaskNotificationListener, self).__init__(*args, **kwargs)
+        self.wakeup_event = wakeup_event
+        self.select_timeout_millis = select_timeout_millis
+        self.reconnect_interval_millis = reconnect_interval_millis
+
+        self._stopped = False
+
+    def run(self) -> None:
+        while not self._stopped:
+            try:
+                self._listen()
+            except Exception as e:
+                # the task runners will continue to poll for tasks in the meantime
+                logger.exception(e)
+                time.sleep(self.reconnect_interval_millis / 1000)
 
     def stop(self):
         self._stopped = True
+
+    def _listen(self) -> None:
+        # use a dedicated connection since it needs to be in autocommit mode to
+        # receive notifications as soon as they are sent
+        database_wrapper = connections[DEFAULT_DB_ALIAS]
+        connection = database_wrapper.get_new_connection(
+            database_wrapper.get_connection_params()
+        )
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {TASK_CREATED_CHANNEL}")
+
+            while not self._stopped:
+                readable, _, _ = select.select(
+                    [connection], [], [], self.select_timeout_millis / 1000
+                )
+                if not readable:
+                    continue
+
+                connection.poll()
+                if connection.notifies:
+                    connection.notifies.clear()
+                    self.wakeup_event.set()
+        finally:
+            connection.close()
+
+
+def create_task_runners(
+    num_threads: int,
+    sleep_interval_millis: int,
+    queue_pop_size: int,
+    listen: bool = True,
+    queues: typing.List[str] = None,
+    dedicated_runners: typing.Dict[str, int] = None,
+) -> typing.Tuple[typing.List[TaskRunner], typing.Optional[TaskNotificationListener]]:
+    """
+    Create the task runner threads (and, if listening for notifications of new tasks
+    and using postgres, the listener thread which wakes them up).
+
+    :param queues: the queues processed by the (num_threads) general task runners,
+        all queues if None
+    :param dedicated_runners: number of additional task runners to dedicate to
+        each queue, e.g. {"realtime": 2}
+    """
+    listener = None
+    wakeup_event = None
+    if listen and connections[DEFAULT_DB_ALIAS].vendor == "postgresql":
+        wakeup_event = Event()
+        listener = TaskNotificationListener(wakeup_event=wakeup_event, daemon=True)
+
+    task_runners = [
+        TaskRunner(
+            sleep_interval_millis=sleep_interval_millis,
+            queue_pop_size=queue_pop_size,
+            wakeup_event=wakeup_event,
+            queues=queues,
+        )
+        for _ in range(num_threads)
+    ]
+    for queue, num_dedicated_runners in (dedicated_runners or {}).items():
+        task_runners.extend(
+            TaskRunner(
+                sleep_interval_millis=sleep_interval_millis,
+                queue_pop_size=queue_pop_size,
+                wakeup_event=wakeup_event,
+                queues=[queue],
+            )
+            for _ in range(num_dedicated_runners)
+        )
+    return task_runners, listener
@@ -4,12 +4,16 @@ import typing
 import pytest
 from core.constants import BOOLEAN, INTEGER, STRING
 from django.urls import reverse
+from flag_engine.environments.builders import build_environment_model
 from pytest_lazyfixture import lazy_fixture
 from rest_framework import status
 from rest_framework.exceptions import NotFound
 from rest_framework.test import APIClient
 from tests.integration.helpers import create_mv_option_with_api
 
+from environments.models import Environment
+from util.mappers import map_environment_to_environment_document
+
 
 def test_edge_identities_feature_states_list_does_not_call_sync_identity_document_features_if_not_needed(
     admin_client,
@@ -884,21 +888,31 @@ def test_get_all_feature_states_for_an_identity(
     default_feature_value,
     segment_override_type,
     segment_override_value,
+    mocker,
 ):
-    # Mock the get_segment_ids method so that it returns no segments for the first
-    # request (to get the environment default), then so that it returns one segment
-    # for the segment and identity override requests.
-    segment_ids_responses = [[], [segment], [segment]]
+    # Mock the environment document in dynamo, which is rebuilt whenever the
+    # environment changes
+    def get_environment_model_side_effect(api_key):
+        return build_environment_model(
+            map_environment_to_environment_document(
+                Environment.objects.get(api_key=api_key)
+            )
+        )
 
-    def get_segment_ids_side_effect(*args, **kwargs):
-        nonlocal segment_ids_responses
-        return segment_ids_responses.pop(0)
+    # Mock the segment evaluation so that the identity matches all segments
+    def get_identity_segments_side_effect(environment_model, identity_model):
+        return environment_model.project.segments
 
     edge_identity_dynamo_wrapper_mock.get_item_from_uuid_or_404.return_value = (
         identity_document_without_fs
     )
-    edge_identity_dynamo_wrapper_mock.get_segment_ids.side_effect = (
-        get_segment_ids_side_effect
+    environment_wrapper_mock = edge_identity_dynamo_wrapper_mock.environment_wrapper
+    environment_wrapper_mock.get_environment_model.side_effect = (
+        get_environment_model_side_effect
+    )
+    mocker.patch(
+        "edge_api.identities.models.get_identity_segments",
+        side_effect=get_identity_segments_side_effect,
     )
 
     # First, let's verify that, without any overrides, the endpoint gives us the
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+import pytest
+from app_analytics.cache import API_USAGE_CACHE_BUCKET_SIZE, APIUsageCache
+from app_analytics.models import APIUsageBucket, Resource
+from django.conf import settings
+from django.utils import timezone
+
+
+@pytest.mark.skipif(
+    "analytics" not in settings.DATABASES,
+    reason="Skip test if analytics database is configured",
+)
+@pytest.mark.freeze_time("2023-01-19T09:09:47.325132+00:00")
+@pytest.mark.django_db(databases=["analytics", "default"])
+def test_api_usage_cache_flush_writes_aggregated_buckets(environment, freezer, mocker):
+    # Given
+    mocker.patch.object(APIUsageCache, "_start_flusher")
+    cache = APIUsageCache()
+    start_of_minute = timezone.now().replace(second=0, microsecond=0)
+
+    for _ in range(3):
+        cache.track_request(
+            resource=Resource.FLAGS, environment_key=environment.api_key
+        )
+    cache.track_request(
+        resource=Resource.IDENTITIES, environment_key=environment.api_key
+    )
+    freezer.move_to(timezone.now() + timedelta(minutes=1))
+    cache.track_request(resource=Resource.FLAGS, environment_key=environment.api_key)
+
+    # an unknown environment key is ignored
+    cache.track_request(resource=Resource.FLAGS, environment_key="unknown")
+
+    # When
+    cache.flush()
+
+    # Then
+    buckets = APIUsageBucket.objects.filter(
+        environment_id=environment.id, bucket_size=API_USAGE_CACHE_BUCKET_SIZE
+    )
+    assert {
+        (bucket.resource, bucket.created_at, bucket.total_count) for bucket in buckets
+    } == {
+        (Resource.FLAGS, start_of_minute, 3),
+        (Resource.IDENTITIES, start_of_minute, 1),
+        (Resource.FLAGS, start_of_minute + timedelta(minutes=1), 1),
+    }
+    assert APIUsageBucket.objects.count() == 3
+
+    # and the counts are reset
+    cache.flush()
+    assert APIUsageBucket.objects.count() == 3
+
+
+def test_api_usage_cache_requests_flush_when_max_keys_reached(settings, mocker):
+    # Given
+    settings.API_USAGE_CACHE_MAX_KEYS = 2
+    mocker.patch.object(APIUsageCache, "_start_flusher")
+    cache = APIUsageCache()
+
+    # When
+    cache.track_request(resource=Resource.FLAGS, environment_key="key-1")
+    cache.track_request(resource=Resource.FLAGS, environment_key="key-1")
+    flush_requested_before_max_keys = cache._flush_requested.is_set()
+    cache.track_request(resource=Resource.FLAGS, environment_key="key-2")
+
+    # Then
+    assert flush_requested_before_max_keys is False
+    assert cache._flush_requested.is_set()
+
+
+def test_api_usage_cache_ignores_requests_without_environment_key(mocker):
+    # Given
+    mocked_start_flusher = mocker.patch.object(APIUsageCache, "_start_flusher")
+    cache = APIUsageCache()
+
+    # When
+    cache.track_request(resource=Resource.FLAGS, environment_key=None)
+
+    # Then
+    assert cache._counts == {}
+    mocked_start_flusher.assert_not_called()
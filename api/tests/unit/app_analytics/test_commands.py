@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+import pytest
+from app_analytics.cache import API_USAGE_CACHE_BUCKET_SIZE
+from django.core.management import CommandError, call_command
+
+
+def test_backfill_analytics_buckets(mocker):
+    # Given
+    mocked_populate_api_usage_time_bucket = mocker.patch(
+        "app_analytics.management.commands.backfill_analytics_buckets.populate_api_usage_time_bucket"
+    )
+    mocked_populate_feature_evaluation_time_bucket = mocker.patch(
+        "app_analytics.management.commands.backfill_analytics_buckets.populate_feature_evaluation_time_bucket"
+    )
+
+    # When
+    call_command(
+        "backfill_analytics_buckets",
+        "--from",
+        "2023-01-19T09:00:00",
+        "--to",
+        "2023-01-19T10:00:00",
+        "--bucket-size",
+        "30",
+    )
+
+    # Then
+    expected_calls = [
+        mocker.call(
+            30,
+            datetime(2023, 1, 19, 9, 0, tzinfo=timezone.utc),
+            datetime(2023, 1, 19, 9, 30, tzinfo=timezone.utc),
+            None,
+        ),
+        mocker.call(
+            30,
+            datetime(2023, 1, 19, 9, 30, tzinfo=timezone.utc),
+            datetime(2023, 1, 19, 10, 0, tzinfo=timezone.utc),
+            None,
+        ),
+    ]
+    assert mocked_populate_api_usage_time_bucket.call_args_list == expected_calls
+    assert (
+        mocked_populate_feature_evaluation_time_bucket.call_args_list == expected_calls
+    )
+
+
+def test_backfill_analytics_buckets_rejects_the_api_usage_cache_bucket_size(mocker):
+    # Given
+    mocked_populate_api_usage_time_bucket = mocker.patch(
+        "app_analytics.management.commands.backfill_analytics_buckets.populate_api_usage_time_bucket"
+    )
+
+    # When
+    with pytest.raises(CommandError):
+        call_command(
+            "backfill_analytics_buckets",
+            "--from",
+            "2023-01-19T09:00:00",
+            "--bucket-size",
+            str(API_USAGE_CACHE_BUCKET_SIZE),
+        )
+
+    # Then
+    mocked_populate_api_usage_time_bucket.assert_not_called()
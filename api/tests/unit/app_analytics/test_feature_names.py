@@ -0,0 +1,37 @@
+from app_analytics.feature_names import (
+    environment_feature_names_cache,
+    get_environment_feature_names,
+)
+from django.utils import timezone
+
+from features.models import Feature
+
+
+def test_get_environment_feature_names(environment, feature):
+    # When
+    feature_names = get_environment_feature_names(environment)
+
+    # Then
+    assert feature_names == frozenset({feature.name})
+
+
+def test_get_environment_feature_names_uses_cache_until_environment_updated(
+    settings, environment, feature, project, django_assert_num_queries
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_FEATURE_NAMES_SECONDS = 60
+    environment_feature_names_cache.clear()
+
+    get_environment_feature_names(environment)
+    new_feature = Feature.objects.create(name="new_feature", project=project)
+
+    # When
+    with django_assert_num_queries(0):
+        cached_feature_names = get_environment_feature_names(environment)
+
+    environment.updated_at = timezone.now()
+    feature_names = get_environment_feature_names(environment)
+
+    # Then
+    assert cached_feature_names == frozenset({feature.name})
+    assert feature_names == frozenset({feature.name, new_feature.name})
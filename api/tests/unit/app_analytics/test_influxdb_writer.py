@@ -0,0 +1,148 @@
+import time
+
+import pytest
+from app_analytics.influxdb_writer import InfluxDBWriter, InfluxDBWriterMetrics
+from influxdb_client import Point
+from urllib3.exceptions import HTTPError
+
+
+@pytest.fixture()
+def influxdb_client(mocker):
+    return mocker.MagicMock()
+
+
+@pytest.fixture()
+def write_api(influxdb_client):
+    return influxdb_client.write_api.return_value
+
+
+def _get_writer(influxdb_client, **kwargs) -> InfluxDBWriter:
+    options = {
+        "bucket": "bucket",
+        "batch_size": 2,
+        "flush_interval_seconds": 60,
+        "max_queue_size": 10,
+        **kwargs,
+    }
+    return InfluxDBWriter(client=influxdb_client, **options)
+
+
+def _get_points(count: int):
+    return [Point("api_call").field("request_count", i) for i in range(count)]
+
+
+def test_influxdb_writer_flush_writes_queued_points_in_batches(
+    influxdb_client, write_api, mocker
+):
+    # Given
+    writer = _get_writer(influxdb_client)
+    mocker.patch.object(writer, "_start_flusher")
+    mocker.patch("app_analytics.influxdb_writer.time.time_ns", return_value=1000)
+    writer.write(_get_points(3))
+
+    # When
+    writer.flush()
+
+    # Then
+    assert write_api.write.call_args_list == [
+        mocker.call(
+            bucket="bucket",
+            record=[
+                "api_call request_count=0i 1000",
+                "api_call request_count=1i 1001",
+            ],
+        ),
+        mocker.call(bucket="bucket", record=["api_call request_count=2i 1002"]),
+    ]
+    assert writer.metrics == InfluxDBWriterMetrics(queued=3, written=3)
+
+
+def test_influxdb_writer_writes_identical_points_in_a_batch_as_separate_points(
+    influxdb_client, write_api, mocker
+):
+    # Given
+    writer = _get_writer(influxdb_client)
+    mocker.patch.object(writer, "_start_flusher")
+    points = [
+        Point("api_call").tag("resource", "flags").field("request_count", 1)
+        for _ in range(2)
+    ]
+
+    # When
+    writer.write(points)
+    writer.flush()
+
+    # Then
+    (batch,) = [call.kwargs["record"] for call in write_api.write.call_args_list]
+    assert len(batch) == 2
+    assert all(
+        line.startswith("api_call,resource=flags request_count=1i ") for line in batch
+    )
+    first_timestamp, second_timestamp = (int(line.split()[-1]) for line in batch)
+    assert second_timestamp > first_timestamp
+
+
+def test_influxdb_writer_keeps_the_timestamp_of_timestamped_points(
+    influxdb_client, write_api, mocker
+):
+    # Given
+    writer = _get_writer(influxdb_client)
+    mocker.patch.object(writer, "_start_flusher")
+    point = Point("api_call").field("request_count", 1).time(1234)
+
+    # When
+    writer.write([point])
+    writer.flush()
+
+    # Then
+    write_api.write.assert_called_once_with(
+        bucket="bucket", record=["api_call request_count=1i 1234"]
+    )
+
+
+def test_influxdb_writer_drops_points_when_queue_is_full(
+    influxdb_client, write_api, mocker
+):
+    # Given
+    writer = _get_writer(influxdb_client, max_queue_size=2)
+    mocker.patch.object(writer, "_start_flusher")
+
+    # When
+    writer.write(_get_points(3))
+    writer.flush()
+
+    # Then
+    assert writer.metrics == InfluxDBWriterMetrics(queued=2, written=2, dropped=1)
+
+
+def test_influxdb_writer_counts_failed_writes(influxdb_client, write_api, mocker):
+    # Given
+    writer = _get_writer(influxdb_client)
+    mocker.patch.object(writer, "_start_flusher")
+    write_api.write.side_effect = HTTPError
+
+    # When
+    writer.write(_get_points(1))
+    writer.flush()
+
+    # Then
+    assert writer.metrics == InfluxDBWriterMetrics(queued=1, failed=1)
+
+
+def test_influxdb_writer_flushes_in_background_once_batch_is_full(
+    influxdb_client, write_api
+):
+    # Given
+    writer = _get_writer(influxdb_client)
+
+    # When
+    writer.write(_get_points(2))
+
+    # Then
+    for _ in range(50):
+        if writer.metrics.written == 2:
+            break
+        time.sleep(0.01)
+
+    assert writer.metrics.written == 2
+    write_api.write.assert_called_once()
@@ -57,3 +57,25 @@ def test_APIUsageMiddleware_avoids_calling_track_request_if_resoure_is_not_track
 
     # Then
     mocked_track_request.delay.assert_not_called()
+
+
+def test_APIUsageMiddleware_uses_cache_if_enabled(rf, mocker, settings):
+    # Given
+    settings.USE_CACHE_FOR_USAGE_DATA = True
+    environment_key = "test"
+    headers = {"HTTP_X-Environment-Key": environment_key}
+    request = rf.get("/api/v1/flags", **headers)
+
+    mocked_track_request = mocker.patch("app_analytics.middleware.track_request")
+    mocked_api_usage_cache = mocker.patch("app_analytics.middleware.api_usage_cache")
+
+    middleware = APIUsageMiddleware(mocker.MagicMock())
+
+    # When
+    middleware(request)
+
+    # Then
+    mocked_api_usage_cache.track_request.assert_called_once_with(
+        resource=Resource.FLAGS, environment_key=environment_key
+    )
+    mocked_track_request.delay.assert_not_called()
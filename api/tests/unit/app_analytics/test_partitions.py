@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+import pytest
+from app_analytics.models import APIUsageRaw, FeatureEvaluationRaw, Resource
+from app_analytics.partitions import (
+    create_partitions,
+    drop_partitions,
+    get_default_partition_name,
+    get_partition_name,
+    get_partitions,
+    manage_partitions,
+)
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+if "analytics" not in settings.DATABASES:
+    pytest.skip(
+        "Skip test if analytics database is configured", allow_module_level=True
+    )
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_create_partitions_creates_missing_daily_partitions():
+    # Given
+    start = timezone.now().date() + timedelta(days=10)
+
+    # When
+    created_partitions = create_partitions(APIUsageRaw, start=start, days=3)
+
+    # Then
+    expected_partitions = [
+        get_partition_name(APIUsageRaw, start + timedelta(days=i)) for i in range(3)
+    ]
+    assert created_partitions == expected_partitions
+    assert set(expected_partitions).issubset(get_partitions(APIUsageRaw))
+
+    # and creating them again is a no-op
+    assert create_partitions(APIUsageRaw, start=start, days=3) == []
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_migration_creates_partitions_for_the_following_days():
+    # Given
+    today = timezone.now().date()
+
+    # When
+    partition_days = set(get_partitions(APIUsageRaw).values())
+
+    # Then
+    # the legacy partition holds the data up to the end of tomorrow
+    assert {today + timedelta(days=i) for i in range(1, 10)}.issubset(partition_days)
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_migration_keeps_the_index_name_expected_by_django():
+    # Given
+    index_name = "app_analytics_apiusagera_environment_id_created_a_ef3863d6_idx"
+
+    # When
+    with connections["analytics"].cursor() as cursor:
+        cursor.execute(
+            "SELECT tablename FROM pg_indexes WHERE indexname = %s", [index_name]
+        )
+        tables = cursor.fetchall()
+
+    # Then
+    assert tables == [(APIUsageRaw._meta.db_table,)]
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_create_partitions_moves_rows_out_of_the_default_partition():
+    # Given
+    day = timezone.now().date() + timedelta(days=30)
+    event = APIUsageRaw.objects.create(
+        environment_id=1, host="host1", resource=Resource.FLAGS
+    )
+    event.created_at = timezone.now() + timedelta(days=30)
+    event.save()
+
+    # When
+    created_partitions = create_partitions(APIUsageRaw, start=day, days=1)
+
+    # Then
+    partition_name = get_partition_name(APIUsageRaw, day)
+    assert created_partitions == [partition_name]
+    with connections["analytics"].cursor() as cursor:
+        cursor.execute(f"SELECT id FROM {partition_name}")
+        assert cursor.fetchall() == [(event.id,)]
+        cursor.execute(
+            f"SELECT count(*) FROM {get_default_partition_name(APIUsageRaw)}"
+        )
+        assert cursor.fetchone() == (0,)
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_rows_are_routed_to_the_daily_partition():
+    # Given
+    day = timezone.now().date() + timedelta(days=10)
+    create_partitions(FeatureEvaluationRaw, start=day, days=1)
+    event = FeatureEvaluationRaw.objects.create(
+        feature_name="feature1", environment_id=1, evaluation_count=1
+    )
+
+    # When
+    event.created_at = timezone.now() + timedelta(days=10)
+    event.save()
+
+    # Then
+    # the row is moved to the partition for its day, but is still available
+    # through the parent table
+    assert FeatureEvaluationRaw.objects.get(id=event.id).created_at.date() == day
+    assert get_partition_name(FeatureEvaluationRaw, day) in get_partitions(
+        FeatureEvaluationRaw
+    )
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_drop_partitions_drops_expired_partitions_only():
+    # Given
+    tomorrow = timezone.now().date() + timedelta(days=1)
+    create_partitions(APIUsageRaw, start=tomorrow, days=2)
+
+    # the partition holding the data from before the table was partitioned is
+    # named after the day the migration ran
+    expired_partitions = [
+        partition_name
+        for partition_name, day in get_partitions(APIUsageRaw).items()
+        if day <= tomorrow
+    ]
+
+    expired_event = APIUsageRaw.objects.create(
+        environment_id=1, host="host1", resource=Resource.FLAGS
+    )
+    expired_event.created_at = timezone.now().replace(year=2020)
+    expired_event.save()
+
+    # When
+    dropped_partitions = drop_partitions(
+        APIUsageRaw, before=tomorrow + timedelta(days=1)
+    )
+
+    # Then
+    assert sorted(dropped_partitions) == sorted(expired_partitions)
+    assert get_partition_name(APIUsageRaw, tomorrow) in dropped_partitions
+    assert get_partition_name(
+        APIUsageRaw, tomorrow + timedelta(days=1)
+    ) in get_partitions(APIUsageRaw)
+    assert all(day > tomorrow for day in get_partitions(APIUsageRaw).values())
+    assert not APIUsageRaw.objects.filter(id=expired_event.id).exists()
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_manage_partitions(mocker):
+    # Given
+    mocked_create_partitions = mocker.patch(
+        "app_analytics.partitions.create_partitions"
+    )
+    mocked_drop_partitions = mocker.patch("app_analytics.partitions.drop_partitions")
+    today = timezone.now().date()
+
+    # When
+    manage_partitions(premake_days=7, retention_days=30)
+
+    # Then
+    mocked_create_partitions.assert_has_calls(
+        [
+            mocker.call(APIUsageRaw, start=today, days=8),
+            mocker.call(FeatureEvaluationRaw, start=today, days=8),
+        ]
+    )
+    mocked_drop_partitions.assert_has_calls(
+        [
+            mocker.call(APIUsageRaw, before=today - timedelta(days=30)),
+            mocker.call(FeatureEvaluationRaw, before=today - timedelta(days=30)),
+        ]
+    )
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_manage_partitions_does_not_drop_partitions_without_retention(mocker):
+    # Given
+    mocker.patch("app_analytics.partitions.create_partitions")
+    mocked_drop_partitions = mocker.patch("app_analytics.partitions.drop_partitions")
+
+    # When
+    manage_partitions(premake_days=7)
+
+    # Then
+    mocked_drop_partitions.assert_not_called()
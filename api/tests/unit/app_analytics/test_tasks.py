@@ -1,6 +1,7 @@
 from datetime import datetime
 
 import pytest
+from app_analytics.cache import API_USAGE_CACHE_BUCKET_SIZE
 from app_analytics.models import (
     APIUsageBucket,
     APIUsageRaw,
@@ -9,8 +10,11 @@ from app_analytics.models import (
     Resource,
 )
 from app_analytics.tasks import (
+    get_time_buckets_between,
     populate_api_usage_bucket,
+    populate_api_usage_time_bucket,
     populate_feature_evaluation_bucket,
+    populate_feature_evaluation_time_bucket,
     track_feature_evaluation,
     track_request,
 )
@@ -144,6 +148,60 @@ def test_populate_api_usage_bucket(freezer, bucket_size, runs_every):
         assert bucket.total_count == bucket_size
 
 
+@pytest.mark.freeze_time("2023-01-19T09:09:47.325132+00:00")
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_api_usage_bucket_includes_cached_api_usage(freezer):
+    # Given
+    environment_id = 1
+    now = timezone.now()
+    start_of_bucket = now.replace(
+        minute=45, second=0, microsecond=0
+    ) - timezone.timedelta(hours=1)
+    for i in range(15):
+        APIUsageBucket.objects.create(
+            environment_id=environment_id,
+            resource=Resource.FLAGS,
+            total_count=2,
+            bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+            created_at=start_of_bucket + timezone.timedelta(minutes=i),
+        )
+    _create_api_usage_event(
+        environment_id, start_of_bucket + timezone.timedelta(minutes=1)
+    )
+
+    # When
+    populate_api_usage_bucket(bucket_size=15, run_every=15)
+
+    # Then
+    bucket = APIUsageBucket.objects.get(bucket_size=15)
+    assert bucket.created_at == start_of_bucket
+    assert bucket.total_count == 15 * 2 + 1
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_api_usage_time_bucket_does_not_replace_cached_api_usage():
+    # Given
+    start_of_bucket = datetime.fromisoformat("2023-01-19T09:00:00+00:00")
+    cached_bucket = APIUsageBucket.objects.create(
+        environment_id=1,
+        resource=Resource.FLAGS,
+        total_count=2,
+        bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+        created_at=start_of_bucket,
+    )
+
+    # When
+    with pytest.raises(ValueError):
+        populate_api_usage_time_bucket(
+            API_USAGE_CACHE_BUCKET_SIZE,
+            start_of_bucket,
+            start_of_bucket + timezone.timedelta(minutes=API_USAGE_CACHE_BUCKET_SIZE),
+        )
+
+    # Then
+    assert APIUsageBucket.objects.filter(id=cached_bucket.id).exists()
+
+
 @pytest.mark.django_db(databases=["analytics", "default"])
 def test_track_request(environment):
     # Given
@@ -282,8 +340,8 @@ def test_populate_api_usage_bucket_using_a_bucket(freezer):
     # Given
     environment_id = 1
 
-    # let's create 3, 5m buckets
-    now = timezone.now()
+    # let's create 3, 5m buckets, from 8:45 to 9:00
+    now = timezone.now() - timezone.timedelta(minutes=5)
     for _ in range(3):
         APIUsageBucket.objects.create(
             environment_id=environment_id,
@@ -304,6 +362,139 @@ def test_populate_api_usage_bucket_using_a_bucket(freezer):
     assert APIUsageBucket.objects.filter(bucket_size=15, total_count=300).count() == 1
 
 
+@pytest.mark.freeze_time("2023-01-19T09:00:00+00:00")
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_api_usage_bucket_uses_the_same_boundaries_for_all_source_data(
+    freezer,
+):
+    # Given
+    environment_id = 1
+    start_of_bucket = timezone.now()
+    end_of_bucket = start_of_bucket + timezone.timedelta(minutes=15)
+    for created_at in (start_of_bucket, end_of_bucket):
+        _create_api_usage_event(environment_id, created_at)
+        APIUsageBucket.objects.create(
+            environment_id=environment_id,
+            resource=Resource.FLAGS,
+            total_count=2,
+            bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+            created_at=created_at,
+        )
+
+    # When
+    populate_api_usage_time_bucket(15, start_of_bucket, end_of_bucket)
+
+    # Then
+    # only the data created at the start of the bucket is included
+    assert APIUsageBucket.objects.get(bucket_size=15).total_count == 1 + 2
+
+
+@pytest.mark.freeze_time("2023-01-19T09:00:30+00:00")
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_api_usage_bucket_waits_for_the_api_usage_cache_to_flush(
+    freezer, settings
+):
+    # Given
+    settings.API_USAGE_CACHE_SECONDS = 60
+    environment_id = 1
+    start_of_bucket = timezone.now().replace(minute=45, second=0) - timezone.timedelta(
+        hours=1
+    )
+    # the usage for the last minute of the bucket hasn't been flushed yet
+    for i in range(14):
+        APIUsageBucket.objects.create(
+            environment_id=environment_id,
+            resource=Resource.FLAGS,
+            total_count=1,
+            bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+            created_at=start_of_bucket + timezone.timedelta(minutes=i),
+        )
+
+    # When
+    populate_api_usage_bucket(bucket_size=15, run_every=15)
+
+    # Then
+    assert not APIUsageBucket.objects.filter(bucket_size=15).exists()
+
+    # When
+    APIUsageBucket.objects.create(
+        environment_id=environment_id,
+        resource=Resource.FLAGS,
+        total_count=1,
+        bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+        created_at=start_of_bucket + timezone.timedelta(minutes=14),
+    )
+    freezer.move_to(timezone.now() + timezone.timedelta(minutes=2))
+    populate_api_usage_bucket(bucket_size=15, run_every=15)
+
+    # Then
+    bucket = APIUsageBucket.objects.get(bucket_size=15)
+    assert bucket.created_at == start_of_bucket
+    assert bucket.total_count == 15
+
+
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_time_buckets_keeps_existing_buckets_without_source_data():
+    # Given
+    start_of_bucket = datetime.fromisoformat("2023-01-19T09:00:00+00:00")
+    end_of_bucket = start_of_bucket + timezone.timedelta(minutes=15)
+    api_usage_bucket = APIUsageBucket.objects.create(
+        environment_id=1,
+        resource=Resource.FLAGS,
+        total_count=10,
+        bucket_size=15,
+        created_at=start_of_bucket,
+    )
+    feature_evaluation_bucket = FeatureEvaluationBucket.objects.create(
+        environment_id=1,
+        feature_name="feature1",
+        total_count=10,
+        bucket_size=15,
+        created_at=start_of_bucket,
+    )
+
+    # When
+    populate_api_usage_time_bucket(15, start_of_bucket, end_of_bucket)
+    populate_feature_evaluation_time_bucket(15, start_of_bucket, end_of_bucket)
+
+    # Then
+    assert APIUsageBucket.objects.filter(id=api_usage_bucket.id).exists()
+    assert FeatureEvaluationBucket.objects.filter(
+        id=feature_evaluation_bucket.id
+    ).exists()
+
+
+@pytest.mark.freeze_time("2023-01-19T09:00:00+00:00")
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_api_usage_time_bucket_skips_expired_raw_data(freezer, settings):
+    # Given
+    settings.RAW_ANALYTICS_RETENTION_DAYS = 7
+    start_of_bucket = timezone.now() - timezone.timedelta(days=8)
+    end_of_bucket = start_of_bucket + timezone.timedelta(minutes=15)
+    api_usage_bucket = APIUsageBucket.objects.create(
+        environment_id=1,
+        resource=Resource.FLAGS,
+        total_count=10,
+        bucket_size=15,
+        created_at=start_of_bucket,
+    )
+    # the cached usage is still there, but the raw data has been dropped
+    APIUsageBucket.objects.create(
+        environment_id=1,
+        resource=Resource.FLAGS,
+        total_count=2,
+        bucket_size=API_USAGE_CACHE_BUCKET_SIZE,
+        created_at=start_of_bucket,
+    )
+
+    # When
+    populate_api_usage_time_bucket(15, start_of_bucket, end_of_bucket)
+
+    # Then
+    api_usage_bucket.refresh_from_db()
+    assert api_usage_bucket.total_count == 10
+
+
 def _create_feature_evaluation_event(environment_id, feature_name, count, when):
     event = FeatureEvaluationRaw.objects.create(
         environment_id=environment_id,
@@ -315,3 +506,58 @@ def _create_feature_evaluation_event(environment_id, feature_name, count, when):
     event.save()
 
     return event
+
+
+@pytest.mark.freeze_time("2023-01-19T09:09:47.325132+00:00")
+@pytest.mark.django_db(databases=["analytics"])
+def test_populate_buckets_is_idempotent(freezer):
+    # Given
+    environment_id = 1
+    now = timezone.now()
+    for i in range(60):
+        _create_api_usage_event(environment_id, now - timezone.timedelta(minutes=i))
+        _create_feature_evaluation_event(
+            environment_id, "feature1", 2, now - timezone.timedelta(minutes=i)
+        )
+
+    # When
+    for _ in range(2):
+        populate_api_usage_bucket(bucket_size=15, run_every=60)
+        populate_feature_evaluation_bucket(bucket_size=15, run_every=60)
+
+    # Then
+    assert APIUsageBucket.objects.filter(bucket_size=15).count() == 4
+    assert FeatureEvaluationBucket.objects.filter(bucket_size=15).count() == 4
+    assert sorted(
+        FeatureEvaluationBucket.objects.filter(bucket_size=15).values_list(
+            "total_count", flat=True
+        )
+    ) == [10, 30, 30, 30]
+
+
+@pytest.mark.parametrize(
+    "start, end, expected_start_times",
+    (
+        (
+            "2023-01-19T09:00:00+00:00",
+            "2023-01-19T09:45:00+00:00",
+            ["09:00", "09:15", "09:30"],
+        ),
+        ("2023-01-19T09:05:30+00:00", "2023-01-19T09:44:59+00:00", ["09:15"]),
+        ("2023-01-19T09:05:00+00:00", "2023-01-19T09:10:00+00:00", []),
+    ),
+)
+def test_get_time_buckets_between(start, end, expected_start_times):
+    # When
+    time_buckets = get_time_buckets_between(
+        15, start=datetime.fromisoformat(start), end=datetime.fromisoformat(end)
+    )
+
+    # Then
+    assert [
+        bucket_start_time.strftime("%H:%M") for bucket_start_time, _ in time_buckets
+    ] == expected_start_times
+    assert all(
+        bucket_end_time - bucket_start_time == timezone.timedelta(minutes=15)
+        for bucket_start_time, bucket_end_time in time_buckets
+    )
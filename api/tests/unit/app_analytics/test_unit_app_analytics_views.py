@@ -131,3 +131,49 @@ def test_get_total_usage_count_for_non_admin_user_returns_403(
 
     # Then
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_sdk_analytics_merges_multiple_flushes(mocker, settings, environment, feature):
+    # Given
+    settings.INFLUXDB_TOKEN = "some-token"
+
+    data = [{feature.name: 12}, {feature.name: 3}]
+    request = mocker.MagicMock(data=data, environment=environment)
+
+    view = SDKAnalyticsFlags(request=request)
+
+    mocked_track_feature_eval = mocker.patch(
+        "app_analytics.views.track_feature_evaluation_influxdb"
+    )
+
+    # When
+    response = view.post(request)
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    mocked_track_feature_eval.assert_called_once_with(
+        environment.id, {feature.name: 15}
+    )
+
+
+def test_sdk_analytics_does_not_allow_invalid_flush(
+    mocker, settings, environment, feature
+):
+    # Given
+    settings.INFLUXDB_TOKEN = "some-token"
+
+    data = [{feature.name: 12}, "not-a-flush"]
+    request = mocker.MagicMock(data=data, environment=environment)
+
+    view = SDKAnalyticsFlags(request=request)
+
+    mocked_track_feature_eval = mocker.patch(
+        "app_analytics.views.track_feature_evaluation_influxdb"
+    )
+
+    # When
+    response = view.post(request)
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    mocked_track_feature_eval.assert_not_called()
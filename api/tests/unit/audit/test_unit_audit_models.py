@@ -1,6 +1,9 @@
 from audit.models import AuditLog
 from audit.related_object_type import RelatedObjectType
+from audit.tasks import process_environment_update
 from integrations.datadog.models import DataDogConfiguration
+from task_processor.models import Task
+from task_processor.task_run_method import TaskRunMethod
 
 
 def test_organisation_webhooks_are_called_when_audit_log_saved(project, mocker):
@@ -231,3 +234,48 @@ def test_creating_audit_logs_for_change_request_does_not_trigger_environment_upd
     send_environment_update_message_for_environment.assert_not_called()
     send_environment_update_message_for_project.assert_not_called()
     assert audit_log.created_date != environment.updated_at
+
+
+def test_creating_audit_logs_coalesces_environment_updates_if_enabled(
+    environment, project, mocker, settings
+):
+    # Given
+    settings.ENVIRONMENT_UPDATE_COALESCE_SECONDS = 10
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    write_environments_to_dynamodb = mocker.patch(
+        "environments.models.Environment.write_environments_to_dynamodb"
+    )
+    send_environment_update_message_for_environment = mocker.patch(
+        "audit.models.send_environment_update_message_for_environment"
+    )
+
+    # When
+    AuditLog.objects.create(environment=environment, project=project)
+    audit_log = AuditLog.objects.create(environment=environment, project=project)
+
+    # Then
+    write_environments_to_dynamodb.assert_not_called()
+    send_environment_update_message_for_environment.assert_not_called()
+
+    environment.refresh_from_db()
+    assert environment.updated_at == audit_log.created_date
+
+    task = Task.objects.get(task_identifier=process_environment_update.task_identifier)
+    assert task.kwargs == {"environment_id": environment.id, "project_id": project.id}
+    assert task.scheduled_for > audit_log.created_date
+
+
+def test_creating_audit_log_for_environment_does_not_schedule_update_if_project_update_scheduled(
+    environment, project, settings
+):
+    # Given
+    settings.ENVIRONMENT_UPDATE_COALESCE_SECONDS = 10
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    AuditLog.objects.create(project=project)
+
+    # When
+    AuditLog.objects.create(environment=environment, project=project)
+
+    # Then
+    task = Task.objects.get(task_identifier=process_environment_update.task_identifier)
+    assert task.kwargs == {"environment_id": None, "project_id": project.id}
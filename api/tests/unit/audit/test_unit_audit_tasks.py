@@ -9,6 +9,7 @@ from audit.tasks import (
     create_feature_state_updated_by_change_request_audit_log,
     create_feature_state_went_live_audit_log,
     create_segment_priorities_changed_audit_log,
+    process_environment_update,
 )
 from features.models import FeatureSegment
 from segments.models import Segment
@@ -273,3 +274,49 @@ def test_create_feature_state_wen_live_audit_log_does_nothing_if_feature_state_d
         ).count()
         == 0
     )
+
+
+def test_process_environment_update_for_environment(environment, project, mocker):
+    # Given
+    write_environments_to_dynamodb = mocker.patch(
+        "environments.models.Environment.write_environments_to_dynamodb"
+    )
+    send_environment_update_message_for_environment = mocker.patch(
+        "audit.tasks.send_environment_update_message_for_environment"
+    )
+    send_environment_update_message_for_project = mocker.patch(
+        "audit.tasks.send_environment_update_message_for_project"
+    )
+
+    # When
+    process_environment_update(environment_id=environment.id, project_id=project.id)
+
+    # Then
+    write_environments_to_dynamodb.assert_called_once_with(
+        environment_id=environment.id, project_id=project.id
+    )
+    send_environment_update_message_for_environment.assert_called_once_with(environment)
+    send_environment_update_message_for_project.assert_not_called()
+
+
+def test_process_environment_update_for_project(environment, project, mocker):
+    # Given
+    write_environments_to_dynamodb = mocker.patch(
+        "environments.models.Environment.write_environments_to_dynamodb"
+    )
+    send_environment_update_message_for_environment = mocker.patch(
+        "audit.tasks.send_environment_update_message_for_environment"
+    )
+    send_environment_update_message_for_project = mocker.patch(
+        "audit.tasks.send_environment_update_message_for_project"
+    )
+
+    # When
+    process_environment_update(project_id=project.id)
+
+    # Then
+    write_environments_to_dynamodb.assert_called_once_with(
+        environment_id=None, project_id=project.id
+    )
+    send_environment_update_message_for_project.assert_called_once_with(project)
+    send_environment_update_message_for_environment.assert_not_called()
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+from core.buffering import BufferedFlusher
+
+
+class ListBuffer(BufferedFlusher):
+    def __init__(self, flush_interval_seconds: float):
+        super().__init__(flush_interval_seconds)
+        self.items = []
+        self.flushed = []
+        self.flushed_event = threading.Event()
+
+    def add(self, item) -> None:
+        with self._lock:
+            self.items.append(item)
+            self._start_flusher()
+        self._flush_requested.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            items, self.items = self.items, []
+        self.flushed.extend(items)
+        if items:
+            self.flushed_event.set()
+
+
+def test_buffered_flusher_flushes_from_background_thread_when_requested():
+    # Given
+    buffer = ListBuffer(flush_interval_seconds=60)
+
+    # When
+    buffer.add(1)
+
+    # Then
+    assert buffer.flushed_event.wait(timeout=5)
+    assert buffer.flushed == [1]
+    assert buffer.items == []
+
+
+def test_buffered_flusher_starts_a_single_flusher_thread():
+    # Given
+    buffer = ListBuffer(flush_interval_seconds=60)
+
+    # When
+    buffer.add(1)
+    flusher = buffer._flusher
+    buffer.add(2)
+
+    # Then
+    assert flusher.is_alive()
+    assert flusher.daemon
+    assert buffer._flusher is flusher
+
+
+def test_buffered_flusher_keeps_running_when_flush_fails(mocker):
+    # Given
+    buffer = ListBuffer(flush_interval_seconds=0.01)
+    buffer.close_db_connections = True
+    mocked_close_old_connections = mocker.patch("core.buffering.close_old_connections")
+    flushed = threading.Event()
+    attempts = []
+
+    def flush():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError()
+        flushed.set()
+
+    mocker.patch.object(buffer, "flush", side_effect=flush)
+
+    # When
+    buffer._start_flusher()
+
+    # Then
+    assert flushed.wait(timeout=5)
+    assert mocked_close_old_connections.call_count >= 1
+
+
+def test_buffered_flusher_flush_on_exit_flushes():
+    # Given
+    buffer = ListBuffer(flush_interval_seconds=60)
+    buffer.items.append(1)
+
+    # When
+    buffer.flush_on_exit()
+
+    # Then
+    assert buffer.flushed == [1]
+
+
+def test_buffered_flusher_flush_must_be_implemented():
+    with pytest.raises(NotImplementedError):
+        BufferedFlusher(flush_interval_seconds=60).flush()
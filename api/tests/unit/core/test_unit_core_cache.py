@@ -0,0 +1,94 @@
+from core.cache import LocalCache
+
+
+def test_local_cache_get_returns_default_if_key_not_set():
+    # Given
+    cache = LocalCache(max_entries=2)
+
+    # Then
+    assert cache.get("foo") is None
+    assert cache.get("foo", "default") == "default"
+
+
+def test_local_cache_does_not_copy_values():
+    # Given
+    cache = LocalCache(max_entries=2)
+    value = object()
+
+    # When
+    cache.set("foo", value)
+
+    # Then
+    assert cache.get("foo") is value
+
+
+def test_local_cache_evicts_least_recently_used_item_when_full():
+    # Given
+    cache = LocalCache(max_entries=2)
+    cache.set("foo", 1)
+    cache.set("bar", 2)
+
+    # When
+    cache.get("foo")
+    cache.set("baz", 3)
+
+    # Then
+    assert len(cache) == 2
+    assert cache.get("foo") == 1
+    assert cache.get("bar") is None
+    assert cache.get("baz") == 3
+
+
+def test_local_cache_expires_items_after_timeout(mocker):
+    # Given
+    mocked_time = mocker.patch("core.cache.time")
+    mocked_time.monotonic.return_value = 100
+
+    cache = LocalCache(max_entries=2, timeout=10)
+    cache.set("foo", 1)
+    cache.set("bar", 2, timeout=20)
+
+    # When
+    mocked_time.monotonic.return_value = 115
+
+    # Then
+    assert cache.get("foo") is None
+    assert cache.get("bar") == 2
+    assert len(cache) == 1
+
+
+def test_local_cache_delete_and_clear():
+    # Given
+    cache = LocalCache(max_entries=3)
+    cache.set("foo", 1)
+    cache.set("bar", 2)
+    cache.set("baz", 3)
+
+    # When
+    cache.delete("foo")
+    cache.delete("not-a-key")
+
+    # Then
+    assert cache.get("foo") is None
+    assert len(cache) == 2
+
+    # When
+    cache.clear()
+
+    # Then
+    assert len(cache) == 0
+
+
+def test_local_cache_records_hits_and_misses():
+    # Given
+    cache = LocalCache(max_entries=10)
+    cache.set("foo", "bar")
+
+    # When
+    cache.get("foo")
+    cache.get("foo")
+    cache.get("baz")
+
+    # Then
+    assert cache.hits == 2
+    assert cache.misses == 1
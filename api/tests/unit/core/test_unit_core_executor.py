@@ -0,0 +1,108 @@
+import threading
+
+from core.executor import BoundedExecutor
+
+
+def test_bounded_executor_runs_submitted_functions():
+    # Given
+    executor = BoundedExecutor(max_workers=2, max_queue_size=10)
+    results = []
+
+    # When
+    for i in range(5):
+        assert executor.submit(results.append, i) is True
+    executor.shutdown(timeout=5)
+
+    # Then
+    assert sorted(results) == [0, 1, 2, 3, 4]
+    metrics = executor.metrics
+    assert metrics.submitted == 5
+    assert metrics.completed == 5
+    assert metrics.dropped == 0
+    assert metrics.max_latency_seconds >= 0
+
+
+def test_bounded_executor_drops_functions_when_queue_is_full():
+    # Given
+    executor = BoundedExecutor(max_workers=1, max_queue_size=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(timeout=5)
+
+    executor.submit(block)
+    started.wait(timeout=5)
+
+    # When
+    queued = executor.submit(lambda: None)
+    dropped = executor.submit(lambda: None)
+
+    # Then
+    assert queued is True
+    assert dropped is False
+    assert executor.queue_depth == 1
+    assert executor.metrics.dropped == 1
+
+    release.set()
+    executor.shutdown(timeout=5)
+    assert executor.metrics.completed == 2
+
+
+def test_bounded_executor_rate_limits_dropped_warnings(mocker):
+    # Given
+    mocked_logger = mocker.patch("core.executor.logger")
+    mocked_monotonic = mocker.patch("core.executor.time.monotonic", return_value=0)
+    executor = BoundedExecutor(max_workers=1, max_queue_size=1)
+    mocker.patch.object(executor, "_start_workers")
+    executor.submit(lambda: None)
+
+    # When
+    for _ in range(3):
+        executor.submit(lambda: None)
+
+    # Then
+    assert executor.metrics.dropped == 3
+    mocked_logger.warning.assert_called_once()
+    assert mocked_logger.warning.call_args.args[1] == 1
+
+    # When
+    mocked_monotonic.return_value = executor.dropped_warning_interval_seconds
+    executor.submit(lambda: None)
+
+    # Then
+    assert mocked_logger.warning.call_count == 2
+    assert mocked_logger.warning.call_args.args[1] == 3
+
+
+def test_bounded_executor_counts_failed_functions():
+    # Given
+    executor = BoundedExecutor(max_workers=1, max_queue_size=10)
+
+    def fail():
+        raise ValueError()
+
+    # When
+    executor.submit(fail)
+    executor.shutdown(timeout=5)
+
+    # Then
+    assert executor.metrics.failed == 1
+    assert executor.metrics.completed == 0
+
+
+def test_postpone_submits_to_executor(mocker):
+    # Given
+    from util.util import postpone
+
+    mocked_executor = mocker.patch("util.util.postpone_executor")
+
+    def function(*args, **kwargs):
+        pass
+
+    # When
+    postpone(function)(1, foo="bar")
+
+    # Then
+    mocked_executor.submit.assert_called_once_with(function, 1, foo="bar")
@@ -15,7 +15,7 @@ def forwarder_mocked_migrator(mocker):
 @pytest.fixture()
 def forwarder_mocked_requests(mocker):
     return mocker.patch(
-        "edge_api.identities.edge_request_forwarder.requests",
+        "edge_api.identities.edge_request_forwarder.http_session",
         autospec=True,
         spec_set=True,
     )
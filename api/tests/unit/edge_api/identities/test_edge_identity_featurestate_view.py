@@ -1,6 +1,9 @@
 from django.urls import reverse
+from flag_engine.environments.builders import build_environment_model
 from rest_framework import status
 
+from util.mappers import map_environment_to_environment_document
+
 
 def test_user_with_view_environment_permission_can_retrieve_all_feature_states_for_identity(
     test_user_client,
@@ -15,6 +18,10 @@ def test_user_with_view_environment_permission_can_retrieve_all_feature_states_f
     edge_identity_dynamo_wrapper_mock.get_item_from_uuid_or_404.return_value = (
         identity_document_without_fs
     )
+    environment_wrapper_mock = edge_identity_dynamo_wrapper_mock.environment_wrapper
+    environment_wrapper_mock.get_environment_model.return_value = (
+        build_environment_model(map_environment_to_environment_document(environment))
+    )
     user_environment_permission.permissions.add(view_environment_permission)
     url = reverse(
         "api-v1:environments:edge-identity-featurestates-all",
@@ -3,6 +3,7 @@ from datetime import timedelta
 import pytest
 import shortuuid
 from django.utils import timezone
+from flag_engine.environments.builders import build_environment_model
 from flag_engine.features.models import FeatureModel, FeatureStateModel
 from freezegun import freeze_time
 
@@ -10,10 +11,22 @@ from edge_api.identities.models import EdgeIdentity
 from features.models import FeatureSegment, FeatureState, FeatureStateValue
 from features.workflows.core.models import ChangeRequest
 from segments.models import Segment
+from util.mappers import map_environment_to_environment_document
+
+
+def _mock_environment_model(edge_identity_dynamo_wrapper_mock, environment):
+    environment_model = build_environment_model(
+        map_environment_to_environment_document(environment)
+    )
+    get_environment_model = (
+        edge_identity_dynamo_wrapper_mock.environment_wrapper.get_environment_model
+    )
+    get_environment_model.return_value = environment_model
+    return environment_model
 
 
 def test_get_all_feature_states_for_edge_identity_uses_segment_priorities(
-    environment, project, segment, feature, mocker
+    environment, project, segment, feature, mocker, django_assert_num_queries
 ):
     # Given
     another_segment = Segment.objects.create(name="another_segment", project=project)
@@ -21,10 +34,6 @@ def test_get_all_feature_states_for_edge_identity_uses_segment_priorities(
     edge_identity_dynamo_wrapper_mock = mocker.patch(
         "edge_api.identities.models.EdgeIdentity.dynamo_wrapper",
     )
-    edge_identity_dynamo_wrapper_mock.get_segment_ids.return_value = [
-        segment.id,
-        another_segment.id,
-    ]
 
     feature_segment_p1 = FeatureSegment.objects.create(
         segment=segment, feature=feature, environment=environment, priority=1
@@ -47,23 +56,90 @@ def test_get_all_feature_states_for_edge_identity_uses_segment_priorities(
         string_value="p2"
     )
 
+    environment_model = _mock_environment_model(
+        edge_identity_dynamo_wrapper_mock, environment
+    )
+    mocked_get_identity_segments = mocker.patch(
+        "edge_api.identities.models.get_identity_segments",
+        return_value=environment_model.project.segments,
+    )
+
     identity_model = mocker.MagicMock(
         environment_api_key=environment.api_key, identity_features=[]
     )
     edge_identity = EdgeIdentity(identity_model)
 
     # When
-    feature_states, _ = edge_identity.get_all_feature_states()
+    with django_assert_num_queries(0):
+        (
+            feature_states,
+            identity_feature_names,
+            segment_overrides,
+        ) = edge_identity.get_all_feature_states()
 
     # Then
     assert len(feature_states) == 1
-    assert feature_states[0] == segment_override_p1
+    assert feature_states[0].django_id == segment_override_p1.id
+    assert feature_states[0].get_value() == "p1"
+    assert identity_feature_names == set()
+    assert segment_overrides[feature.name].id == segment.id
 
-    edge_identity_dynamo_wrapper_mock.get_segment_ids.assert_called_once_with(
-        identity_model=identity_model
+    environment_wrapper_mock = edge_identity_dynamo_wrapper_mock.environment_wrapper
+    environment_wrapper_mock.get_environment_model.assert_called_once_with(
+        environment.api_key
+    )
+    mocked_get_identity_segments.assert_called_once_with(
+        environment_model, identity_model
     )
 
 
+def test_get_all_feature_states_for_edge_identity_uses_identity_overrides(
+    environment, project, segment, feature, mocker
+):
+    # Given
+    edge_identity_dynamo_wrapper_mock = mocker.patch(
+        "edge_api.identities.models.EdgeIdentity.dynamo_wrapper",
+    )
+
+    feature_segment = FeatureSegment.objects.create(
+        segment=segment, feature=feature, environment=environment
+    )
+    FeatureState.objects.create(
+        feature=feature, environment=environment, feature_segment=feature_segment
+    )
+
+    environment_model = _mock_environment_model(
+        edge_identity_dynamo_wrapper_mock, environment
+    )
+    mocker.patch(
+        "edge_api.identities.models.get_identity_segments",
+        return_value=environment_model.project.segments,
+    )
+
+    identity_override = FeatureStateModel(
+        feature=FeatureModel(id=feature.id, name=feature.name, type="STANDARD"),
+        enabled=True,
+        feature_state_value="identity override",
+    )
+    identity_model = mocker.MagicMock(
+        environment_api_key=environment.api_key,
+        identity_features=[identity_override],
+    )
+    edge_identity = EdgeIdentity(identity_model)
+
+    # When
+    (
+        feature_states,
+        identity_feature_names,
+        segment_overrides,
+    ) = edge_identity.get_all_feature_states()
+
+    # Then
+    assert feature_states == [identity_override]
+    assert identity_feature_names == {feature.name}
+    assert segment_overrides == {}
+
+
 def test_edge_identity_get_all_feature_states_ignores_not_live_feature_states(
     environment, project, segment, feature, feature_state, admin_user, mocker
 ):
@@ -71,7 +147,6 @@ def test_edge_identity_get_all_feature_states_ignores_not_live_feature_states(
     edge_identity_dynamo_wrapper_mock = mocker.patch(
         "edge_api.identities.models.EdgeIdentity.dynamo_wrapper",
     )
-    edge_identity_dynamo_wrapper_mock.get_segment_ids.return_value = []
 
     change_request = ChangeRequest.objects.create(
         title="Test CR", environment=environment, user=admin_user
@@ -91,10 +166,11 @@ def test_edge_identity_get_all_feature_states_ignores_not_live_feature_states(
 
     # When
     with freeze_time(timezone.now() + timedelta(hours=2)):
-        feature_states, _ = edge_identity.get_all_feature_states()
+        _mock_environment_model(edge_identity_dynamo_wrapper_mock, environment)
+        feature_states, _, _ = edge_identity.get_all_feature_states()
 
     # Then
-    assert feature_states == [feature_state]
+    assert [fs.django_id for fs in feature_states] == [feature_state.id]
 
 
 def test_edge_identity_from_identity_document():
@@ -413,3 +489,56 @@ def test_edge_identity_save_called_generate_audit_records_if_feature_override_up
             "master_api_key_id": None,
         }
     )
+
+
+def test_edge_identity_save_does_not_generate_audit_records_if_override_reverted(
+    mocker, edge_identity_model, edge_identity_dynamo_wrapper_mock
+):
+    # Given
+    mocked_generate_audit_log_records = mocker.patch(
+        "edge_api.identities.models.generate_audit_log_records"
+    )
+
+    feature_state_model = FeatureStateModel(
+        feature=FeatureModel(id=1, name="test_feature", type="STANDARD"),
+        enabled=True,
+    )
+    feature_state_model.set_value("initial")
+    edge_identity_model.add_feature_override(feature_state_model)
+
+    user = mocker.MagicMock()
+
+    edge_identity_model.save(user=user)
+    mocked_generate_audit_log_records.reset_mock()
+
+    feature_state_model.set_value("updated")
+    feature_state_model.set_value("initial")
+
+    # When
+    edge_identity_model.save(user=user)
+
+    # Then
+    mocked_generate_audit_log_records.delay.assert_not_called()
+
+
+def test_edge_identity_save_does_not_deep_copy_identity(
+    mocker, edge_identity_model, edge_identity_dynamo_wrapper_mock
+):
+    # Given
+    mocked_deepcopy = mocker.patch("copy.deepcopy")
+    mocker.patch("edge_api.identities.models.generate_audit_log_records")
+
+    feature_state_model = FeatureStateModel(
+        feature=FeatureModel(id=1, name="test_feature", type="STANDARD"),
+        enabled=True,
+    )
+    edge_identity_model.add_feature_override(feature_state_model)
+    edge_identity_model.save(user=mocker.MagicMock())
+
+    feature_state_model.enabled = False
+
+    # When
+    edge_identity_model.save(user=mocker.MagicMock())
+
+    # Then
+    mocked_deepcopy.assert_not_called()
@@ -1,13 +1,22 @@
 import json
+from collections import OrderedDict
 
 import pytest
+import requests
 from core.constants import FLAGSMITH_SIGNATURE_HEADER
 
 from edge_api.identities.edge_request_forwarder import (
+    EdgeRequestForwarder,
+    _should_forward,
+    forward_edge_requests,
     forward_identity_request,
     forward_trait_request,
     forward_trait_request_sync,
     forward_trait_requests,
+    get_bulk_traits_edge_request,
+    get_identity_edge_request,
+    get_trait_edge_request,
+    project_migration_done_cache,
 )
 
 
@@ -151,27 +160,177 @@ def test_forward_trait_request_calls_sync_function_correctly(mocker):
     )
 
 
-def test_forward_trait_requests_calls_sync_function_correctly(mocker):
+def test_forward_trait_requests_makes_a_single_bulk_request(
+    mocker,
+    forward_enable_settings,
+    forwarder_mocked_migrator,
+    forwarder_mocked_requests,
+):
     # Given
-    mocked_forward_trait_request = mocker.patch(
-        "edge_api.identities.edge_request_forwarder.forward_trait_request_sync",
-        autospec=True,
-    )
-    request_method = "POST"
-    headers = {"X-Environment-Key": "test_api_key"}
     project_id = 1
+    headers = {"X-Environment-Key": "test_api_key"}
     payload = [
         {"identity": {"identifier": "test_user_123"}},
         {"identity": {"identifier": "test_user_456"}},
     ]
 
+    type(
+        forwarder_mocked_migrator.return_value
+    ).is_migration_done = mocker.PropertyMock(return_value=True)
+
+    # When
+    forward_trait_requests("PUT", headers, project_id, payload)
+
+    # Then
+    forwarder_mocked_requests.post.assert_not_called()
+    args, kwargs = forwarder_mocked_requests.put.call_args
+    assert args[0] == forward_enable_settings.EDGE_API_URL + "traits/bulk/"
+    assert kwargs["data"] == json.dumps(payload)
+    assert kwargs["headers"][FLAGSMITH_SIGNATURE_HEADER]
+
+
+def test_forward_edge_requests_checks_migration_status_once_per_project(
+    mocker,
+    forward_enable_settings,
+    forwarder_mocked_migrator,
+    forwarder_mocked_requests,
+):
+    # Given
+    headers = {"X-Environment-Key": "test_api_key"}
+    migrated_project_id, not_migrated_project_id = 1, 2
+
+    def get_migrator(project_id):
+        migrator = mocker.MagicMock()
+        migrator.is_migration_done = project_id == migrated_project_id
+        return migrator
+
+    forwarder_mocked_migrator.side_effect = get_migrator
+
+    edge_requests = [
+        get_identity_edge_request(
+            "GET", headers, migrated_project_id, query_params={"identifier": "a"}
+        ),
+        get_trait_edge_request(
+            "POST", headers, migrated_project_id, {"trait_key": "key"}
+        ),
+        get_bulk_traits_edge_request(
+            "PUT", headers, migrated_project_id, [{"trait_key": "key"}]
+        ),
+        get_identity_edge_request(
+            "POST", headers, not_migrated_project_id, request_data={"identifier": "b"}
+        ),
+    ]
+
+    # When
+    forward_edge_requests(edge_requests)
+
+    # Then
+    assert forwarder_mocked_migrator.call_args_list == [
+        mocker.call(migrated_project_id),
+        mocker.call(not_migrated_project_id),
+    ]
+
+    url = forward_enable_settings.EDGE_API_URL
+    forwarder_mocked_requests.get.assert_called_once()
+    assert forwarder_mocked_requests.get.call_args.args[0] == url + "identities/"
+    forwarder_mocked_requests.post.assert_called_once()
+    assert forwarder_mocked_requests.post.call_args.args[0] == url + "traits/"
+    forwarder_mocked_requests.put.assert_called_once()
+    assert forwarder_mocked_requests.put.call_args.args[0] == url + "traits/bulk/"
+
+
+def test_forward_edge_requests_continues_if_a_request_fails(
+    mocker,
+    forward_enable_settings,
+    forwarder_mocked_migrator,
+    forwarder_mocked_requests,
+):
+    # Given
+    headers = {"X-Environment-Key": "test_api_key"}
+    project_id = 1
+    type(
+        forwarder_mocked_migrator.return_value
+    ).is_migration_done = mocker.PropertyMock(return_value=True)
+    forwarder_mocked_requests.post.side_effect = [
+        requests.ConnectionError(),
+        mocker.MagicMock(),
+    ]
+
+    edge_requests = [
+        get_trait_edge_request("POST", headers, project_id, {"trait_key": "key"}),
+        get_trait_edge_request("POST", headers, project_id, {"trait_key": "key1"}),
+    ]
+
+    # When
+    forward_edge_requests(edge_requests)
+
+    # Then
+    assert forwarder_mocked_requests.post.call_count == 2
+
+
+def test_should_forward_caches_completed_migrations(
+    mocker, settings, forwarder_mocked_migrator
+):
+    # Given
+    settings.CACHE_PROJECT_MIGRATION_STATUS_SECONDS = 60
+    mocker.patch.object(project_migration_done_cache, "_data", OrderedDict())
+
+    mocked_migration_done = mocker.PropertyMock(side_effect=[False, True])
+    type(
+        forwarder_mocked_migrator.return_value
+    ).is_migration_done = mocked_migration_done
+
+    # When
+    results = [_should_forward(1) for _ in range(3)]
+
+    # Then
+    assert results == [False, True, True]
+    assert forwarder_mocked_migrator.call_count == 2
+
+
+def test_edge_request_forwarder_creates_task_per_call_if_not_coalescing(mocker):
+    # Given
+    mocked_forward_edge_requests = mocker.patch(
+        "edge_api.identities.edge_request_forwarder.forward_edge_requests"
+    )
+    forwarder = EdgeRequestForwarder(flush_interval_seconds=0, batch_size=10)
+    edge_requests = [
+        get_identity_edge_request("POST", {}, 1, request_data={"identifier": id_})
+        for id_ in ("a", "b")
+    ]
+
     # When
-    forward_trait_requests(request_method, headers, project_id, payload)
+    forwarder.forward(*edge_requests)
 
     # Then
-    mocked_forward_trait_request.assert_has_calls(
-        [
-            mocker.call(request_method, headers, project_id, payload[0]),
-            mocker.call(request_method, headers, project_id, payload[1]),
-        ]
+    mocked_forward_edge_requests.delay.assert_called_once_with(args=(edge_requests,))
+
+
+def test_edge_request_forwarder_coalesces_requests_into_batches(mocker):
+    # Given
+    mocked_forward_edge_requests = mocker.patch(
+        "edge_api.identities.edge_request_forwarder.forward_edge_requests"
     )
+    forwarder = EdgeRequestForwarder(flush_interval_seconds=10, batch_size=2)
+    mocker.patch.object(forwarder, "_start_flusher")
+    edge_requests = [
+        get_identity_edge_request("POST", {}, 1, request_data={"identifier": id_})
+        for id_ in ("a", "b", "c")
+    ]
+
+    # When
+    for edge_request in edge_requests:
+        forwarder.forward(edge_request)
+
+    # Then
+    mocked_forward_edge_requests.delay.assert_not_called()
+    assert forwarder._flush_requested.is_set()
+
+    # and When
+    forwarder.flush()
+
+    # Then
+    assert mocked_forward_edge_requests.delay.call_args_list == [
+        mocker.call(args=(edge_requests[:2],)),
+        mocker.call(args=(edge_requests[2:],)),
+    ]
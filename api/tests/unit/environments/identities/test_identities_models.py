@@ -1,7 +1,14 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
+from environments.identities import helpers
+from environments.identities.helpers import hashed_percentages_memo
 from environments.identities.models import Identity
-from features.models import Feature, FeatureState
+from environments.identities.traits.models import Trait
+from environments.snapshots import environment_feature_states_cache
+from features.models import Feature, FeatureSegment, FeatureState
+from segments.models import EQUAL, Condition
 
 
 def test_identity_get_all_feature_states_gets_latest_committed_version(environment):
@@ -66,3 +73,251 @@ def test_get_hash_key_with_use_identity_composite_key_for_hashing_disabled(
     assert identity.get_hash_key(use_identity_composite_key_for_hashing=False) == str(
         identity.id
     )
+
+
+def test_identity_get_all_feature_states_uses_environment_snapshot(
+    identity,
+    environment,
+    feature,
+    segment,
+    identity_matching_segment,
+    settings,
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS = 60
+    environment_feature_states_cache.clear()
+
+    other_feature = Feature.objects.create(
+        name="other_feature", project=feature.project
+    )
+    identity_override_feature = Feature.objects.create(
+        name="identity_override_feature", project=feature.project
+    )
+
+    # a segment override for a segment which the identity matches...
+    matching_feature_segment = FeatureSegment.objects.create(
+        feature=feature, segment=identity_matching_segment, environment=environment
+    )
+    matching_segment_override = FeatureState.objects.create(
+        feature=feature,
+        environment=environment,
+        feature_segment=matching_feature_segment,
+        enabled=True,
+    )
+
+    # and one for a segment which it doesn't
+    FeatureState.objects.create(
+        feature=other_feature,
+        environment=environment,
+        feature_segment=FeatureSegment.objects.create(
+            feature=other_feature, segment=segment, environment=environment
+        ),
+        enabled=True,
+    )
+
+    identity_override = FeatureState.objects.create(
+        feature=identity_override_feature,
+        environment=environment,
+        identity=identity,
+        enabled=True,
+    )
+
+    expected_feature_states = {
+        feature.id: matching_segment_override,
+        other_feature.id: FeatureState.objects.get(
+            feature=other_feature,
+            environment=environment,
+            feature_segment__isnull=True,
+            identity__isnull=True,
+        ),
+        identity_override_feature.id: identity_override,
+    }
+
+    identity = Identity.objects.select_related("environment").get(id=identity.id)
+    identity.get_all_feature_states()
+
+    # When
+    with CaptureQueriesContext(connection) as captured_queries:
+        feature_states = identity.get_all_feature_states()
+
+    # Then
+    # only the identity overrides are retrieved from the feature states table
+    feature_state_queries = [
+        query["sql"]
+        for query in captured_queries
+        if 'FROM "features_featurestate"' in query["sql"]
+    ]
+    assert len(feature_state_queries) == 1
+    assert '"features_featurestate"."identity_id" = ' in feature_state_queries[0]
+
+    # Then
+    assert {fs.feature_id: fs for fs in feature_states} == expected_feature_states
+
+    # and the result matches that retrieved directly from the database
+    settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS = 0
+    assert set(identity.get_all_feature_states()) == set(feature_states)
+
+    environment_feature_states_cache.clear()
+
+
+def test_identity_manager_bulk_get_or_create(environment):
+    # Given
+    existing_identity = Identity.objects.create(
+        identifier="existing", environment=environment
+    )
+
+    # When
+    identities, created_identifiers = Identity.objects.bulk_get_or_create(
+        environment, ["existing", "new"]
+    )
+
+    # Then
+    assert set(identities) == {"existing", "new"}
+    assert created_identifiers == {"new"}
+    assert identities["existing"] == existing_identity
+    assert identities["new"] == Identity.objects.get(
+        identifier="new", environment=environment
+    )
+
+
+def test_identity_bulk_update_traits(environment, organisation):
+    # Given
+    identity_one = Identity.objects.create(identifier="one", environment=environment)
+    identity_two = Identity.objects.create(identifier="two", environment=environment)
+    Trait.objects.create(identity=identity_one, trait_key="a", string_value="foo")
+    Trait.objects.create(identity=identity_one, trait_key="b", string_value="foo")
+    Trait.objects.create(identity=identity_two, trait_key="a", string_value="foo")
+
+    # When
+    identities_traits = Identity.bulk_update_traits(
+        [
+            (
+                identity_one,
+                [
+                    {"trait_key": "a", "trait_value": "bar"},
+                    {"trait_key": "b", "trait_value": None},
+                ],
+            ),
+            (identity_two, [{"trait_key": "c", "trait_value": 1}]),
+        ]
+    )
+
+    # Then
+    assert {
+        identity_id: {trait.trait_key: trait.trait_value for trait in traits}
+        for identity_id, traits in identities_traits.items()
+    } == {
+        identity_one.id: {"a": "bar"},
+        identity_two.id: {"a": "foo", "c": 1},
+    }
+    assert Trait.objects.filter(identity=identity_one).count() == 1
+
+
+def test_identity_get_all_feature_states_for_identities_matches_single_identity(
+    environment, feature, segment, segment_rule, settings
+):
+    # Given
+    Condition.objects.create(
+        rule=segment_rule, property="plan", operator=EQUAL, value="premium"
+    )
+    segment_override = FeatureState.objects.create(
+        feature=feature,
+        environment=environment,
+        feature_segment=FeatureSegment.objects.create(
+            feature=feature, segment=segment, environment=environment
+        ),
+        enabled=True,
+    )
+
+    other_feature = Feature.objects.create(name="other", project=environment.project)
+    premium_identity = Identity.objects.create(
+        identifier="premium", environment=environment
+    )
+    overridden_identity = Identity.objects.create(
+        identifier="overridden", environment=environment
+    )
+    identity_override = FeatureState.objects.create(
+        feature=other_feature,
+        environment=environment,
+        identity=overridden_identity,
+        enabled=True,
+    )
+    premium_traits = [
+        Trait(identity=premium_identity, trait_key="plan", string_value="premium")
+    ]
+
+    # When
+    with CaptureQueriesContext(connection) as captured_queries:
+        identities_feature_states = Identity.get_all_feature_states_for_identities(
+            environment,
+            [(premium_identity, premium_traits), (overridden_identity, [])],
+        )
+
+    # Then
+    # the identity overrides are retrieved for all identities in a single query
+    identity_override_queries = [
+        query["sql"]
+        for query in captured_queries
+        if 'FROM "features_featurestate"' in query["sql"]
+        and '"features_featurestate"."identity_id" IN' in query["sql"]
+    ]
+    assert len(identity_override_queries) == 1
+
+    premium_feature_states = {
+        fs.feature_id: fs for fs in identities_feature_states[premium_identity.id]
+    }
+    assert premium_feature_states[feature.id] == segment_override
+    overridden_feature_states = {
+        fs.feature_id: fs for fs in identities_feature_states[overridden_identity.id]
+    }
+    assert overridden_feature_states[other_feature.id] == identity_override
+
+    # and the results match those for each individual identity
+    assert set(identities_feature_states[premium_identity.id]) == set(
+        premium_identity.get_all_feature_states(traits=premium_traits)
+    )
+    assert set(identities_feature_states[overridden_identity.id]) == set(
+        overridden_identity.get_all_feature_states(traits=[])
+    )
+
+
+def test_identity_get_all_feature_states_for_identities_hashes_multivariate_values_in_batch(  # noqa: E501
+    environment, multivariate_feature, mocker
+):
+    # Given
+    identities = [
+        Identity.objects.create(identifier=f"identity-{i}", environment=environment)
+        for i in range(3)
+    ]
+    expected_values = {
+        identity.id: next(
+            fs
+            for fs in identity.get_all_feature_states()
+            if fs.feature == multivariate_feature
+        ).get_feature_state_value(identity=identity)
+        for identity in identities
+    }
+    mocked_get_hashed_percentages = mocker.patch(
+        "environments.identities.helpers.get_hashed_percentages_for_object_ids",
+        wraps=helpers.get_hashed_percentages_for_object_ids,
+    )
+    md5_spy = mocker.spy(helpers.hashlib, "md5")
+
+    # When
+    with hashed_percentages_memo():
+        identities_feature_states = Identity.get_all_feature_states_for_identities(
+            environment, [(identity, []) for identity in identities]
+        )
+        values = {
+            identity.id: next(
+                fs
+                for fs in identities_feature_states[identity.id]
+                if fs.feature == multivariate_feature
+            ).get_feature_state_value(identity=identity)
+            for identity in identities
+        }
+
+    # Then
+    assert values == expected_values
+    mocked_get_hashed_percentages.assert_called_once()
+    assert md5_spy.call_count == len(identities)
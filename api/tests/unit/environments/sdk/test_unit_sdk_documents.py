@@ -0,0 +1,84 @@
+import gzip
+
+import pytest
+
+from environments.sdk import documents
+from environments.sdk.documents import (
+    BROTLI,
+    GZIP,
+    get_preferred_encoding,
+    get_rendered_environment_document,
+    render_environment_document,
+)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, brotli_installed, expected_encoding",
+    (
+        ("", True, None),
+        ("gzip", True, GZIP),
+        ("gzip, deflate, br", True, BROTLI),
+        ("gzip, deflate, br", False, GZIP),
+        ("gzip;q=0, br;q=1.0", True, BROTLI),
+        ("gzip;q=0", True, None),
+        ("deflate", True, None),
+    ),
+)
+def test_get_preferred_encoding(
+    accept_encoding, brotli_installed, expected_encoding, settings, mocker
+):
+    # Given
+    settings.ENABLE_GZIP_COMPRESSION = True
+    mocker.patch.object(
+        documents, "brotli", mocker.MagicMock() if brotli_installed else None
+    )
+
+    # Then
+    assert get_preferred_encoding(accept_encoding) == expected_encoding
+
+
+def test_get_preferred_encoding_returns_none_if_compression_disabled(settings):
+    # Given
+    settings.ENABLE_GZIP_COMPRESSION = False
+
+    # Then
+    assert get_preferred_encoding("gzip, br") is None
+
+
+def test_render_environment_document(environment):
+    # When
+    rendered_document = render_environment_document(environment, encodings=[GZIP])
+
+    # Then
+    assert rendered_document.updated_at == environment.updated_at
+    assert gzip.decompress(rendered_document.get_content(GZIP)) == (
+        rendered_document.get_content()
+    )
+
+
+def test_get_rendered_environment_document_caches_on_updated_at(
+    environment, settings, mocker
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_DOCUMENT_SECONDS = 60
+    mocked_render = mocker.patch.object(
+        documents,
+        "render_environment_document",
+        side_effect=render_environment_document,
+    )
+
+    updated_at = environment.updated_at
+
+    # When
+    first = get_rendered_environment_document(environment, updated_at)
+    second = get_rendered_environment_document(environment, updated_at)
+
+    # Then
+    assert first == second
+    assert mocked_render.call_count == 1
+
+    # When
+    get_rendered_environment_document(environment, updated_at.replace(year=2100))
+
+    # Then
+    assert mocked_render.call_count == 2
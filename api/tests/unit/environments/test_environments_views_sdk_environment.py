@@ -1,8 +1,12 @@
+import gzip
+import json
+
 from core.constants import FLAGSMITH_UPDATED_AT_HEADER
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from audit.models import AuditLog
 from environments.models import Environment, EnvironmentAPIKey
 from features.models import Feature
 from segments.models import EQUAL, Condition, Segment, SegmentRule
@@ -47,7 +51,7 @@ def test_get_environment_document(
     url = reverse("api-v1:environment-document")
 
     # When
-    with django_assert_num_queries(11):
+    with django_assert_num_queries(12):
         response = client.get(url)
 
     # Then
@@ -81,3 +85,111 @@ def test_get_environment_document_fails_with_invalid_key(
     # We get a 403 since only the server side API keys are able to access the
     # environment document
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_get_environment_document_returns_304_if_not_modified(
+    environment, environment_api_key, django_assert_num_queries
+):
+    # Given
+    client = APIClient()
+    client.credentials(HTTP_X_ENVIRONMENT_KEY=environment_api_key.key)
+    url = reverse("api-v1:environment-document")
+
+    etag = client.get(url).headers["ETag"]
+
+    # When
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    # Then
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not response.content
+    assert response.headers[FLAGSMITH_UPDATED_AT_HEADER] == str(
+        environment.updated_at.timestamp()
+    )
+
+
+def test_get_environment_document_returns_document_if_modified(
+    environment, environment_api_key, settings
+):
+    # Given
+    # the environment is cached during authentication, so the updated_at of the
+    # cached environment is stale once it's updated by the audit log
+    settings.ENVIRONMENT_CACHE_SECONDS = 60
+    client = APIClient()
+    client.credentials(HTTP_X_ENVIRONMENT_KEY=environment_api_key.key)
+    url = reverse("api-v1:environment-document")
+
+    etag = client.get(url).headers["ETag"]
+
+    # When
+    AuditLog.objects.create(
+        environment=environment, project=environment.project, log="Updated"
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["api_key"] == environment.api_key
+    assert response.headers["ETag"] != etag
+
+
+def test_get_environment_document_ignores_if_modified_since(
+    environment, environment_api_key
+):
+    # Given
+    client = APIClient()
+    client.credentials(HTTP_X_ENVIRONMENT_KEY=environment_api_key.key)
+    url = reverse("api-v1:environment-document")
+
+    last_modified = client.get(url).headers["Last-Modified"]
+
+    # When
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+    # Then
+    # Last-Modified only has a resolution of a second, so it can't be trusted to
+    # determine whether the document has changed
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_environment_document_compressed(
+    environment, environment_api_key, settings
+):
+    # Given
+    settings.ENABLE_GZIP_COMPRESSION = True
+    client = APIClient()
+    client.credentials(HTTP_X_ENVIRONMENT_KEY=environment_api_key.key)
+    url = reverse("api-v1:environment-document")
+
+    # When
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert (
+        json.loads(gzip.decompress(response.content))["api_key"] == environment.api_key
+    )
+
+
+def test_get_environment_document_uses_cached_rendered_document(
+    environment, environment_api_key, settings, django_assert_num_queries
+):
+    # Given
+    settings.CACHE_ENVIRONMENT_DOCUMENT_SECONDS = 60
+    client = APIClient()
+    client.credentials(HTTP_X_ENVIRONMENT_KEY=environment_api_key.key)
+    url = reverse("api-v1:environment-document")
+
+    expected_content = client.get(url).content
+
+    # When
+    # only updated_at and the document cache are queried since the environment is
+    # retrieved from the environment cache during authentication
+    with django_assert_num_queries(2):
+        response = client.get(url)
+
+    # Then
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == expected_content
@@ -0,0 +1,305 @@
+import pytest
+
+from audit.models import AuditLog
+from audit.related_object_type import RelatedObjectType
+from environments.document_builder import (
+    built_environments_cache,
+    get_patched_environment_model,
+    get_project_segment_rules,
+    segment_rules_cache,
+    set_built_environments,
+)
+from environments.models import Environment
+from features.models import Feature, FeatureState
+from features.multivariate.models import MultivariateFeatureStateValue
+from segments.models import EQUAL, Condition, Segment, SegmentRule
+from util.mappers import (
+    map_engine_environment_to_environment_document,
+    map_environment_to_environment_document,
+)
+from util.mappers.engine import (
+    map_environment_to_engine,
+    map_segment_rules_to_engine,
+)
+
+
+@pytest.fixture()
+def segment_rules_cache_enabled(settings):
+    settings.CACHE_SEGMENT_RULES_SECONDS = 60
+    segment_rules_cache.clear()
+    yield
+    segment_rules_cache.clear()
+
+
+@pytest.fixture()
+def built_environments_cache_enabled(settings):
+    settings.CACHE_BUILT_ENVIRONMENTS_SECONDS = 60
+    built_environments_cache.clear()
+    yield
+    built_environments_cache.clear()
+
+
+@pytest.fixture()
+def segment_with_condition(segment, segment_rule):
+    nested_rule = SegmentRule.objects.create(
+        rule=segment_rule, type=SegmentRule.ANY_RULE
+    )
+    Condition.objects.create(
+        rule=nested_rule, property="foo", operator=EQUAL, value="bar"
+    )
+    return segment
+
+
+@pytest.fixture()
+def another_segment(project):
+    segment = Segment.objects.create(name="another_segment", project=project)
+    rule = SegmentRule.objects.create(segment=segment, type=SegmentRule.ALL_RULE)
+    Condition.objects.create(rule=rule, property="baz", operator=EQUAL, value="qux")
+    return segment
+
+
+def _create_segment_audit_log(segment: Segment) -> AuditLog:
+    return AuditLog.objects.create(
+        project=segment.project,
+        related_object_type=RelatedObjectType.SEGMENT.name,
+        related_object_id=segment.id,
+        log="Segment updated",
+    )
+
+
+def _create_feature_state_audit_log(feature_state: FeatureState) -> AuditLog:
+    return AuditLog.objects.create(
+        project=feature_state.environment.project,
+        environment=feature_state.environment,
+        related_object_type=RelatedObjectType.FEATURE_STATE.name,
+        related_object_id=feature_state.id,
+        log="Feature state updated",
+    )
+
+
+def _build_environment_model(environment: Environment):
+    return map_environment_to_engine(
+        Environment.objects.filter_for_document_builder(id=environment.id).get()
+    )
+
+
+def test_get_project_segment_rules_returns_mapped_rules_for_all_segments(
+    project, segment_with_condition, another_segment, segment_rules_cache_enabled
+):
+    # When
+    rules_by_segment_id = get_project_segment_rules(project)
+
+    # Then
+    assert rules_by_segment_id == {
+        segment_with_condition.id: map_segment_rules_to_engine(segment_with_condition),
+        another_segment.id: map_segment_rules_to_engine(another_segment),
+    }
+
+
+def test_environment_document_built_with_segment_rules_matches_full_build(
+    environment, segment_with_condition, another_segment, segment_rules_cache_enabled
+):
+    # Given
+    environment = Environment.objects.filter_for_document_builder(
+        id=environment.id, include_segment_rules=False
+    ).get()
+
+    # When
+    environment_document = map_environment_to_environment_document(
+        environment,
+        segment_rules_by_segment_id=get_project_segment_rules(environment.project),
+    )
+
+    # Then
+    assert environment_document == map_environment_to_environment_document(
+        Environment.objects.filter_for_document_builder(id=environment.id).get()
+    )
+
+
+def test_get_project_segment_rules_uses_cache_if_no_segments_changed(
+    project,
+    segment_with_condition,
+    another_segment,
+    segment_rules_cache_enabled,
+    mocker,
+):
+    # Given
+    get_project_segment_rules(project)
+    spy = mocker.spy(Segment.objects, "filter")
+
+    # When
+    rules_by_segment_id = get_project_segment_rules(project)
+
+    # Then
+    spy.assert_not_called()
+    assert set(rules_by_segment_id) == {segment_with_condition.id, another_segment.id}
+
+
+def test_get_project_segment_rules_only_rebuilds_rules_for_segment_in_audit_log(
+    project,
+    segment_with_condition,
+    another_segment,
+    segment_rules_cache_enabled,
+    mocker,
+):
+    # Given
+    get_project_segment_rules(project)
+
+    Condition.objects.filter(rule__rule__segment=segment_with_condition).update(
+        value="updated"
+    )
+    audit_log = _create_segment_audit_log(segment_with_condition)
+    spy = mocker.spy(Segment.objects, "filter")
+
+    # When
+    rules_by_segment_id = get_project_segment_rules(project, audit_log=audit_log)
+
+    # Then
+    spy.assert_called_once_with(id__in={segment_with_condition.id})
+    condition = rules_by_segment_id[segment_with_condition.id][0].rules[0].conditions[0]
+    assert condition.value == "updated"
+    assert rules_by_segment_id[another_segment.id] == map_segment_rules_to_engine(
+        another_segment
+    )
+
+
+def test_get_project_segment_rules_rebuilds_all_rules_if_cache_is_out_of_date(
+    project,
+    segment_with_condition,
+    another_segment,
+    segment_rules_cache_enabled,
+    mocker,
+):
+    # Given
+    get_project_segment_rules(project)
+
+    # an audit log record which hasn't been processed (yet)
+    Condition.objects.filter(rule__segment=another_segment).update(value="updated")
+    _create_segment_audit_log(another_segment)
+
+    audit_log = _create_segment_audit_log(segment_with_condition)
+    spy = mocker.spy(Segment.objects, "filter")
+
+    # When
+    rules_by_segment_id = get_project_segment_rules(project, audit_log=audit_log)
+
+    # Then
+    spy.assert_called_once_with(id__in={segment_with_condition.id, another_segment.id})
+    assert rules_by_segment_id[another_segment.id][0].conditions[0].value == "updated"
+
+
+def test_get_project_segment_rules_removes_deleted_segments(
+    project, segment_with_condition, another_segment, segment_rules_cache_enabled
+):
+    # Given
+    get_project_segment_rules(project)
+    another_segment.delete()
+
+    # When
+    rules_by_segment_id = get_project_segment_rules(project)
+
+    # Then
+    assert set(rules_by_segment_id) == {segment_with_condition.id}
+    assert set(segment_rules_cache.get(str(project.id)).rules_by_segment_id) == {
+        segment_with_condition.id
+    }
+
+
+def test_get_patched_environment_model_matches_full_build(
+    environment,
+    feature_state,
+    segment_featurestate,
+    multivariate_feature,
+    built_environments_cache_enabled,
+):
+    # Given
+    set_built_environments([_build_environment_model(environment)])
+
+    FeatureState.objects.filter(id=feature_state.id).update(enabled=True)
+    FeatureState.objects.filter(id=segment_featurestate.id).update(enabled=True)
+    MultivariateFeatureStateValue.objects.filter(
+        feature_state__environment=environment
+    ).update(percentage_allocation=10)
+    audit_log = _create_feature_state_audit_log(feature_state)
+
+    # When
+    environment_model = get_patched_environment_model(audit_log)
+
+    # Then
+    assert map_engine_environment_to_environment_document(
+        environment_model
+    ) == map_environment_to_environment_document(
+        Environment.objects.filter_for_document_builder(id=environment.id).get()
+    )
+    assert (
+        built_environments_cache.get(str(environment.id)).last_audit_log_id
+        == audit_log.id
+    )
+
+
+def test_get_patched_environment_model_returns_none_if_cache_is_out_of_date(
+    environment, feature_state, built_environments_cache_enabled
+):
+    # Given
+    set_built_environments([_build_environment_model(environment)])
+
+    # an audit log record which hasn't been processed (yet)
+    _create_feature_state_audit_log(feature_state)
+
+    audit_log = _create_feature_state_audit_log(feature_state)
+
+    # When
+    environment_model = get_patched_environment_model(audit_log)
+
+    # Then
+    assert environment_model is None
+
+
+def test_get_patched_environment_model_returns_none_if_not_a_feature_state_change(
+    environment, segment, built_environments_cache_enabled
+):
+    # Given
+    set_built_environments([_build_environment_model(environment)])
+    audit_log = _create_segment_audit_log(segment)
+
+    # When
+    environment_model = get_patched_environment_model(audit_log)
+
+    # Then
+    assert environment_model is None
+
+
+def test_feature_state_audit_log_patches_built_environment(
+    dynamo_enabled_project,
+    dynamo_enabled_project_environment_one,
+    built_environments_cache_enabled,
+    mocker,
+):
+    # Given
+    environment = dynamo_enabled_project_environment_one
+    feature = Feature.objects.create(name="feature", project=dynamo_enabled_project)
+    feature_state = FeatureState.objects.get(feature=feature, environment=environment)
+
+    mock_environment_wrapper = mocker.patch("environments.models.environment_wrapper")
+    mock_environment_wrapper.write_environments.side_effect = lambda environments: [
+        map_environment_to_engine(environment) for environment in environments
+    ]
+    Environment.write_environments_to_dynamodb(environment_id=environment.id)
+    mock_environment_wrapper.reset_mock()
+
+    FeatureState.objects.filter(id=feature_state.id).update(enabled=True)
+
+    # When
+    # the audit log record writes the environment to dynamodb when it is created
+    _create_feature_state_audit_log(feature_state)
+
+    # Then
+    mock_environment_wrapper.write_environments.assert_not_called()
+    mock_environment_wrapper.write_environment_models.assert_called_once()
+    (
+        (environment_model,),
+    ) = mock_environment_wrapper.write_environment_models.call_args.args
+    assert [
+        feature_state_model.enabled
+        for feature_state_model in environment_model.feature_states
+    ] == [True]
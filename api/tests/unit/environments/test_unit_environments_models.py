@@ -5,9 +5,16 @@ import pytest
 from core.request_origin import RequestOrigin
 from pytest_django.asserts import assertQuerysetEqual as assert_queryset_equal
 
+from environments.cache import (
+    bump_environment_cache_versions,
+    environment_cache,
+    environment_cache_version_local_cache,
+    environment_local_cache,
+)
 from environments.models import Environment, EnvironmentAPIKey, Webhook
 from features.models import Feature, FeatureState
 from organisations.models import OrganisationRole
+from segments.evaluator import compile_segment
 from segments.models import Segment
 from util.mappers import map_environment_to_environment_document
 
@@ -292,7 +299,7 @@ def test_get_segments_returns_only_segments_that_have_an_override(
     assert segments == [segment]
 
     mock_environment_segments_cache.set.assert_called_once_with(
-        environment.id, segments
+        f"compiled:{environment.id}", [compile_segment(segment)]
     )
 
 
@@ -306,7 +313,7 @@ def test_get_segments_from_cache_does_not_hit_db_if_cache_hit(
 ):
     # Given
     mock_environment_segments_cache = mocker.MagicMock()
-    mock_environment_segments_cache.get.return_value = [segment]
+    mock_environment_segments_cache.get.return_value = [compile_segment(segment)]
 
     monkeypatch.setattr(
         "environments.models.environment_segments_cache",
@@ -396,3 +403,148 @@ def test_delete_environment_with_committed_change_request(
 
     # Then
     assert environment.deleted_at is not None
+
+
+@pytest.fixture()
+def local_environment_cache(settings):
+    settings.ENVIRONMENT_LOCAL_CACHE_SECONDS = 60
+    environment_local_cache.clear()
+    environment_cache_version_local_cache.clear()
+    yield environment_local_cache
+    environment_local_cache.clear()
+    environment_cache_version_local_cache.clear()
+
+
+def test_get_from_cache_uses_local_cache(
+    environment, local_environment_cache, mocker, django_assert_num_queries
+):
+    # Given
+    Environment.get_from_cache(environment.api_key)
+    mocked_environment_cache = mocker.patch(
+        "environments.models.environment_cache", autospec=True
+    )
+
+    # When
+    with django_assert_num_queries(0):
+        retrieved_environment = Environment.get_from_cache(environment.api_key)
+
+    # Then
+    assert retrieved_environment == environment
+    mocked_environment_cache.get.assert_not_called()
+    assert local_environment_cache.hits == 1
+
+
+def test_get_from_cache_uses_locally_cached_version(
+    environment, local_environment_cache, settings, mocker
+):
+    # Given
+    settings.ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS = 5
+    Environment.get_from_cache(environment.api_key)
+    mocked_environment_cache = mocker.patch(
+        "environments.cache.environment_cache", autospec=True
+    )
+
+    # When
+    retrieved_environment = Environment.get_from_cache(environment.api_key)
+
+    # Then
+    assert retrieved_environment == environment
+    mocked_environment_cache.get.assert_not_called()
+
+
+def test_get_from_cache_checks_version_in_shared_cache_if_not_cached_locally(
+    environment, local_environment_cache, settings
+):
+    # Given
+    settings.ENVIRONMENT_LOCAL_CACHE_VERSION_SECONDS = 0
+    Environment.get_from_cache(environment.api_key)
+
+    # another process updates the environment
+    bump_environment_cache_versions([environment.api_key])
+    Environment.objects.filter(id=environment.id).update(name="updated")
+    environment_cache.delete(environment.api_key)
+
+    # When
+    retrieved_environment = Environment.get_from_cache(environment.api_key)
+
+    # Then
+    assert retrieved_environment.name == "updated"
+
+
+def test_get_from_cache_does_not_use_local_cache_after_environment_updated(
+    environment, local_environment_cache
+):
+    # Given
+    Environment.get_from_cache(environment.api_key)
+
+    # When
+    environment.name = "updated"
+    environment.save()
+    retrieved_environment = Environment.get_from_cache(environment.api_key)
+
+    # Then
+    assert retrieved_environment.name == "updated"
+
+
+def test_get_from_cache_does_not_use_local_cache_after_project_updated(
+    environment, project, local_environment_cache
+):
+    # Given
+    Environment.get_from_cache(environment.api_key)
+
+    # When
+    project.name = "updated"
+    project.save()
+    retrieved_environment = Environment.get_from_cache(environment.api_key)
+
+    # Then
+    assert retrieved_environment.project.name == "updated"
+
+
+def test_get_from_cache_does_not_use_local_cache_if_disabled(
+    environment, settings, mocker
+):
+    # Given
+    settings.ENVIRONMENT_LOCAL_CACHE_SECONDS = 0
+    mocked_local_cache = mocker.patch("environments.models.environment_local_cache")
+
+    # When
+    Environment.get_from_cache(environment.api_key)
+
+    # Then
+    mocked_local_cache.get.assert_not_called()
+    mocked_local_cache.set.assert_not_called()
+
+
+def test_write_environments_to_dynamodb_uses_segment_rules_cache_if_enabled(
+    dynamo_enabled_project,
+    dynamo_enabled_project_environment_one,
+    mock_dynamo_env_wrapper,
+    settings,
+    mocker,
+):
+    # Given
+    settings.CACHE_SEGMENT_RULES_SECONDS = 60
+    mock_dynamo_env_wrapper.reset_mock()
+    audit_log = mocker.MagicMock()
+    mock_get_project_segment_rules = mocker.patch(
+        "environments.models.get_project_segment_rules", autospec=True
+    )
+
+    # When
+    Environment.write_environments_to_dynamodb(
+        environment_id=dynamo_enabled_project_environment_one.id, audit_log=audit_log
+    )
+
+    # Then
+    mock_get_project_segment_rules.assert_called_once_with(
+        dynamo_enabled_project, audit_log=audit_log
+    )
+    args, kwargs = mock_dynamo_env_wrapper.write_environments.call_args
+    assert kwargs == {
+        "segment_rules_by_segment_id": mock_get_project_segment_rules.return_value
+    }
+    assert_queryset_equal(
+        args[0],
+        Environment.objects.filter(id=dynamo_enabled_project_environment_one.id),
+    )
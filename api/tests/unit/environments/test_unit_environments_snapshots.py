@@ -0,0 +1,191 @@
+from datetime import timedelta
+
+import pytest
+from django.db.models import Q
+from django.utils import timezone
+
+from environments.models import Environment
+from environments.snapshots import (
+    environment_feature_states_cache,
+    get_environment_feature_states_snapshot,
+)
+from features.models import Feature, FeatureSegment, FeatureState
+from segments.models import Segment
+
+
+@pytest.fixture(autouse=True)
+def clear_environment_feature_states_cache():
+    environment_feature_states_cache.clear()
+    yield
+    environment_feature_states_cache.clear()
+
+
+@pytest.fixture()
+def cache_environment_feature_states(settings):
+    settings.CACHE_ENVIRONMENT_FEATURE_STATES_SECONDS = 60
+
+
+def test_snapshot_contains_environment_and_segment_feature_states(
+    environment,
+    feature,
+    feature_state,
+    segment,
+    segment_featurestate,
+    identity_featurestate,
+    cache_environment_feature_states,
+):
+    # When
+    snapshot = get_environment_feature_states_snapshot(environment)
+
+    # Then
+    assert snapshot.environment_feature_states == [feature_state]
+    assert snapshot.segment_feature_states == {segment.id: [segment_featurestate]}
+    assert snapshot.get_feature_states([]) == [feature_state]
+    assert snapshot.get_feature_states([segment.id]) == [
+        feature_state,
+        segment_featurestate,
+    ]
+
+
+def test_snapshot_only_contains_the_latest_live_version(
+    environment, feature, feature_state, cache_environment_feature_states
+):
+    # Given
+    feature_state_v2 = FeatureState.objects.create(
+        feature=feature, environment=environment, version=2, live_from=timezone.now()
+    )
+    FeatureState.objects.create(
+        feature=feature, environment=environment, version=None, live_from=None
+    )
+
+    # When
+    snapshot = get_environment_feature_states_snapshot(environment)
+
+    # Then
+    assert snapshot.environment_feature_states == [feature_state_v2]
+
+
+def test_snapshot_is_reused_until_environment_is_updated(
+    environment,
+    feature_state,
+    cache_environment_feature_states,
+    django_assert_num_queries,
+):
+    # Given
+    snapshot = get_environment_feature_states_snapshot(environment)
+
+    # When
+    with django_assert_num_queries(0):
+        cached_snapshot = get_environment_feature_states_snapshot(environment)
+
+    # Then
+    assert cached_snapshot is snapshot
+
+    # When
+    Environment.objects.filter(id=environment.id).update(updated_at=timezone.now())
+    environment.refresh_from_db()
+    rebuilt_snapshot = get_environment_feature_states_snapshot(environment)
+
+    # Then
+    assert rebuilt_snapshot is not snapshot
+    assert rebuilt_snapshot.environment_updated_at == environment.updated_at
+
+
+def test_snapshot_is_cached_separately_for_additional_filters(
+    environment, project, feature, feature_state, cache_environment_feature_states
+):
+    # Given
+    server_key_only_feature = Feature.objects.create(
+        name="server_key_only_feature", project=project, is_server_key_only=True
+    )
+    additional_filters = Q(feature__is_server_key_only=False)
+
+    # When
+    snapshot = get_environment_feature_states_snapshot(environment)
+    filtered_snapshot = get_environment_feature_states_snapshot(
+        environment, additional_filters
+    )
+
+    # Then
+    assert {fs.feature for fs in snapshot.environment_feature_states} == {
+        feature,
+        server_key_only_feature,
+    }
+    assert filtered_snapshot.environment_feature_states == [feature_state]
+
+
+def test_snapshot_expires_when_next_scheduled_feature_state_goes_live(
+    environment, feature, feature_state, cache_environment_feature_states, mocker
+):
+    # Given
+    live_from = timezone.now() + timedelta(seconds=10)
+    FeatureState.objects.create(
+        feature=feature, environment=environment, version=2, live_from=live_from
+    )
+    mocked_cache = mocker.patch(
+        "environments.snapshots.environment_feature_states_cache"
+    )
+    mocked_cache.get.return_value = None
+
+    # When
+    get_environment_feature_states_snapshot(environment)
+
+    # Then
+    _, kwargs = mocked_cache.set.call_args
+    assert 0 < kwargs["timeout"] <= 10
+
+
+def test_snapshot_ignores_segment_overrides_for_other_environments(
+    environment, project, feature, segment, cache_environment_feature_states
+):
+    # Given
+    other_environment = Environment.objects.create(name="other", project=project)
+    feature_segment = FeatureSegment.objects.create(
+        feature=feature, segment=segment, environment=other_environment
+    )
+    FeatureState.objects.create(
+        feature=feature, environment=other_environment, feature_segment=feature_segment
+    )
+    Segment.objects.create(name="another segment", project=project)
+
+    # When
+    snapshot = get_environment_feature_states_snapshot(environment)
+
+    # Then
+    assert snapshot.segment_feature_states == {}
+
+
+def test_snapshot_precomputes_multivariate_allocations(
+    environment, multivariate_feature, identity, django_assert_num_queries
+):
+    # Given
+    feature_state = FeatureState.objects.get(
+        environment=environment,
+        feature=multivariate_feature,
+        identity=None,
+        feature_segment=None,
+    )
+    identity_hash_key = identity.get_hash_key()
+    expected_value = feature_state.get_feature_state_value_by_hash_key(
+        identity_hash_key
+    )
+
+    # When
+    snapshot = get_environment_feature_states_snapshot(environment)
+
+    # Then
+    (snapshot_feature_state,) = [
+        fs
+        for fs in snapshot.environment_feature_states
+        if fs.feature_id == multivariate_feature.id
+    ]
+    assert snapshot_feature_state._multivariate_allocations.limits == (30, 60, 100)
+
+    # and the multivariate value is determined without any further queries
+    with django_assert_num_queries(0):
+        assert (
+            snapshot_feature_state.get_feature_state_value_by_hash_key(
+                identity_hash_key
+            )
+            == expected_value
+        )
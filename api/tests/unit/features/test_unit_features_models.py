@@ -6,6 +6,7 @@ from django.utils import timezone
 from environments.identities.models import Identity
 from environments.models import Environment
 from features.models import Feature, FeatureSegment, FeatureState
+from features.multivariate.models import MultivariateFeatureStateValue
 from features.workflows.core.models import ChangeRequest
 from segments.models import Segment
 
@@ -404,3 +405,60 @@ def test_feature_state_gt_operator_for_segment_overrides_and_environment_default
 
     # Then
     assert segment_override > environment_default
+
+
+@pytest.mark.parametrize(
+    "hashed_percentage, expected_option_index",
+    (
+        (0.0, 0),
+        (0.2999, 0),
+        (0.3, 2),
+        (0.5999, 2),
+        (0.6, None),
+        (0.9999, None),
+    ),
+)
+@pytest.mark.parametrize("precompute", (True, False))
+def test_feature_state_get_multivariate_feature_state_value_uses_allocations(
+    multivariate_feature,
+    environment,
+    mocker,
+    hashed_percentage,
+    expected_option_index,
+    precompute,
+):
+    # Given
+    mocker.patch(
+        "features.models.get_hashed_percentage_for_object_ids",
+        return_value=hashed_percentage,
+    )
+    feature_state = FeatureState.objects.get(
+        environment=environment,
+        feature=multivariate_feature,
+        identity=None,
+        feature_segment=None,
+    )
+    mv_values = list(
+        MultivariateFeatureStateValue.objects.filter(
+            feature_state=feature_state
+        ).order_by("id")
+    )
+    # the second option is not allocated any identities, and 40% of identities
+    # aren't allocated an option
+    for mv_value, percentage_allocation in zip(mv_values, (30, 0, 30)):
+        mv_value.percentage_allocation = percentage_allocation
+        mv_value.save()
+
+    if precompute:
+        feature_state.precompute_multivariate_allocations()
+
+    # When
+    value = feature_state.get_multivariate_feature_state_value(
+        identity_hash_key="identity"
+    )
+
+    # Then
+    if expected_option_index is None:
+        assert value == feature_state.feature_state_value
+    else:
+        assert value == mv_values[expected_option_index].multivariate_feature_option
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from environments.identities.models import Identity
@@ -62,3 +64,20 @@ def test_amplitude_when_generate_user_data_with_correct_values_then_success(
     }
 
     assert expected_user_data == user_data
+
+
+def test_amplitude_identify_users_sends_batch_in_single_request(mocker):
+    # Given
+    mocked_session = mocker.patch("integrations.amplitude.amplitude.http_session")
+    config = AmplitudeConfiguration(api_key="123key")
+    amplitude_wrapper = AmplitudeWrapper(config)
+    users_data = [{"user_id": "user-1"}, {"user_id": "user-2"}]
+
+    # When
+    amplitude_wrapper._identify_users(users_data)
+
+    # Then
+    mocked_session.post.assert_called_once_with(
+        amplitude_wrapper.url,
+        data={"api_key": "123key", "identification": json.dumps(users_data)},
+    )
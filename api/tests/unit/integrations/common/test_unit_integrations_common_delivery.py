@@ -0,0 +1,219 @@
+import pytest
+import requests
+from rudder_analytics.request import APIError as RudderstackAPIError
+
+from analytics.request import APIError as SegmentAPIError
+from integrations.amplitude.amplitude import AmplitudeWrapper
+from integrations.amplitude.models import AmplitudeConfiguration
+from integrations.common.delivery import IdentityIntegrationDelivery
+from integrations.heap.heap import HeapWrapper
+from integrations.heap.models import HeapConfiguration
+from integrations.rudderstack.models import RudderstackConfiguration
+from integrations.rudderstack.rudderstack import RudderstackWrapper
+from integrations.segment.models import SegmentConfiguration
+from integrations.segment.segment import SegmentWrapper
+
+
+@pytest.fixture()
+def delivery(mocker):
+    delivery = IdentityIntegrationDelivery(
+        flush_interval_seconds=60,
+        max_queue_size=3,
+        max_retries=2,
+        retry_backoff_seconds=0,
+    )
+    mocker.patch.object(delivery, "_start_flusher")
+    return delivery
+
+
+def deliver_with_retries(delivery, wrapper, batch):
+    delivery.deliver(wrapper, batch)
+    while delivery._retries:
+        delivery.flush(wait=True)
+
+
+def test_identity_integration_delivery_batches_user_data_per_integration(
+    delivery, mocker
+):
+    # Given
+    mocked_identify_users = mocker.patch.object(AmplitudeWrapper, "_identify_users")
+    config = AmplitudeConfiguration(api_key="key")
+    other_config = AmplitudeConfiguration(api_key="other-key")
+
+    delivery.enqueue(AmplitudeWrapper(config), {"user_id": "user-1"})
+    delivery.enqueue(AmplitudeWrapper(config), {"user_id": "user-2"})
+    delivery.enqueue(AmplitudeWrapper(other_config), {"user_id": "user-3"})
+
+    # When
+    delivery.flush(wait=True)
+
+    # Then
+    assert mocked_identify_users.call_args_list == [
+        mocker.call([{"user_id": "user-1"}, {"user_id": "user-2"}]),
+        mocker.call([{"user_id": "user-3"}]),
+    ]
+
+
+def test_identity_integration_delivery_does_not_batch_integrations_without_batch_api(
+    delivery, mocker
+):
+    # Given
+    mocked_identify_user = mocker.patch.object(HeapWrapper, "_identify_user")
+    config = HeapConfiguration(api_key="key")
+
+    delivery.enqueue(HeapWrapper(config), {"identity": "user-1"})
+    delivery.enqueue(HeapWrapper(config), {"identity": "user-2"})
+
+    # When
+    delivery.flush(wait=True)
+
+    # Then
+    assert mocked_identify_user.call_count == 2
+
+
+def test_identity_integration_delivery_requests_flush_when_batch_is_full(delivery):
+    # When
+    delivery.enqueue(HeapWrapper(HeapConfiguration(api_key="key")), {})
+
+    # Then
+    assert delivery._flush_requested.is_set()
+
+
+def test_identity_integration_delivery_drops_user_data_when_queue_is_full(
+    delivery, mocker
+):
+    # Given
+    mocked_identify_users = mocker.patch.object(AmplitudeWrapper, "_identify_users")
+    wrapper = AmplitudeWrapper(AmplitudeConfiguration(api_key="key"))
+
+    # When
+    for i in range(5):
+        delivery.enqueue(wrapper, {"user_id": f"user-{i}"})
+    delivery.flush(wait=True)
+
+    # Then
+    mocked_identify_users.assert_called_once()
+    assert len(mocked_identify_users.call_args.args[0]) == 3
+
+
+def test_identity_integration_delivery_retries_retryable_errors(delivery, mocker):
+    # Given
+    mocked_identify_users = mocker.patch.object(
+        AmplitudeWrapper,
+        "_identify_users",
+        side_effect=[requests.ConnectionError, requests.ConnectionError, None],
+    )
+    wrapper = AmplitudeWrapper(AmplitudeConfiguration(api_key="key"))
+
+    # When
+    deliver_with_retries(delivery, wrapper, [{"user_id": "user-1"}])
+
+    # Then
+    assert mocked_identify_users.call_count == 3
+
+
+def test_identity_integration_delivery_does_not_retry_client_errors(delivery, mocker):
+    # Given
+    response = requests.Response()
+    response.status_code = 400
+    mocked_identify_users = mocker.patch.object(
+        AmplitudeWrapper,
+        "_identify_users",
+        side_effect=requests.HTTPError(response=response),
+    )
+    wrapper = AmplitudeWrapper(AmplitudeConfiguration(api_key="key"))
+
+    # When
+    deliver_with_retries(delivery, wrapper, [{"user_id": "user-1"}])
+
+    # Then
+    mocked_identify_users.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "status, expected_call_count",
+    ((500, 3), (503, 3), (429, 3), (400, 1), (401, 1)),
+)
+def test_identity_integration_delivery_retries_retryable_segment_api_errors(
+    delivery, mocker, status, expected_call_count
+):
+    # Given
+    mocked_identify_users = mocker.patch.object(
+        SegmentWrapper,
+        "_identify_users",
+        side_effect=SegmentAPIError(status, "error", "Segment error"),
+    )
+    wrapper = SegmentWrapper(SegmentConfiguration(api_key="key"))
+
+    # When
+    deliver_with_retries(delivery, wrapper, [{"user_id": "user-1"}])
+
+    # Then
+    assert mocked_identify_users.call_count == expected_call_count
+
+
+def test_identity_integration_delivery_flush_uses_executor(delivery, mocker):
+    # Given
+    mocked_executor = mocker.patch("integrations.common.delivery.postpone_executor")
+    wrapper = HeapWrapper(HeapConfiguration(api_key="key"))
+    delivery.enqueue(wrapper, {"identity": "user-1"})
+
+    # When
+    delivery.flush()
+
+    # Then
+    mocked_executor.submit.assert_called_once_with(
+        delivery.deliver, wrapper, [{"identity": "user-1"}], 0
+    )
+
+
+def test_identity_integration_delivery_retries_retryable_rudderstack_api_errors(
+    delivery, mocker
+):
+    # Given
+    mocked_identify_users = mocker.patch.object(
+        RudderstackWrapper,
+        "_identify_users",
+        side_effect=RudderstackAPIError(503, "error", "Rudderstack error"),
+    )
+    wrapper = RudderstackWrapper(
+        RudderstackConfiguration(api_key="key", base_url="https://example.com")
+    )
+
+    # When
+    deliver_with_retries(delivery, wrapper, [{"user_id": "user-1"}])
+
+    # Then
+    assert mocked_identify_users.call_count == 3
+
+
+def test_identity_integration_delivery_retries_failed_batches_after_backoff(
+    delivery, mocker
+):
+    # Given
+    delivery.retry_backoff_seconds = 10
+    mocked_monotonic = mocker.patch(
+        "integrations.common.delivery.time.monotonic", return_value=100
+    )
+    mocked_executor = mocker.patch("integrations.common.delivery.postpone_executor")
+    mocker.patch.object(
+        AmplitudeWrapper, "_identify_users", side_effect=requests.ConnectionError
+    )
+    wrapper = AmplitudeWrapper(AmplitudeConfiguration(api_key="key"))
+    batch = [{"user_id": "user-1"}]
+
+    # When
+    delivery.deliver(wrapper, batch)
+    delivery.flush()
+
+    # Then
+    # the worker isn't blocked while waiting to retry
+    mocked_executor.submit.assert_not_called()
+
+    # When
+    mocked_monotonic.return_value = 110
+    delivery.flush()
+
+    # Then
+    mocked_executor.submit.assert_called_once_with(delivery.deliver, wrapper, batch, 1)
+    assert delivery._retries == []
@@ -46,3 +46,21 @@ def test_mixpanel_generate_user_data(project, feature, identity):
     ]
 
     assert user_data == expected_user_data
+
+
+def test_mixpanel_identify_users_sends_batch_in_single_request(mocker):
+    # Given
+    mocked_session = mocker.patch("integrations.mixpanel.mixpanel.http_session")
+    mixpanel = MixpanelWrapper(MixpanelConfiguration(api_key="123key"))
+
+    # When
+    mixpanel._identify_users(
+        [[{"$distinct_id": "user-1"}], [{"$distinct_id": "user-2"}]]
+    )
+
+    # Then
+    mocked_session.post.assert_called_once_with(
+        mixpanel.url,
+        headers=mixpanel.headers,
+        json=[{"$distinct_id": "user-1"}, {"$distinct_id": "user-2"}],
+    )
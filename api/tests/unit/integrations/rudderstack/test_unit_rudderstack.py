@@ -0,0 +1,46 @@
+from integrations.rudderstack.models import RudderstackConfiguration
+from integrations.rudderstack.rudderstack import RudderstackWrapper
+
+
+def test_rudderstack_wrappers_use_their_own_configuration(mocker):
+    # Given
+    mocked_post = mocker.patch("integrations.rudderstack.rudderstack.post")
+    wrapper_one = RudderstackWrapper(
+        RudderstackConfiguration(api_key="key-1", base_url="https://one.example.com")
+    )
+    wrapper_two = RudderstackWrapper(
+        RudderstackConfiguration(api_key="key-2", base_url="https://two.example.com")
+    )
+
+    # When
+    wrapper_one._identify_users([{"user_id": "user-1", "traits": {}}])
+
+    # Then
+    assert wrapper_one.get_batch_key() != wrapper_two.get_batch_key()
+    mocked_post.assert_called_once()
+    assert mocked_post.call_args.args == ("key-1", "https://one.example.com")
+
+
+def test_rudderstack_identify_users_sends_batch_in_single_request(mocker):
+    # Given
+    mocked_post = mocker.patch("integrations.rudderstack.rudderstack.post")
+    wrapper = RudderstackWrapper(
+        RudderstackConfiguration(api_key="key", base_url="https://example.com")
+    )
+
+    # When
+    wrapper._identify_users(
+        [
+            {"user_id": "user-1", "traits": {"feature": True}},
+            {"user_id": "user-2", "traits": {"feature": False}},
+        ]
+    )
+
+    # Then
+    mocked_post.assert_called_once()
+    messages = mocked_post.call_args.kwargs["batch"]
+    assert [(message["userId"], message["traits"]) for message in messages] == [
+        ("user-1", {"feature": True}),
+        ("user-2", {"feature": False}),
+    ]
+    assert all(message["type"] == "identify" for message in messages)
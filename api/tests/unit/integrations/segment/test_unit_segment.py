@@ -48,3 +48,26 @@ def test_segment_when_generate_user_data_with_correct_values_then_success(
     }
 
     assert expected_user_data == user_data
+
+
+def test_segment_identify_users_sends_batch_in_single_request(mocker):
+    # Given
+    mocked_post = mocker.patch("integrations.segment.segment.post")
+    segment_wrapper = SegmentWrapper(SegmentConfiguration(api_key="123key"))
+
+    # When
+    segment_wrapper._identify_users(
+        [
+            {"user_id": "user-1", "traits": {"feature": True}},
+            {"user_id": "user-2", "traits": {"feature": False}},
+        ]
+    )
+
+    # Then
+    mocked_post.assert_called_once()
+    messages = mocked_post.call_args.kwargs["batch"]
+    assert [(message["userId"], message["traits"]) for message in messages] == [
+        ("user-1", {"feature": True}),
+        ("user-2", {"feature": False}),
+    ]
+    assert all(message["type"] == "identify" for message in messages)
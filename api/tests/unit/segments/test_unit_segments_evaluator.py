@@ -0,0 +1,242 @@
+import pickle
+
+import pytest
+from core.constants import BOOLEAN, FLOAT, INTEGER, STRING
+
+from environments.identities.traits.models import Trait
+from segments.evaluator import (
+    compile_segment,
+    compile_segments,
+    get_traits_by_key,
+)
+from segments.models import (
+    CONTAINS,
+    EQUAL,
+    GREATER_THAN,
+    GREATER_THAN_INCLUSIVE,
+    IN,
+    IS_NOT_SET,
+    IS_SET,
+    LESS_THAN,
+    LESS_THAN_INCLUSIVE,
+    MODULO,
+    NOT_CONTAINS,
+    NOT_EQUAL,
+    PERCENTAGE_SPLIT,
+    REGEX,
+    Condition,
+    Segment,
+    SegmentRule,
+)
+
+TRAIT_KEY = "some_property"
+
+
+@pytest.mark.parametrize(
+    "operator, condition_value",
+    (
+        (EQUAL, "1"),
+        (EQUAL, "1.5"),
+        (EQUAL, "true"),
+        (EQUAL, "foo"),
+        (NOT_EQUAL, "0"),
+        (NOT_EQUAL, "False"),
+        (NOT_EQUAL, "foo"),
+        (GREATER_THAN, "1"),
+        (GREATER_THAN, "0.5"),
+        (GREATER_THAN_INCLUSIVE, "1"),
+        (GREATER_THAN_INCLUSIVE, "not-a-number"),
+        (LESS_THAN, "2"),
+        (LESS_THAN_INCLUSIVE, "1.5"),
+        (CONTAINS, "oo"),
+        (NOT_CONTAINS, "oo"),
+        (REGEX, "[a-z]+"),
+        (REGEX, "\\d+"),
+        (MODULO, "2|1"),
+        (MODULO, "2|1|0"),
+        (IN, "foo,1,True,1.5"),
+        (IN, ""),
+        (IS_SET, None),
+        (IS_NOT_SET, None),
+    ),
+)
+@pytest.mark.parametrize(
+    "trait_value",
+    (1, 1.5, True, False, "foo", "1.0.0", ""),
+)
+def test_compiled_segment_matches_model_evaluation(
+    segment, segment_rule, identity, operator, condition_value, trait_value
+):
+    # Given
+    Condition.objects.create(
+        rule=segment_rule,
+        operator=operator,
+        property=TRAIT_KEY,
+        value=condition_value,
+    )
+    traits = [
+        Trait(
+            trait_key=TRAIT_KEY,
+            identity=identity,
+            **Trait.generate_trait_value_data(trait_value),
+        )
+    ]
+    compiled_segment = compile_segment(segment)
+
+    # When
+    result = compiled_segment.does_identity_match(identity, get_traits_by_key(traits))
+
+    # Then
+    assert result is segment.does_identity_match(identity, traits)
+
+
+@pytest.mark.parametrize(
+    "operator, condition_value, trait_value, expected_result",
+    (
+        (EQUAL, "1.0.0:semver", "1.0.0", True),
+        (GREATER_THAN, "0.9.0:semver", "1.0.0", True),
+        (LESS_THAN, "1.0.1:semver", "1.0.0", True),
+        (LESS_THAN_INCLUSIVE, "invalid:semver", "1.0.0", False),
+        (EQUAL, "1.0.0:semver", "not-a-version", False),
+    ),
+)
+def test_compiled_semver_condition(
+    segment,
+    segment_rule,
+    identity,
+    operator,
+    condition_value,
+    trait_value,
+    expected_result,
+):
+    # Given
+    Condition.objects.create(
+        rule=segment_rule,
+        operator=operator,
+        property=TRAIT_KEY,
+        value=condition_value,
+    )
+    traits = [Trait(trait_key=TRAIT_KEY, value_type=STRING, string_value=trait_value)]
+
+    # When
+    result = compile_segment(segment).does_identity_match(
+        identity, get_traits_by_key(traits)
+    )
+
+    # Then
+    assert result is expected_result
+
+
+@pytest.mark.parametrize(
+    "rule_type, trait_values, expected_result",
+    (
+        (SegmentRule.ALL_RULE, {"a": "foo", "b": "bar"}, True),
+        (SegmentRule.ALL_RULE, {"a": "foo"}, False),
+        (SegmentRule.ANY_RULE, {"a": "foo"}, True),
+        (SegmentRule.ANY_RULE, {}, False),
+        (SegmentRule.NONE_RULE, {}, True),
+        (SegmentRule.NONE_RULE, {"b": "bar"}, False),
+    ),
+)
+def test_compiled_segment_evaluates_nested_rules(
+    project, identity, rule_type, trait_values, expected_result
+):
+    # Given
+    segment = Segment.objects.create(name="nested", project=project)
+    parent_rule = SegmentRule.objects.create(segment=segment, type=SegmentRule.ALL_RULE)
+    child_rule = SegmentRule.objects.create(rule=parent_rule, type=rule_type)
+    Condition.objects.create(rule=child_rule, operator=EQUAL, property="a", value="foo")
+    Condition.objects.create(rule=child_rule, operator=EQUAL, property="b", value="bar")
+
+    traits = [
+        Trait(trait_key=key, identity=identity, value_type=STRING, string_value=value)
+        for key, value in trait_values.items()
+    ]
+
+    # When
+    result = compile_segment(segment).does_identity_match(
+        identity, get_traits_by_key(traits)
+    )
+
+    # Then
+    assert result is expected_result
+    assert result is segment.does_identity_match(identity, traits)
+
+
+def test_compiled_segment_without_rules_does_not_match(segment, identity):
+    assert compile_segment(segment).does_identity_match(identity, {}) is False
+
+
+@pytest.mark.parametrize(
+    "hashed_percentage, expected_result", ((0.05, True), (0.2, False))
+)
+def test_compiled_percentage_split_condition(
+    segment, segment_rule, identity, mocker, hashed_percentage, expected_result
+):
+    # Given
+    mock_get_hashed_percentage_for_object_ids = mocker.patch(
+        "segments.evaluator.get_hashed_percentage_for_object_ids",
+        return_value=hashed_percentage,
+    )
+    Condition.objects.create(rule=segment_rule, operator=PERCENTAGE_SPLIT, value="10")
+
+    # When
+    result = compile_segment(segment).does_identity_match(identity, {})
+
+    # Then
+    assert result is expected_result
+    mock_get_hashed_percentage_for_object_ids.assert_called_once_with(
+        object_ids=[segment.id, identity.get_hash_key()]
+    )
+
+
+@pytest.mark.parametrize(
+    "operator, expected_result", ((PERCENTAGE_SPLIT, True), (EQUAL, False))
+)
+def test_compiled_segment_has_percentage_split(
+    segment, segment_rule, operator, expected_result
+):
+    # Given
+    nested_rule = SegmentRule.objects.create(
+        rule=segment_rule, type=SegmentRule.ALL_RULE
+    )
+    Condition.objects.create(rule=nested_rule, operator=operator, value="10")
+
+    # When
+    compiled_segment = compile_segment(segment)
+
+    # Then
+    assert compiled_segment.has_percentage_split is expected_result
+
+
+def test_get_traits_by_key_keeps_first_trait_for_duplicate_keys(identity):
+    # Given
+    first_trait = Trait(trait_key=TRAIT_KEY, value_type=INTEGER, integer_value=1)
+    second_trait = Trait(trait_key=TRAIT_KEY, value_type=FLOAT, float_value=2.0)
+    other_trait = Trait(trait_key="other", value_type=BOOLEAN, boolean_value=True)
+
+    # When
+    traits_by_key = get_traits_by_key([first_trait, second_trait, other_trait])
+
+    # Then
+    assert traits_by_key == {TRAIT_KEY: first_trait, "other": other_trait}
+
+
+def test_compiled_segments_can_be_pickled(segment, segment_rule, identity):
+    # Given
+    Condition.objects.create(
+        rule=segment_rule, operator=REGEX, property=TRAIT_KEY, value="^foo.*"
+    )
+    Condition.objects.create(
+        rule=segment_rule, operator=GREATER_THAN, property="v", value="1.0.0:semver"
+    )
+    traits = [
+        Trait(trait_key=TRAIT_KEY, value_type=STRING, string_value="foobar"),
+        Trait(trait_key="v", value_type=STRING, string_value="1.2.0"),
+    ]
+
+    # When
+    compiled_segments = pickle.loads(pickle.dumps(compile_segments([segment])))
+
+    # Then
+    assert compiled_segments[0].does_identity_match(identity, get_traits_by_key(traits))
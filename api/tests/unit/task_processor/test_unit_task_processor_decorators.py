@@ -3,13 +3,15 @@ import logging
 from datetime import timedelta
 
 import pytest
+from django.utils import timezone
 
 from task_processor.decorators import (
     register_recurring_task,
     register_task_handler,
 )
-from task_processor.models import RecurringTask
+from task_processor.models import RecurringTask, Task, TaskPriority
 from task_processor.task_registry import get_task
+from task_processor.task_run_method import TaskRunMethod
 
 
 def test_register_task_handler_run_in_thread(mocker, caplog):
@@ -93,3 +95,83 @@ def test_register_recurring_task_does_nothing_if_not_run_by_processor(mocker, db
     assert not RecurringTask.objects.filter(task_identifier=task_identifier).exists()
     with pytest.raises(KeyError):
         assert get_task(task_identifier)
+
+
+def test_delay_with_coalesce_returns_existing_scheduled_task(db, settings):
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+
+    @register_task_handler()
+    def coalesced_function(first_arg):
+        pass
+
+    delay_until = timezone.now() + timedelta(seconds=10)
+    task = coalesced_function.delay(
+        delay_until=delay_until, args=("foo",), coalesce=True
+    )
+
+    # When
+    coalesced_task = coalesced_function.delay(
+        delay_until=delay_until, args=("foo",), coalesce=True
+    )
+    other_task = coalesced_function.delay(
+        delay_until=delay_until, args=("bar",), coalesce=True
+    )
+
+    # Then
+    assert coalesced_task == task
+    assert other_task != task
+    assert (
+        Task.objects.filter(task_identifier=coalesced_function.task_identifier).count()
+        == 2
+    )
+
+
+@pytest.mark.parametrize(
+    "existing_task_kwargs",
+    (
+        {"scheduled_for": timezone.now() - timedelta(seconds=1)},
+        {"is_locked": True},
+        {"completed": True},
+    ),
+)
+def test_delay_with_coalesce_creates_new_task_if_existing_task_not_pending(
+    db, settings, existing_task_kwargs
+):
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+
+    @register_task_handler()
+    def coalesced_function(first_arg):
+        pass
+
+    delay_until = timezone.now() + timedelta(seconds=10)
+    task = coalesced_function.delay(
+        delay_until=delay_until, args=("foo",), coalesce=True
+    )
+    Task.objects.filter(id=task.id).update(**existing_task_kwargs)
+
+    # When
+    new_task = coalesced_function.delay(
+        delay_until=delay_until, args=("foo",), coalesce=True
+    )
+
+    # Then
+    assert new_task != task
+
+
+def test_delay_creates_task_with_queue_and_priority(db, settings):
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+
+    @register_task_handler(queue="some_queue", priority=TaskPriority.HIGH)
+    def queued_function(first_arg):
+        pass
+
+    # When
+    task = queued_function.delay(args=("foo",))
+
+    # Then
+    task.refresh_from_db()
+    assert task.queue == "some_queue"
+    assert task.priority == TaskPriority.HIGH
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from task_processor.processes import WorkerProcess, WorkerThread
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_process_runs_task_runners_and_stops_gracefully():
+    # Given
+    worker_process = WorkerProcess(
+        name="TestWorker",
+        num_threads=2,
+        sleep_interval_millis=100,
+        queue_pop_size=1,
+    )
+
+    # When
+    worker_process.start()
+    try:
+        # wait for the task runners to report their first heartbeat
+        time.sleep(2)
+        heartbeats = list(worker_process._heartbeats)
+        unhealthy_threads = worker_process.get_unhealthy_threads(
+            ms_before_unhealthy=1500
+        )
+    finally:
+        worker_process.stop()
+        worker_process.join(timeout=10)
+
+    # Then
+    assert all(heartbeat > worker_process.started_at for heartbeat in heartbeats)
+    assert unhealthy_threads == []
+    assert not worker_process.is_alive()
+    assert worker_process.exitcode == 0
+
+
+def test_worker_process_get_unhealthy_threads_returns_threads_without_recent_heartbeat(
+    mocker,
+):
+    # Given
+    worker_process = WorkerProcess(
+        name="TestWorker",
+        num_threads=2,
+        sleep_interval_millis=100,
+        queue_pop_size=1,
+    )
+    now = time.time()
+    worker_process.started_at = now - 60
+    worker_process._process = mocker.MagicMock(is_alive=mocker.Mock(return_value=True))
+    worker_process._heartbeats = [now, now - 30]
+
+    # When
+    unhealthy_threads = worker_process.get_unhealthy_threads(ms_before_unhealthy=5000)
+
+    # Then
+    assert unhealthy_threads == [WorkerThread(name="TestWorker-TaskRunner-1")]
+
+
+def test_worker_process_get_unhealthy_threads_allows_time_for_threads_to_start(
+    mocker,
+):
+    # Given
+    worker_process = WorkerProcess(
+        name="TestWorker",
+        num_threads=1,
+        sleep_interval_millis=100,
+        queue_pop_size=1,
+    )
+    worker_process.started_at = time.time()
+    worker_process._process = mocker.MagicMock(is_alive=mocker.Mock(return_value=True))
+    worker_process._heartbeats = [0]
+
+    # When
+    unhealthy_threads = worker_process.get_unhealthy_threads(ms_before_unhealthy=5000)
+
+    # Then
+    assert unhealthy_threads == []
+
+
+def test_worker_process_get_unhealthy_threads_returns_all_threads_if_process_dead(
+    mocker,
+):
+    # Given
+    worker_process = WorkerProcess(
+        name="TestWorker",
+        num_threads=2,
+        sleep_interval_millis=100,
+        queue_pop_size=1,
+    )
+    worker_process._process = mocker.MagicMock(is_alive=mocker.Mock(return_value=False))
+
+    # When
+    unhealthy_threads = worker_process.get_unhealthy_threads(ms_before_unhealthy=5000)
+
+    # Then
+    assert unhealthy_threads == [
+        WorkerThread(name="TestWorker-TaskRunner-0"),
+        WorkerThread(name="TestWorker-TaskRunner-1"),
+    ]
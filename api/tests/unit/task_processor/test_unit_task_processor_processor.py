@@ -12,9 +12,11 @@ from task_processor.decorators import (
     register_task_handler,
 )
 from task_processor.models import (
+    REALTIME_QUEUE,
     RecurringTask,
     RecurringTaskRun,
     Task,
+    TaskPriority,
     TaskResult,
     TaskRun,
 )
@@ -305,6 +307,87 @@ def test_run_tasks_skips_locked_tasks():
     task_runner_thread.join()
 
 
+def test_get_tasks_to_process_locks_and_returns_tasks_in_correct_order(db):
+    # Given
+    now = timezone.now()
+    later_task = Task.schedule_task(
+        now - timedelta(minutes=1),
+        _create_organisation.task_identifier,
+        args=("later task organisation",),
+    )
+    earlier_task = Task.schedule_task(
+        now - timedelta(minutes=2),
+        _create_organisation.task_identifier,
+        args=("earlier task organisation",),
+    )
+    future_task = Task.schedule_task(
+        now + timedelta(minutes=1),
+        _create_organisation.task_identifier,
+        args=("future task organisation",),
+    )
+    Task.objects.bulk_create([later_task, earlier_task, future_task])
+
+    # When
+    tasks = list(Task.objects.get_tasks_to_process(3))
+
+    # Then
+    assert [task.uuid for task in tasks] == [earlier_task.uuid, later_task.uuid]
+    assert all(task.is_locked for task in tasks)
+    assert set(Task.objects.filter(is_locked=True).values_list("uuid", flat=True)) == {
+        earlier_task.uuid,
+        later_task.uuid,
+    }
+
+
+def test_get_tasks_to_process_returns_tasks_in_order_of_priority(db):
+    # Given
+    now = timezone.now()
+    low_priority_task = Task.schedule_task(
+        now - timedelta(minutes=2),
+        _create_organisation.task_identifier,
+        args=("low priority task organisation",),
+        priority=TaskPriority.LOW,
+    )
+    high_priority_task = Task.schedule_task(
+        now - timedelta(minutes=1),
+        _create_organisation.task_identifier,
+        args=("high priority task organisation",),
+        priority=TaskPriority.HIGH,
+    )
+    Task.objects.bulk_create([low_priority_task, high_priority_task])
+
+    # When
+    tasks = list(Task.objects.get_tasks_to_process(1))
+
+    # Then
+    assert [task.uuid for task in tasks] == [high_priority_task.uuid]
+
+
+def test_run_tasks_only_runs_tasks_from_given_queues(db):
+    # Given
+    now = timezone.now()
+    default_queue_task = Task.schedule_task(
+        now - timedelta(minutes=2),
+        _create_organisation.task_identifier,
+        args=("default queue organisation",),
+    )
+    realtime_queue_task = Task.schedule_task(
+        now - timedelta(minutes=1),
+        _create_organisation.task_identifier,
+        args=("realtime queue organisation",),
+        queue=REALTIME_QUEUE,
+    )
+    Task.objects.bulk_create([default_queue_task, realtime_queue_task])
+
+    # When
+    task_runs = run_tasks(2, queues=[REALTIME_QUEUE])
+
+    # Then
+    assert [task_run.task.uuid for task_run in task_runs] == [realtime_queue_task.uuid]
+    assert Organisation.objects.filter(name="realtime queue organisation").exists()
+    assert not Organisation.objects.filter(name="default queue organisation").exists()
+
+
 def test_run_more_than_one_task(db):
     # Given
     num_tasks = 5
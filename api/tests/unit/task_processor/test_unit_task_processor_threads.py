@@ -0,0 +1,94 @@
+import time
+from threading import Event
+
+import pytest
+
+from task_processor.models import Task
+from task_processor.threads import (
+    TaskNotificationListener,
+    TaskRunner,
+    create_task_runners,
+)
+
+
+def test_task_runner_sleeps_until_woken_up(mocker):
+    # Given
+    mock_run_tasks = mocker.patch("task_processor.threads.run_tasks")
+    mocker.patch("task_processor.threads.run_recurring_tasks")
+    wakeup_event = Event()
+
+    task_runner = TaskRunner(sleep_interval_millis=60_000, wakeup_event=wakeup_event)
+
+    def stop_task_runner(*args, **kwargs):
+        if mock_run_tasks.call_count > 1:
+            task_runner.stop()
+
+    mock_run_tasks.side_effect = stop_task_runner
+    task_runner.start()
+
+    # When
+    wakeup_event.set()
+    task_runner.join(timeout=5)
+
+    # Then
+    assert not task_runner.is_alive()
+    assert mock_run_tasks.call_count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_task_notification_listener_sets_wakeup_event_when_task_created():
+    # Given
+    wakeup_event = Event()
+    listener = TaskNotificationListener(
+        wakeup_event=wakeup_event, select_timeout_millis=100, daemon=True
+    )
+    listener.start()
+
+    try:
+        # give the listener time to connect and start listening
+        time.sleep(1)
+
+        # When
+        Task.create("some_task").save()
+
+        # Then
+        assert wakeup_event.wait(timeout=5)
+    finally:
+        listener.stop()
+        listener.join(timeout=5)
+
+
+def test_task_runner_with_queues_only_runs_tasks_from_those_queues(mocker):
+    # Given
+    mock_run_tasks = mocker.patch("task_processor.threads.run_tasks")
+    mock_run_recurring_tasks = mocker.patch(
+        "task_processor.threads.run_recurring_tasks"
+    )
+    task_runner = TaskRunner(queue_pop_size=5, queues=["realtime"])
+    mock_run_tasks.side_effect = lambda *args, **kwargs: task_runner.stop()
+    mocker.patch.object(task_runner, "_sleep")
+
+    # When
+    task_runner.run()
+
+    # Then
+    mock_run_tasks.assert_called_once_with(5, queues=["realtime"])
+    mock_run_recurring_tasks.assert_not_called()
+
+
+def test_create_task_runners_with_dedicated_runners(db):
+    # When
+    task_runners, _ = create_task_runners(
+        num_threads=2,
+        sleep_interval_millis=100,
+        queue_pop_size=1,
+        listen=False,
+        dedicated_runners={"realtime": 1},
+    )
+
+    # Then
+    assert [task_runner.queues for task_runner in task_runners] == [
+        None,
+        None,
+        ["realtime"],
+    ]
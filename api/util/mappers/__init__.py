@@ -1,4 +1,5 @@
 from util.mappers.dynamodb import (
+    map_engine_environment_to_environment_document,
     map_engine_identity_to_identity_document,
     map_environment_api_key_to_environment_api_key_document,
     map_environment_to_environment_document,
@@ -7,6 +8,7 @@ from util.mappers.dynamodb import (
 from util.mappers.engine import map_feature_to_engine, map_mv_option_to_engine
 
 __all__ = (
+    "map_engine_environment_to_environment_document",
     "map_engine_identity_to_identity_document",
     "map_environment_api_key_to_environment_api_key_document",
     "map_environment_to_environment_document",
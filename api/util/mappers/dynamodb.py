@@ -1,6 +1,15 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any, Dict, List, TypeAlias, TypeVar, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Optional,
+    TypeAlias,
+    TypeVar,
+    Union,
+)
 
 from pydantic import BaseModel
 
@@ -11,13 +20,16 @@ from util.mappers.engine import (
 )
 
 if TYPE_CHECKING:  # pragma: no cover
+    from flag_engine.environments.models import EnvironmentModel
     from flag_engine.identities.models import IdentityModel
+    from flag_engine.segments.models import SegmentRuleModel
 
     from environments.identities.models import Identity
     from environments.models import Environment, EnvironmentAPIKey
 
 
 __all__ = (
+    "map_engine_environment_to_environment_document",
     "map_engine_identity_to_identity_document",
     "map_environment_api_key_to_environment_api_key_document",
     "map_environment_to_environment_document",
@@ -28,15 +40,25 @@ DocumentValue: TypeAlias = Union[Dict[str, "DocumentValue"], str, bool, None, De
 Document: TypeAlias = Dict[str, DocumentValue]
 
 
-def map_environment_to_environment_document(
-    environment: "Environment",
+def map_engine_environment_to_environment_document(
+    engine_environment: "EnvironmentModel",
 ) -> Document:
     return {
         field_name: _map_value_to_document_value(value)
-        for field_name, value in map_environment_to_engine(
+        for field_name, value in engine_environment
+    }
+
+
+def map_environment_to_environment_document(
+    environment: "Environment",
+    segment_rules_by_segment_id: Optional[Dict[int, List["SegmentRuleModel"]]] = None,
+) -> Document:
+    return map_engine_environment_to_environment_document(
+        map_environment_to_engine(
             environment,
+            segment_rules_by_segment_id=segment_rules_by_segment_id,
         )
-    }
+    )
 
 
 def map_environment_api_key_to_environment_api_key_document(
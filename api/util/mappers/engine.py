@@ -1,3 +1,4 @@
+from collections import defaultdict
 from collections.abc import Iterable
 from itertools import chain
 from typing import TYPE_CHECKING, Dict, List, Optional
@@ -44,9 +45,11 @@ if TYPE_CHECKING:  # pragma: no cover
 __all__ = (
     "map_environment_api_key_to_engine",
     "map_environment_to_engine",
+    "map_feature_states_to_engine_environment",
     "map_feature_to_engine",
     "map_identity_to_engine",
     "map_mv_option_to_engine",
+    "map_segment_rules_to_engine",
 )
 
 
@@ -148,8 +151,15 @@ def map_mv_option_to_engine(
     return MultivariateFeatureOptionModel(value=mv_option.value, id=mv_option.id)
 
 
+def map_segment_rules_to_engine(segment: "Segment") -> List[SegmentRuleModel]:
+    return [
+        map_segment_rule_to_engine(segment_rule) for segment_rule in segment.rules.all()
+    ]
+
+
 def map_environment_to_engine(
     environment: "Environment",
+    segment_rules_by_segment_id: Optional[Dict[int, List[SegmentRuleModel]]] = None,
 ) -> EnvironmentModel:
     """
     Maps Core API's `environments.models.Environment` model instance to the
@@ -158,6 +168,9 @@ def map_environment_to_engine(
     feature versions.
 
     :param Environment environment: the environment to map
+    :param segment_rules_by_segment_id: optional mapping of segment id to the
+        already mapped rules for each of the project's segments, in which case
+        the segment rules are not read from the ORM
     :rtype EnvironmentModel
     """
     project: "Project" = environment.project
@@ -165,10 +178,11 @@ def map_environment_to_engine(
 
     # Read relationships - grab all the data needed from the ORM here.
     project_segments: List["Segment"] = project.segments.all()
-    project_segment_rules_by_segment_id: Dict[
-        int,
-        Iterable["SegmentRule"],
-    ] = {segment.pk: segment.rules.all() for segment in project_segments}
+    if segment_rules_by_segment_id is None:
+        segment_rules_by_segment_id = {
+            segment.pk: map_segment_rules_to_engine(segment)
+            for segment in project_segments
+        }
     project_segment_feature_states_by_segment_id = _get_project_segment_feature_states(
         project_segments,
         environment.pk,
@@ -222,10 +236,7 @@ def map_environment_to_engine(
         SegmentModel(
             id=segment.pk,
             name=segment.name,
-            rules=[
-                map_segment_rule_to_engine(segment_rule)
-                for segment_rule in project_segment_rules_by_segment_id.pop(segment.pk)
-            ],
+            rules=segment_rules_by_segment_id[segment.pk],
             feature_states=[
                 map_feature_state_to_engine(
                     feature_state,
@@ -316,6 +327,76 @@ def map_environment_to_engine(
     )
 
 
+def map_feature_states_to_engine_environment(
+    environment_model: EnvironmentModel,
+    feature_states: Iterable["FeatureState"],
+) -> EnvironmentModel:
+    """
+    Replaces the feature states, including the segment overrides, of an already
+    mapped environment, leaving everything else as it is.
+
+    :param EnvironmentModel environment_model: the environment to update
+    :param feature_states: all of the environment's feature states (excluding the
+        identity overrides), with the feature, feature state value, feature segment
+        and multivariate feature state values prefetched
+    :rtype EnvironmentModel
+    """
+    environment_feature_states = []
+    feature_states_by_feature_segment = defaultdict(list)
+    for feature_state in feature_states:
+        if feature_segment := feature_state.feature_segment:
+            feature_states_by_feature_segment[feature_segment].append(feature_state)
+        else:
+            environment_feature_states.append(feature_state)
+
+    environment_feature_states = _get_prioritised_feature_states(
+        environment_feature_states
+    )
+    segment_feature_states_by_segment_id = defaultdict(list)
+    for feature_segment in sorted(
+        feature_states_by_feature_segment, key=lambda fs: (fs.priority, fs.pk)
+    ):
+        segment_feature_states_by_segment_id[feature_segment.segment_id] += [
+            map_feature_state_to_engine(
+                feature_state, feature_state.multivariate_feature_state_values.all()
+            )
+            for feature_state in _get_prioritised_feature_states(
+                feature_states_by_feature_segment[feature_segment]
+            )
+        ]
+
+    project_model = environment_model.project.copy(
+        update={
+            "server_key_only_feature_ids": [
+                feature.pk
+                for feature_state in environment_feature_states
+                if (feature := feature_state.feature).is_server_key_only
+            ],
+            "segments": [
+                segment_model.copy(
+                    update={
+                        "feature_states": segment_feature_states_by_segment_id[
+                            segment_model.id
+                        ]
+                    }
+                )
+                for segment_model in environment_model.project.segments
+            ],
+        }
+    )
+    return environment_model.copy(
+        update={
+            "project": project_model,
+            "feature_states": [
+                map_feature_state_to_engine(
+                    feature_state, feature_state.multivariate_feature_state_values.all()
+                )
+                for feature_state in environment_feature_states
+            ],
+        }
+    )
+
+
 def map_environment_api_key_to_engine(
     environment_api_key: "EnvironmentAPIKey",
 ) -> EnvironmentAPIKeyModel:
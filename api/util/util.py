@@ -1,10 +1,36 @@
-from threading import Thread
+import atexit
+import functools
+import logging
+
+from core.executor import BoundedExecutor
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+postpone_executor = BoundedExecutor(
+    max_workers=settings.POSTPONE_EXECUTOR_MAX_WORKERS,
+    max_queue_size=settings.POSTPONE_EXECUTOR_MAX_QUEUE_SIZE,
+)
 
 
 def postpone(function):
+    """
+    Run the decorated function in the background, using the shared executor. Note
+    that the call is dropped if the executor's queue is full.
+    """
+
+    @functools.wraps(function)
     def decorator(*args, **kwargs):
-        t = Thread(target=function, args=args, kwargs=kwargs)
-        t.daemon = True
-        t.start()
+        postpone_executor.submit(function, *args, **kwargs)
 
     return decorator
+
+
+@atexit.register
+def _shutdown_postpone_executor_on_exit() -> None:  # pragma: no cover
+    try:
+        postpone_executor.shutdown(
+            timeout=settings.POSTPONE_EXECUTOR_SHUTDOWN_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.exception(e)
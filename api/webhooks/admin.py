@@ -0,0 +1,33 @@
+from django.contrib import admin
+
+from webhooks.models import WebhookDelivery
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    date_hierarchy = "created_at"
+    list_display = (
+        "id",
+        "url",
+        "event_type",
+        "status",
+        "attempts",
+        "last_status_code",
+        "created_at",
+        "last_attempted_at",
+    )
+    list_filter = ("status", "webhook_type", "event_type")
+    search_fields = ("url",)
+    readonly_fields = (
+        "webhook_type",
+        "webhook_id",
+        "url",
+        "event_type",
+        "payload",
+        "status",
+        "attempts",
+        "last_status_code",
+        "last_error",
+        "created_at",
+        "last_attempted_at",
+    )
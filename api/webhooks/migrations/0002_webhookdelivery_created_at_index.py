@@ -0,0 +1,17 @@
+# Generated by Django 3.2.20 on 2026-10-17 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['created_at'], name='webhooks_we_created_d5a8af_idx'),
+        ),
+    ]
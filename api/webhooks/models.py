@@ -1,4 +1,5 @@
 from core.models import AbstractBaseExportableModel, SoftDeleteExportableModel
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -22,3 +23,41 @@ class AbstractBaseSoftDeleteExportableWebhookModel(
 ):
     class Meta:
         abstract = True
+
+
+class WebhookDeliveryStatus(models.TextChoices):
+    PENDING = "PENDING"
+    SUCCESS = "SUCCESS"
+    FAILED = "FAILED"
+
+
+class WebhookDelivery(models.Model):
+    """
+    A (durable) request to a webhook, which is delivered by the task processor and
+    kept as a log of the deliveries made to each webhook.
+    """
+
+    webhook_type = models.CharField(max_length=50)
+    webhook_id = models.IntegerField()
+    url = models.CharField(max_length=200)
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+
+    status = models.CharField(
+        max_length=50,
+        choices=WebhookDeliveryStatus.choices,
+        default=WebhookDeliveryStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_attempted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Webhook deliveries"
+        indexes = [
+            models.Index(fields=("url", "last_attempted_at")),
+            models.Index(fields=("created_at",)),
+        ]
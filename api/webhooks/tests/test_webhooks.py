@@ -1,25 +1,35 @@
 import hashlib
 import hmac
 import json
+import threading
+from datetime import timedelta
 from typing import Type
 from unittest import TestCase, mock
 
 import pytest
 from core.constants import FLAGSMITH_SIGNATURE_HEADER
+from django.utils import timezone
+from pytest_django.fixtures import SettingsWrapper
 from pytest_mock import MockerFixture
 from requests.exceptions import ConnectionError, Timeout
 
 from environments.models import Environment, Webhook
 from organisations.models import Organisation, OrganisationWebhook
 from projects.models import Project
+from task_processor.models import Task
+from task_processor.task_run_method import TaskRunMethod
+from webhooks.models import WebhookDelivery, WebhookDeliveryStatus
 from webhooks.sample_webhook_data import (
     environment_webhook_data,
     organisation_webhook_data,
 )
 from webhooks.webhooks import (
+    CLEAN_UP_WEBHOOK_DELIVERIES_INTERVAL,
     WebhookEventType,
     WebhookType,
     call_environment_webhooks,
+    clean_up_webhook_deliveries,
+    deliver_webhook,
     trigger_sample_webhook,
 )
 
@@ -33,9 +43,10 @@ class WebhooksTestCase(TestCase):
             name="Test environment", project=project
         )
 
-    @mock.patch("webhooks.webhooks.requests")
+    @mock.patch("webhooks.webhooks.http_session")
     def test_requests_made_to_all_urls_for_environment(self, mock_requests):
         # Given
+        mock_requests.post.return_value.status_code = 200
         webhook_1 = Webhook.objects.create(
             url="http://url.1.com", enabled=True, environment=self.environment
         )
@@ -61,7 +72,7 @@ class WebhooksTestCase(TestCase):
             str(webhook.url) in all_call_args for webhook in (webhook_1, webhook_2)
         )
 
-    @mock.patch("webhooks.webhooks.requests")
+    @mock.patch("webhooks.webhooks.http_session")
     def test_request_not_made_to_disabled_webhook(self, mock_requests):
         # Given
         Webhook.objects.create(
@@ -78,7 +89,7 @@ class WebhooksTestCase(TestCase):
         # Then
         mock_requests.post.assert_not_called()
 
-    @mock.patch("webhooks.webhooks.requests")
+    @mock.patch("webhooks.webhooks.http_session")
     def test_trigger_sample_webhook_makes_correct_post_request_for_environment(
         self, mock_request
     ):
@@ -89,7 +100,7 @@ class WebhooksTestCase(TestCase):
         assert json.loads(kwargs["data"]) == environment_webhook_data
         assert args[0] == url
 
-    @mock.patch("webhooks.webhooks.requests")
+    @mock.patch("webhooks.webhooks.http_session")
     def test_trigger_sample_webhook_makes_correct_post_request_for_organisation(
         self, mock_request
     ):
@@ -102,11 +113,12 @@ class WebhooksTestCase(TestCase):
         assert args[0] == url
 
     @mock.patch("webhooks.webhooks.WebhookSerializer")
-    @mock.patch("webhooks.webhooks.requests")
+    @mock.patch("webhooks.webhooks.http_session")
     def test_request_made_with_correct_signature(
         self, mock_requests, webhook_serializer
     ):
         # Given
+        mock_requests.post.return_value.status_code = 200
         payload = {"key": "value"}
         webhook_serializer.return_value.data = payload
         secret = "random_key"
@@ -134,11 +146,12 @@ class WebhooksTestCase(TestCase):
         received_signature = kwargs["headers"][FLAGSMITH_SIGNATURE_HEADER]
         assert hmac.compare_digest(expected_signature, received_signature) is True
 
-    @mock.patch("webhooks.webhooks.requests")
+    @mock.patch("webhooks.webhooks.http_session")
     def test_request_does_not_have_signature_header_if_secret_is_not_set(
         self, mock_requests
     ):
         # Given
+        mock_requests.post.return_value.status_code = 200
         Webhook.objects.create(
             url="http://url.1.com", enabled=True, environment=self.environment
         )
@@ -161,7 +174,7 @@ def test_call_environment_webhooks__multiple_webhooks__failure__calls_expected(
     environment: Environment,
 ) -> None:
     # Given
-    requests_post_mock = mocker.patch("webhooks.webhooks.requests.post")
+    requests_post_mock = mocker.patch("webhooks.webhooks.http_session.post")
     requests_post_mock.side_effect = expected_error()
     send_failure_email_mock: mock.Mock = mocker.patch(
         "webhooks.webhooks.send_failure_email"
@@ -212,3 +225,436 @@ def test_call_environment_webhooks__multiple_webhooks__failure__calls_expected(
         ],
         any_order=True,
     )
+
+
+def test_call_environment_webhooks__success__records_delivery(
+    mocker: MockerFixture, environment: Environment
+) -> None:
+    # Given
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    http_session_mock.post.return_value.status_code = 200
+
+    webhook = Webhook.objects.create(
+        url="http://url.1.com", enabled=True, environment=environment
+    )
+
+    # When
+    call_environment_webhooks(
+        environment=environment,
+        data={"foo": "bar"},
+        event_type=WebhookEventType.FLAG_UPDATED,
+    )
+
+    # Then
+    delivery = WebhookDelivery.objects.get()
+    assert delivery.webhook_type == WebhookType.ENVIRONMENT.value
+    assert delivery.webhook_id == webhook.id
+    assert delivery.url == webhook.url
+    assert delivery.event_type == WebhookEventType.FLAG_UPDATED.value
+    assert delivery.payload == {"event_type": "FLAG_UPDATED", "data": {"foo": "bar"}}
+    assert delivery.status == WebhookDeliveryStatus.SUCCESS
+    assert delivery.attempts == 1
+    assert delivery.last_status_code == 200
+    assert delivery.last_attempted_at is not None
+
+
+def test_deliver_webhook__failure__schedules_retry_when_using_task_processor(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    settings.WEBHOOK_DELIVERY_MAX_ATTEMPTS = 3
+    settings.WEBHOOK_DELIVERY_RETRY_BACKOFF_SECONDS = 10
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    http_session_mock.post.return_value.status_code = 503
+    send_failure_email_mock = mocker.patch("webhooks.webhooks.send_failure_email")
+
+    delivery = _create_delivery(environment, attempts=1)
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.PENDING
+    assert delivery.attempts == 2
+    assert delivery.last_status_code == 503
+
+    task = Task.objects.get(task_identifier=deliver_webhook.task_identifier)
+    assert task.args == [delivery.id]
+    assert task.scheduled_for >= timezone.now() + timedelta(seconds=15)
+
+    send_failure_email_mock.assert_not_called()
+
+
+def test_deliver_webhook__failure__last_attempt__marks_failed_and_sends_email(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    settings.WEBHOOK_DELIVERY_MAX_ATTEMPTS = 2
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    http_session_mock.post.return_value.status_code = 500
+    send_failure_email_mock = mocker.patch("webhooks.webhooks.send_failure_email")
+
+    delivery = _create_delivery(environment, attempts=1)
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.FAILED
+    assert delivery.attempts == 2
+
+    assert not Task.objects.filter(
+        task_identifier=deliver_webhook.task_identifier
+    ).exists()
+    send_failure_email_mock.assert_called_once_with(
+        Webhook.objects.get(id=delivery.webhook_id),
+        delivery.payload,
+        WebhookType.ENVIRONMENT,
+        500,
+    )
+
+
+def test_deliver_webhook__circuit_open__does_not_call_webhook(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 2
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    send_failure_email_mock = mocker.patch("webhooks.webhooks.send_failure_email")
+
+    for _ in range(2):
+        _create_delivery(
+            environment,
+            status=WebhookDeliveryStatus.FAILED,
+            attempts=1,
+            last_attempted_at=timezone.now(),
+        )
+    delivery = _create_delivery(environment)
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    http_session_mock.post.assert_not_called()
+
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.FAILED
+    assert delivery.attempts == 1
+    assert delivery.last_attempted_at is None
+    send_failure_email_mock.assert_called_once_with(
+        Webhook.objects.get(id=delivery.webhook_id),
+        delivery.payload,
+        WebhookType.ENVIRONMENT,
+        "N/A (Circuit breaker open)",
+    )
+
+
+def test_deliver_webhook__circuit_open__reschedules_with_jitter_when_using_task_processor(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 2
+    settings.WEBHOOK_CIRCUIT_BREAKER_RESET_SECONDS = 300
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    mocker.patch("webhooks.webhooks.random.random", return_value=0.5)
+
+    for _ in range(2):
+        _create_delivery(
+            environment,
+            status=WebhookDeliveryStatus.FAILED,
+            attempts=1,
+            last_attempted_at=timezone.now(),
+        )
+    delivery = _create_delivery(environment)
+
+    # When
+    now = timezone.now()
+    deliver_webhook(delivery.id)
+
+    # Then
+    http_session_mock.post.assert_not_called()
+
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.PENDING
+    assert delivery.attempts == 1
+
+    task = Task.objects.get(task_identifier=deliver_webhook.task_identifier)
+    assert (
+        now + timedelta(seconds=450)
+        <= task.scheduled_for
+        <= timezone.now() + timedelta(seconds=450)
+    )
+
+
+def test_deliver_webhook__circuit_open__last_attempt__marks_failed(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 2
+    settings.WEBHOOK_DELIVERY_MAX_ATTEMPTS = 3
+
+    mocker.patch("webhooks.webhooks.http_session")
+    send_failure_email_mock = mocker.patch("webhooks.webhooks.send_failure_email")
+
+    for _ in range(2):
+        _create_delivery(
+            environment,
+            status=WebhookDeliveryStatus.FAILED,
+            attempts=1,
+            last_attempted_at=timezone.now(),
+        )
+    delivery = _create_delivery(environment, attempts=2)
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.FAILED
+    assert delivery.attempts == 3
+    assert not Task.objects.filter(
+        task_identifier=deliver_webhook.task_identifier
+    ).exists()
+    send_failure_email_mock.assert_called_once()
+
+
+def test_deliver_webhook__circuit_half_open__lets_a_single_probe_through(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+    settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 2
+    settings.WEBHOOK_CIRCUIT_BREAKER_RESET_SECONDS = 300
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    http_session_mock.post.return_value.status_code = 503
+
+    for _ in range(2):
+        _create_delivery(
+            environment,
+            status=WebhookDeliveryStatus.FAILED,
+            attempts=1,
+            last_attempted_at=timezone.now() - timedelta(seconds=301),
+        )
+    probe_delivery = _create_delivery(environment)
+    other_delivery = _create_delivery(environment)
+
+    # When
+    deliver_webhook(probe_delivery.id)
+    deliver_webhook(other_delivery.id)
+
+    # Then
+    # the probe failed, so the circuit is open again for the other delivery
+    http_session_mock.post.assert_called_once()
+
+    probe_delivery.refresh_from_db()
+    assert probe_delivery.last_status_code == 503
+    other_delivery.refresh_from_db()
+    assert other_delivery.last_error == "Circuit breaker open"
+    assert other_delivery.last_attempted_at is None
+
+
+def test_deliver_webhook__circuit_closed_after_success(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD = 2
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    http_session_mock.post.return_value.status_code = 200
+
+    _create_delivery(
+        environment,
+        status=WebhookDeliveryStatus.FAILED,
+        attempts=1,
+        last_attempted_at=timezone.now(),
+    )
+    _create_delivery(
+        environment,
+        status=WebhookDeliveryStatus.SUCCESS,
+        attempts=1,
+        last_attempted_at=timezone.now(),
+    )
+    delivery = _create_delivery(environment)
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    http_session_mock.post.assert_called_once()
+
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.SUCCESS
+
+
+def test_deliver_webhook__host_busy__reschedules_when_using_task_processor(
+    mocker: MockerFixture,
+    environment: Environment,
+    settings: SettingsWrapper,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = TaskRunMethod.TASK_PROCESSOR
+
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+    mocker.patch(
+        "webhooks.webhooks._get_host_semaphore",
+        return_value=threading.BoundedSemaphore(0),
+    )
+
+    delivery = _create_delivery(environment)
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    http_session_mock.post.assert_not_called()
+
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.PENDING
+    assert delivery.attempts == 0
+    assert Task.objects.filter(task_identifier=deliver_webhook.task_identifier).exists()
+
+
+def test_deliver_webhook__webhook_deleted__marks_failed(
+    mocker: MockerFixture, environment: Environment
+) -> None:
+    # Given
+    http_session_mock = mocker.patch("webhooks.webhooks.http_session")
+
+    delivery = _create_delivery(environment)
+    Webhook.objects.filter(id=delivery.webhook_id).delete()
+
+    # When
+    deliver_webhook(delivery.id)
+
+    # Then
+    http_session_mock.post.assert_not_called()
+
+    delivery.refresh_from_db()
+    assert delivery.status == WebhookDeliveryStatus.FAILED
+
+
+def test_clean_up_webhook_deliveries__deletes_expired_completed_deliveries(
+    environment: Environment, settings: SettingsWrapper
+) -> None:
+    # Given
+    settings.WEBHOOK_DELIVERY_RETENTION_DAYS = 30
+    settings.WEBHOOK_DELIVERY_DELETE_BATCH_SIZE = 1
+
+    expired_deliveries = [
+        _create_delivery(environment, status=WebhookDeliveryStatus.SUCCESS),
+        _create_delivery(environment, status=WebhookDeliveryStatus.FAILED),
+    ]
+    pending_delivery = _create_delivery(environment)
+    WebhookDelivery.objects.filter(
+        id__in=[delivery.id for delivery in expired_deliveries + [pending_delivery]]
+    ).update(created_at=timezone.now() - timedelta(days=31))
+    recent_delivery = _create_delivery(
+        environment, status=WebhookDeliveryStatus.SUCCESS
+    )
+
+    # When
+    clean_up_webhook_deliveries()
+
+    # Then
+    assert set(WebhookDelivery.objects.values_list("id", flat=True)) == {
+        pending_delivery.id,
+        recent_delivery.id,
+    }
+
+
+def test_clean_up_webhook_deliveries__does_nothing_without_retention(
+    environment: Environment, settings: SettingsWrapper
+) -> None:
+    # Given
+    settings.WEBHOOK_DELIVERY_RETENTION_DAYS = 0
+
+    delivery = _create_delivery(environment, status=WebhookDeliveryStatus.SUCCESS)
+    WebhookDelivery.objects.filter(id=delivery.id).update(
+        created_at=timezone.now() - timedelta(days=365)
+    )
+
+    # When
+    clean_up_webhook_deliveries()
+
+    # Then
+    assert WebhookDelivery.objects.filter(id=delivery.id).exists()
+
+
+@pytest.mark.parametrize(
+    "task_run_method, expected_clean_ups",
+    ((TaskRunMethod.SEPARATE_THREAD, 1), (TaskRunMethod.TASK_PROCESSOR, 0)),
+)
+def test_call_environment_webhooks__cleans_up_deliveries_without_task_processor(
+    environment: Environment,
+    settings: SettingsWrapper,
+    mocker: MockerFixture,
+    task_run_method: TaskRunMethod,
+    expected_clean_ups: int,
+) -> None:
+    # Given
+    settings.TASK_RUN_METHOD = task_run_method
+    mocker.patch("webhooks.webhooks.deliver_webhook")
+    mocker.patch("webhooks.webhooks._last_clean_up_at", None)
+    mocked_monotonic = mocker.patch(
+        "webhooks.webhooks.time.monotonic", return_value=1000
+    )
+    mocked_executor = mocker.patch("webhooks.webhooks.postpone_executor")
+    Webhook.objects.create(url="http://url.1.com", environment=environment)
+
+    # When
+    call_environment_webhooks(environment, {}, WebhookEventType.FLAG_UPDATED)
+    call_environment_webhooks(environment, {}, WebhookEventType.FLAG_UPDATED)
+
+    # Then
+    # the deliveries are cleaned up at most once per interval
+    assert mocked_executor.submit.call_count == expected_clean_ups
+
+    # When
+    mocked_monotonic.return_value = (
+        1000 + CLEAN_UP_WEBHOOK_DELIVERIES_INTERVAL.total_seconds()
+    )
+    call_environment_webhooks(environment, {}, WebhookEventType.FLAG_UPDATED)
+
+    # Then
+    assert mocked_executor.submit.call_count == expected_clean_ups * 2
+    for call in mocked_executor.submit.call_args_list:
+        assert call.args == (clean_up_webhook_deliveries,)
+
+
+def _create_delivery(environment: Environment, **kwargs) -> WebhookDelivery:
+    webhook, _ = Webhook.objects.get_or_create(
+        url="http://url.1.com", environment=environment
+    )
+    return WebhookDelivery.objects.create(
+        webhook_type=WebhookType.ENVIRONMENT.value,
+        webhook_id=webhook.id,
+        url=webhook.url,
+        event_type=WebhookEventType.FLAG_UPDATED.value,
+        payload={"event_type": WebhookEventType.FLAG_UPDATED.value, "data": {}},
+        **kwargs,
+    )
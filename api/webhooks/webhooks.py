@@ -1,6 +1,12 @@
 import enum
 import json
+import logging
+import random
+import threading
+import time
 import typing
+from datetime import timedelta
+from urllib.parse import urlparse
 
 import requests
 from core.constants import FLAGSMITH_SIGNATURE_HEADER
@@ -9,22 +15,55 @@ from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.core.serializers.json import DjangoJSONEncoder
 from django.template.loader import get_template
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
 
 from environments.models import Webhook
 from organisations.models import OrganisationWebhook
+from task_processor.decorators import (
+    register_recurring_task,
+    register_task_handler,
+)
+from task_processor.task_run_method import TaskRunMethod
+from util.util import postpone_executor
 from webhooks.sample_webhook_data import (
     environment_webhook_data,
     organisation_webhook_data,
 )
 
-from .models import AbstractBaseExportableWebhookModel
+from .models import (
+    AbstractBaseExportableWebhookModel,
+    WebhookDelivery,
+    WebhookDeliveryStatus,
+)
 from .serializers import WebhookSerializer
 
 if typing.TYPE_CHECKING:
     import environments  # noqa
 
+logger = logging.getLogger(__name__)
+
 WebhookModels = typing.Union[OrganisationWebhook, "environments.models.Webhook"]
 
+# shared by all of the webhook requests so that connections to each host are reused
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_maxsize=settings.WEBHOOK_MAX_CONCURRENT_REQUESTS_PER_HOST
+)
+http_session.mount("http://", _http_adapter)
+http_session.mount("https://", _http_adapter)
+
+# limits the number of concurrent requests made to each host by this process
+_host_semaphores: typing.Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+CLEAN_UP_WEBHOOK_DELIVERIES_INTERVAL = timedelta(hours=12)
+
+# monotonic time at which this process last cleaned up the webhook deliveries, see
+# _clean_up_webhook_deliveries_if_due
+_last_clean_up_at: typing.Optional[float] = None
+_clean_up_lock = threading.Lock()
+
 
 class WebhookEventType(enum.Enum):
     FLAG_UPDATED = "FLAG_UPDATED"
@@ -32,6 +71,14 @@ class WebhookEventType(enum.Enum):
     AUDIT_LOG_CREATED = "AUDIT_LOG_CREATED"
 
 
+class CircuitState(enum.Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    # the reset period has passed, so a single request is let through to probe
+    # whether the url has recovered
+    HALF_OPEN = "HALF_OPEN"
+
+
 class WebhookType(enum.Enum):
     ORGANISATION = "ORGANISATION"
     ENVIRONMENT = "ENVIRONMENT"
@@ -98,33 +145,245 @@ def _call_webhook(
         signature = sign_payload(json_data, key=webhook.secret)
         headers.update({FLAGSMITH_SIGNATURE_HEADER: signature})
 
-    return requests.post(str(webhook.url), data=json_data, headers=headers, timeout=10)
+    return http_session.post(
+        str(webhook.url),
+        data=json_data,
+        headers=headers,
+        timeout=settings.WEBHOOK_REQUEST_TIMEOUT_SECONDS,
+    )
 
 
-def _call_webhook_email_on_error(
-    webhook: WebhookModels, data: typing.Mapping, webhook_type: WebhookType
-):
-    try:
-        res = _call_webhook(webhook, data)
-    except requests.exceptions.RequestException as exc:
-        send_failure_email(
-            webhook,
-            data,
-            webhook_type,
-            f"N/A ({exc.__class__.__name__})",
+def _call_webhooks(webhooks, data, event_type, webhook_type):
+    webhook_data = {"event_type": event_type.value, "data": data}
+    serializer = WebhookSerializer(data=webhook_data)
+    serializer.is_valid(raise_exception=False)
+
+    deliveries = WebhookDelivery.objects.bulk_create(
+        WebhookDelivery(
+            webhook_type=webhook_type.value,
+            webhook_id=webhook.id,
+            url=webhook.url,
+            event_type=event_type.value,
+            payload=serializer.data,
         )
+        for webhook in webhooks
+    )
+    for delivery in deliveries:
+        deliver_webhook.delay(args=(delivery.id,))
+
+    _clean_up_webhook_deliveries_if_due()
+
+
+@register_task_handler()
+def deliver_webhook(delivery_id: int) -> None:
+    delivery = WebhookDelivery.objects.filter(
+        id=delivery_id, status=WebhookDeliveryStatus.PENDING
+    ).first()
+    if not delivery:
         return
 
-    if res.status_code != 200:
-        send_failure_email(webhook, data, webhook_type, res.status_code)
+    webhook_type = WebhookType(delivery.webhook_type)
+    webhook = (
+        get_webhook_model(webhook_type).objects.filter(id=delivery.webhook_id).first()
+    )
+    if not webhook:
+        delivery.status = WebhookDeliveryStatus.FAILED
+        delivery.last_error = "Webhook does not exist"
+        delivery.save()
+        return
 
+    circuit_state = _get_circuit_state(delivery.url)
+    if circuit_state == CircuitState.OPEN:
+        _skip_delivery(delivery, webhook, webhook_type)
+        return
+    if circuit_state == CircuitState.HALF_OPEN:
+        # mark the probe as attempted up front so that the circuit stays open for
+        # the other deliveries to the url while the probe is made
+        WebhookDelivery.objects.filter(id=delivery.id).update(
+            last_attempted_at=timezone.now()
+        )
 
-def _call_webhooks(webhooks, data, event_type, webhook_type):
-    webhook_data = {"event_type": event_type.value, "data": data}
-    serializer = WebhookSerializer(data=webhook_data)
-    serializer.is_valid(raise_exception=False)
-    for webhook in webhooks:
-        _call_webhook_email_on_error(webhook, serializer.data, webhook_type)
+    if not _attempt_delivery(delivery, webhook):
+        return
+
+    if delivery.last_status_code == 200:
+        delivery.status = WebhookDeliveryStatus.SUCCESS
+        delivery.save()
+        return
+
+    if delivery.attempts < settings.WEBHOOK_DELIVERY_MAX_ATTEMPTS:
+        backoff = settings.WEBHOOK_DELIVERY_RETRY_BACKOFF_SECONDS * 2 ** (
+            delivery.attempts - 1
+        )
+        if _schedule_delivery(delivery, timedelta(seconds=backoff)):
+            return
+
+    delivery.status = WebhookDeliveryStatus.FAILED
+    delivery.save()
+    send_failure_email(
+        webhook,
+        delivery.payload,
+        webhook_type,
+        delivery.last_status_code or f"N/A ({delivery.last_error})",
+    )
+
+
+@register_recurring_task(run_every=CLEAN_UP_WEBHOOK_DELIVERIES_INTERVAL)
+def clean_up_webhook_deliveries() -> None:
+    """
+    Delete the deliveries which completed (successfully or not) more than
+    WEBHOOK_DELIVERY_RETENTION_DAYS ago, in batches.
+    """
+    if not settings.WEBHOOK_DELIVERY_RETENTION_DAYS:
+        return
+
+    delete_before = timezone.now() - timedelta(
+        days=settings.WEBHOOK_DELIVERY_RETENTION_DAYS
+    )
+    expired_deliveries = WebhookDelivery.objects.filter(
+        status__in=(WebhookDeliveryStatus.SUCCESS, WebhookDeliveryStatus.FAILED),
+        created_at__lt=delete_before,
+    )
+    batch_size = settings.WEBHOOK_DELIVERY_DELETE_BATCH_SIZE
+    while True:
+        delivery_ids = list(
+            expired_deliveries.values_list("id", flat=True)[:batch_size]
+        )
+        if not delivery_ids:
+            return
+        WebhookDelivery.objects.filter(id__in=delivery_ids).delete()
+
+
+def _clean_up_webhook_deliveries_if_due() -> None:
+    # recurring tasks are only run by the task processor, so otherwise the
+    # deliveries are cleaned up (in the background) by the processes which create
+    # them, at most once per interval
+    if _can_schedule_deliveries():
+        return
+
+    global _last_clean_up_at
+    now = time.monotonic()
+    with _clean_up_lock:
+        if _last_clean_up_at is not None and (
+            now - _last_clean_up_at
+            < CLEAN_UP_WEBHOOK_DELIVERIES_INTERVAL.total_seconds()
+        ):
+            return
+        _last_clean_up_at = now
+
+    postpone_executor.submit(clean_up_webhook_deliveries)
+
+
+def _skip_delivery(
+    delivery: WebhookDelivery, webhook: WebhookModels, webhook_type: WebhookType
+) -> None:
+    logger.info("Circuit breaker open for %s, not calling webhook.", delivery.url)
+
+    # skips count towards the attempts (without counting as a failure to the url)
+    # so that deliveries to a url which doesn't recover eventually fail
+    delivery.attempts += 1
+    delivery.last_error = "Circuit breaker open"
+
+    # the deliveries are rescheduled with jitter so that they aren't all retried
+    # at once when the circuit closes
+    reset_seconds = settings.WEBHOOK_CIRCUIT_BREAKER_RESET_SECONDS
+    delay = timedelta(seconds=reset_seconds * (1 + random.random()))
+    if delivery.attempts < settings.WEBHOOK_DELIVERY_MAX_ATTEMPTS and (
+        _schedule_delivery(delivery, delay)
+    ):
+        return
+
+    delivery.status = WebhookDeliveryStatus.FAILED
+    delivery.save()
+    send_failure_email(
+        webhook, delivery.payload, webhook_type, "N/A (Circuit breaker open)"
+    )
+
+
+def _attempt_delivery(delivery: WebhookDelivery, webhook: WebhookModels) -> bool:
+    """
+    Call the webhook, recording the outcome on the (unsaved) delivery. Returns False
+    if the delivery was rescheduled instead because the host is busy.
+    """
+    # when using the task processor, rather than tying up a task runner waiting for
+    # the other requests to the host to complete, the delivery is rescheduled
+    host_semaphore = _get_host_semaphore(delivery.url)
+    if not host_semaphore.acquire(blocking=not _can_schedule_deliveries()):
+        _schedule_delivery(
+            delivery, timedelta(seconds=settings.WEBHOOK_REQUEST_TIMEOUT_SECONDS)
+        )
+        return False
+
+    try:
+        response = _call_webhook(webhook, delivery.payload)
+    except requests.exceptions.RequestException as exc:
+        delivery.last_status_code = None
+        delivery.last_error = exc.__class__.__name__
+    else:
+        delivery.last_status_code = response.status_code
+        delivery.last_error = ""
+    finally:
+        host_semaphore.release()
+
+    delivery.attempts += 1
+    delivery.last_attempted_at = timezone.now()
+    return True
+
+
+def _can_schedule_deliveries() -> bool:
+    return settings.TASK_RUN_METHOD == TaskRunMethod.TASK_PROCESSOR
+
+
+def _schedule_delivery(delivery: WebhookDelivery, delay: timedelta) -> bool:
+    """
+    Save the delivery and schedule it to be retried after the given delay, returning
+    False if it can't be scheduled (i.e. when not using the task processor).
+    """
+    if not _can_schedule_deliveries():
+        return False
+
+    delivery.save()
+    deliver_webhook.delay(delay_until=timezone.now() + delay, args=(delivery.id,))
+    return True
+
+
+def _get_circuit_state(url: str) -> CircuitState:
+    """
+    The circuit is open once the last WEBHOOK_CIRCUIT_BREAKER_THRESHOLD deliveries
+    attempted to the url have all failed, until the reset period has passed since the
+    last of them. It's then half open until the next attempt, which closes it again if
+    it succeeds.
+    """
+    threshold = settings.WEBHOOK_CIRCUIT_BREAKER_THRESHOLD
+    if not threshold:
+        return CircuitState.CLOSED
+
+    # pending deliveries which have been attempted are waiting to be retried
+    last_attempts = list(
+        WebhookDelivery.objects.filter(url=url, last_attempted_at__isnull=False)
+        .order_by("-last_attempted_at")
+        .values_list("status", "last_attempted_at")[:threshold]
+    )
+    if len(last_attempts) < threshold or any(
+        status == WebhookDeliveryStatus.SUCCESS for status, _ in last_attempts
+    ):
+        return CircuitState.CLOSED
+
+    _, last_attempted_at = last_attempts[0]
+    reset_at = last_attempted_at + timedelta(
+        seconds=settings.WEBHOOK_CIRCUIT_BREAKER_RESET_SECONDS
+    )
+    return CircuitState.OPEN if reset_at > timezone.now() else CircuitState.HALF_OPEN
+
+
+def _get_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(
+                settings.WEBHOOK_MAX_CONCURRENT_REQUESTS_PER_HOST
+            )
+        return _host_semaphores[host]
 
 
 def send_failure_email(webhook, data, webhook_type, status_code=None):